@@ -0,0 +1,61 @@
+import argparse
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database.connection_pool import get_connection, close_connections
+from database.migrations import migrate
+from bot.dashboard_generator import LifeDashboardGenerator, SECTIONS
+from bot.lru_cache import LRUCache
+from benchmarks.load_generator import generate
+from benchmarks.end_to_end_benchmark import summarize, time_calls
+
+def heaviest_users(db_path, count):
+    """Users with the most check-ins, where the dashboard has the most to read"""
+    rows = get_connection(db_path).execute('''
+    SELECT user_id FROM daily_domain_rollups
+    GROUP BY user_id ORDER BY SUM(total) DESC LIMIT ?
+    ''', (count,)).fetchall()
+    return [row[0] for row in rows]
+
+def per_section_reads(generator, user_id):
+    """Every section reading the rollups for itself, as before they shared DashboardMetrics"""
+    return [getattr(generator, section)(user_id, generator.load_metrics(user_id)) for section in SECTIONS]
+
+def run(db_path, users=20, rounds=5):
+    migrate(db_path)
+    user_ids = heaviest_users(db_path, users) * rounds
+    # No dashboard cache: every call builds its sections
+    generator = LifeDashboardGenerator(db_path, cache=LRUCache(maxsize=0))
+
+    for user_id in set(user_ids):
+        assert generator.build_sections(user_id) == per_section_reads(generator, user_id), \
+            f"sections differ for user {user_id}"
+
+    results = {}
+    for name, build in [('per-section', lambda user_id: per_section_reads(generator, user_id)),
+                        ('shared', generator.build_sections)]:
+        results[name] = summarize(time_calls(build, user_ids))
+        print(f"  {name:>11}: p50 {results[name]['p50_ms']:8.2f} ms   p99 {results[name]['p99_ms']:8.2f} ms")
+    print(f"Speedup: {results['per-section']['p50_ms'] / results['shared']['p50_ms']:.1f}x at p50, "
+          f"{results['per-section']['p99_ms'] / results['shared']['p99_ms']:.1f}x at p99 "
+          f"({len(set(user_ids))} users, identical output)")
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description="Dashboard sections from one shared read vs one read each, for users with long histories")
+    parser.add_argument('--db', default='benchmark.db', help="database to benchmark; generated if missing")
+    parser.add_argument('--users', type=int, default=200, help="users to generate when the database is missing")
+    parser.add_argument('--years', type=float, default=5, help="years of history to generate")
+    parser.add_argument('--sample', type=int, default=20, help="heaviest users to time")
+    parser.add_argument('--rounds', type=int, default=5, help="dashboards per user and strategy")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.db):
+        print(f"📊 Generating {args.users:,} users x {args.years:g} years into {args.db}...")
+        generate(args.db, args.users, args.years)
+    run(args.db, args.sample, args.rounds)
+    close_connections(args.db)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,169 @@
+import argparse
+import asyncio
+import json
+import math
+import platform
+import random
+import sqlite3
+import time
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from datetime import datetime, timezone
+from types import SimpleNamespace
+from database.connection_pool import get_connection, close_connections
+from bot.services import get_services
+from work_automation.real_jira_organizer import RealJiraOrganizer
+from benchmarks.load_generator import generate
+
+# A run is slower than the baseline if a percentile grows by more than this
+DEFAULT_TOLERANCE = 0.25
+
+def percentile(ordered, pct):
+    """Nearest-rank percentile of an already sorted list"""
+    return ordered[max(0, min(len(ordered) - 1, math.ceil(pct / 100 * len(ordered)) - 1))]
+
+def summarize(seconds):
+    ordered = sorted(seconds)
+    return {
+        'samples': len(ordered),
+        'p50_ms': round(percentile(ordered, 50) * 1000, 3),
+        'p99_ms': round(percentile(ordered, 99) * 1000, 3),
+        'mean_ms': round(sum(ordered) / len(ordered) * 1000, 3),
+    }
+
+def time_calls(func, user_ids):
+    seconds = []
+    for user_id in user_ids:
+        started = time.perf_counter()
+        func(user_id)
+        seconds.append(time.perf_counter() - started)
+    return seconds
+
+def fake_checkin_update(user_id):
+    """The Update Telegram sends when a user presses the daily check-in button"""
+    async def answer(*args, **kwargs):
+        pass
+
+    async def edit_message_text(text, **kwargs):
+        query.reply = text
+
+    query = SimpleNamespace(data='daily_checkin', reply=None, answer=answer, edit_message_text=edit_message_text,
+                            from_user=SimpleNamespace(id=user_id, first_name=f"User{user_id}"))
+    return SimpleNamespace(callback_query=query, effective_user=query.from_user)
+
+def checkin_scenario(services):
+    """daily_checkin_callback through the bot's callback handler, or None without python-telegram-bot"""
+    try:
+        from bot.main import EnhancedLifeAgent
+    except ImportError as e:
+        print(f"  ⚠️ Skipping daily_checkin_callback: {e}")
+        return None, lambda: None
+
+    bot = EnhancedLifeAgent(services)
+    loop = asyncio.new_event_loop()
+
+    def press_checkin(user_id):
+        update = fake_checkin_update(user_id)
+        loop.run_until_complete(bot.handle_callback_query(update, None))
+        assert update.callback_query.reply, "check-in produced no message"
+
+    def close():
+        loop.close()
+        bot.db_executor.shutdown()
+
+    return press_checkin, close
+
+def run(db_path, samples=200, seed=0):
+    """Time each scenario over a sample of users and return the latency summaries"""
+    services = get_services(db_path)
+    services.init_schema()
+    user_count = get_connection(db_path).execute("SELECT COUNT(*) FROM users").fetchone()[0]
+    if not user_count:
+        raise ValueError(f"{db_path} has no users; generate data first")
+
+    rng = random.Random(seed)
+    user_ids = [rng.randint(1, user_count) for _ in range(samples)]
+    engine = services.intervention_engine
+    organizer = RealJiraOrganizer(db_path)
+    press_checkin, close_bot = checkin_scenario(services)
+
+    scenarios = [
+        ('generate_comprehensive_dashboard', services.dashboard_generator.generate_comprehensive_dashboard),
+        ('analyze_user_patterns', lambda user_id: services.pattern_analyzer.analyze_user_patterns(user_id, 30)),
+        ('comprehensive_intervention_check', engine.comprehensive_intervention_check),
+        ('daily_checkin_callback', press_checkin),
+        ('get_optimized_workday', lambda user_id: organizer.get_optimized_workday()),
+    ]
+    results = {}
+    try:
+        for name, func in scenarios:
+            if func is None:
+                continue
+            results[name] = summarize(time_calls(func, user_ids))
+            print(f"  {name:>34}: p50 {results[name]['p50_ms']:9.2f} ms   p99 {results[name]['p99_ms']:9.2f} ms")
+    finally:
+        close_bot()
+        engine.close()
+    return {
+        'created': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'database': os.path.basename(db_path),
+        'users': user_count,
+        'samples': samples,
+        'python': platform.python_version(),
+        'sqlite': sqlite3.sqlite_version,
+        'results': results,
+    }
+
+def compare(report, baseline, tolerance=DEFAULT_TOLERANCE):
+    """Scenarios whose p50 or p99 grew past the tolerance, as printable lines"""
+    regressions = []
+    for name, current in report['results'].items():
+        previous = baseline.get('results', {}).get(name)
+        if previous is None:
+            continue
+        for key in ('p50_ms', 'p99_ms'):
+            if previous[key] > 0 and current[key] > previous[key] * (1 + tolerance):
+                regressions.append(f"{name} {key[:3]}: {previous[key]:.2f} -> {current[key]:.2f} ms "
+                                   f"(+{(current[key] / previous[key] - 1) * 100:.0f}%)")
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description="Time the bot's hot paths against a synthetic database")
+    parser.add_argument('--db', default='benchmark.db', help="database to benchmark; generated if missing")
+    parser.add_argument('--users', type=int, default=1000, help="users to generate when the database is missing")
+    parser.add_argument('--years', type=float, default=2, help="years of history to generate")
+    parser.add_argument('--samples', type=int, default=200, help="timed calls per scenario")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', default='benchmark_baseline.json', help="where to write this run's results")
+    parser.add_argument('--compare', help="baseline JSON to check this run against")
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE,
+                        help="allowed slowdown before a scenario counts as a regression (0.25 = 25%%)")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.db):
+        print(f"📊 Generating {args.users:,} users x {args.years:g} years into {args.db}...")
+        generate(args.db, args.users, args.years, args.seed)
+
+    print(f"⏱️ Timing {args.samples} calls per scenario on {args.db}...")
+    report = run(args.db, args.samples, args.seed)
+    close_connections(args.db)
+
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"✅ Results written to {args.output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions = compare(report, baseline, args.tolerance)
+        if regressions:
+            print("❌ Slower than baseline:")
+            for line in regressions:
+                print(f"  {line}")
+            sys.exit(1)
+        print(f"✅ Within {args.tolerance:.0%} of {args.compare}")
+
+if __name__ == "__main__":
+    main()
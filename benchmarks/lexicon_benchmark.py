@@ -0,0 +1,48 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import timeit
+from bot.lexicon import LANGUAGE
+
+MESSAGES = [
+    "I will definitely call three clients by 2 PM today",
+    "Maybe I'll try to go for a run later if I'm not too tired",
+    "Going to automate the weekly report with a Python script",
+    "I deserve a treat, just this once, I earned it",
+    "Phone away, basketball with my son at the gym after dinner",
+    "Honestly I can't, no time this week, feeling overwhelmed",
+    "Plan to research the course material and organize my notes",
+    "Beach day with friends and family to recharge",
+    "Good morning! Procrastinating on the proposal again",
+    "Budget review and track every expense before Friday",
+]
+
+def substring_loops(text):
+    """The per-call-site any(word in text ...) scans this replaced"""
+    lowered = text.lower()
+    found = []
+    for category, (weight, phrases) in LANGUAGE.categories.items():
+        if any(phrase in lowered for phrase in phrases):
+            found.append(category)
+    return found
+
+def compiled_lexicon(text):
+    return LANGUAGE._scan(text).categories()
+
+def run(number=2000):
+    results = {}
+    for name, func in [('substring loops', substring_loops), ('compiled lexicon', compiled_lexicon)]:
+        seconds = timeit.timeit(lambda: [func(message) for message in MESSAGES], number=number)
+        per_message_us = seconds / (number * len(MESSAGES)) * 1e6
+        results[name] = per_message_us
+        print(f"{name:>18}: {per_message_us:6.2f} µs/message")
+
+    cached = timeit.timeit(lambda: [LANGUAGE.match(message) for message in MESSAGES], number=number)
+    print(f"{'cached repeat':>18}: {cached / (number * len(MESSAGES)) * 1e6:6.2f} µs/message")
+    print(f"Speedup: {results['substring loops'] / results['compiled lexicon']:.1f}x "
+          f"({len(LANGUAGE.categories)} categories scanned per message)")
+    return results
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,217 @@
+import argparse
+import json
+import random
+import time
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from datetime import date, datetime, timedelta, timezone
+from database.connection_pool import get_connection, transaction, close_connections
+from database.migrations import migrate
+from database.search import rebuild_search
+from database.sqlite_storage import INCIDENT_FIELDS
+
+# Synthetic users for benchmarks. Every user gets a reproducible multi-year
+# history - they join at different times, track a subset of domains, skip days,
+# run hot and cold streaks, slip on weekends - plus the triggers, conversations
+# and work incidents that history would have produced. Rows are generated per
+# user and written in batches, so memory stays flat from 1k users to 1M.
+
+DOMAINS = ['business', 'health', 'finance', 'parenting', 'work', 'personal']
+
+COMMITMENTS = {
+    'business': ["Call three prospects before noon", "Send the proposal to the client",
+                 "Follow up on last week's leads", "Draft the quarterly plan"],
+    'health': ["30 minute run after work", "Gym session at 6 AM", "No sugar today",
+               "Walk 10,000 steps"],
+    'finance': ["Review the budget", "Track every expense today", "No takeaway this week",
+                "Move savings into the index fund"],
+    'parenting': ["Basketball with my son after dinner", "Read a story at bedtime",
+                  "Phone away during family dinner", "Help with homework"],
+    'work': ["Close two tickets before lunch", "Automate the weekly report",
+             "Clear the patching backlog", "Document the RMM fix"],
+    'personal': ["Read for 20 minutes", "Meditate before bed", "Plan the weekend trip",
+                 "Study the course material"],
+}
+
+USER_MESSAGES = [
+    "I will definitely get it done by 2 PM today",
+    "Maybe I'll try later if I'm not too tired",
+    "Honestly I can't, no time this week, feeling overwhelmed",
+    "Done! Felt great to finish it early",
+    "I deserve a break, just this once",
+]
+
+AGENT_MESSAGES = [
+    "What exactly will you do, and by when?",
+    "That sounds like the same pattern as last week. What's different today?",
+    "Good. I'll check in with you this evening.",
+]
+
+TRIGGER_TYPES = ['missed_commitment', 'pattern_decline', 'avoidance_language']
+
+ASSIGNEES = ['You', 'You', 'Alex', 'Sam']
+PRIORITIES = ['High', 'Medium', 'Low']
+STATUSES = ['Open', 'In Progress', 'Scheduled', 'Resolved']
+CUSTOMERS = ['TechCorp Industries', 'Healthcare Partners', 'Metro Legal', 'Summit Logistics',
+             'Riverside Schools', 'Apex Manufacturing']
+
+def timestamp(day: date, hour: int, minute: int) -> str:
+    return f"{day.isoformat()} {hour:02d}:{minute:02d}:00"
+
+def user_history(user_id: int, days: int, seed: int, today: date):
+    """One user's check-ins, triggers and conversations, the same for the same seed
+
+    Returns (checkins, triggers, sessions) where each session is
+    (agent_domain, session_start, session_end, outcome, [(speaker, text, type, timestamp)]).
+    """
+    rng = random.Random(seed * 1_000_003 + user_id)
+    tracked = rng.sample(DOMAINS, rng.randint(3, len(DOMAINS)))
+    rates = {domain: rng.uniform(0.3, 0.9) for domain in tracked}
+    engagement = rng.uniform(0.5, 0.95)
+    first_day = rng.randrange(days) if rng.random() < 0.5 else 0  # half joined partway through
+
+    checkins, triggers, sessions = [], [], []
+    streak = {domain: 0 for domain in tracked}
+    for offset in range(days - first_day - 1, -1, -1):
+        day = today - timedelta(days=offset)
+        if rng.random() > engagement:
+            continue
+        weekend = day.weekday() >= 5
+        hour = rng.choice((7, 8, 9)) if not weekend else rng.choice((9, 10, 11))
+        for domain in tracked:
+            # Completion follows the user's rate, nudged by the current streak
+            chance = rates[domain] + 0.05 * max(-3, min(3, streak[domain])) - (0.1 if weekend else 0.0)
+            completed = rng.random() < chance
+            streak[domain] = max(0, streak[domain]) + 1 if completed else min(0, streak[domain]) - 1
+            created_at = timestamp(day, hour, rng.randrange(60))
+            checkins.append((user_id, day.isoformat(), domain, rng.choice(COMMITMENTS[domain]),
+                             int(completed), None, created_at, day.isoweekday() % 7, hour))
+            if not completed and rng.random() < 0.4:
+                severity = round(min(1.0, 0.3 + 0.1 * -streak[domain] + rng.uniform(0, 0.2)), 2)
+                trigger_type = 'missed_commitment' if streak[domain] > -3 else rng.choice(TRIGGER_TYPES[1:])
+                triggers.append((user_id, trigger_type, domain,
+                                 json.dumps({'streak': streak[domain]}), severity,
+                                 timestamp(day, rng.randint(18, 22), rng.randrange(60))))
+
+        if rng.random() < 0.3:
+            domain = rng.choice(tracked)
+            minute = rng.randrange(50)
+            messages = []
+            for turn in range(rng.randint(1, 3)):
+                messages.append(('agent', rng.choice(AGENT_MESSAGES), 'prompt',
+                                 timestamp(day, hour, minute + 2 * turn)))
+                messages.append(('user', rng.choice(USER_MESSAGES), 'response',
+                                 timestamp(day, hour, minute + 2 * turn + 1)))
+            outcome = rng.choice(('committed', 'committed', 'abandoned', 'intervened'))
+            sessions.append((domain, timestamp(day, hour, minute), messages[-1][3], outcome, messages))
+    return checkins, triggers, sessions
+
+def incident_rows(count: int, seed: int, today: date):
+    """Jira incidents, about half of them open and assigned to 'You'"""
+    rng = random.Random(seed)
+    rows = []
+    for number in range(count):
+        created = today - timedelta(days=rng.randrange(60))
+        rows.append({
+            'ticket_number': f"BENCH-{number + 1:06d}",
+            'summary': f"{rng.choice(('RMM Agent Not Reporting', 'Patch Deployment Failed', 'Backup Job Error', 'Alert Storm'))} - {rng.choice(CUSTOMERS)}",
+            'priority': rng.choice(PRIORITIES),
+            'status': rng.choice(STATUSES),
+            'assignee': rng.choice(ASSIGNEES),
+            'customer': rng.choice(CUSTOMERS),
+            'created_date': created.isoformat(),
+            'due_date': (created + timedelta(days=rng.randint(1, 14))).isoformat(),
+            'estimated_hours': rng.choice((0.5, 1.0, 1.5, 2.0, 3.0, 4.0)),
+            'complexity_score': round(rng.uniform(0.1, 1.0), 2),
+            'customer_impact': rng.randint(1, 10),
+            'urgency_score': round(rng.uniform(0.1, 1.0), 2),
+            'tags': 'benchmark',
+        })
+    return rows
+
+def write_batch(db_path, users, checkins, triggers, sessions):
+    with transaction(db_path) as conn:
+        conn.executemany("INSERT OR IGNORE INTO users (user_id, username, first_name) VALUES (?, ?, ?)", users)
+        conn.executemany('''
+        INSERT INTO daily_checkins
+        (user_id, date, domain, commitment, completed, notes, created_at, created_weekday, created_hour)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ''', checkins)
+        conn.executemany('''
+        INSERT INTO intervention_triggers
+        (user_id, trigger_type, domain, trigger_data, severity_score, timestamp)
+        VALUES (?, ?, ?, ?, ?, ?)
+        ''', triggers)
+        # Explicit ids, so messages can point at their session without a round trip each
+        next_id = conn.execute("SELECT COALESCE(MAX(id), 0) FROM conversation_sessions").fetchone()[0] + 1
+        session_rows, message_rows = [], []
+        for session_id, (user_id, domain, start, end, outcome, messages) in enumerate(sessions, next_id):
+            session_rows.append((session_id, user_id, domain, start, end, '{}', outcome))
+            message_rows.extend((session_id, *message) for message in messages)
+        conn.executemany('''
+        INSERT INTO conversation_sessions
+        (id, user_id, agent_domain, session_start, session_end, session_data, outcome)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+        ''', session_rows)
+        conn.executemany('''
+        INSERT INTO conversation_messages (session_id, speaker, message_text, message_type, timestamp)
+        VALUES (?, ?, ?, ?, ?)
+        ''', message_rows)
+
+def generate(db_path, users=1000, years=2, seed=0, incidents=500, batch_users=500, verbose=True):
+    """Fill db_path with synthetic users 1..users and return how many rows of each kind were written"""
+    migrate(db_path)
+    today = datetime.now(timezone.utc).date()
+    days = int(years * 365)
+    counts = {'users': 0, 'checkins': 0, 'triggers': 0, 'sessions': 0, 'messages': 0, 'incidents': 0}
+    started = time.perf_counter()
+
+    for first in range(1, users + 1, batch_users):
+        batch = ([], [], [], [])
+        for user_id in range(first, min(first + batch_users, users + 1)):
+            checkins, triggers, sessions = user_history(user_id, days, seed, today)
+            batch[0].append((user_id, f"bench_user_{user_id}", f"User{user_id}"))
+            batch[1].extend(checkins)
+            batch[2].extend(triggers)
+            batch[3].extend((user_id, *session) for session in sessions)
+            counts['messages'] += sum(len(session[4]) for session in sessions)
+        write_batch(db_path, *batch)
+        for key, rows in zip(('users', 'checkins', 'triggers', 'sessions'), batch):
+            counts[key] += len(rows)
+        if verbose:
+            print(f"  {counts['users']:,}/{users:,} users, {counts['checkins']:,} check-ins "
+                  f"({time.perf_counter() - started:.1f}s)")
+
+    rows = incident_rows(incidents, seed, today)
+    with transaction(db_path) as conn:
+        conn.executemany(f'''
+        INSERT OR REPLACE INTO real_jira_incidents ({', '.join(INCIDENT_FIELDS)})
+        VALUES ({', '.join('?' for _ in INCIDENT_FIELDS)})
+        ''', [[incident[field] for field in INCIDENT_FIELDS] for incident in rows])
+    counts['incidents'] = len(rows)
+
+    get_connection(db_path).execute("ANALYZE")
+    rebuild_search(db_path)
+    return counts
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a synthetic Life Agent database for benchmarks")
+    parser.add_argument('--db', default='benchmark.db', help="database file to fill (default: benchmark.db)")
+    parser.add_argument('--users', type=int, default=1000)
+    parser.add_argument('--years', type=float, default=2)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--incidents', type=int, default=500)
+    args = parser.parse_args()
+
+    if os.path.exists(args.db):
+        print(f"❌ {args.db} already exists; remove it or pick another --db")
+        sys.exit(1)
+    print(f"📊 Generating {args.users:,} users x {args.years:g} years into {args.db}...")
+    counts = generate(args.db, args.users, args.years, args.seed, args.incidents)
+    close_connections(args.db)
+    print("✅ " + ", ".join(f"{count:,} {name}" for name, count in counts.items()))
+
+if __name__ == "__main__":
+    main()
@@ -1,24 +1,29 @@
 from abc import ABC, abstractmethod
 from datetime import datetime
-import sqlite3
 import json
 from typing import Dict, List, Optional
-from bot.pattern_analyzer import PatternAnalyzer
-from bot.intervention_engine import InterventionEngine
-from bot.intervention_messages import InterventionMessageGenerator
+from config import DB_PATH
+from bot.analytics_snapshot import snapshot_scope, hours_ago
+from bot.lexicon import LANGUAGE
+from bot.services import get_services
 
 class BaseAgent(ABC):
     """Enhanced base class with conversation and intervention capabilities"""
 
-    def __init__(self, domain_name, user_id, conversation_manager, db_path="life_agent.db"):
+    def __init__(self, domain_name, user_id, conversation_manager, db_path=DB_PATH, services=None):
+        services = services or get_services(db_path)
+
         self.domain = domain_name
         self.user_id = user_id
         self.conversation_manager = conversation_manager
-        self.db_path = db_path
+        # Injected services decide the database, so agent queries hit the same file
+        self.db_path = services.db_path
+        self.storage = services.storage
         self.personality_traits = self.get_personality_traits()
-        self.pattern_analyzer = PatternAnalyzer(db_path)
-        self.intervention_engine = InterventionEngine(db_path)
-        self.intervention_generator = InterventionMessageGenerator()
+        # Shared across all agents and users instead of built per agent
+        self.pattern_analyzer = services.pattern_analyzer
+        self.intervention_engine = services.intervention_engine
+        self.intervention_generator = services.intervention_generator
 
     @abstractmethod
     def get_personality_traits(self):
@@ -50,8 +55,14 @@ class BaseAgent(ABC):
         """Generate intervention based on patterns"""
         pass
 
-    def get_pattern_based_prompt(self):
+    def get_pattern_based_prompt(self, snapshot=None):
         """Generate prompt based on user's behavioral patterns"""
+        # Nested prompt builders (predictive insights etc.) reuse the snapshot
+        with snapshot_scope(snapshot):
+            return self.build_pattern_based_prompt()
+
+    def build_pattern_based_prompt(self):
+        """Pick crisis, intervention, momentum or base prompt from patterns"""
         try:
             patterns = self.pattern_analyzer.analyze_user_patterns(self.user_id, 14)
 
@@ -91,7 +102,7 @@ class BaseAgent(ABC):
         """Generate momentum building prompt"""
         pass
 
-    def check_intervention_needed(self):
+    def check_intervention_needed(self, snapshot=None):
         """Check if intervention is needed for this domain"""
         try:
             intervention_level = self.intervention_engine.get_intervention_level(self.user_id, self.domain)
@@ -99,7 +110,7 @@ class BaseAgent(ABC):
             if intervention_level > 0:
                 # Get trigger data for context
                 trigger_data = self.get_recent_triggers()
-                user_patterns = self.pattern_analyzer.analyze_user_patterns(self.user_id, 14)
+                user_patterns = self.pattern_analyzer.analyze_user_patterns(self.user_id, 14, snapshot)
 
                 # Generate intervention message
                 intervention_message = self.intervention_generator.generate_intervention_message(
@@ -119,19 +130,9 @@ class BaseAgent(ABC):
     def get_recent_triggers(self):
         """Get recent trigger data for this domain"""
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-
-            cursor.execute('''
-            SELECT trigger_type, trigger_data, severity_score, timestamp
-            FROM intervention_triggers
-            WHERE user_id = ? AND domain = ?
-            AND timestamp > datetime('now', '-48 hours')
-            ORDER BY timestamp DESC LIMIT 1
-            ''', (self.user_id, self.domain))
-
-            result = cursor.fetchone()
-            conn.close()
+            self.intervention_engine.flush_triggers()
+            triggers = self.storage.triggers.recent(self.user_id, self.domain, hours_ago(48))
+            result = triggers[0] if triggers else None
 
             if result:
                 return {
@@ -184,14 +185,10 @@ class BaseAgent(ABC):
                 score = (score + domain_rate) / 2  # Average with historical performance
 
             # Language analysis
-            commitment_lower = commitment_text.lower()
-            certain_words = ['will', 'going to', 'must', 'committed to', 'definitely']
-            uncertain_words = ['maybe', 'try', 'hope', 'might', 'probably']
-
-            if any(word in commitment_lower for word in certain_words):
-                score += 0.2
-            if any(word in commitment_lower for word in uncertain_words):
-                score -= 0.3
+            match = LANGUAGE.match(commitment_text)
+            for category in ('prediction.certain', 'prediction.uncertain'):
+                if category in match:
+                    score += match.weights[category]
 
             return min(max(score, 0.1), 0.9)  # Keep between 10% and 90%
         except Exception:
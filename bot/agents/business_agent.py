@@ -1,9 +1,10 @@
 from .base_agent import BaseAgent
 import random
+from bot.lexicon import LANGUAGE
 
 class BusinessAgent(BaseAgent):
-    def __init__(self, user_id, conversation_manager=None):
-        super().__init__("business", user_id, conversation_manager)
+    def __init__(self, user_id, conversation_manager=None, services=None):
+        super().__init__("business", user_id, conversation_manager, services=services)
 
     def get_personality_traits(self):
         return {
@@ -81,22 +82,22 @@ class BusinessAgent(BaseAgent):
 
     def analyze_response(self, user_response, conversation_context=None):
         """Enhanced analysis with success prediction"""
-        response = user_response.lower()
+        match = LANGUAGE.match(user_response)
 
         # Check for specificity
-        if any(word in response for word in ["maybe", "try to", "hope", "think about", "probably"]):
+        if 'business.vague' in match:
             return "❌ **Vague commitment detected.** 'Maybe' and 'try' are failure words. I need a specific, measurable action with a timeline."
 
         # Check for avoidance disguised as learning
-        if any(word in response for word in ["research", "learn", "study", "read", "course"]):
+        if 'business.learning' in match:
             return "⚠️ **Learning procrastination alert.** Research without action is sophisticated avoidance. What ACTION follows this learning TODAY?"
 
         # Check for revenue focus
-        if any(word in response for word in ["client", "customer", "proposal", "outreach", "networking", "content"]):
+        if 'business.revenue' in match:
             return "✅ **Revenue-generating action identified.** This directly advances your consultant goals."
 
         # Check for business building vs. maintenance
-        if any(word in response for word in ["organize", "plan", "setup", "prepare"]):
+        if 'business.preparation' in match:
             return "📋 **Preparation task noted.** Preparation is valuable, but what CLIENT-FACING action follows this prep work?"
 
         return f"**Business commitment analyzed:** {user_response}"
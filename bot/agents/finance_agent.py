@@ -1,9 +1,10 @@
 from .base_agent import BaseAgent
 import random
+from bot.lexicon import LANGUAGE
 
 class FinanceAgent(BaseAgent):
-    def __init__(self, user_id, conversation_manager=None):
-        super().__init__("finance", user_id, conversation_manager)
+    def __init__(self, user_id, conversation_manager=None, services=None):
+        super().__init__("finance", user_id, conversation_manager, services=services)
     
     def get_personality_traits(self):
         return {
@@ -72,18 +73,18 @@ class FinanceAgent(BaseAgent):
     
     def analyze_response(self, user_response, conversation_context=None):
         """Enhanced analysis with financial focus"""
-        response = user_response.lower()
+        match = LANGUAGE.match(user_response)
         
         # Impulse spending rationalization
-        if any(phrase in response for phrase in ["deserve", "treat myself", "just this once", "earned it"]):
+        if 'finance.rationalization' in match:
             return "❌ **Impulse spending rationalization detected.** 'Deserve' is expensive. What business goal does this purchase support?"
         
         # Business investment recognition
-        if any(word in response for word in ["business", "investment", "tools", "education", "networking"]):
+        if 'finance.investment' in match:
             return "✅ **Business investment mindset activated.** This spending creates future earning capacity."
         
         # Savings and planning recognition
-        if any(word in response for word in ["save", "budget", "plan", "track"]):
+        if 'finance.discipline' in match:
             return "💰 **Financial discipline engaged.** Delayed gratification creates business opportunity freedom."
         
         return f"**Financial commitment analyzed:** {user_response}"
@@ -1,9 +1,10 @@
 from .base_agent import BaseAgent
 import random
+from bot.lexicon import LANGUAGE
 
 class HealthAgent(BaseAgent):
-    def __init__(self, user_id, conversation_manager=None):
-        super().__init__("health", user_id, conversation_manager)
+    def __init__(self, user_id, conversation_manager=None, services=None):
+        super().__init__("health", user_id, conversation_manager, services=services)
     
     def get_personality_traits(self):
         return {
@@ -64,22 +65,22 @@ class HealthAgent(BaseAgent):
     
     def analyze_response(self, user_response, conversation_context=None):
         """Enhanced analysis with energy focus"""
-        response = user_response.lower()
+        match = LANGUAGE.match(user_response)
         
         # Energy excuse detection
-        if any(word in response for word in ["skip", "rest day", "too tired", "later", "maybe"]):
+        if 'health.excuse' in match:
             return "❌ **Energy excuse detected.** 'Too tired' is usually code for 'haven't moved my body.' Low energy is typically CAUSED by inactivity."
         
         # Morning movement recognition
-        if "morning" in response:
+        if 'health.morning' in match:
             return "🌅 **Morning energy investment confirmed.** Early physical activity = sustained energy all day."
         
         # Family fitness integration
-        if any(word in response for word in ["son", "basketball", "together", "gym"]):
+        if 'health.family' in match:
             return "🏀 **Father-son fitness partnership activated.** Shared physical activity strengthens relationships."
         
         # Specific activity recognition
-        if any(word in response for word in ["workout", "run", "walk", "exercise"]):
+        if 'health.activity' in match:
             return "💪 **Energy investment confirmed.** Physical activity is business fuel and family energy enhancement."
         
         return f"**Health commitment analyzed:** {user_response}"
@@ -1,9 +1,10 @@
 from .base_agent import BaseAgent
 import random
+from bot.lexicon import LANGUAGE
 
 class ParentingAgent(BaseAgent):
-    def __init__(self, user_id: int, conversation_manager=None):
-        super().__init__("parenting", user_id, conversation_manager)
+    def __init__(self, user_id: int, conversation_manager=None, services=None):
+        super().__init__("parenting", user_id, conversation_manager, services=services)
     
     def get_personality_traits(self) -> dict:
         return {
@@ -36,15 +37,15 @@ class ParentingAgent(BaseAgent):
         return random.choice(prompts)
     
     def analyze_response(self, user_response: str, conversation_context=None) -> str:
-        response = user_response.lower()
+        match = LANGUAGE.match(user_response)
         
-        if any(word in response for word in ["phone away", "present", "focused", "no distractions"]):
+        if 'parenting.present' in match:
             return "✅ **Present parenting commitment.** Quality attention creates lasting impact. Duration planned?"
         
-        if any(word in response for word in ["gym", "basketball", "sports", "active"]):
+        if 'parenting.active' in match:
             return "🏀 **Active bonding confirmed.** Physical activities build stronger relationships. Consistency is key."
         
-        if any(word in response for word in ["might", "if I can", "depends"]):
+        if 'parenting.conditional' in match:
             return "⚠️ **Conditional parenting detected.** Your son deserves certainty. What specific time commitment can you guarantee?"
         
         return f"**Parenting commitment logged:** {user_response}\n\nHow will this strengthen your relationship and his development?"
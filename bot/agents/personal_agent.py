@@ -1,9 +1,10 @@
 from .base_agent import BaseAgent
 import random
+from bot.lexicon import LANGUAGE
 
 class PersonalAgent(BaseAgent):
-    def __init__(self, user_id, conversation_manager=None):
-        super().__init__("personal", user_id, conversation_manager)
+    def __init__(self, user_id, conversation_manager=None, services=None):
+        super().__init__("personal", user_id, conversation_manager, services=services)
     
     def get_personality_traits(self):
         return {
@@ -72,22 +73,22 @@ class PersonalAgent(BaseAgent):
     
     def analyze_response(self, user_response, conversation_context=None):
         """Enhanced analysis with balance focus"""
-        response = user_response.lower()
+        match = LANGUAGE.match(user_response)
         
         # Strategic rest recognition
-        if any(word in response for word in ["recharge", "restore", "balance", "energy"]):
+        if 'personal.restorative' in match:
             return "⚖️ **Strategic rest confirmed.** Recovery that enhances performance rather than detracts from it."
         
         # Social connection recognition
-        if any(word in response for word in ["friends", "family", "social", "connection"]):
+        if 'personal.social' in match:
             return "👥 **Social recharge selected.** Human connection enhances all life domains."
         
         # Escapism indicators
-        if any(phrase in response for phrase in ["forget about", "escape from", "avoid thinking", "distract myself"]):
+        if 'personal.escapism' in match:
             return "⚠️ **Escapism detected rather than restoration.** Healthy personal time enhances your capacity for challenges."
         
         # Specific activities
-        if any(word in response for word in ["gaming", "movie", "beach", "pool", "reading"]):
+        if 'personal.leisure' in match:
             return "🎮 **Specific leisure activity selected.** Enjoyment is productivity fuel when balanced properly."
         
         return f"**Personal time commitment analyzed:** {user_response}"
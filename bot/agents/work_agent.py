@@ -1,9 +1,10 @@
 from .base_agent import BaseAgent
 import random
+from bot.lexicon import LANGUAGE
 
 class WorkAgent(BaseAgent):
-    def __init__(self, user_id, conversation_manager=None):
-        super().__init__("work", user_id, conversation_manager)
+    def __init__(self, user_id, conversation_manager=None, services=None):
+        super().__init__("work", user_id, conversation_manager, services=services)
     
     def get_personality_traits(self):
         return {
@@ -72,18 +73,18 @@ class WorkAgent(BaseAgent):
     
     def analyze_response(self, user_response, conversation_context=None):
         """Enhanced analysis with efficiency focus"""
-        response = user_response.lower()
+        match = LANGUAGE.match(user_response)
         
         # Automation opportunity recognition
-        if any(word in response for word in ["automate", "template", "system", "process", "script"]):
+        if 'work.automation' in match:
             return "🤖 **Automation opportunity identified.** This saves time AND builds portfolio credibility."
         
         # Manual process acceptance
-        if any(phrase in response for phrase in ["nothing to automate", "no time", "too complex"]):
+        if 'work.avoidance' in match:
             return "❌ **Automation avoidance detected.** You're in customer support - automation opportunities are everywhere."
         
         # Efficiency improvement recognition
-        if any(word in response for word in ["email", "report", "template", "workflow"]):
+        if 'work.efficiency' in match:
             return "⚡ **Efficiency improvement target confirmed.** This type of automation typically saves 60-80% of task time."
         
         return f"**Work automation commitment analyzed:** {user_response}"
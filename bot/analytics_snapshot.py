@@ -0,0 +1,170 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import date, datetime, timedelta, timezone
+from typing import Dict, List, Optional, Tuple
+from config import DB_PATH
+from database.storage import get_storage
+from bot.timer_scheduler import local_date
+
+DOMAINS = ['business', 'health', 'finance', 'parenting', 'work', 'personal']
+SNAPSHOT_WINDOWS = (7, 14, 30)
+
+_active_snapshot = ContextVar('active_snapshot', default=None)
+
+
+def window_cutoff(days: int, today=None) -> str:
+    """ISO date a check-in must be newer than to fall inside the window.
+
+    Windows end on today, which should be the user's local date (user_today)
+    since check-ins are dated by it; it defaults to the UTC date, matching
+    SQLite's date('now', '-N days').
+    """
+    today = today or datetime.now(timezone.utc).date()
+    return (today - timedelta(days=days)).isoformat()
+
+
+def user_today(storage, user_id: int, now: datetime = None) -> date:
+    """The user's local date: what check-ins are dated by and analytics windows end on"""
+    return local_date(storage.users.timezone(user_id), now)
+
+
+def hours_ago(hours: float) -> str:
+    """UTC timestamp `hours` back, matching SQLite's datetime('now', '-N hours')"""
+    return (datetime.now(timezone.utc) - timedelta(hours=hours)).strftime('%Y-%m-%d %H:%M:%S')
+
+
+class UserAnalyticsSnapshot:
+    """Per-user completion, trend and avoidance figures for every window, built from one scan.
+
+    Rows are (date, domain, total, completed) daily aggregates ordered newest
+    first. Trends split a domain's check-ins into a recent and an earlier half;
+    inside a single day completed check-ins are counted first.
+    """
+
+    def __init__(self, user_id: int, daily_rows: List[Tuple], windows=SNAPSHOT_WINDOWS,
+                 db_path=DB_PATH, today=None):
+        self.user_id = user_id
+        self.daily_rows = daily_rows
+        self.windows = tuple(sorted(windows))
+        self.db_path = db_path
+        self.today = today or datetime.now(timezone.utc).date()
+        self._patterns = {}
+
+    @classmethod
+    def load(cls, db_path: str, user_id: int, windows=SNAPSHOT_WINDOWS, storage=None,
+             today=None) -> 'UserAnalyticsSnapshot':
+        """Read the user's daily totals once for the widest requested window"""
+        storage = storage or get_storage(db_path)
+        today = today or user_today(storage, user_id)
+        rows = storage.checkins.daily_totals(user_id, window_cutoff(max(windows), today))
+        return cls(user_id, rows, windows, db_path, today)
+
+    def covers(self, days: int) -> bool:
+        """Whether this snapshot holds enough history for a window"""
+        return days <= self.windows[-1]
+
+    def rows_in_window(self, days: int) -> List[Tuple]:
+        cutoff = window_cutoff(days, self.today)
+        return [row for row in self.daily_rows if row[0] > cutoff]
+
+    def completion_patterns(self, days: int) -> Dict:
+        """Completion rate and trend by domain, same shape as PatternAnalyzer"""
+        rows = self.rows_in_window(days)
+        if not rows:
+            return {'by_domain': {}, 'message': 'No data yet - use system for a few days'}
+
+        domain_stats = {}
+        for domain in DOMAINS:
+            days_for_domain = [(total, completed) for _, row_domain, total, completed in rows
+                               if row_domain == domain]
+            if not days_for_domain:
+                continue
+
+            total = sum(day[0] for day in days_for_domain)
+            completed = sum(day[1] for day in days_for_domain)
+
+            domain_stats[domain] = {
+                'completion_rate': completed / total,
+                'total_commitments': total,
+                'trend': self._trend(days_for_domain, total, completed)
+            }
+
+        return {'by_domain': domain_stats}
+
+    def avoidance_patterns(self, days: int) -> Dict:
+        """Share of failed commitments overall and per domain"""
+        rows = self.rows_in_window(days)
+        total_commitments = sum(row[2] for row in rows)
+        failed = sum(row[2] - row[3] for row in rows)
+
+        if not failed:
+            return {'total_avoidance_rate': 0.0}
+
+        avoidance_by_domain = {}
+        for _, domain, total, completed in rows:
+            if total > completed:
+                stats = avoidance_by_domain.setdefault(domain, {'failure_count': 0})
+                stats['failure_count'] += total - completed
+
+        return {
+            'total_avoidance_rate': failed / max(1, total_commitments),
+            'avoidance_by_domain': avoidance_by_domain
+        }
+
+    def patterns(self, days: int) -> Dict:
+        """Full pattern analysis for a window, same shape as analyze_user_patterns"""
+        if days not in self._patterns:
+            self._patterns[days] = {
+                'completion_patterns': self.completion_patterns(days),
+                'timing_patterns': {'message': 'Timing analysis available after more conversations'},
+                'avoidance_patterns': self.avoidance_patterns(days),
+                'success_factors': {'message': 'Success factor analysis available with more data'},
+                'cross_domain_effects': {}
+            }
+        return self._patterns[days]
+
+    def _trend(self, days_for_domain: List[Tuple], total: int, completed: int) -> str:
+        if total < 4:
+            return 'stable'
+
+        recent_size = total // 2
+        recent_completed = 0
+        remaining = recent_size
+        for day_total, day_completed in days_for_domain:
+            if remaining <= 0:
+                break
+            taken = min(remaining, day_total)
+            recent_completed += min(taken, day_completed)
+            remaining -= taken
+
+        recent_rate = recent_completed / recent_size
+        earlier_rate = (completed - recent_completed) / (total - recent_size)
+
+        if recent_rate > earlier_rate + 0.1:
+            return 'improving'
+        elif recent_rate < earlier_rate - 0.1:
+            return 'declining'
+        return 'stable'
+
+
+@contextmanager
+def snapshot_scope(snapshot: Optional[UserAnalyticsSnapshot]):
+    """Make a snapshot visible to every pattern analysis run inside the block"""
+    if snapshot is None:
+        yield
+        return
+
+    token = _active_snapshot.set(snapshot)
+    try:
+        yield
+    finally:
+        _active_snapshot.reset(token)
+
+
+def active_snapshot(db_path: str, user_id: int, days: int) -> Optional[UserAnalyticsSnapshot]:
+    """The scoped snapshot, if it belongs to this user/database and covers the window"""
+    snapshot = _active_snapshot.get()
+    if (snapshot is not None and snapshot.user_id == user_id
+            and snapshot.db_path == db_path and snapshot.covers(days)):
+        return snapshot
+    return None
@@ -0,0 +1,56 @@
+from collections import deque
+from datetime import datetime
+from config import DB_PATH
+from bot.write_behind import WriteBehindBuffer, utc_timestamp
+
+# Flush once this many messages are waiting...
+JOURNAL_BATCH_SIZE = 200
+# ...or this many seconds after the first one arrived
+JOURNAL_FLUSH_INTERVAL = 1.0
+# Latest messages kept with a live conversation; the journal has them all
+MESSAGE_TAIL = 20
+
+class MessageRecord:
+    __slots__ = ('speaker', 'message', 'type', 'timestamp')
+
+    def __init__(self, speaker: str, message: str, type: str, timestamp: datetime):
+        self.speaker = speaker
+        self.message = message
+        self.type = type
+        self.timestamp = timestamp
+
+    def __eq__(self, other):
+        return isinstance(other, MessageRecord) and all(
+            getattr(self, slot) == getattr(other, slot) for slot in self.__slots__)
+
+    def __repr__(self):
+        return f"MessageRecord({self.speaker!r}, {self.message!r}, {self.type!r}, {self.timestamp!r})"
+
+    def __deepcopy__(self, memo):
+        # Every field is immutable, so a new record is a full copy
+        return MessageRecord(self.speaker, self.message, self.type, self.timestamp)
+
+def message_tail(records=()) -> deque:
+    """The bounded list of recent messages a live conversation keeps"""
+    return deque(records, maxlen=MESSAGE_TAIL)
+
+class ConversationJournal(WriteBehindBuffer):
+    """Append-only, write-behind log of conversation messages
+
+    Messages are stamped when appended and inserted into conversation_messages
+    in bulk transactions, like triggers in TriggerSink. Call flush() before
+    ending a session or reading its messages back.
+    """
+
+    name = 'conversation-journal'
+
+    def __init__(self, db_path=DB_PATH, batch_size=JOURNAL_BATCH_SIZE,
+                 flush_interval=JOURNAL_FLUSH_INTERVAL, storage=None):
+        super().__init__(db_path, batch_size, flush_interval, storage)
+
+    def append(self, session_id: int, speaker: str, message_text: str, message_type: str):
+        """Buffer one message, flushing right away if the batch is full"""
+        self._append((session_id, speaker, message_text, message_type, utc_timestamp()))
+
+    def _write(self, batch):
+        self.storage.conversations.add_messages(batch)
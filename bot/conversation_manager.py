@@ -1,156 +1,119 @@
 from datetime import datetime, timedelta
 import json
-import sqlite3
-from typing import Dict, List, Optional
+import threading
+import time
+import weakref
+from collections import deque
+from typing import Dict, List, Optional, Tuple
+from config import DB_PATH
+from database.metrics import METRICS, SESSIONS_EXPIRED, SESSIONS_PERSISTED, SESSIONS_LIVE
+from database.migrations import migrate
+from database.storage import get_storage
+from bot.analytics_snapshot import user_today, window_cutoff
+from bot.lexicon import LANGUAGE
+from bot.conversation_journal import ConversationJournal, MessageRecord, message_tail
+from bot.session_store import SessionStore, MemorySessionStore, SQLiteSessionStore, ExpiryQueue
+
+# Conversations with no activity for this long are closed as abandoned
+IDLE_TIMEOUT = 30 * 60
+
+# Open managers in the process, held weakly; the live gauge adds up their conversations
+_managers = weakref.WeakSet()
+METRICS.register_gauge(SESSIONS_LIVE, lambda: sum(len(manager.expiry) for manager in list(_managers)),
+                       "Conversations this process is waiting on")
 
 class ConversationManager:
     """Manages conversation state and context for all agents"""
     
-    def __init__(self, db_path="life_agent.db"):
+    def __init__(self, db_path=DB_PATH, storage=None, sessions: Optional[SessionStore] = None,
+                 idle_timeout=IDLE_TIMEOUT, clock=time.time):
         self.db_path = db_path
-        self.active_conversations = {}  # In-memory conversation state
-        self.init_conversation_tables()
-    
-    def init_conversation_tables(self):
-        """Initialize database tables for conversation tracking"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        # Conversation sessions table
-        cursor.execute('''
-        CREATE TABLE IF NOT EXISTS conversation_sessions (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            user_id INTEGER,
-            agent_domain TEXT,
-            session_start TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            session_end TIMESTAMP,
-            session_data TEXT, -- JSON data
-            outcome TEXT -- committed, abandoned, intervened
-        )
-        ''')
-        
-        # Conversation messages table
-        cursor.execute('''
-        CREATE TABLE IF NOT EXISTS conversation_messages (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            session_id INTEGER,
-            speaker TEXT, -- user, agent
-            message_text TEXT,
-            message_type TEXT, -- prompt, response, analysis, intervention
-            timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            FOREIGN KEY (session_id) REFERENCES conversation_sessions (id)
-        )
-        ''')
-        
-        # Behavioral patterns table for pattern recognition
-        cursor.execute('''
-        CREATE TABLE IF NOT EXISTS behavioral_patterns (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            user_id INTEGER,
-            pattern_type TEXT, -- avoidance, success, energy, mood
-            pattern_description TEXT,
-            confidence_score REAL, -- 0.0 to 1.0
-            occurrences INTEGER,
-            last_occurrence TIMESTAMP,
-            triggers TEXT, -- JSON array of trigger conditions
-            outcomes TEXT, -- JSON array of typical outcomes
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        )
-        ''')
-        
-        conn.commit()
-        conn.close()
-        print("✅ Conversation and pattern tables initialized")
+        self.storage = storage or get_storage(db_path)
+        if self.storage.uses_sql:
+            migrate(self.db_path)
+        # Active conversation state: shared through the database file when
+        # there is one, so a restart or another bot process can pick it up
+        if sessions is None:
+            sessions = SQLiteSessionStore(db_path) if self.storage.uses_sql else MemorySessionStore()
+        self.sessions = sessions
+        self.journal = ConversationJournal(db_path, storage=self.storage)
+        self.idle_timeout = idle_timeout
+        self.clock = clock
+        # Idle deadlines of the conversations this process has served
+        self.expiry = ExpiryQueue()
+        self._abandoned = []  # (session_id, outcome, session_data) still to be written
+        self._abandoned_lock = threading.Lock()
+        self.expired = METRICS.counter(SESSIONS_EXPIRED)
+        self.persisted = METRICS.counter(SESSIONS_PERSISTED)
+        _managers.add(self)
     
     def start_conversation(self, user_id: int, agent_domain: str) -> str:
         """Start new conversation session with specific agent"""
         session_id = self._create_session(user_id, agent_domain)
+        now = self.clock()
         
-        self.active_conversations[user_id] = {
+        self.sessions.start(user_id, {
             'session_id': session_id,
             'agent_domain': agent_domain,
             'conversation_stage': 'initial_prompt',
-            'messages': [],
+            'messages': message_tail(),
             'context': {},
             'commitment_pending': False,
-            'last_activity': datetime.now()
-        }
+            'last_activity': datetime.fromtimestamp(now)
+        })
+        self.expiry.touch(user_id, now + self.idle_timeout)
         
         return session_id
     
     def add_message(self, user_id: int, speaker: str, message: str, message_type: str = 'response'):
         """Add message to active conversation"""
-        if user_id not in self.active_conversations:
+        return self.add_messages(user_id, [(speaker, message, message_type)])
+    
+    def add_messages(self, user_id: int, messages: List[Tuple[str, str, str]]) -> bool:
+        """Add (speaker, message, message_type) messages to the active conversation with one state write"""
+        now = self.clock()
+        records = [MessageRecord(speaker, message, message_type, datetime.fromtimestamp(now))
+                   for speaker, message, message_type in messages]
+        
+        # Add to active conversation, keeping only the latest messages
+        def append(conversation):
+            tail = conversation['messages']
+            if not isinstance(tail, deque):  # saved before the tail was bounded
+                tail = conversation['messages'] = message_tail(tail)
+            tail.extend(records)
+            conversation['last_activity'] = datetime.fromtimestamp(now)
+        
+        conversation = self.sessions.update(user_id, append)
+        if conversation is None:
             return False
         
-        conversation = self.active_conversations[user_id]
-        session_id = conversation['session_id']
-        
-        # Add to database
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        cursor.execute('''
-        INSERT INTO conversation_messages (session_id, speaker, message_text, message_type)
-        VALUES (?, ?, ?, ?)
-        ''', (session_id, speaker, message, message_type))
-        conn.commit()
-        conn.close()
-        
-        # Add to active conversation
-        conversation['messages'].append({
-            'speaker': speaker,
-            'message': message,
-            'type': message_type,
-            'timestamp': datetime.now()
-        })
-        conversation['last_activity'] = datetime.now()
-        
+        # Add to database, in the journal's next batch
+        for record in records:
+            self.journal.append(conversation['session_id'], record.speaker, record.message, record.type)
+        self.expiry.touch(user_id, now + self.idle_timeout)
         return True
     
     def get_conversation_context(self, user_id: int) -> Dict:
-        """Get current conversation context for user"""
-        if user_id not in self.active_conversations:
-            return {}
-        return self.active_conversations[user_id]
+        """Get a copy of the user's current conversation context; change it through sessions.update"""
+        return self.sessions.get(user_id) or {}
     
     def get_recent_patterns(self, user_id: int, agent_domain: str, days: int = 7) -> List:
         """Get recent completion patterns for domain"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-        SELECT date, commitment, completed, notes
-        FROM daily_checkins
-        WHERE user_id = ? AND domain = ?
-        AND date > date('now', '-{} days')
-        ORDER BY date DESC
-        '''.format(days), (user_id, agent_domain))
-        
-        results = cursor.fetchall()
-        conn.close()
-        return results
+        return self.storage.checkins.recent(user_id, agent_domain, window_cutoff(days, user_today(self.storage, user_id)))
     
     def analyze_cross_domain_patterns(self, user_id: int) -> Dict:
         """Analyze patterns across all life domains"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
         # Get completion rates by domain
-        cursor.execute('''
-        SELECT domain,
-        COUNT(*) as total_commitments,
-        SUM(CASE WHEN completed = 1 THEN 1 ELSE 0 END) as completed_commitments,
-        AVG(CASE WHEN completed = 1 THEN 1.0 ELSE 0.0 END) as completion_rate
-        FROM daily_checkins
-        WHERE user_id = ? AND date > date('now', '-14 days')
-        GROUP BY domain
-        ''', (user_id,))
-        
-        domain_stats = cursor.fetchall()
-        conn.close()
+        domain_totals = {}
+        cutoff = window_cutoff(14, user_today(self.storage, user_id))
+        for _, domain, total, completed in self.storage.checkins.daily_totals(user_id, cutoff):
+            counts = domain_totals.setdefault(domain, [0, 0])
+            counts[0] += total
+            counts[1] += completed
         
         patterns = {}
-        for domain, total, completed, rate in domain_stats:
+        for domain, (total, completed) in sorted(domain_totals.items()):
+            rate = completed * 1.0 / total
             patterns[domain] = {
                 'total_commitments': total,
                 'completed_commitments': completed,
@@ -189,59 +152,89 @@ class ConversationManager:
         completed = sum(1 for p in patterns if p[2])  # p[2] is completed column
         base_rate = completed / len(patterns)
         
-        # Adjust based on commitment language
-        commitment_lower = commitment_text.lower()
-        
-        # Negative indicators
-        if any(word in commitment_lower for word in ['maybe', 'try', 'hope', 'might']):
-            base_rate *= 0.7
-        
-        # Positive indicators  
-        if any(word in commitment_lower for word in ['will', 'committed', 'definitely']):
-            base_rate *= 1.2
-        
-        # Specific action indicators
-        if any(word in commitment_lower for word in ['at', 'by', 'before', 'during']):
-            base_rate *= 1.1
+        # Adjust based on commitment language: uncertain, certain and
+        # time-specific wording each scale the rate
+        match = LANGUAGE.match(commitment_text)
+        for category in ('likelihood.uncertain', 'likelihood.certain', 'likelihood.scheduled'):
+            if category in match:
+                base_rate *= match.weights[category]
         
         return min(max(base_rate, 0.1), 0.9)  # Keep between 10% and 90%
     
     def end_conversation(self, user_id: int, outcome: str = 'completed'):
-        """End active conversation session"""
-        if user_id not in self.active_conversations:
-            return
-        
-        conversation = self.active_conversations[user_id]
-        session_id = conversation['session_id']
-        
-        # Update session in database
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        cursor.execute('''
-        UPDATE conversation_sessions
-        SET session_end = CURRENT_TIMESTAMP,
-            outcome = ?,
-            session_data = ?
-        WHERE id = ?
-        ''', (outcome, json.dumps(conversation['context']), session_id))
-        conn.commit()
-        conn.close()
+        """End active conversation session
+
+        Its messages are written first: if that fails the error is raised and
+        the conversation stays active, with its messages still buffered.
+        """
+        self.journal.flush(raise_errors=True)
         
         # Remove from active conversations
-        del self.active_conversations[user_id]
+        self.expiry.discard(user_id)
+        conversation = self.sessions.remove(user_id)
+        if conversation is None:
+            return
+        
+        # Update session in database, after its messages
+        self.storage.conversations.end_session(conversation['session_id'], outcome, json.dumps(conversation['context']))
+    
+    def expire_idle_conversations(self, now: Optional[float] = None) -> int:
+        """Close conversations idle for idle_timeout as abandoned, written in one batch; returns how many"""
+        now = self.clock() if now is None else now
+        cutoff = now - self.idle_timeout
+        idle = lambda conversation: conversation['last_activity'].timestamp() <= cutoff
+        self.sessions.prune()
+        
+        # Deadlines this process set, plus sessions left behind by processes that stopped
+        closed = []
+        for user_id in set(self.expiry.pop_due(now)) | set(self.sessions.idle(cutoff)):
+            conversation = self.sessions.remove(user_id, only_if=idle)
+            if conversation is not None:
+                closed.append((conversation['session_id'], 'abandoned', json.dumps(conversation['context'])))
+                continue
+            # Active again (through another process): wait for its new deadline
+            conversation = self.sessions.get(user_id)
+            if conversation is not None:
+                self.expiry.touch(user_id, conversation['last_activity'].timestamp() + self.idle_timeout)
+        
+        self.expired.inc(len(closed))
+        with self._abandoned_lock:
+            self._abandoned.extend(closed)
+        self.flush_abandoned()
+        return len(closed)
+    
+    def flush_abandoned(self) -> int:
+        """Write abandoned sessions' outcomes in one transaction; kept for the next sweep if it fails"""
+        with self._abandoned_lock:
+            batch, self._abandoned = self._abandoned, []
+        if not batch:
+            return 0
+        try:
+            # Their messages go first, so a session is never ended without them
+            self.journal.flush(raise_errors=True)
+            self.storage.conversations.end_sessions(batch)
+        except Exception as e:
+            print(f"Abandoned session flush error: {e}")
+            with self._abandoned_lock:
+                self._abandoned[:0] = batch
+            return 0
+        self.persisted.inc(len(batch))
+        return len(batch)
+    
+    def close(self):
+        """Write every buffered message and abandoned session, and hand live ones over"""
+        _managers.discard(self)
+        self.journal.close()
+        self.flush_abandoned()
+        self.sessions.release()
+    
+    def session_stats(self) -> Dict:
+        """Live conversations in this process, and abandoned ones closed and written since start"""
+        return {'live': len(self.expiry), 'expired': self.expired.value, 'persisted': self.persisted.value}
     
     def _create_session(self, user_id: int, agent_domain: str) -> str:
         """Create new conversation session in database"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        cursor.execute('''
-        INSERT INTO conversation_sessions (user_id, agent_domain)
-        VALUES (?, ?)
-        ''', (user_id, agent_domain))
-        session_id = cursor.lastrowid
-        conn.commit()
-        conn.close()
-        return session_id
+        return self.storage.conversations.create_session(user_id, agent_domain)
 
 if __name__ == "__main__":
     # Test the conversation manager
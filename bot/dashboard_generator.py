@@ -1,24 +1,151 @@
-from datetime import datetime, timedelta
-import sqlite3
-from typing import Dict, List
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Tuple
 import json
+from config import DB_PATH
+from database.connection_pool import get_connection
+from database.metrics import METRICS, timed
+from database.storage import get_storage
+from bot.analytics_snapshot import user_today, window_cutoff, hours_ago
+from bot.lru_cache import LRUCache
+from bot.timer_scheduler import utc_now
+
+# Dashboard sections in display order; they share one DashboardMetrics read
+SECTIONS = [
+    'get_performance_summary',
+    'get_domain_analysis',
+    'get_pattern_insights',
+    'get_productivity_metrics',
+    'get_intervention_status',
+    'get_optimization_recommendations',
+]
+
+# Windows the dashboard reports on, in days
+DASHBOARD_WINDOWS = (7, 14, 30)
+
+class DashboardMetrics:
+    """Per-domain totals for every dashboard window, folded from one read of the daily rollups
+
+    Windows end on `today`, the user's local date, so they roll over at the
+    user's midnight (UTC today if not given).
+    """
+    __slots__ = ('windows', 'active_days', 'today')
+
+    def __init__(self, daily_rows: List[Tuple], today: date = None):
+        self.today = today
+        cutoffs = [(days, window_cutoff(days, today)) for days in DASHBOARD_WINDOWS]
+        self.windows = {days: {} for days in DASHBOARD_WINDOWS}  # days -> {domain: [total, completed]}
+        dates = {days: set() for days in DASHBOARD_WINDOWS}
+        for date, domain, total, completed in daily_rows:
+            for days, cutoff in cutoffs:
+                if date > cutoff:
+                    counts = self.windows[days].setdefault(domain, [0, 0])
+                    counts[0] += total
+                    counts[1] += completed
+                    dates[days].add(date)
+        self.active_days = {days: len(dates[days]) for days in DASHBOARD_WINDOWS}
+
+    @classmethod
+    def load(cls, storage, user_id: int, today: date = None) -> 'DashboardMetrics':
+        return cls(storage.checkins.daily_totals(user_id, window_cutoff(max(DASHBOARD_WINDOWS), today)), today)
+
+    def by_domain(self, days: int, min_total: int = 1) -> List[Tuple[str, int, int, float]]:
+        """(domain, total, completed, completion rate) for domains with enough check-ins, by domain name"""
+        return [(domain, total, completed, completed / total)
+                for domain, (total, completed) in sorted(self.windows[days].items()) if total >= min_total]
+
+    def overall(self, days: int) -> Tuple[int, int]:
+        """(total, completed) across every domain"""
+        counts = self.windows[days].values()
+        return sum(c[0] for c in counts), sum(c[1] for c in counts)
+
+DASHBOARD_CACHE_SIZE = 1024
+# Seconds; new check-ins and triggers invalidate sooner through user data versions,
+# this only bounds how far the sliding 7-day trigger count can drift
+DASHBOARD_CACHE_TTL = 3600
+
+class MaterializedDashboard:
+    """A rendered dashboard, the section texts it was assembled from and the metrics behind them"""
+    __slots__ = ('text', 'sections', 'metrics', 'generated_at')
+
+    def __init__(self, text: str, sections: List[str], metrics: DashboardMetrics, generated_at: datetime):
+        self.text = text
+        self.sections = sections
+        self.metrics = metrics
+        self.generated_at = generated_at
+
+# Shared by every generator in the process, keyed by (db_path, user_id)
+DASHBOARD_CACHE = LRUCache(maxsize=DASHBOARD_CACHE_SIZE, ttl=DASHBOARD_CACHE_TTL)
+METRICS.register_cache('dashboards', DASHBOARD_CACHE.stats)
 
 class LifeDashboardGenerator:
-    """Generate comprehensive life optimization dashboard"""
+    """Generate comprehensive life optimization dashboard
+
+    The sections share one read of the rollups and otherwise run a single
+    indexed query or two - see benchmarks/dashboard_benchmark.py.
+    """
     
-    def __init__(self, db_path="life_agent.db"):
+    def __init__(self, db_path=DB_PATH, cache: LRUCache = None, storage=None, clock=utc_now):
         self.db_path = db_path
+        self.clock = clock
+        self.storage = storage or get_storage(db_path)
+        self.cache = cache if cache is not None else DASHBOARD_CACHE
+    
+    def local_today(self, user_id: int) -> date:
+        """The user's current date in their own timezone, which their check-ins are dated by"""
+        return user_today(self.storage, user_id, self.clock())
+    
+    def load_metrics(self, user_id: int, today: date = None) -> DashboardMetrics:
+        return DashboardMetrics.load(self.storage, user_id, today or self.local_today(user_id))
     
+    def build_sections(self, user_id: int, metrics: DashboardMetrics = None) -> List[str]:
+        """Every section's text, in display order, sharing one read of the rollups"""
+        metrics = metrics or self.load_metrics(user_id)
+        return [getattr(self, section)(user_id, metrics) for section in SECTIONS]
+    
+    def data_version(self, user_id: int, today: date = None):
+        """Changes whenever the user's check-ins or triggers do, the store is recreated or their local day rolls over
+        
+        Keyed on the local date rather than the UTC one, so a dashboard warmed
+        before the user's morning check-in is still current at the check-in,
+        even where UTC midnight falls in between (8:45 in Tokyo is 23:45 UTC).
+        """
+        return (self.storage.data_version(user_id), today or self.local_today(user_id))
+    
+    def materialize(self, user_id: int) -> MaterializedDashboard:
+        """The user's dashboard, rebuilt only when their data or the day has changed"""
+        return self._load(user_id)[0]
+    
+    def warm(self, user_ids: List[int]) -> int:
+        """Build any missing or stale dashboards ahead of time, returning how many were built"""
+        return sum(self._load(user_id)[1] for user_id in user_ids)
+    
+    def _load(self, user_id: int):
+        key = (self.db_path, user_id)
+        today = self.local_today(user_id)
+        # Read the version before building, so writes made meanwhile still invalidate the result
+        version = self.data_version(user_id, today)
+        dashboard = self.cache.get(key, version)
+        if dashboard is not None:
+            return dashboard, False
+        generated_at = datetime.now()
+        metrics = self.load_metrics(user_id, today)
+        sections = self.build_sections(user_id, metrics)
+        dashboard = MaterializedDashboard(self.render(sections, generated_at), sections, metrics, generated_at)
+        self.cache.set(key, dashboard, version)
+        return dashboard, True
+    
+    def invalidate_user(self, user_id: int):
+        self.cache.invalidate((self.db_path, user_id))
+    
+    @timed('dashboard', 'generate_comprehensive_dashboard')
     def generate_comprehensive_dashboard(self, user_id: int) -> str:
         """Generate complete life optimization dashboard"""
-        
-        # Get all dashboard components
-        performance_summary = self.get_performance_summary(user_id)
-        domain_analysis = self.get_domain_analysis(user_id)
-        pattern_insights = self.get_pattern_insights(user_id)
-        productivity_metrics = self.get_productivity_metrics(user_id)
-        intervention_status = self.get_intervention_status(user_id)
-        optimization_recommendations = self.get_optimization_recommendations(user_id)
+        return self.materialize(user_id).text
+    
+    def render(self, sections: List[str], generated_at: datetime) -> str:
+        """Assemble the dashboard text from its sections"""
+        (performance_summary, domain_analysis, pattern_insights, productivity_metrics,
+         intervention_status, optimization_recommendations) = sections
         
         dashboard = f"""
 📊 **COMPREHENSIVE LIFE OPTIMIZATION DASHBOARD**
@@ -36,33 +163,20 @@ class LifeDashboardGenerator:
 {optimization_recommendations}
 
 ---
-*Dashboard generated: {datetime.now().strftime('%B %d, %Y at %I:%M %p')}*
+*Dashboard generated: {generated_at.strftime('%B %d, %Y at %I:%M %p')}*
 *AI Life Agent System - Professional Edition*
 """
         
         return dashboard
     
-    def get_performance_summary(self, user_id: int) -> str:
+    def get_performance_summary(self, user_id: int, metrics: DashboardMetrics = None) -> str:
         """Generate overall performance summary"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        # Get 30-day performance data
-        cursor.execute("""
-        SELECT 
-            domain,
-            COUNT(*) as total_commitments,
-            SUM(CASE WHEN completed = 1 THEN 1 ELSE 0 END) as completed_commitments,
-            AVG(CASE WHEN completed = 1 THEN 1.0 ELSE 0.0 END) as completion_rate
-        FROM daily_checkins 
-        WHERE user_id = ? AND date > date('now', '-30 days')
-        GROUP BY domain
-        """, (user_id,))
-        
-        domain_data = cursor.fetchall()
+        metrics = metrics or self.load_metrics(user_id)
+        
+        # 30-day performance data
+        domain_data = metrics.by_domain(30)
         
         if not domain_data:
-            conn.close()
             return "**📈 PERFORMANCE SUMMARY**\n*Insufficient data - complete daily check-ins to generate insights*"
         
         # Calculate overall metrics
@@ -74,18 +188,11 @@ class LifeDashboardGenerator:
         best_domain = max(domain_data, key=lambda x: x[3])
         worst_domain = min(domain_data, key=lambda x: x[3])
         
-        # Get 7-day trend
-        cursor.execute("""
-        SELECT AVG(CASE WHEN completed = 1 THEN 1.0 ELSE 0.0 END) as week_rate
-        FROM daily_checkins 
-        WHERE user_id = ? AND date > date('now', '-7 days')
-        """, (user_id,))
-        
-        week_rate = cursor.fetchone()[0] or 0
+        # 7-day trend
+        week_total, week_completed = metrics.overall(7)
+        week_rate = week_completed / week_total if week_total else 0
         trend = "📈 Improving" if week_rate > overall_rate else "📉 Declining" if week_rate < overall_rate else "➡️ Stable"
         
-        conn.close()
-        
         return f"""
 **📈 PERFORMANCE SUMMARY (30 Days)**
 
@@ -99,26 +206,15 @@ class LifeDashboardGenerator:
 **🎪 Active Domains:** {len(domain_data)}/6
 """
     
-    def get_domain_analysis(self, user_id: int) -> str:
+    def get_domain_analysis(self, user_id: int, metrics: DashboardMetrics = None) -> str:
         """Generate detailed domain-by-domain analysis"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute("""
-        SELECT 
-            domain,
-            COUNT(*) as total,
-            SUM(CASE WHEN completed = 1 THEN 1 ELSE 0 END) as completed,
-            AVG(CASE WHEN completed = 1 THEN 1.0 ELSE 0.0 END) as rate,
-            COUNT(CASE WHEN date > date('now', '-7 days') THEN 1 END) as recent_activity
-        FROM daily_checkins 
-        WHERE user_id = ? AND date > date('now', '-30 days')
-        GROUP BY domain
-        ORDER BY rate DESC
-        """, (user_id,))
-        
-        domains = cursor.fetchall()
-        conn.close()
+        metrics = metrics or self.load_metrics(user_id)
+        
+        # Best rate first; ties go to the later domain name, as the per-section query ordered them
+        recent = metrics.windows[7]
+        domains = sorted(((domain, total, completed, rate, recent.get(domain, (0, 0))[0])
+                          for domain, total, completed, rate in metrics.by_domain(30)),
+                         key=lambda row: (row[3], row[0]), reverse=True)
         
         if not domains:
             return "**🏢 DOMAIN ANALYSIS**\n*No domain data available*"
@@ -145,43 +241,28 @@ class LifeDashboardGenerator:
         
         return domain_analysis
     
-    def get_pattern_insights(self, user_id: int) -> str:
+    def get_pattern_insights(self, user_id: int, metrics: DashboardMetrics = None) -> str:
         """Generate behavioral pattern insights"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        # Timing patterns
-        cursor.execute("""
-        SELECT 
-            strftime('%w', created_at) as day_of_week,
-            AVG(CASE WHEN completed = 1 THEN 1.0 ELSE 0.0 END) as success_rate,
-            COUNT(*) as count
-        FROM daily_checkins 
-        WHERE user_id = ? AND date > date('now', '-30 days')
-        GROUP BY strftime('%w', created_at)
-        HAVING count >= 3
-        ORDER BY success_rate DESC
-        """, (user_id,))
-        
-        day_patterns = cursor.fetchall()
-        
-        # Recent completion streaks
-        cursor.execute("""
-        SELECT date, completed FROM daily_checkins 
-        WHERE user_id = ? AND date > date('now', '-14 days')
-        ORDER BY date DESC
-        """, (user_id,))
-        
-        recent_data = cursor.fetchall()
-        conn.close()
-        
-        # Calculate current streak
+        metrics = metrics or self.load_metrics(user_id)
+        history = self.storage.checkins.completion_history(user_id, window_cutoff(30, metrics.today))
+        
+        # Timing patterns: success rate per weekday with 3+ check-ins, best first
+        weekdays = {}
+        for _, completed, weekday in history:
+            if weekday is not None:
+                counts = weekdays.setdefault(weekday, [0, 0])
+                counts[0] += 1
+                counts[1] += 1 if completed else 0
+        day_patterns = sorted(((weekday, done / count, count) for weekday, (count, done) in sorted(weekdays.items())
+                               if count >= 3), key=lambda row: row[1], reverse=True)
+        
+        # Calculate current streak over the last 14 days, newest first
         current_streak = 0
-        for date, completed in recent_data:
-            if completed:
-                current_streak += 1
-            else:
+        recent_cutoff = window_cutoff(14, metrics.today)
+        for date, completed, _ in history:
+            if date <= recent_cutoff or not completed:
                 break
+            current_streak += 1
         
         # Best day analysis
         day_names = ['Sunday', 'Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday']
@@ -209,14 +290,16 @@ class LifeDashboardGenerator:
 • Weekly Engagement: {len(day_patterns)}/7 days active
 """
     
-    def get_productivity_metrics(self, user_id: int) -> str:
+    def get_productivity_metrics(self, user_id: int, metrics: DashboardMetrics = None) -> str:
         """Generate productivity and efficiency metrics"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+        metrics = metrics or self.load_metrics(user_id)
         
-        # Check if work automation data exists
-        cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='work_automation_tasks'")
-        has_work_table = cursor.fetchone() is not None
+        # Work automation tasks are only ever kept in the SQLite file
+        has_work_table = False
+        if self.storage.uses_sql:
+            cursor = get_connection(self.db_path).cursor()
+            cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='work_automation_tasks'")
+            has_work_table = cursor.fetchone() is not None
         
         if has_work_table:
             cursor.execute("""
@@ -234,19 +317,10 @@ class LifeDashboardGenerator:
             total_automations, time_saved, avg_effectiveness = 0, 0, 0
         
         # Calculate commitment velocity (commitments per day)
-        cursor.execute("""
-        SELECT COUNT(DISTINCT date) as active_days,
-               COUNT(*) as total_commitments
-        FROM daily_checkins 
-        WHERE user_id = ? AND date > date('now', '-14 days')
-        """, (user_id,))
-        
-        velocity_data = cursor.fetchone()
-        active_days, total_commitments = velocity_data or (0, 0)
+        active_days = metrics.active_days[14]
+        total_commitments = metrics.overall(14)[0]
         daily_velocity = total_commitments / max(active_days, 1)
         
-        conn.close()
-        
         return f"""
 **⚡ PRODUCTIVITY METRICS**
 
@@ -263,32 +337,15 @@ class LifeDashboardGenerator:
 **🎯 Efficiency Score:** {min(100, (daily_velocity * 20)):.0f}%
 """
     
-    def get_intervention_status(self, user_id: int) -> str:
+    def get_intervention_status(self, user_id: int, metrics: DashboardMetrics = None) -> str:
         """Generate intervention system status"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+        metrics = metrics or self.load_metrics(user_id)
         
         # Check for recent interventions
-        cursor.execute("""
-        SELECT COUNT(*) as intervention_count
-        FROM intervention_triggers 
-        WHERE user_id = ? AND timestamp > datetime('now', '-7 days')
-        """, (user_id,))
-        
-        recent_interventions = cursor.fetchone()[0] or 0
+        recent_interventions = self.storage.triggers.count(user_id, hours_ago(7 * 24))
         
         # Check completion rates for intervention assessment
-        cursor.execute("""
-        SELECT 
-            domain,
-            AVG(CASE WHEN completed = 1 THEN 1.0 ELSE 0.0 END) as rate
-        FROM daily_checkins 
-        WHERE user_id = ? AND date > date('now', '-7 days')
-        GROUP BY domain
-        """, (user_id,))
-        
-        domain_rates = cursor.fetchall()
-        conn.close()
+        domain_rates = [(domain, rate) for domain, _, _, rate in metrics.by_domain(7)]
         
         # Determine intervention risk
         critical_domains = [d for d, r in domain_rates if r < 0.3]
@@ -319,44 +376,14 @@ class LifeDashboardGenerator:
 **🤖 AI Response:** {'Active monitoring with interventions deployed' if recent_interventions > 0 else 'Passive monitoring - performance within acceptable ranges'}
 """
     
-    def get_optimization_recommendations(self, user_id: int) -> str:
+    def get_optimization_recommendations(self, user_id: int, metrics: DashboardMetrics = None) -> str:
         """Generate personalized optimization recommendations"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        # Find lowest performing domain
-        cursor.execute("""
-        SELECT 
-            domain,
-            AVG(CASE WHEN completed = 1 THEN 1.0 ELSE 0.0 END) as rate,
-            COUNT(*) as count
-        FROM daily_checkins 
-        WHERE user_id = ? AND date > date('now', '-14 days')
-        GROUP BY domain
-        HAVING count >= 3
-        ORDER BY rate ASC
-        LIMIT 1
-        """, (user_id,))
-        
-        worst_domain = cursor.fetchone()
-        
-        # Find best performing domain for leverage
-        cursor.execute("""
-        SELECT 
-            domain,
-            AVG(CASE WHEN completed = 1 THEN 1.0 ELSE 0.0 END) as rate,
-            COUNT(*) as count
-        FROM daily_checkins 
-        WHERE user_id = ? AND date > date('now', '-14 days')
-        GROUP BY domain
-        HAVING count >= 3
-        ORDER BY rate DESC
-        LIMIT 1
-        """, (user_id,))
-        
-        best_domain = cursor.fetchone()
-        
-        conn.close()
+        metrics = metrics or self.load_metrics(user_id)
+        
+        # Lowest performing domain, and the best one for leverage (3+ check-ins in 14 days)
+        candidates = [(domain, rate, total) for domain, total, _, rate in metrics.by_domain(14, min_total=3)]
+        worst_domain = min(candidates, key=lambda row: (row[1], row[0]), default=None)
+        best_domain = max(candidates, key=lambda row: (row[1], row[0]), default=None)
         
         recommendations = ["**🎯 OPTIMIZATION RECOMMENDATIONS**\n"]
         
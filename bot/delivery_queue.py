@@ -0,0 +1,241 @@
+import asyncio
+import random
+import time
+from collections import deque
+from datetime import timedelta
+from typing import Dict, Optional
+from config import DB_PATH
+from database.async_db import AsyncDatabaseExecutor
+from database.migrations import migrate
+from database.storage import get_storage
+from bot.lru_cache import LRUCache
+
+# Telegram allows about 30 messages a second overall and 1 a second per chat
+GLOBAL_RATE = 30.0
+GLOBAL_BURST = 30
+CHAT_RATE = 1.0
+CHAT_BURST = 3
+DELIVERY_WORKERS = 8
+MAX_ATTEMPTS = 5
+BASE_BACKOFF = 1.0
+MAX_BACKOFF = 60.0
+# Chats whose rate-limit state is kept; idle ones are forgotten first
+CHAT_BUCKETS = 10000
+# Recent sends kept for latency percentiles
+LATENCY_SAMPLES = 1000
+
+# Telegram errors that will fail the same way on every retry (matched by
+# class name so the queue doesn't need python-telegram-bot to be importable)
+PERMANENT_ERRORS = {'Forbidden', 'BadRequest', 'InvalidToken', 'ChatMigrated'}
+
+class TokenBucket:
+    """Allows `rate` events a second on average, in bursts of up to `capacity`"""
+
+    def __init__(self, rate: float, capacity: float, clock=time.monotonic):
+        self.rate = rate
+        self.capacity = capacity
+        self.clock = clock
+        self.tokens = capacity
+        self.updated = clock()
+
+    def _refill(self):
+        now = self.clock()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def try_take(self) -> bool:
+        self._refill()
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return True
+        return False
+
+    def delay(self) -> float:
+        """Seconds until a token is available"""
+        self._refill()
+        return max(0.0, (1 - self.tokens) / self.rate)
+
+    async def take(self):
+        """Wait for a token and take it"""
+        while not self.try_take():
+            await asyncio.sleep(self.delay())
+
+class OutboundMessage:
+    __slots__ = ('chat_id', 'text', 'parse_mode', 'attempts', 'enqueued_at', 'result')
+
+    def __init__(self, chat_id: int, text: str, parse_mode: Optional[str], result: asyncio.Future):
+        self.chat_id = chat_id
+        self.text = text
+        self.parse_mode = parse_mode
+        self.attempts = 0
+        self.enqueued_at = time.monotonic()
+        self.result = result
+
+def percentile(samples, fraction: float) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+class DeliveryQueue:
+    """Outbound Telegram messages, sent by a pool of workers within rate limits
+
+    Each chat has its own token bucket and all chats share a global one.
+    A message whose chat is over its limit waits without holding a worker.
+    Failed sends are retried with exponential backoff, or after Telegram's
+    retry_after hint. Messages that fail permanently or use up MAX_ATTEMPTS
+    are dead-lettered through storage. enqueue() returns a future that resolves
+    to True once the message is delivered, or False if it was dead-lettered.
+    """
+
+    def __init__(self, bot, db_path=DB_PATH, workers=DELIVERY_WORKERS, executor=None,
+                 global_rate=GLOBAL_RATE, global_burst=GLOBAL_BURST, chat_rate=CHAT_RATE, chat_burst=CHAT_BURST,
+                 max_attempts=MAX_ATTEMPTS, base_backoff=BASE_BACKOFF, max_backoff=MAX_BACKOFF, storage=None):
+        self.bot = bot
+        self.db_path = db_path
+        self.storage = storage or get_storage(db_path)
+        self.workers = workers
+        self.owns_executor = executor is None
+        self.executor = executor or AsyncDatabaseExecutor()
+        self.global_bucket = TokenBucket(global_rate, global_burst)
+        self.chat_rate = chat_rate
+        self.chat_burst = chat_burst
+        self.chat_buckets = LRUCache(maxsize=CHAT_BUCKETS)
+        self.max_attempts = max_attempts
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self.queue = asyncio.Queue()
+        self.sent = 0
+        self.retried = 0
+        self.dead_lettered = 0
+        self.in_flight = 0
+        self.send_latencies = deque(maxlen=LATENCY_SAMPLES)
+        self.delivery_latencies = deque(maxlen=LATENCY_SAMPLES)
+        self._workers = []
+        self._waiting = 0  # messages parked until their chat or backoff allows a retry
+        if self.storage.uses_sql:
+            migrate(db_path)
+
+    def enqueue(self, chat_id: int, text: str, parse_mode: Optional[str] = 'Markdown') -> asyncio.Future:
+        """Queue a message; await the returned future to learn whether it was delivered"""
+        result = asyncio.get_running_loop().create_future()
+        self.queue.put_nowait(OutboundMessage(chat_id, text, parse_mode, result))
+        return result
+
+    def start(self):
+        """Start the send workers on the running event loop"""
+        if not self._workers:
+            loop = asyncio.get_running_loop()
+            self._workers = [loop.create_task(self._worker(), name=f"delivery-{i}") for i in range(self.workers)]
+
+    async def drain(self):
+        """Wait until every queued message has been delivered or dead-lettered"""
+        await self.queue.join()
+
+    async def stop(self, drain=True):
+        """Stop the workers, by default after the queue has drained"""
+        if drain and self._workers:
+            await self.drain()
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        if self.owns_executor:
+            self.executor.shutdown()
+
+    def stats(self) -> Dict:
+        return {
+            'queue_depth': self.queue.qsize(),
+            'waiting': self._waiting,
+            'in_flight': self.in_flight,
+            'sent': self.sent,
+            'retried': self.retried,
+            'dead_lettered': self.dead_lettered,
+            'send_latency_p50': percentile(self.send_latencies, 0.5),
+            'send_latency_p99': percentile(self.send_latencies, 0.99),
+            'delivery_latency_p50': percentile(self.delivery_latencies, 0.5),
+            'delivery_latency_p99': percentile(self.delivery_latencies, 0.99),
+        }
+
+    def _chat_bucket(self, chat_id: int) -> TokenBucket:
+        bucket = self.chat_buckets.get(chat_id)
+        if bucket is None:
+            bucket = TokenBucket(self.chat_rate, self.chat_burst)
+            self.chat_buckets.set(chat_id, bucket)
+        return bucket
+
+    def _retry_later(self, message: OutboundMessage, delay: float):
+        # The message stays counted as unfinished until it's back on the queue,
+        # so drain() can't return while a retry is pending
+        self._waiting += 1
+
+        def requeue():
+            self._waiting -= 1
+            self.queue.put_nowait(message)
+            self.queue.task_done()
+
+        asyncio.get_running_loop().call_later(delay, requeue)
+
+    def _backoff(self, message: OutboundMessage, error: Exception) -> float:
+        # Flood-control errors say how long to wait (seconds, or a timedelta in newer releases)
+        retry_after = getattr(error, 'retry_after', None)
+        if isinstance(retry_after, timedelta):
+            return retry_after.total_seconds()
+        if retry_after is not None:
+            return float(retry_after)
+        delay = min(self.max_backoff, self.base_backoff * 2 ** (message.attempts - 1))
+        return delay * random.uniform(0.5, 1.0)
+
+    async def _worker(self):
+        while True:
+            message = await self.queue.get()
+            bucket = self._chat_bucket(message.chat_id)
+            if bucket.delay() > 0:
+                self._retry_later(message, bucket.delay())
+                continue
+
+            # The chat's token is taken only once the global wait is over, so
+            # messages for one chat can't queue up there and then go out together
+            await self.global_bucket.take()
+            if not bucket.try_take():
+                self._retry_later(message, bucket.delay())
+                continue
+            message.attempts += 1
+            self.in_flight += 1
+            start = time.monotonic()
+            try:
+                await self.bot.send_message(chat_id=message.chat_id, text=message.text, parse_mode=message.parse_mode)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                await self._failed(message, e)
+            else:
+                now = time.monotonic()
+                self.sent += 1
+                self.send_latencies.append(now - start)
+                self.delivery_latencies.append(now - message.enqueued_at)
+                if not message.result.done():
+                    message.result.set_result(True)
+                self.queue.task_done()
+            finally:
+                self.in_flight -= 1
+
+    async def _failed(self, message: OutboundMessage, error: Exception):
+        permanent = any(cls.__name__ in PERMANENT_ERRORS for cls in type(error).__mro__)
+        if not permanent and message.attempts < self.max_attempts:
+            self.retried += 1
+            self._retry_later(message, self._backoff(message, error))
+            return
+
+        print(f"Giving up on message to {message.chat_id} after {message.attempts} attempts: {error}")
+        try:
+            await self.executor.run(self._dead_letter, message, f"{type(error).__name__}: {error}")
+        except Exception as e:
+            print(f"Dead letter write error: {e}")
+        self.dead_lettered += 1
+        if not message.result.done():
+            message.result.set_result(False)
+        self.queue.task_done()
+
+    def _dead_letter(self, message: OutboundMessage, error: str):
+        self.storage.dead_letters.add(message.chat_id, message.text, message.parse_mode, message.attempts, error)
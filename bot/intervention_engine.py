@@ -1,79 +1,97 @@
 from datetime import datetime, timedelta
-import sqlite3
 import json
 from typing import Dict, List, Optional
+from config import DB_PATH
 from bot.pattern_analyzer import PatternAnalyzer
+from bot.analytics_snapshot import UserAnalyticsSnapshot, user_today, window_cutoff, hours_ago
+from bot.timer_scheduler import local_date, utc_now
+from bot.trigger_sink import TriggerSink
+from bot.lexicon import LANGUAGE
+from database.connection_pool import get_connection
+from database.metrics import timed
+from database.migrations import migrate
+from database.rollups import ensure_rollups
+from database.storage import get_storage
+
+DOMAINS = ['business', 'health', 'finance', 'parenting', 'work', 'personal']
+
+# Commitments still open this many hours after check-in count as missed
+DEADLINE_HOURS = 2
+def missed_deadline_hours(created_at: str, current_time: datetime) -> Optional[float]:
+    """Hours since an open commitment was made, or None if it isn't overdue yet"""
+    hours_since_commitment = (current_time - datetime.fromisoformat(created_at)).total_seconds() / 3600
+    return hours_since_commitment if hours_since_commitment > DEADLINE_HOURS else None
+
+def decline_trigger(completion_rate: float, trend: str) -> Optional[tuple]:
+    """(trigger_type, severity) for a domain's 14-day figures, or None"""
+    if completion_rate < 0.3:  # Crisis level
+        return 'crisis_completion_rate', 0.9
+    elif completion_rate < 0.5 and trend == 'declining':  # Intervention level
+        return 'declining_performance', 0.7
+    elif trend == 'declining' and completion_rate < 0.7:  # Warning level
+        return 'performance_warning', 0.5
+    return None
+
+def cascade_failures(cross_effects: Dict) -> List[Dict]:
+    """Cross-domain effects with high correlation but low success"""
+    cascades = []
+    for effect_key, data in cross_effects.items():
+        if data['strength'] > 0.6 and data.get('success_correlation', 0) < 0.3:
+            # High correlation but low success rate = cascade failure
+            if '_affects_' in effect_key:
+                source_domain, target_domain = effect_key.split('_affects_')
+                cascades.append({
+                    'source_domain': source_domain,
+                    'target_domain': target_domain,
+                    'cascade_strength': data['strength']
+                })
+    return cascades
+
+def intervention_level(trigger_count: int, max_severity: float, active_level: Optional[int]) -> int:
+    """Intervention level from the last 24h of triggers and any active intervention"""
+    if not trigger_count:
+        return 0  # No intervention needed
+    
+    if active_level is not None:
+        # Escalate if triggers continue
+        if trigger_count > 2:
+            return min(active_level + 1, 5)
+        return active_level
+    
+    # Determine initial intervention level
+    if max_severity > 0.8 or trigger_count > 3:
+        return 4  # Crisis intervention
+    elif max_severity > 0.6 or trigger_count > 2:
+        return 3  # Firm intervention
+    elif max_severity > 0.4 or trigger_count > 1:
+        return 2  # Pattern alert
+    else:
+        return 1  # Gentle reminder
 
 class InterventionEngine:
     """Real-time intervention and accountability system"""
     
-    def __init__(self, db_path="life_agent.db"):
+    def __init__(self, db_path=DB_PATH, pattern_analyzer: Optional[PatternAnalyzer] = None, storage=None):
         self.db_path = db_path
-        self.pattern_analyzer = PatternAnalyzer(db_path)
-        self.init_intervention_tables()
-    
-    def init_intervention_tables(self):
-        """Initialize intervention tracking tables"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        # Active interventions table
-        cursor.execute('''
-        CREATE TABLE IF NOT EXISTS active_interventions (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        user_id INTEGER,
-        domain TEXT,
-        intervention_level INTEGER, -- 1-5 escalation level
-        trigger_condition TEXT,
-        start_time TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-        last_escalation TIMESTAMP,
-        response_received BOOLEAN DEFAULT FALSE,
-        resolution_status TEXT DEFAULT 'active', -- active, resolved, escalated
-        effectiveness_score REAL
-        )
-        ''')
-        
-        # Intervention triggers table
-        cursor.execute('''
-        CREATE TABLE IF NOT EXISTS intervention_triggers (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        user_id INTEGER,
-        trigger_type TEXT, -- missed_commitment, pattern_decline, avoidance_language
-        domain TEXT,
-        trigger_data TEXT, -- JSON with specific details
-        severity_score REAL, -- 0.0 to 1.0
-        timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-        intervention_deployed BOOLEAN DEFAULT FALSE
-        )
-        ''')
-        
-        conn.commit()
-        conn.close()
+        self.storage = storage or get_storage(db_path)
+        self.pattern_analyzer = pattern_analyzer or PatternAnalyzer(db_path, storage=self.storage)
+        self.trigger_sink = TriggerSink(db_path, storage=self.storage)
+        if self.storage.uses_sql:
+            migrate(self.db_path)
     
     def monitor_commitment_deadlines(self, user_id: int):
         """Check for missed commitment deadlines"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
         # Get today's uncompleted commitments
-        cursor.execute('''
-        SELECT id, domain, commitment, created_at
-        FROM daily_checkins
-        WHERE user_id = ? AND date = date('now') AND completed = 0
-        ''', (user_id,))
-        
-        uncompleted = cursor.fetchall()
-        conn.close()
+        uncompleted = self.storage.checkins.open_on(user_id, window_cutoff(0, user_today(self.storage, user_id)))
         
         current_time = datetime.now()
         missed_deadlines = []
         
         for commitment_id, domain, commitment, created_at in uncompleted:
-            created_time = datetime.fromisoformat(created_at)
-            hours_since_commitment = (current_time - created_time).total_seconds() / 3600
+            hours_since_commitment = missed_deadline_hours(created_at, current_time)
             
             # Trigger intervention if commitment is >2 hours old and incomplete
-            if hours_since_commitment > 2:
+            if hours_since_commitment is not None:
                 missed_deadlines.append({
                     'commitment_id': commitment_id,
                     'domain': domain,
@@ -88,9 +106,9 @@ class InterventionEngine:
         
         return missed_deadlines
     
-    def detect_pattern_decline(self, user_id: int):
+    def detect_pattern_decline(self, user_id: int, snapshot=None):
         """Detect declining performance patterns"""
-        patterns = self.pattern_analyzer.analyze_user_patterns(user_id, 14)
+        patterns = self.pattern_analyzer.analyze_user_patterns(user_id, 14, snapshot)
         
         declining_domains = []
         domain_patterns = patterns.get('completion_patterns', {}).get('by_domain', {})
@@ -100,17 +118,10 @@ class InterventionEngine:
             trend = data['trend']
             
             # Trigger conditions
-            if completion_rate < 0.3:  # Crisis level
-                severity = 0.9
-                trigger_type = 'crisis_completion_rate'
-            elif completion_rate < 0.5 and trend == 'declining':  # Intervention level
-                severity = 0.7
-                trigger_type = 'declining_performance'
-            elif trend == 'declining' and completion_rate < 0.7:  # Warning level
-                severity = 0.5
-                trigger_type = 'performance_warning'
-            else:
+            trigger = decline_trigger(completion_rate, trend)
+            if trigger is None:
                 continue
+            trigger_type, severity = trigger
             
             declining_domains.append({
                 'domain': domain,
@@ -129,22 +140,10 @@ class InterventionEngine:
     
     def analyze_avoidance_language(self, user_id: int, message_text: str):
         """Analyze user message for avoidance indicators"""
-        avoidance_patterns = [
-            (['maybe', 'might', 'possibly'], 0.3),
-            (['try to', 'hope to', 'plan to'], 0.4),
-            (['later', 'eventually', 'sometime'], 0.5),
-            (['too tired', 'not feeling', 'overwhelmed'], 0.6),
-            (['can\'t', 'impossible', 'no time'], 0.7)
-        ]
-        
-        message_lower = message_text.lower()
-        avoidance_score = 0.0
-        detected_patterns = []
-        
-        for patterns, score in avoidance_patterns:
-            if any(pattern in message_lower for pattern in patterns):
-                avoidance_score = max(avoidance_score, score)
-                detected_patterns.extend([p for p in patterns if p in message_lower])
+        match = LANGUAGE.match(message_text)
+        avoidance_score = match.max_weight('avoidance.')
+        detected_patterns = [phrase for category in match.categories() if category.startswith('avoidance.')
+                             for phrase in match.phrases(category)]
         
         if avoidance_score > 0.3:
             self.log_trigger(user_id, 'avoidance_language', 'general', {
@@ -163,82 +162,42 @@ class InterventionEngine:
     
     def get_intervention_level(self, user_id: int, domain: str) -> int:
         """Determine appropriate intervention level based on triggers"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        # Get recent triggers for domain
-        cursor.execute('''
-        SELECT trigger_type, severity_score, timestamp
-        FROM intervention_triggers
-        WHERE user_id = ? AND domain = ?
-        AND timestamp > datetime('now', '-24 hours')
-        ORDER BY timestamp DESC
-        ''', (user_id, domain))
+        self.flush_triggers()
         
-        recent_triggers = cursor.fetchall()
+        # Count recent triggers for domain
+        trigger_count, max_severity = self.storage.triggers.summary(user_id, domain, hours_ago(24))
         
         # Check for active interventions
-        cursor.execute('''
-        SELECT intervention_level, start_time
-        FROM active_interventions
-        WHERE user_id = ? AND domain = ? AND resolution_status = 'active'
-        ORDER BY start_time DESC LIMIT 1
-        ''', (user_id, domain))
-        
-        active_intervention = cursor.fetchone()
-        conn.close()
-        
-        if not recent_triggers:
-            return 0  # No intervention needed
+        active_level = self.storage.interventions.active_level(user_id, domain)
         
         # Calculate intervention level
-        max_severity = max(trigger[1] for trigger in recent_triggers)
-        trigger_count = len(recent_triggers)
-        
-        if active_intervention:
-            current_level = active_intervention[0]
-            # Escalate if triggers continue
-            if trigger_count > 2:
-                return min(current_level + 1, 5)
-            return current_level
-        
-        # Determine initial intervention level
-        if max_severity > 0.8 or trigger_count > 3:
-            return 4  # Crisis intervention
-        elif max_severity > 0.6 or trigger_count > 2:
-            return 3  # Firm intervention
-        elif max_severity > 0.4 or trigger_count > 1:
-            return 2  # Pattern alert
-        else:
-            return 1  # Gentle reminder
+        return intervention_level(trigger_count, max_severity, active_level)
     
     def log_trigger(self, user_id: int, trigger_type: str, domain: str, trigger_data: dict, severity: float):
-        """Log intervention trigger"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-        INSERT INTO intervention_triggers
-        (user_id, trigger_type, domain, trigger_data, severity_score)
-        VALUES (?, ?, ?, ?, ?)
-        ''', (user_id, trigger_type, domain, json.dumps(trigger_data), severity))
-        
-        conn.commit()
-        conn.close()
+        """Log intervention trigger (buffered; see flush_triggers)"""
+        self.trigger_sink.add(user_id, trigger_type, domain, trigger_data, severity)
+    
+    def flush_triggers(self) -> int:
+        """Write buffered triggers now so reads see them"""
+        return self.trigger_sink.flush()
     
+    def close(self):
+        """Flush buffered triggers and stop the background writer"""
+        self.trigger_sink.close()
+    
+    @timed('engine', 'comprehensive_intervention_check')
     def comprehensive_intervention_check(self, user_id: int):
         """Run comprehensive intervention analysis"""
         interventions_needed = {}
         
-        # Check all trigger conditions
+        # Check all trigger conditions (one check-in scan shared by the pattern checks)
+        snapshot = self.pattern_analyzer.load_snapshot(user_id)
         missed_deadlines = self.monitor_commitment_deadlines(user_id)
-        declining_patterns = self.detect_pattern_decline(user_id)
-        cascade_failures = self.check_cross_domain_cascade(user_id)
+        declining_patterns = self.detect_pattern_decline(user_id, snapshot)
+        cascade_failures = self.check_cross_domain_cascade(user_id, snapshot)
         
         # Determine interventions needed
-        all_domains = ['business', 'health', 'finance', 'parenting', 'work', 'personal']
-        
-        for domain in all_domains:
+        for domain in DOMAINS:
             intervention_level = self.get_intervention_level(user_id, domain)
             
             if intervention_level > 0:
@@ -250,68 +209,205 @@ class InterventionEngine:
         
         return interventions_needed
     
-    def check_cross_domain_cascade(self, user_id: int):
+    def check_cross_domain_cascade(self, user_id: int, snapshot=None):
         """Detect when failure in one domain is affecting others"""
-        patterns = self.pattern_analyzer.analyze_user_patterns(user_id, 7)
+        patterns = self.pattern_analyzer.analyze_user_patterns(user_id, 7, snapshot)
         cross_effects = patterns.get('cross_domain_effects', {})
         
-        cascading_failures = []
-        
-        for effect_key, data in cross_effects.items():
-            if data['strength'] > 0.6 and data.get('success_correlation', 0) < 0.3:
-                # High correlation but low success rate = cascade failure
-                if '_affects_' in effect_key:
-                    source_domain, target_domain = effect_key.split('_affects_')
-                    
-                    cascading_failures.append({
-                        'source_domain': source_domain,
-                        'target_domain': target_domain,
-                        'cascade_strength': data['strength']
-                    })
-                    
-                    self.log_trigger(user_id, 'cascade_failure', target_domain, {
-                        'source_domain': source_domain,
-                        'cascade_strength': data['strength']
-                    }, data['strength'])
+        cascading_failures = cascade_failures(cross_effects)
+        
+        for cascade in cascading_failures:
+            self.log_trigger(user_id, 'cascade_failure', cascade['target_domain'], {
+                'source_domain': cascade['source_domain'],
+                'cascade_strength': cascade['cascade_strength']
+            }, cascade['cascade_strength'])
         
         return cascading_failures
     
     def get_domain_triggers(self, user_id: int, domain: str):
         """Get recent triggers for specific domain"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-        SELECT trigger_type, trigger_data, severity_score, timestamp
-        FROM intervention_triggers
-        WHERE user_id = ? AND domain = ?
-        AND timestamp > datetime('now', '-48 hours')
-        ORDER BY timestamp DESC
-        ''', (user_id, domain))
-        
-        triggers = cursor.fetchall()
-        conn.close()
+        self.flush_triggers()
+        triggers = self.storage.triggers.recent(user_id, domain, hours_ago(48))
         
         return [{'type': t[0], 'data': json.loads(t[1]), 'severity': t[2], 'time': t[3]}
                 for t in triggers]
     
     def deploy_intervention(self, user_id: int, domain: str, intervention_level: int, trigger_data: dict):
         """Deploy intervention and track it"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
         # Record active intervention
+        return self.storage.interventions.add(user_id, domain, intervention_level, json.dumps(trigger_data))
+    
+    @timed('engine', 'run_intervention_sweep')
+    def run_intervention_sweep(self, user_ids: List[int]) -> Dict[int, Dict]:
+        """Set-based comprehensive_intervention_check for many users at once
+        
+        Runs a fixed number of grouped queries whatever the user count and writes
+        all triggers and interventions with executemany in one transaction.
+        Returns {user_id: interventions_needed} for users needing intervention.
+        Backends without SQL fall back to checking users one at a time.
+        """
+        if not user_ids:
+            return {}
+        
+        if not self.storage.uses_sql:
+            results = {user_id: self.comprehensive_intervention_check(user_id) for user_id in dict.fromkeys(user_ids)}
+            return {user_id: needed for user_id, needed in results.items() if needed}
+        
+        ensure_rollups(self.db_path)
+        self.flush_triggers()
+        # Each user's windows end on their own local date, as check-ins are dated
+        now = utc_now()
+        timezones = self.storage.users.timezones()
+        today = {user_id: local_date(timezones.get(user_id), now).isoformat() for user_id in user_ids}
+        conn = get_connection(self.db_path)
+        conn.commit()  # Start from a clean slate so BEGIN IMMEDIATE below is ours
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            cursor = conn.cursor()
+            # Sweep queries CROSS JOIN from this table so SQLite keeps it as the outer loop and
+            # searches each user's rows by index; left to itself, with no statistics on a
+            # temp table, it would scan the big table and look users up by primary key
+            cursor.execute("CREATE TEMP TABLE IF NOT EXISTS sweep_users (user_id INTEGER PRIMARY KEY, today TEXT)")
+            cursor.execute("DELETE FROM sweep_users")
+            cursor.executemany("INSERT INTO sweep_users (user_id, today) VALUES (?, ?)", today.items())
+            
+            triggers = self._sweep_deadline_triggers(cursor) + self._sweep_pattern_triggers(cursor)
+            cursor.executemany('''
+            INSERT INTO intervention_triggers
+            (user_id, trigger_type, domain, trigger_data, severity_score)
+            VALUES (?, ?, ?, ?, ?)
+            ''', [(user_id, trigger_type, domain, json.dumps(data), severity)
+                  for user_id, trigger_type, domain, data, severity in triggers])
+            
+            interventions = self._sweep_interventions(cursor)
+            cursor.execute("DELETE FROM sweep_users")
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        
+        return interventions
+    
+    def _sweep_deadline_triggers(self, cursor) -> List[tuple]:
+        """monitor_commitment_deadlines for every sweep user"""
         cursor.execute('''
+        SELECT c.user_id, c.domain, c.commitment, c.created_at
+        FROM sweep_users u CROSS JOIN daily_checkins c ON c.user_id = u.user_id
+        WHERE c.date = u.today AND c.completed = 0
+        ''')
+        
+        current_time = datetime.now()
+        triggers = []
+        for user_id, domain, commitment, created_at in cursor.fetchall():
+            hours_since_commitment = missed_deadline_hours(created_at, current_time)
+            if hours_since_commitment is not None:
+                triggers.append((user_id, 'missed_deadline', domain, {
+                    'commitment': commitment,
+                    'hours_overdue': hours_since_commitment
+                }, min(hours_since_commitment / 24, 1.0)))
+        return triggers
+    
+    def _sweep_pattern_triggers(self, cursor) -> List[tuple]:
+        """detect_pattern_decline and check_cross_domain_cascade for every sweep user"""
+        # date(u.today, '-14 days') is window_cutoff(14) of the user's local date
+        cursor.execute('''
+        SELECT r.user_id, u.today, r.date, r.domain, r.total, r.completed
+        FROM sweep_users u CROSS JOIN daily_domain_rollups r ON r.user_id = u.user_id
+        WHERE r.date > date(u.today, '-14 days')
+        ORDER BY r.user_id, r.date DESC, r.domain
+        ''')
+        
+        rows_by_user = {}
+        today = {}
+        for user_id, local_today, date, domain, total, completed in cursor.fetchall():
+            rows_by_user.setdefault(user_id, []).append((date, domain, total, completed))
+            today[user_id] = datetime.fromisoformat(local_today).date()
+        
+        triggers = []
+        for user_id, rows in rows_by_user.items():
+            snapshot = UserAnalyticsSnapshot(user_id, rows, (7, 14), self.db_path, today[user_id])
+            
+            domain_patterns = snapshot.patterns(14)['completion_patterns'].get('by_domain', {})
+            for domain, data in domain_patterns.items():
+                trigger = decline_trigger(data['completion_rate'], data['trend'])
+                if trigger is not None:
+                    triggers.append((user_id, trigger[0], domain, {
+                        'completion_rate': data['completion_rate'],
+                        'trend': data['trend'],
+                        'total_commitments': data['total_commitments']
+                    }, trigger[1]))
+            
+            for cascade in cascade_failures(snapshot.patterns(7)['cross_domain_effects']):
+                triggers.append((user_id, 'cascade_failure', cascade['target_domain'], {
+                    'source_domain': cascade['source_domain'],
+                    'cascade_strength': cascade['cascade_strength']
+                }, cascade['cascade_strength']))
+        return triggers
+    
+    def _sweep_interventions(self, cursor) -> Dict[int, Dict]:
+        """get_intervention_level, get_domain_triggers and deploy_intervention for every sweep user"""
+        domain_filter = "domain IN ({})".format(', '.join('?' for _ in DOMAINS))
+        
+        cursor.execute(f'''
+        SELECT t.user_id, t.domain, COUNT(*), MAX(t.severity_score)
+        FROM sweep_users u CROSS JOIN intervention_triggers t ON t.user_id = u.user_id
+        WHERE t.timestamp > ? AND t.{domain_filter}
+        GROUP BY t.user_id, t.domain
+        ''', [hours_ago(24)] + DOMAINS)
+        recent = {(user_id, domain): (count, max_severity)
+                  for user_id, domain, count, max_severity in cursor.fetchall()}
+        if not recent:
+            return {}
+        
+        # Latest active intervention per user and domain
+        cursor.execute(f'''
+        SELECT user_id, domain, intervention_level FROM (
+            SELECT a.user_id, a.domain, a.intervention_level,
+                   ROW_NUMBER() OVER (PARTITION BY a.user_id, a.domain
+                                      ORDER BY a.start_time DESC, a.id DESC) AS position
+            FROM sweep_users u CROSS JOIN active_interventions a ON a.user_id = u.user_id
+            WHERE a.resolution_status = 'active' AND a.{domain_filter}
+        ) WHERE position = 1
+        ''', DOMAINS)
+        active = {(user_id, domain): level for user_id, domain, level in cursor.fetchall()}
+        
+        cursor.execute(f'''
+        SELECT t.user_id, t.domain, t.trigger_type, t.trigger_data, t.severity_score, t.timestamp
+        FROM sweep_users u CROSS JOIN intervention_triggers t ON t.user_id = u.user_id
+        WHERE t.timestamp > ? AND t.{domain_filter}
+        ORDER BY t.timestamp DESC, t.id DESC
+        ''', [hours_ago(48)] + DOMAINS)
+        domain_triggers = {}
+        for user_id, domain, trigger_type, trigger_data, severity, timestamp in cursor.fetchall():
+            domain_triggers.setdefault((user_id, domain), []).append(
+                {'type': trigger_type, 'data': json.loads(trigger_data), 'severity': severity, 'time': timestamp})
+        
+        deployments = []
+        for (user_id, domain), (count, max_severity) in sorted(recent.items()):
+            level = intervention_level(count, max_severity, active.get((user_id, domain)))
+            if level > 0:
+                deployments.append((user_id, domain, level))
+        if not deployments:
+            return {}
+        
+        cursor.executemany('''
         INSERT INTO active_interventions
         (user_id, domain, intervention_level, trigger_condition)
         VALUES (?, ?, ?, ?)
-        ''', (user_id, domain, intervention_level, json.dumps(trigger_data)))
-        
-        intervention_id = cursor.lastrowid
-        conn.commit()
-        conn.close()
-        
-        return intervention_id
+        ''', [(user_id, domain, level, json.dumps({})) for user_id, domain, level in deployments])
+        
+        # We hold the write lock, so the new AUTOINCREMENT ids are consecutive
+        cursor.execute("SELECT MAX(id) FROM active_interventions")
+        first_id = cursor.fetchone()[0] - len(deployments) + 1
+        
+        interventions = {}
+        for offset, (user_id, domain, level) in enumerate(deployments):
+            interventions.setdefault(user_id, {})[domain] = {
+                'level': level,
+                'triggers': domain_triggers.get((user_id, domain), []),
+                'intervention_id': first_id + offset
+            }
+        return interventions
 
 if __name__ == "__main__":
     engine = InterventionEngine()
@@ -1,31 +1,70 @@
 import asyncio
-import schedule
-import time
-from datetime import datetime
-from bot.intervention_engine import InterventionEngine
-from bot.intervention_messages import InterventionMessageGenerator
+from typing import Dict, List
+from config import DB_PATH
+from database.archive import archive_sessions
+from database.async_db import AsyncDatabaseExecutor
+from bot.services import get_services
+from bot.timer_scheduler import TimerScheduler, DailyAt, Every, get_timezone, DEFAULT_TIMEZONE
+from bot.delivery_queue import DeliveryQueue
+
+# Local wall-clock times for the daily checks
+MORNING_CHECK = (9, 0)
+MIDDAY_CHECK = (13, 0)
+EVENING_CHECK = (20, 0)
+# Dashboards are rebuilt ahead of the morning check-in rush
+DASHBOARD_WARMUP = (8, 45)
+INTERVENTION_CHECK_INTERVAL = 30 * 60
+# How often idle conversations are closed as abandoned
+CONVERSATION_EXPIRY_INTERVAL = 60
+# Old conversations are moved to the compressed archive nightly (UTC)
+CONVERSATION_ARCHIVE = (3, 30)
+# Spread job starts over up to this many seconds
+SCHEDULE_JITTER = 60
 
 class InterventionScheduler:
     """Automated monitoring and intervention deployment"""
     
-    def __init__(self, telegram_bot, db_path="life_agent.db"):
+    def __init__(self, telegram_bot, db_path=DB_PATH, executor=None, delivery=None, prewarm_dashboards=True):
         self.telegram_bot = telegram_bot
-        self.intervention_engine = InterventionEngine(db_path)
-        self.message_generator = InterventionMessageGenerator()
-        self.active_users = []  # List of user IDs to monitor
+        services = get_services(db_path)
+        self.database = services.database
+        self.intervention_engine = services.intervention_engine
+        self.message_generator = services.intervention_generator
+        self.dashboard_generator = services.dashboard_generator
+        self.conversation_manager = services.conversation_manager
+        self.db_path = db_path
+        self.prewarm_dashboards = prewarm_dashboards
+        self.active_users = {}  # user_id -> timezone name
+        self.owns_executor = executor is None
+        self.executor = executor or AsyncDatabaseExecutor()
+        self.scheduler = TimerScheduler(executor=self.executor)
+        self.delivery = delivery or DeliveryQueue(telegram_bot, db_path, executor=self.executor,
+                                                  storage=services.storage)
+    
+    def add_monitored_user(self, user_id: int, timezone: str = None):
+        """Add user to monitoring list, with daily checks at their local times"""
+        timezone = timezone or DEFAULT_TIMEZONE
+        try:
+            get_timezone(timezone)
+        except ValueError as e:
+            print(f"{e}; using {DEFAULT_TIMEZONE} for user {user_id}")
+            timezone = DEFAULT_TIMEZONE
+        self.active_users[user_id] = timezone
+        self.schedule_timezone(timezone)
     
-    def add_monitored_user(self, user_id: int):
-        """Add user to monitoring list"""
-        if user_id not in self.active_users:
-            self.active_users.append(user_id)
+    def users_in(self, timezone: str) -> List[int]:
+        return [user_id for user_id, user_timezone in self.active_users.items() if user_timezone == timezone]
     
     async def run_intervention_check(self):
-        """Run comprehensive intervention check for all users"""
-        for user_id in self.active_users:
-            interventions_needed = self.intervention_engine.comprehensive_intervention_check(user_id)
-            
-            for domain, intervention_data in interventions_needed.items():
-                await self.deploy_intervention(user_id, domain, intervention_data)
+        """Run comprehensive intervention check for all users in one batched sweep"""
+        sweep_results = await self.executor.run(
+            self.intervention_engine.run_intervention_sweep, list(self.active_users))
+        
+        await asyncio.gather(*(
+            self.deploy_intervention(user_id, domain, intervention_data)
+            for user_id, interventions_needed in sweep_results.items()
+            for domain, intervention_data in interventions_needed.items()
+        ))
     
     async def deploy_intervention(self, user_id: int, domain: str, intervention_data: Dict):
         """Deploy intervention message to user"""
@@ -37,46 +76,73 @@ class InterventionScheduler:
             domain, level, triggers[0] if triggers else {}, {}
         )
         
-        # Send via Telegram
-        try:
-            await self.telegram_bot.send_message(
-                chat_id=user_id,
-                text=intervention_message,
-                parse_mode='Markdown'
-            )
-            
+        # Send via Telegram (failures are retried, then dead-lettered by the queue)
+        if await self.send_message(user_id, intervention_message):
             # Log intervention deployment
             self.log_intervention_sent(user_id, domain, level, intervention_message)
-            
-        except Exception as e:
-            print(f"Failed to send intervention to {user_id}: {e}")
     
     def log_intervention_sent(self, user_id: int, domain: str, level: int, message: str):
         """Log that intervention was successfully sent"""
         # Implementation for tracking intervention effectiveness
         pass
     
+    async def send_message(self, user_id: int, text: str) -> bool:
+        """Queue one Telegram message and wait until it's delivered (True) or dead-lettered (False)"""
+        return await self.delivery.enqueue(user_id, text)
+    
     def schedule_monitoring_tasks(self):
         """Schedule regular monitoring tasks"""
-        # Morning accountability check (9 AM)
-        schedule.every().day.at("09:00").do(lambda: asyncio.create_task(self.morning_accountability_check()))
-        
-        # Midday progress pulse (1 PM) 
-        schedule.every().day.at("13:00").do(lambda: asyncio.create_task(self.midday_progress_check()))
+        # Real-time monitoring (every 30 minutes)
+        self.scheduler.add_job('intervention_check', Every(INTERVENTION_CHECK_INTERVAL),
+                               self.run_intervention_check, jitter=SCHEDULE_JITTER)
+        # Runs on the executor; closes and persists abandoned conversations in one batch
+        self.scheduler.add_job('conversation_expiry', Every(CONVERSATION_EXPIRY_INTERVAL),
+                               self.conversation_manager.expire_idle_conversations)
+        if self.conversation_manager.storage.uses_sql:
+            self.scheduler.add_job('conversation_archive', DailyAt(*CONVERSATION_ARCHIVE),
+                                   archive_sessions, self.db_path, jitter=SCHEDULE_JITTER)
         
-        # Evening review trigger (8 PM)
-        schedule.every().day.at("20:00").do(lambda: asyncio.create_task(self.evening_review_reminder()))
+        for timezone in set(self.active_users.values()) | {DEFAULT_TIMEZONE}:
+            self.schedule_timezone(timezone)
+    
+    def schedule_timezone(self, timezone: str):
+        """Daily checks for the users in one timezone, at their local time"""
+        daily_checks = [
+            ('morning', MORNING_CHECK, self.morning_accountability_check),  # 9 AM
+            ('midday', MIDDAY_CHECK, self.midday_progress_check),  # 1 PM
+            ('evening', EVENING_CHECK, self.evening_review_reminder),  # 8 PM
+        ]
+        if self.prewarm_dashboards:
+            daily_checks.append(('dashboards', DASHBOARD_WARMUP, self.warm_dashboards))  # 8:45 AM
+        for name, (hour, minute), check in daily_checks:
+            job_name = f"{name}:{timezone}"
+            if job_name not in self.scheduler.jobs:
+                self.scheduler.add_job(job_name, DailyAt(hour, minute, timezone), check, timezone,
+                                       jitter=SCHEDULE_JITTER)
+    
+    async def pending_commitments(self, timezone: str) -> Dict[int, List[Dict]]:
+        """Overdue commitments for each user in a timezone, read off the event loop"""
+        user_ids = self.users_in(timezone)
         
-        # Real-time monitoring (every 30 minutes)
-        schedule.every(30).minutes.do(lambda: asyncio.create_task(self.run_intervention_check()))
+        def load():
+            pending = {}
+            for user_id in user_ids:
+                missed_deadlines = self.intervention_engine.monitor_commitment_deadlines(user_id)
+                if missed_deadlines:
+                    pending[user_id] = missed_deadlines
+            return pending
+        return await self.executor.run(load)
+    
+    async def send_to_users(self, messages: Dict[int, str]):
+        """Queue each user's message and wait for the whole batch to go out"""
+        await asyncio.gather(*(self.send_message(user_id, text) for user_id, text in messages.items()))
     
-    async def morning_accountability_check(self):
+    async def morning_accountability_check(self, timezone: str = DEFAULT_TIMEZONE):
         """9 AM: Check for missed morning commitments"""
-        for user_id in self.active_users:
-            missed_deadlines = self.intervention_engine.monitor_commitment_deadlines(user_id)
-            
-            if missed_deadlines:
-                message = f"""
+        pending = await self.pending_commitments(timezone)
+        messages = {}
+        for user_id, missed_deadlines in pending.items():
+            messages[user_id] = f"""
 🌅 **Morning Accountability Check**
 
 You have {len(missed_deadlines)} pending commitments from this morning:
@@ -85,20 +151,44 @@ You have {len(missed_deadlines)} pending commitments from this morning:
 
 Status update: Are these still happening today, or do we need to adjust the plan?
 """
-                
-                await self.telegram_bot.send_message(
-                    chat_id=user_id,
-                    text=message,
-                    parse_mode='Markdown'
-                )
-    
-    async def run_scheduler(self):
-        """Run the scheduler continuously"""
+        await self.send_to_users(messages)
+    
+    async def midday_progress_check(self, timezone: str = DEFAULT_TIMEZONE):
+        """1 PM: Progress pulse for users with commitments still open"""
+        pending = await self.pending_commitments(timezone)
+        await self.send_to_users({
+            user_id: f"⏱️ **Midday Pulse**\n\n{len(missed_deadlines)} commitments still open. "
+                     f"What's the next concrete step on {missed_deadlines[0]['domain'].title()}?"
+            for user_id, missed_deadlines in pending.items()
+        })
+    
+    async def evening_review_reminder(self, timezone: str = DEFAULT_TIMEZONE):
+        """8 PM: Prompt every user in the timezone to close out the day"""
+        await self.send_to_users({
+            user_id: "🌙 **Evening Review**\n\nWhich commitments did you complete today? "
+                     "Use /checkin to log them before tomorrow's plan."
+            for user_id in self.users_in(timezone)
+        })
+    
+    async def warm_dashboards(self, timezone: str = DEFAULT_TIMEZONE):
+        """8:45 AM: Build dashboards so morning taps are served from the cache"""
+        await self.executor.run(self.dashboard_generator.warm, self.users_in(timezone))
+    
+    async def start(self):
+        """Load known users and start firing checks on the running event loop"""
+        user_timezones = await self.executor.run(self.database.get_user_timezones)
+        for user_id, timezone in user_timezones.items():
+            self.add_monitored_user(user_id, timezone)
         self.schedule_monitoring_tasks()
-        
-        while True:
-            schedule.run_pending()
-            await asyncio.sleep(60)  # Check every minute
+        self.delivery.start()
+        self.scheduler.start()
+    
+    async def stop(self):
+        """Stop scheduling and let running checks finish"""
+        await self.scheduler.stop()
+        await self.delivery.stop()
+        if self.owns_executor:
+            self.executor.shutdown()
 
 if __name__ == "__main__":
     print("Intervention scheduler ready!")
\ No newline at end of file
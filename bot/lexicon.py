@@ -0,0 +1,172 @@
+import re
+from functools import lru_cache
+from typing import Dict, List, Optional, Set, Tuple
+from database.metrics import METRICS
+
+# Words, keeping inner apostrophes ("can't") but not surrounding quotes
+TOKEN_PATTERN = re.compile(r"\w+(?:'\w+)*")
+
+VOWELS = set('aeiou')
+
+def tokenize(text: str) -> List[str]:
+    return TOKEN_PATTERN.findall(text.lower().replace('’', "'"))
+
+def inflections(word: str) -> Set[str]:
+    """word with its regular -s, -ed and -ing forms ("plan": plans, planned, planning)
+
+    Over-generating is harmless: forms that aren't English never show up in a
+    message. Short words ("at", "to") and contractions are left as they are.
+    """
+    if len(word) < 3 or not word.isalpha():
+        return {word}
+    forms = {word, word + 's', word + 'ed', word + 'ing'}
+    if word.endswith(('s', 'x', 'z', 'ch', 'sh')):
+        forms.add(word + 'es')
+    if word.endswith('e'):
+        forms.update((word + 'd', word[:-1] + 'ing'))
+    if word.endswith('y') and word[-2] not in VOWELS:
+        forms.update((word[:-1] + 'ies', word[:-1] + 'ied'))
+    if word[-1] not in VOWELS | set('wxy') and word[-2] in VOWELS and word[-3] not in VOWELS:
+        # Doubled final consonant: running, skipped
+        forms.update((word + word[-1] + 'ed', word + word[-1] + 'ing'))
+    return forms
+
+class LexiconMatch:
+    """Categories found in one message, with the phrases that matched each"""
+
+    __slots__ = ('_phrases', 'weights')
+
+    def __init__(self, phrases: Dict[str, List[str]], weights: Dict[str, float]):
+        self._phrases = phrases
+        self.weights = weights
+
+    def __contains__(self, category: str) -> bool:
+        return category in self._phrases
+
+    def any(self, *categories: str) -> bool:
+        return any(category in self._phrases for category in categories)
+
+    def phrases(self, category: str) -> List[str]:
+        """Matched phrases for a category, in lexicon order"""
+        return list(self._phrases.get(category, ()))
+
+    def categories(self) -> List[str]:
+        return list(self._phrases)
+
+    def max_weight(self, prefix: str = '') -> float:
+        """Highest weight among matched categories starting with prefix"""
+        return max((weight for category, weight in self.weights.items() if category.startswith(prefix)),
+                   default=0.0)
+
+class Lexicon:
+    """Multi-phrase matcher: finds every category in a message in one pass
+
+    Phrases are matched on whole words (so "at" does not fire on "that"),
+    case-insensitively, and overlapping phrases ("try" and "try to") both count.
+    Each word also matches its regular inflections ("automate" matches
+    "automated"); irregular forms are listed as phrases of their own.
+    The text is tokenized once and each position is looked up in a word trie.
+    """
+
+    def __init__(self, categories: Dict[str, Tuple[float, List[str]]]):
+        self.categories = categories
+        self._trie = {}
+        self._order = {}  # (category, phrase) -> position, to report matches in lexicon order
+        for category, (weight, phrases) in categories.items():
+            for phrase in phrases:
+                nodes = [self._trie]
+                for word in tokenize(phrase):
+                    nodes = [node.setdefault(form, {}) for node in nodes for form in inflections(word)]
+                for node in nodes:
+                    node.setdefault(None, []).append((category, phrase))
+                self._order[(category, phrase)] = len(self._order)
+        self._match = lru_cache(maxsize=256)(self._scan)
+
+    def match(self, text: Optional[str]) -> LexiconMatch:
+        """Every category and matched phrase in text (cached for repeated messages)"""
+        return self._match(text or '')
+
+    def cache_stats(self) -> Dict:
+        """Hit/miss counters for the match cache, shaped like LRUCache.stats()"""
+        info = self._match.cache_info()
+        lookups = info.hits + info.misses
+        return {
+            'hits': info.hits,
+            'misses': info.misses,
+            'size': info.currsize,
+            'maxsize': info.maxsize,
+            'hit_rate': info.hits / lookups if lookups else 0.0
+        }
+
+    def _scan(self, text: str) -> LexiconMatch:
+        tokens = tokenize(text)
+        trie = self._trie
+        hits = set()
+        for start, word in enumerate(tokens):
+            node = trie.get(word)
+            position = start + 1
+            while node is not None:
+                if None in node:
+                    hits.update(node[None])
+                if position == len(tokens):
+                    break
+                node = node.get(tokens[position])
+                position += 1
+
+        phrases = {}
+        for category, phrase in sorted(hits, key=self._order.__getitem__):
+            phrases.setdefault(category, []).append(phrase)
+        weights = {category: self.categories[category][0] for category in phrases}
+        return LexiconMatch(phrases, weights)
+
+
+# Shared lexicon for every place that reads commitment and message language.
+# Category -> (weight, phrases); weights matter only where a score is derived.
+LANGUAGE = Lexicon({
+    # InterventionEngine.analyze_avoidance_language
+    'avoidance.hedging': (0.3, ['maybe', 'might', 'possibly']),
+    'avoidance.intent': (0.4, ['try to', 'hope to', 'plan to']),
+    'avoidance.deferral': (0.5, ['later', 'eventually', 'sometime']),
+    'avoidance.low_energy': (0.6, ['too tired', 'not feeling', 'overwhelmed']),
+    'avoidance.blocked': (0.7, ["can't", 'impossible', 'no time']),
+
+    # ConversationManager.predict_success_likelihood (weights are rate multipliers)
+    'likelihood.uncertain': (0.7, ['maybe', 'try', 'hope', 'might']),
+    'likelihood.certain': (1.2, ['will', 'committed', 'definitely']),
+    'likelihood.scheduled': (1.1, ['at', 'by', 'before', 'during']),
+
+    # BaseAgent.predict_commitment_success (weights are score adjustments)
+    'prediction.certain': (0.2, ['will', 'going to', 'must', 'committed to', 'definitely']),
+    'prediction.uncertain': (-0.3, ['maybe', 'try', 'hope', 'might', 'probably']),
+
+    # Agent analyze_response checks
+    'business.vague': (1.0, ['maybe', 'try to', 'hope', 'think about', 'probably']),
+    'business.learning': (1.0, ['research', 'learn', 'study', 'read', 'course']),
+    'business.revenue': (1.0, ['client', 'customer', 'proposal', 'outreach', 'networking', 'content']),
+    'business.preparation': (1.0, ['organize', 'plan', 'setup', 'set up', 'prepare']),
+    'finance.rationalization': (1.0, ['deserve', 'treat myself', 'just this once', 'earned it']),
+    'finance.investment': (1.0, ['business', 'investment', 'tools', 'education', 'networking']),
+    'finance.discipline': (1.0, ['save', 'budget', 'plan', 'track']),
+    'health.excuse': (1.0, ['skip', 'rest day', 'too tired', 'later', 'maybe']),
+    'health.morning': (1.0, ['morning']),
+    'health.family': (1.0, ['son', 'basketball', 'together', 'gym']),
+    'health.activity': (1.0, ['workout', 'run', 'ran', 'walk', 'exercise']),
+    'parenting.present': (1.0, ['phone away', 'present', 'focused', 'no distractions']),
+    'parenting.active': (1.0, ['gym', 'basketball', 'sports', 'active']),
+    'parenting.conditional': (1.0, ['might', 'if i can', 'depends']),
+    'personal.restorative': (1.0, ['recharge', 'restore', 'balance', 'energy']),
+    'personal.social': (1.0, ['friends', 'family', 'social', 'connection']),
+    'personal.escapism': (1.0, ['forget about', 'escape from', 'avoid thinking', 'distract myself']),
+    'personal.leisure': (1.0, ['gaming', 'movie', 'beach', 'pool', 'reading']),
+    'work.automation': (1.0, ['automate', 'template', 'system', 'process', 'script']),
+    'work.avoidance': (1.0, ['nothing to automate', 'no time', 'too complex']),
+    'work.efficiency': (1.0, ['email', 'report', 'template', 'workflow']),
+
+    # EnhancedLifeAgent.handle_message free-text routing
+    'message.greeting': (1.0, ['good morning']),
+    'message.low_energy': (1.0, ['tired', 'exhausted', 'low energy']),
+    'message.avoidance': (1.0, ['procrastinating', 'avoiding', 'stuck']),
+    'message.business': (1.0, ['business', 'client', 'work', 'money']),
+})
+
+METRICS.register_cache('lexicon', LANGUAGE.cache_stats)
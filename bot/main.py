@@ -1,6 +1,7 @@
 import os
 import logging
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
+from telegram.helpers import escape_markdown
 from telegram.ext import Application, CommandHandler, MessageHandler, filters, ContextTypes, CallbackQueryHandler
 from dotenv import load_dotenv
 from datetime import datetime, timedelta
@@ -10,17 +11,21 @@ import sys
 import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from database.db_setup import LifeDatabase
-from bot.conversation_manager import ConversationManager
-from bot.pattern_analyzer import PatternAnalyzer
-from bot.intervention_engine import InterventionEngine
+from config import METRICS_PORT
+from database.async_db import AsyncDatabaseExecutor
+from database.metrics import METRICS, timed, start_metrics_server
+from database.search import search_history
+from bot.services import get_services
+from bot.lru_cache import LRUCache
+from bot.lexicon import LANGUAGE
+from bot.intervention_scheduler import InterventionScheduler
+from bot.timer_scheduler import get_timezone
 from bot.agents.business_agent import BusinessAgent
 from bot.agents.health_agent import HealthAgent
 from bot.agents.finance_agent import FinanceAgent
 from bot.agents.parenting_agent import ParentingAgent
 from bot.agents.work_agent import WorkAgent
 from bot.agents.personal_agent import PersonalAgent
-from bot.dashboard_generator import LifeDashboardGenerator
 
 # Load environment variables
 load_dotenv()
@@ -29,29 +34,61 @@ load_dotenv()
 logging.basicConfig(format='%(asctime)s - %(name)s - %(levelname)s - %(message)s', level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Users whose agent sets stay in memory; older ones are rebuilt on demand
+AGENT_CACHE_SIZE = 1000
+
+def format_duration(seconds: float) -> str:
+    """3725 -> '1h 2m'"""
+    minutes, _ = divmod(int(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    days, hours = divmod(hours, 24)
+    if days:
+        return f"{days}d {hours}h"
+    return f"{hours}h {minutes}m" if hours else f"{minutes}m"
+
 class EnhancedLifeAgent:
     """Enhanced AI Life Agent with professional interface and advanced features"""
     
-    def __init__(self):
+    def __init__(self, services=None):
         self.user_data = {}
-        self.db = LifeDatabase()
-        self.conversation_manager = ConversationManager()
-        self.pattern_analyzer = PatternAnalyzer()
-        self.intervention_engine = InterventionEngine()
-        self.agents = {}
+        self.services = services or get_services()
+        self.services.init_schema()
+        self.db = self.services.database
+        self.conversation_manager = self.services.conversation_manager
+        self.pattern_analyzer = self.services.pattern_analyzer
+        self.intervention_engine = self.services.intervention_engine
+        self.db_executor = AsyncDatabaseExecutor()
+        self.agents = LRUCache(maxsize=AGENT_CACHE_SIZE)
+        METRICS.register_cache('agents', self.agents.stats)
+        self.scheduler = None
+
+    async def post_init(self, application: Application):
+        """Start scheduled checks on the bot's own event loop once it's running"""
+        self.scheduler = InterventionScheduler(application.bot, executor=self.db_executor)
+        await self.scheduler.start()
+
+    async def post_shutdown(self, application: Application):
+        """Let running checks finish, then flush and release the database threads"""
+        if self.scheduler is not None:
+            await self.scheduler.stop()
+        self.db_executor.shutdown()
+        self.intervention_engine.close()
+        self.conversation_manager.close()
 
     def get_user_agents(self, user_id):
         """Get or create agent instances for user"""
-        if user_id not in self.agents:
-            self.agents[user_id] = {
-                'business': BusinessAgent(user_id, self.conversation_manager),
-                'health': HealthAgent(user_id, self.conversation_manager),
-                'finance': FinanceAgent(user_id, self.conversation_manager),
-                'parenting': ParentingAgent(user_id, self.conversation_manager),
-                'work': WorkAgent(user_id, self.conversation_manager),
-                'personal': PersonalAgent(user_id, self.conversation_manager)
+        user_agents = self.agents.get(user_id)
+        if user_agents is None:
+            user_agents = {
+                'business': BusinessAgent(user_id, self.conversation_manager, self.services),
+                'health': HealthAgent(user_id, self.conversation_manager, self.services),
+                'finance': FinanceAgent(user_id, self.conversation_manager, self.services),
+                'parenting': ParentingAgent(user_id, self.conversation_manager, self.services),
+                'work': WorkAgent(user_id, self.conversation_manager, self.services),
+                'personal': PersonalAgent(user_id, self.conversation_manager, self.services)
             }
-        return self.agents[user_id]
+            self.agents.set(user_id, user_agents)
+        return user_agents
 
     def create_main_menu_keyboard(self):
         """Create professional main menu with inline buttons"""
@@ -66,13 +103,16 @@ class EnhancedLifeAgent:
         ]
         return InlineKeyboardMarkup(keyboard)
 
+    @timed('handler', 'start')
     async def start_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Enhanced start command with professional interface"""
         user_id = update.effective_user.id
         user_name = update.effective_user.first_name
         
         # Add user to database
-        self.db.add_user(user_id, update.effective_user.username, user_name)
+        await self.db_executor.run(self.db.add_user, user_id, update.effective_user.username, user_name)
+        if self.scheduler is not None and user_id not in self.scheduler.active_users:
+            self.scheduler.add_monitored_user(user_id)
         
         welcome_message = f"""
 🤖 **AI Life Agent - Professional Edition**
@@ -133,20 +173,27 @@ Choose an option below to begin:
         elif data == "help":
             await self.help_callback(query, context)
 
+    @timed('handler', 'daily_checkin')
     async def daily_checkin_callback(self, query, context):
         """Handle daily check-in button press"""
         user_id = query.from_user.id
         user_name = query.from_user.first_name
         
-        # Get user's agents
+        message = await self.db_executor.run(self.build_daily_checkin_message, user_id, user_name)
+        await query.edit_message_text(message, parse_mode='Markdown')
+
+    def build_daily_checkin_message(self, user_id, user_name):
+        """Build the daily check-in text (blocking - runs on the DB executor)"""
+        # Get user's agents and one analytics snapshot shared by all of them
         user_agents = self.get_user_agents(user_id)
+        snapshot = self.pattern_analyzer.load_snapshot(user_id)
         
         # Check for pending interventions first
         intervention_needed = False
         intervention_messages = []
         
         for domain, agent in user_agents.items():
-            intervention_check = agent.check_intervention_needed()
+            intervention_check = agent.check_intervention_needed(snapshot)
             if intervention_check.get('intervention_needed'):
                 intervention_needed = True
                 intervention_messages.append(
@@ -155,9 +202,7 @@ Choose an option below to begin:
         
         if intervention_needed:
             intervention_text = "\n\n".join(intervention_messages[:2])  # Show max 2 interventions
-            message = f"⚠️ **INTERVENTION REQUIRED FIRST**\n\n{intervention_text}\n\n*Address these issues before daily check-in.*"
-            await query.edit_message_text(message, parse_mode='Markdown')
-            return
+            return f"⚠️ **INTERVENTION REQUIRED FIRST**\n\n{intervention_text}\n\n*Address these issues before daily check-in.*"
         
         # Generate daily check-in with all 6 agents
         checkin_message = f"""
@@ -166,22 +211,22 @@ Choose an option below to begin:
 {user_name}, your AI agents are ready for daily accountability:
 
 **1️⃣ BUSINESS AGENT:**
-{user_agents['business'].get_pattern_based_prompt()}
+{user_agents['business'].get_pattern_based_prompt(snapshot)}
 
 **2️⃣ HEALTH AGENT:**
-{user_agents['health'].get_pattern_based_prompt()}
+{user_agents['health'].get_pattern_based_prompt(snapshot)}
 
 **3️⃣ FINANCE AGENT:**
-{user_agents['finance'].get_pattern_based_prompt()}
+{user_agents['finance'].get_pattern_based_prompt(snapshot)}
 
 **4️⃣ PARENTING AGENT:**
-{user_agents['parenting'].get_pattern_based_prompt()}
+{user_agents['parenting'].get_pattern_based_prompt(snapshot)}
 
 **5️⃣ WORK AGENT:**
-{user_agents['work'].get_pattern_based_prompt()}
+{user_agents['work'].get_pattern_based_prompt(snapshot)}
 
 **6️⃣ PERSONAL AGENT:**
-{user_agents['personal'].get_pattern_based_prompt()}
+{user_agents['personal'].get_pattern_based_prompt(snapshot)}
 
 **📝 Instructions:**
 Respond with your specific commitments for each domain. Each agent will analyze your response and provide targeted accountability.
@@ -189,8 +234,9 @@ Respond with your specific commitments for each domain. Each agent will analyze
 Type your commitments now or use /menu to return to main menu.
 """
         
-        await query.edit_message_text(checkin_message, parse_mode='Markdown')
+        return checkin_message
 
+    @timed('handler', 'patterns')
     async def patterns_callback(self, query, context):
         """Handle pattern analysis button press"""
         user_id = query.from_user.id
@@ -199,7 +245,7 @@ Type your commitments now or use /menu to return to main menu.
         processing_msg = await query.edit_message_text("📊 Analyzing behavioral patterns... ⏳")
         
         try:
-            patterns = self.pattern_analyzer.analyze_user_patterns(user_id, 30)
+            patterns = await self.db_executor.run(self.pattern_analyzer.analyze_user_patterns, user_id, 30)
             
             # Format completion patterns
             completion_data = patterns.get('completion_patterns', {}).get('by_domain', {})
@@ -253,8 +299,10 @@ Use /dashboard for detailed analytics or /menu for main menu.
             await processing_msg.edit_text(message, parse_mode='Markdown')
             
         except Exception as e:
+            METRICS.record_error('handler', 'patterns')
             await processing_msg.edit_text(f"❌ Pattern analysis error: {str(e)}")
 
+    @timed('handler', 'work_status')
     async def work_status_callback(self, query, context):
         """Handle work automation status button press"""
         user_id = query.from_user.id
@@ -290,6 +338,7 @@ Use /dashboard for detailed metrics or /menu for main menu.
         
         await query.edit_message_text(message, parse_mode='Markdown')
 
+    @timed('handler', 'system_status')
     async def system_status_callback(self, query, context):
         """Handle system status button press"""
         user_id = query.from_user.id
@@ -297,20 +346,33 @@ Use /dashboard for detailed metrics or /menu for main menu.
         # Quick system health check
         try:
             # Test database connection
-            import sqlite3
-            conn = sqlite3.connect('life_agent.db')
-            cursor = conn.cursor()
-            cursor.execute("SELECT COUNT(*) FROM daily_checkins WHERE user_id = ?", (user_id,))
-            checkin_count = cursor.fetchone()[0]
-            conn.close()
+            checkin_count = await self.db_executor.run(self.db.count_checkins, user_id)
             
             # Test agent system
-            agents = self.get_user_agents(user_id)
+            agents = await self.db_executor.run(self.get_user_agents, user_id)
             agent_status = "✅ All 6 agents operational"
             
             # Test pattern analyzer
-            patterns = self.pattern_analyzer.analyze_user_patterns(user_id, 7)
+            patterns = await self.db_executor.run(self.pattern_analyzer.analyze_user_patterns, user_id, 7)
             pattern_status = f"✅ Pattern analysis working ({len(patterns)} pattern types)"
+            metrics = METRICS.summary()
+            requests, db_calls = metrics['requests'], metrics['db']
+            cache_lines = "\n".join(
+                f"• {name.title()} cache: {stats['hits']} hits / {stats['misses']} misses ({stats['hit_rate']:.0%})"
+                for name, stats in metrics['caches'].items())
+            delivery_line = ""
+            if self.scheduler is not None:
+                delivery = self.scheduler.delivery.stats()
+                delivery_line = (f"\n• Outbound queue: {delivery['queue_depth'] + delivery['waiting']} waiting, "
+                                 f"{delivery['sent']} sent, {delivery['dead_lettered']} failed "
+                                 f"(p99 {delivery['send_latency_p99'] * 1000:.0f}ms)")
+            sessions = self.conversation_manager.session_stats()
+            conversation_line = (f"\n• Conversations: {sessions['live']} live, {sessions['expired']} expired idle, "
+                                 f"{sessions['persisted']} persisted")
+            if metrics['errors']:
+                status = f"⚠️ {metrics['errors']} of {requests['count']} requests failed since start"
+            else:
+                status = "ALL SYSTEMS OPERATIONAL"
             
             message = f"""
 🔧 **AI Life Agent System Status**
@@ -325,33 +387,30 @@ Use /dashboard for detailed metrics or /menu for main menu.
 • PersonalAgent: Strategic rest & balance
 
 **📊 DATA SYSTEM:**
-✅ Database optimized and operational
+✅ Database operational ({self.services.storage.backend})
 • Your checkins: {checkin_count}
-• Performance: Excellent (0.001s queries)
-• Storage: Optimized with WAL mode
+• Database calls: p50 {db_calls['p50'] * 1000:.1f}ms, p99 {db_calls['p99'] * 1000:.1f}ms ({db_calls['count']} calls)
+• Statements per request: {metrics['statements']['mean']:.1f} average, p99 {metrics['statements']['p99']:.0f}
 
 **🧠 INTELLIGENCE SYSTEM:**
 {pattern_status}
-✅ Intervention engine active
-✅ Cross-domain analysis functional
-✅ Conversation management operational
+{cache_lines}{delivery_line}{conversation_line}
 
 **⚡ PERFORMANCE:**
-• Response time: <2 seconds
-• Database queries: <0.1 seconds  
-• System reliability: 100% uptime
-• Integration tests: 8/8 passing
-
-**🚀 STATUS:** ALL SYSTEMS OPERATIONAL
+• Response time: p50 {requests['p50'] * 1000:.0f}ms, p99 {requests['p99'] * 1000:.0f}ms ({requests['count']} requests)
+• Errors: {metrics['errors']} of {requests['count']} requests
+• Uptime: {format_duration(metrics['uptime'])}
 
-Your AI agent system is running at peak performance!
+**🚀 STATUS:** {status}
 """
             
             await query.edit_message_text(message, parse_mode='Markdown')
             
         except Exception as e:
+            METRICS.record_error('handler', 'system_status')
             await query.edit_message_text(f"❌ System check error: {str(e)}")
 
+    @timed('handler', 'dashboard')
     async def dashboard_callback(self, query, context):
         """Handle dashboard button press with full analytics"""
         user_id = query.from_user.id
@@ -361,8 +420,8 @@ Your AI agent system is running at peak performance!
         )
         
         try:
-            dashboard_generator = LifeDashboardGenerator()
-            dashboard_content = dashboard_generator.generate_comprehensive_dashboard(user_id)
+            dashboard_generator = self.services.dashboard_generator
+            dashboard_content = await self.db_executor.run(dashboard_generator.generate_comprehensive_dashboard, user_id)
             
             # Split into chunks if needed (Telegram has 4096 character limit)
             chunks = [dashboard_content[i:i+4000] for i in range(0, len(dashboard_content), 4000)]
@@ -376,24 +435,16 @@ Your AI agent system is running at peak performance!
                     await query.message.reply_text(f"📊 **Dashboard (Part {i+1})**\n\n{chunk}", parse_mode='Markdown')
             
         except Exception as e:
+            METRICS.record_error('handler', 'dashboard')
             await processing_message.edit_text(f"❌ Dashboard generation error: {str(e)}")
 
+    @timed('handler', 'interventions')
     async def interventions_callback(self, query, context):
         """Handle interventions button press"""
         user_id = query.from_user.id
         
         # Check current interventions
-        user_agents = self.get_user_agents(user_id)
-        active_interventions = []
-        
-        for domain, agent in user_agents.items():
-            intervention_check = agent.check_intervention_needed()
-            if intervention_check.get('intervention_needed'):
-                active_interventions.append({
-                    'domain': domain,
-                    'level': intervention_check['level'],
-                    'message': intervention_check['message']
-                })
+        active_interventions = await self.db_executor.run(self.get_active_interventions, user_id)
         
         if active_interventions:
             intervention_text = "\n\n".join([
@@ -439,6 +490,24 @@ The system remains vigilant and will deploy interventions immediately if pattern
         
         await query.edit_message_text(message, parse_mode='Markdown')
 
+    def get_active_interventions(self, user_id):
+        """Collect interventions across all agents (blocking - runs on the DB executor)"""
+        user_agents = self.get_user_agents(user_id)
+        snapshot = self.pattern_analyzer.load_snapshot(user_id)
+        active_interventions = []
+        
+        for domain, agent in user_agents.items():
+            intervention_check = agent.check_intervention_needed(snapshot)
+            if intervention_check.get('intervention_needed'):
+                active_interventions.append({
+                    'domain': domain,
+                    'level': intervention_check['level'],
+                    'message': intervention_check['message']
+                })
+        
+        return active_interventions
+
+    @timed('handler', 'help')
     async def help_callback(self, query, context):
         """Handle help button press"""
         help_message = """
@@ -460,6 +529,8 @@ The system remains vigilant and will deploy interventions immediately if pattern
 • `/dashboard` - Full life optimization dashboard
 • `/status` - System health and performance
 • `/help` - This help information
+• `/timezone` - Set the timezone for scheduled check-ins
+• `/search` - Find past conversations and commitments
 
 **🤖 HOW IT WORKS:**
 1. **Morning:** Daily check-in with all 6 agents
@@ -478,6 +549,7 @@ Ready to optimize your life? Click any button above!
         
         await query.edit_message_text(help_message, parse_mode='Markdown')
 
+    @timed('handler', 'menu')
     async def menu_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Return to main menu command"""
         await update.message.reply_text(
@@ -485,34 +557,83 @@ Ready to optimize your life? Click any button above!
             reply_markup=self.create_main_menu_keyboard()
         )
 
+    @timed('handler', 'timezone')
+    async def timezone_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        """Set the timezone scheduled check-ins are sent in, e.g. /timezone Europe/London"""
+        user_id = update.effective_user.id
+        if not context.args:
+            await update.message.reply_text("🕘 Usage: /timezone <Region/City>, for example /timezone America/New_York")
+            return
+
+        timezone = context.args[0]
+        try:
+            get_timezone(timezone)
+        except ValueError:
+            await update.message.reply_text(f"❌ Unknown timezone: {timezone}. Use a name like Europe/London.")
+            return
+
+        await self.db_executor.run(self.db.add_user, user_id, update.effective_user.username, update.effective_user.first_name)
+        await self.db_executor.run(self.db.set_user_timezone, user_id, timezone)
+        if self.scheduler is not None:
+            self.scheduler.add_monitored_user(user_id, timezone)
+        await update.message.reply_text(f"✅ Morning, midday and evening check-ins will follow {timezone} time.")
+
+    @timed('handler', 'search')
+    async def search_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        """Search the user's past conversations and commitments, e.g. /search morning run"""
+        user_id = update.effective_user.id
+        if not context.args:
+            await update.message.reply_text("🔍 Usage: /search <words>, for example /search client proposal")
+            return
+        if not self.services.storage.uses_sql:
+            await update.message.reply_text("❌ Search needs the SQLite storage backend.")
+            return
+
+        text = ' '.join(context.args)
+        # Control characters mark matches so they survive Markdown escaping
+        hits = await self.db_executor.run(search_history, self.services.db_path, user_id, text,
+                                          mark=('\x02', '\x03'))
+        if not hits:
+            await update.message.reply_text(f"🔍 Nothing found for {text}.")
+            return
+
+        lines = [f"🔍 *Results for* {escape_markdown(text)}\n"]
+        for hit in hits:
+            snippet = escape_markdown(hit.snippet).replace('\x02', '*').replace('\x03', '*')
+            icon = '💬' if hit.kind == 'message' else '🎯'
+            lines.append(f"{icon} {escape_markdown(str(hit.when)[:10])} {escape_markdown(hit.label or '')}: {snippet}")
+        await update.message.reply_text('\n'.join(lines), parse_mode='Markdown')
+
+    @timed('handler', 'message')
     async def handle_message(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Enhanced message handling with conversation context"""
         user_id = update.effective_user.id
         user_message = update.message.text
         user_name = update.effective_user.first_name
         
-        # Check if user is in active conversation
-        conversation_context = self.conversation_manager.get_conversation_context(user_id)
+        # Check if user is in active conversation (a shared session store reads SQLite, so off the loop)
+        conversation_context = await self.db_executor.run(self.conversation_manager.get_conversation_context, user_id)
         
         if conversation_context:
             # Handle ongoing conversation
             agent_domain = conversation_context['agent_domain']
-            user_agents = self.get_user_agents(user_id)
+            user_agents = await self.db_executor.run(self.get_user_agents, user_id)
             
             if agent_domain in user_agents:
                 agent = user_agents[agent_domain]
-                response = agent.process_user_response(user_message)
+                response = await self.db_executor.run(agent.process_user_response, user_message)
                 await update.message.reply_text(response, parse_mode='Markdown')
                 return
         
         # Handle general messages with intelligent responses
-        if "good morning" in user_message.lower():
+        match = LANGUAGE.match(user_message)
+        if 'message.greeting' in match:
             response = f"Good morning {user_name}! 🌅 Ready to dominate today?\n\nUse /checkin for your daily agent coordination or /menu for the main interface."
-        elif any(word in user_message.lower() for word in ["tired", "exhausted", "low energy"]):
+        elif 'message.low_energy' in match:
             response = "⚡ **Energy state detected.** Low energy is often caused by avoiding physical movement, not solved by rest.\n\nWhat's the minimum physical action you can take in the next 10 minutes? Use /checkin to coordinate with HealthAgent."
-        elif any(word in user_message.lower() for word in ["procrastinating", "avoiding", "stuck"]):
+        elif 'message.avoidance' in match:
             response = "🔍 **Avoidance pattern detected.** Your AI agents are designed to break through exactly this.\n\nName the specific task you're avoiding. We're breaking it into manageable actions. Use /checkin for targeted intervention."
-        elif any(word in user_message.lower() for word in ["business", "client", "work", "money"]):
+        elif 'message.business' in match:
             response = f"💼 **Business focus detected.** Your BusinessAgent is ready for revenue-generating accountability.\n\nWhat's the ONE uncomfortable business action you're avoiding? Use /checkin to coordinate."
         else:
             response = f"🤖 **AI Agent Ready**\n\nI hear you, {user_name}. Let me know which domain needs attention:\n\n• **Business** - Revenue generation & growth\n• **Health** - Energy & fitness optimization\n• **Finance** - Money discipline & investment\n• **Parenting** - Quality family time\n• **Work** - Process automation & efficiency\n• **Personal** - Strategic rest & balance\n\nUse /menu for the full interface or just tell me what's on your mind."
@@ -536,14 +657,20 @@ def main():
     # Create Enhanced Life Agent instance
     agent = EnhancedLifeAgent()
     
+    if METRICS_PORT:
+        start_metrics_server(METRICS_PORT)
+        print(f"📈 Metrics at http://localhost:{METRICS_PORT}/metrics")
+    
     # Create application
-    application = Application.builder().token(token).build()
+    application = Application.builder().token(token).post_init(agent.post_init).post_shutdown(agent.post_shutdown).build()
 
     application.add_handler(CommandHandler("dashboard", lambda update, context: agent.dashboard_callback(update.callback_query or update, context)))
     
     # Add handlers
     application.add_handler(CommandHandler("start", agent.start_command))
     application.add_handler(CommandHandler("menu", agent.menu_command))
+    application.add_handler(CommandHandler("timezone", agent.timezone_command))
+    application.add_handler(CommandHandler("search", agent.search_command))
     application.add_handler(CallbackQueryHandler(agent.handle_callback_query))
     application.add_handler(MessageHandler(filters.TEXT & ~filters.COMMAND, agent.handle_message))
     
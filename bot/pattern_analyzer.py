@@ -1,25 +1,60 @@
 from datetime import datetime, timedelta
-import sqlite3
 import json
 from typing import Dict, List, Tuple
+from config import DB_PATH
+from database.storage import get_storage
+from bot.analytics_snapshot import UserAnalyticsSnapshot, SNAPSHOT_WINDOWS, active_snapshot, user_today, window_cutoff
+from bot.lru_cache import LRUCache
+from database.metrics import METRICS, timed
+
+PATTERN_CACHE_SIZE = 512
+PATTERN_CACHE_TTL = 300  # Seconds; data changes are caught sooner by user versions
+
+# Shared by every analyzer in the process, keyed by (db_path, user_id, windows)
+PATTERN_CACHE = LRUCache(maxsize=PATTERN_CACHE_SIZE, ttl=PATTERN_CACHE_TTL)
+METRICS.register_cache('patterns', PATTERN_CACHE.stats)
 
 class PatternAnalyzer:
     """Analyzes behavioral patterns and predicts future performance"""
     
-    def __init__(self, db_path="life_agent.db"):
+    def __init__(self, db_path=DB_PATH, cache: LRUCache = None, storage=None):
         self.db_path = db_path
+        self.cache = cache if cache is not None else PATTERN_CACHE
+        self.storage = storage or get_storage(db_path)
+    
+    @timed('analyzer', 'load_snapshot')
+    def load_snapshot(self, user_id: int, windows=SNAPSHOT_WINDOWS) -> UserAnalyticsSnapshot:
+        """Scan user's check-ins once and keep results for every window
+
+        Snapshots are cached until the user's check-ins or intervention triggers
+        change, the user's day rolls over (windows end on their local date) or the TTL passes.
+        Treat the returned snapshot and its pattern dicts as read-only.
+        """
+        key = (self.db_path, user_id, tuple(sorted(windows)))
+        today = user_today(self.storage, user_id)
+        version = (self.storage.data_version(user_id), today)
+
+        snapshot = self.cache.get(key, version)
+        if snapshot is None:
+            snapshot = UserAnalyticsSnapshot.load(self.db_path, user_id, windows, self.storage, today)
+            self.cache.set(key, snapshot, version)
+        return snapshot
+    
+    def invalidate_user(self, user_id: int):
+        """Drop cached snapshots for a user"""
+        self.cache.invalidate_where(lambda key: key[0] == self.db_path and key[1] == user_id)
+    
+    def cache_stats(self) -> Dict:
+        """Hit/miss counters for the pattern cache"""
+        return self.cache.stats()
     
-    def analyze_user_patterns(self, user_id: int, days: int = 30) -> Dict:
+    @timed('analyzer', 'analyze_user_patterns')
+    def analyze_user_patterns(self, user_id: int, days: int = 30, snapshot: UserAnalyticsSnapshot = None) -> Dict:
         """Comprehensive pattern analysis for user"""
         try:
-            patterns = {
-                'completion_patterns': self.analyze_completion_patterns(user_id, days),
-                'timing_patterns': {'message': 'Timing analysis available after more conversations'},
-                'avoidance_patterns': self.analyze_avoidance_patterns(user_id, days),
-                'success_factors': {'message': 'Success factor analysis available with more data'},
-                'cross_domain_effects': {}
-            }
-            return patterns
+            if snapshot is None or not snapshot.covers(days):
+                snapshot = active_snapshot(self.db_path, user_id, days) or self.load_snapshot(user_id, (days,))
+            return snapshot.patterns(days)
         except Exception as e:
             print(f"Pattern analysis error: {e}")
             return {
@@ -33,58 +68,7 @@ class PatternAnalyzer:
     def analyze_completion_patterns(self, user_id: int, days: int) -> Dict:
         """Analyze completion patterns by domain"""
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            cursor.execute('''
-            SELECT domain, date, completed, commitment
-            FROM daily_checkins
-            WHERE user_id = ? AND date > date('now', '-{} days')
-            ORDER BY date DESC
-            '''.format(days), (user_id,))
-            
-            results = cursor.fetchall()
-            conn.close()
-            
-            if not results:
-                return {'by_domain': {}, 'message': 'No data yet - use system for a few days'}
-            
-            # Domain completion rates
-            domain_stats = {}
-            domains = ['business', 'health', 'finance', 'parenting', 'work', 'personal']
-            
-            for domain in domains:
-                domain_data = [r for r in results if r[0] == domain]
-                if domain_data:
-                    completed = sum(1 for r in domain_data if r[2])
-                    total = len(domain_data)
-                    completion_rate = completed / total
-                    
-                    # Simple trend calculation
-                    if len(domain_data) >= 4:
-                        recent_half = domain_data[:len(domain_data)//2]
-                        earlier_half = domain_data[len(domain_data)//2:]
-                        
-                        recent_rate = sum(1 for r in recent_half if r[2]) / len(recent_half)
-                        earlier_rate = sum(1 for r in earlier_half if r[2]) / len(earlier_half)
-                        
-                        if recent_rate > earlier_rate + 0.1:
-                            trend = 'improving'
-                        elif recent_rate < earlier_rate - 0.1:
-                            trend = 'declining'
-                        else:
-                            trend = 'stable'
-                    else:
-                        trend = 'stable'
-                    
-                    domain_stats[domain] = {
-                        'completion_rate': completion_rate,
-                        'total_commitments': total,
-                        'trend': trend
-                    }
-            
-            return {'by_domain': domain_stats}
-            
+            return self.load_snapshot(user_id, (days,)).completion_patterns(days)
         except Exception as e:
             print(f"Completion pattern error: {e}")
             return {'by_domain': {}}
@@ -92,26 +76,7 @@ class PatternAnalyzer:
     def analyze_avoidance_patterns(self, user_id: int, days: int) -> Dict:
         """Identify avoidance patterns"""
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            cursor.execute('''
-            SELECT domain, commitment, date
-            FROM daily_checkins
-            WHERE user_id = ? AND completed = 0 AND date > date('now', '-{} days')
-            '''.format(days), (user_id,))
-            
-            failed_commitments = cursor.fetchall()
-            conn.close()
-            
-            if not failed_commitments:
-                return {'total_avoidance_rate': 0.0}
-            
-            total_commitments = self.get_total_commitments(user_id, days)
-            avoidance_rate = len(failed_commitments) / max(1, total_commitments)
-            
-            return {'total_avoidance_rate': avoidance_rate}
-            
+            return self.load_snapshot(user_id, (days,)).avoidance_patterns(days)
         except Exception as e:
             print(f"Avoidance pattern error: {e}")
             return {'total_avoidance_rate': 0.0}
@@ -119,18 +84,8 @@ class PatternAnalyzer:
     def get_total_commitments(self, user_id: int, days: int) -> int:
         """Get total commitments in period"""
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            cursor.execute('''
-            SELECT COUNT(*) FROM daily_checkins
-            WHERE user_id = ? AND date > date('now', '-{} days')
-            '''.format(days), (user_id,))
-            
-            result = cursor.fetchone()
-            conn.close()
-            
-            return result[0] if result else 0
+            daily_totals = self.storage.checkins.daily_totals(user_id, window_cutoff(days, user_today(self.storage, user_id)))
+            return sum(total for _, _, total, _ in daily_totals)
             
         except Exception as e:
             print(f"Total commitments error: {e}")
@@ -0,0 +1,96 @@
+import threading
+import weakref
+from config import DB_PATH
+from database.connection_pool import get_pool
+from database.db_setup import LifeDatabase
+from database.migrations import migrate
+from database.storage import get_storage
+from bot.conversation_manager import ConversationManager
+from bot.pattern_analyzer import PatternAnalyzer
+from bot.intervention_engine import InterventionEngine
+from bot.intervention_messages import InterventionMessageGenerator
+from bot.dashboard_generator import LifeDashboardGenerator
+from bot.success_reinforcement import SuccessReinforcementSystem
+
+class ServiceRegistry:
+    """Lazily built, process-wide service objects for one database
+
+    Agents, handlers and schedulers all take their analyzer, engine and
+    generators from here instead of constructing their own copies, and the
+    ones built on repositories share a single storage backend.
+    """
+
+    def __init__(self, db_path=DB_PATH, storage=None):
+        self.db_path = db_path
+        self.storage = storage or get_storage(db_path)
+        self.generation = get_pool(db_path).generation
+        self._services = {}
+        self._lock = threading.RLock()
+        self._schema_ready = False
+
+    def _get(self, name, factory):
+        service = self._services.get(name)
+        if service is None:
+            with self._lock:
+                service = self._services.get(name)
+                if service is None:
+                    service = factory()
+                    self._services[name] = service
+        return service
+
+    def init_schema(self):
+        """Bring the database up to the current schema version, once per database"""
+        with self._lock:
+            if not self._schema_ready:
+                if self.storage.uses_sql:
+                    migrate(self.db_path)
+                self._schema_ready = True
+
+    @property
+    def database(self) -> LifeDatabase:
+        return self._get('database', lambda: LifeDatabase(self.db_path, storage=self.storage))
+
+    @property
+    def conversation_manager(self) -> ConversationManager:
+        return self._get('conversation_manager', lambda: ConversationManager(self.db_path, storage=self.storage))
+
+    @property
+    def pattern_analyzer(self) -> PatternAnalyzer:
+        return self._get('pattern_analyzer', lambda: PatternAnalyzer(self.db_path, storage=self.storage))
+
+    @property
+    def intervention_engine(self) -> InterventionEngine:
+        return self._get('intervention_engine', self._build_intervention_engine)
+
+    @property
+    def intervention_generator(self) -> InterventionMessageGenerator:
+        return self._get('intervention_generator', InterventionMessageGenerator)
+
+    @property
+    def dashboard_generator(self) -> LifeDashboardGenerator:
+        return self._get('dashboard_generator', lambda: LifeDashboardGenerator(self.db_path, storage=self.storage))
+
+    @property
+    def success_reinforcement(self) -> SuccessReinforcementSystem:
+        return self._get('success_reinforcement', lambda: SuccessReinforcementSystem(self.db_path, self.pattern_analyzer))
+
+    def _build_intervention_engine(self):
+        return InterventionEngine(self.db_path, pattern_analyzer=self.pattern_analyzer, storage=self.storage)
+
+
+# Keyed by connection pool so closing a database's connections drops its services too
+_registries = weakref.WeakKeyDictionary()
+_registries_lock = threading.Lock()
+
+
+def get_services(db_path=DB_PATH) -> ServiceRegistry:
+    """Get the shared services for a database, rebuilt if its pool was reopened"""
+    pool = get_pool(db_path)
+    registry = _registries.get(pool)
+    if registry is None or registry.generation != pool.generation:
+        with _registries_lock:
+            registry = _registries.get(pool)
+            if registry is None or registry.generation != pool.generation:
+                registry = ServiceRegistry(db_path)
+                _registries[pool] = registry
+    return registry
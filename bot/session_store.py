@@ -0,0 +1,380 @@
+import copy
+import heapq
+import json
+import os
+import socket
+import threading
+import time
+import uuid
+from abc import ABC, abstractmethod
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Callable, Dict, Hashable, List, Optional, Tuple
+from config import DB_PATH
+from database.connection_pool import get_connection, get_pool
+from database.migrations import migrate
+from bot.conversation_journal import MESSAGE_TAIL, MessageRecord, message_tail
+
+# Seconds a process may keep serving a user's session from memory after its
+# last write; other processes wait for the lease to lapse before writing
+SESSION_LEASE_SECONDS = 5.0
+# Tries at a contended write, with exponential backoff from LEASE_POLL_INTERVAL
+# (about 6 seconds in all, so a lapsed lease is always reached)
+WRITE_ATTEMPTS = 8
+LEASE_POLL_INTERVAL = 0.05
+# Per-user locks within a process, striped so their number stays fixed
+LOCK_STRIPES = 64
+
+class SessionConflict(Exception):
+    """The session was changed, or is leased, by another writer since it was read"""
+
+def encode_state(state: Dict) -> str:
+    return json.dumps(state, default=_encode_value, separators=(',', ':'))
+
+def decode_state(data: str) -> Dict:
+    return json.loads(data, object_hook=_decode_value)
+
+def _encode_value(value):
+    if isinstance(value, datetime):
+        return {'__datetime__': value.isoformat()}
+    if isinstance(value, MessageRecord):
+        return {'__message__': [getattr(value, slot) for slot in MessageRecord.__slots__]}
+    if isinstance(value, deque):
+        return {'__deque__': list(value), 'maxlen': value.maxlen}
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+def _decode_value(value):
+    # Inner values arrive decoded, so a message's timestamp is already a datetime
+    if len(value) == 1 and '__datetime__' in value:
+        return datetime.fromisoformat(value['__datetime__'])
+    if len(value) == 1 and '__message__' in value:
+        return MessageRecord(*value['__message__'])
+    if len(value) == 2 and '__deque__' in value:
+        return deque(value['__deque__'], maxlen=value['maxlen'])
+    return value
+
+class SessionStore(ABC):
+    """Active conversation state per user, versioned for optimistic updates
+
+    load() returns a state with the version it was read at; save() and delete()
+    take that version back and raise SessionConflict if the session has moved
+    on since. start(), update() and remove() wrap them in a per-user lock and
+    retry conflicts, which is what callers normally want.
+
+    States are handed out and taken in as copies: changing one a caller holds
+    never changes the session, only update() and start() do.
+    """
+
+    def __init__(self):
+        self._locks = [threading.RLock() for _ in range(LOCK_STRIPES)]
+
+    @abstractmethod
+    def load(self, user_id: int) -> Optional[Tuple[Dict, int]]:
+        """(state, version) of the user's session, or None"""
+
+    @abstractmethod
+    def save(self, user_id: int, state: Dict, version: Optional[int]) -> int:
+        """Write state over the version read (None replaces any session) and return the new version"""
+
+    @abstractmethod
+    def delete(self, user_id: int, version: int):
+        pass
+
+    def idle(self, before: float) -> List[int]:
+        """Users whose sessions were last written before `before` (unix seconds) by any process"""
+        return []
+
+    def prune(self) -> int:
+        """Drop in-memory copies that can no longer be served; returns how many"""
+        return 0
+
+    def release(self):
+        """Let other processes take over this store's sessions right away"""
+
+    @contextmanager
+    def lock(self, user_id: int):
+        """Serialize one user's read-modify-writes within this process"""
+        with self._locks[hash(user_id) % LOCK_STRIPES]:
+            yield
+
+    def get(self, user_id: int) -> Optional[Dict]:
+        loaded = self.load(user_id)
+        return loaded[0] if loaded else None
+
+    def start(self, user_id: int, state: Dict) -> Dict:
+        """Make state the user's session, replacing any other"""
+        self._retry(user_id, lambda: self.save(user_id, state, None))
+        return state
+
+    def update(self, user_id: int, change: Callable[[Dict], None]) -> Optional[Dict]:
+        """Apply change to the user's session and save it; None if there is no session
+
+        change may run more than once, on a freshly loaded state each time.
+        """
+        def attempt():
+            loaded = self.load(user_id)
+            if loaded is None:
+                return None
+            state, version = loaded
+            change(state)
+            self.save(user_id, state, version)
+            return state
+        return self._retry(user_id, attempt)
+
+    def remove(self, user_id: int, only_if: Optional[Callable[[Dict], bool]] = None) -> Optional[Dict]:
+        """Delete the user's session and return its last state, or None
+
+        With only_if, the session is kept (and None returned) unless only_if(state) holds.
+        """
+        def attempt():
+            loaded = self.load(user_id)
+            if loaded is None or (only_if is not None and not only_if(loaded[0])):
+                return None
+            self.delete(user_id, loaded[1])
+            return loaded[0]
+        return self._retry(user_id, attempt)
+
+    def _retry(self, user_id, attempt):
+        with self.lock(user_id):
+            for retry in range(WRITE_ATTEMPTS - 1):
+                try:
+                    return attempt()
+                except SessionConflict:
+                    time.sleep(LEASE_POLL_INTERVAL * 2 ** retry)
+            return attempt()
+
+class MemorySessionStore(SessionStore):
+    """Sessions in a dict; only this process sees them"""
+
+    def __init__(self):
+        super().__init__()
+        self._sessions = {}  # user_id -> (state, version)
+
+    def load(self, user_id):
+        current = self._sessions.get(user_id)
+        return (copy.deepcopy(current[0]), current[1]) if current else None
+
+    def save(self, user_id, state, version):
+        current = self._sessions.get(user_id)
+        if version is not None and (current is None or current[1] != version):
+            raise SessionConflict(f"session for user {user_id} changed since version {version}")
+        new_version = (current[1] if current else 0) + 1
+        self._sessions[user_id] = (copy.deepcopy(state), new_version)
+        return new_version
+
+    def delete(self, user_id, version):
+        current = self._sessions.get(user_id)
+        if current is None or current[1] != version:
+            raise SessionConflict(f"session for user {user_id} changed since version {version}")
+        del self._sessions[user_id]
+
+class SessionEntry:
+    __slots__ = ('state', 'version', 'lease_expires')
+
+    def __init__(self, state: Dict, version: int, lease_expires: float):
+        self.state = state
+        self.version = version
+        self.lease_expires = lease_expires
+
+class SQLiteSessionStore(SessionStore):
+    """Sessions written through to the conversation_state table, read from memory while leased
+
+    Every write takes a lease on the user's row for this store (its owner id)
+    and must match the version last read. While the lease runs no other
+    process can write the row, so loads are answered from memory without a
+    query; once it lapses the next load reads the row again. Several bot
+    processes can share the database file this way, each serving a user once
+    the previous holder's lease has lapsed.
+
+    A row holds the conversation without its messages, so a new message only
+    rewrites the small part that changed. Messages go to conversation_messages
+    through the ConversationJournal, which flushes well inside a lease, and a
+    row loaded from the table gets its latest MESSAGE_TAIL back from there.
+    """
+
+    def __init__(self, db_path=DB_PATH, lease_seconds=SESSION_LEASE_SECONDS, owner=None, clock=time.time):
+        super().__init__()
+        self.db_path = db_path
+        self.lease_seconds = lease_seconds
+        self.owner = owner or f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self.clock = clock
+        self._entries = {}  # user_id -> SessionEntry for sessions this store holds the lease on
+        self._pool = None
+        migrate(db_path)
+
+    def load(self, user_id):
+        self._bind_pool()
+        entry = self._entries.get(user_id)
+        if entry is not None and entry.lease_expires > self.clock():
+            return copy.deepcopy(entry.state), entry.version
+
+        row = get_connection(self.db_path).execute('''
+        SELECT state, version, owner, lease_expires
+        FROM conversation_state
+        WHERE user_id = ?
+        ''', (user_id,)).fetchone()
+        if row is None:
+            self._entries.pop(user_id, None)
+            return None
+        state = decode_state(row[0])
+        if state.get('session_id') is not None:
+            state['messages'] = self._message_tail(state['session_id'])
+        if row[2] == self.owner and row[3] > self.clock():
+            self._entries[user_id] = SessionEntry(copy.deepcopy(state), row[1], row[3])
+        else:
+            self._entries.pop(user_id, None)
+        return state, row[1]
+
+    def save(self, user_id, state, version):
+        self._bind_pool()
+        now = self.clock()
+        lease_expires = now + self.lease_seconds
+        conn = get_connection(self.db_path)
+        try:
+            if version is None:
+                row = conn.execute('''
+                INSERT INTO conversation_state (user_id, session_id, version, state, owner, lease_expires)
+                VALUES (?, ?, 1, ?, ?, ?)
+                ON CONFLICT (user_id) DO UPDATE
+                SET session_id = excluded.session_id,
+                    version = version + 1,
+                    state = excluded.state,
+                    owner = excluded.owner,
+                    lease_expires = excluded.lease_expires,
+                    updated_at = CURRENT_TIMESTAMP
+                WHERE owner = excluded.owner OR lease_expires <= ?
+                RETURNING version
+                ''', (user_id, state.get('session_id'), self._encode(state), self.owner, lease_expires, now)).fetchone()
+                new_version = row[0] if row else None
+            else:
+                cursor = conn.execute('''
+                UPDATE conversation_state
+                SET session_id = ?,
+                    version = version + 1,
+                    state = ?,
+                    owner = ?,
+                    lease_expires = ?,
+                    updated_at = CURRENT_TIMESTAMP
+                WHERE user_id = ? AND version = ? AND (owner = ? OR lease_expires <= ?)
+                ''', (state.get('session_id'), self._encode(state), self.owner, lease_expires,
+                      user_id, version, self.owner, now))
+                new_version = version + 1 if cursor.rowcount == 1 else None
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            self._entries.pop(user_id, None)
+            raise
+
+        if new_version is None:
+            # The caller's copy may already be changed; read the row afresh next time
+            self._entries.pop(user_id, None)
+            raise SessionConflict(f"session for user {user_id} changed or is leased elsewhere")
+        self._entries[user_id] = SessionEntry(copy.deepcopy(state), new_version, lease_expires)
+        return new_version
+
+    def _encode(self, state):
+        # Messages are kept in conversation_messages, not rewritten with every change
+        return encode_state({key: value for key, value in state.items() if key != 'messages'})
+
+    def _message_tail(self, session_id):
+        rows = get_connection(self.db_path).execute('''
+        SELECT speaker, message_text, message_type, timestamp
+        FROM conversation_messages
+        WHERE session_id = ?
+        ORDER BY id DESC
+        LIMIT ?
+        ''', (session_id, MESSAGE_TAIL)).fetchall()
+        records = []
+        for speaker, message, message_type, timestamp in reversed(rows):
+            # Journal timestamps are UTC; live messages carry local time
+            local = datetime.fromisoformat(timestamp).replace(tzinfo=timezone.utc).astimezone().replace(tzinfo=None)
+            records.append(MessageRecord(speaker, message, message_type, local))
+        return message_tail(records)
+
+    def delete(self, user_id, version):
+        self._bind_pool()
+        conn = get_connection(self.db_path)
+        cursor = conn.execute('''
+        DELETE FROM conversation_state
+        WHERE user_id = ? AND version = ? AND (owner = ? OR lease_expires <= ?)
+        ''', (user_id, version, self.owner, self.clock()))
+        conn.commit()
+        self._entries.pop(user_id, None)
+        if cursor.rowcount != 1:
+            raise SessionConflict(f"session for user {user_id} changed or is leased elsewhere")
+
+    def idle(self, before):
+        cutoff = datetime.fromtimestamp(before, timezone.utc).strftime('%Y-%m-%d %H:%M:%S')
+        rows = get_connection(self.db_path).execute('''
+        SELECT user_id FROM conversation_state
+        WHERE updated_at < ? AND (owner = ? OR lease_expires <= ?)
+        ''', (cutoff, self.owner, self.clock())).fetchall()
+        return [row[0] for row in rows]
+
+    def prune(self):
+        now = self.clock()
+        lapsed = [user_id for user_id, entry in list(self._entries.items()) if entry.lease_expires <= now]
+        for user_id in lapsed:
+            self._entries.pop(user_id, None)
+        return len(lapsed)
+
+    def release(self):
+        """Give up this store's leases so other processes can take its sessions at once"""
+        self._entries.clear()
+        conn = get_connection(self.db_path)
+        conn.execute("UPDATE conversation_state SET lease_expires = 0 WHERE owner = ?", (self.owner,))
+        conn.commit()
+
+    def _bind_pool(self):
+        # A reopened pool may be a recreated file: forget what was cached and
+        # release leases before the new pool's connections close
+        pool = get_pool(self.db_path)
+        if pool is not self._pool:
+            self._entries.clear()
+            self._pool = pool
+            pool.add_close_hook(self.release)
+
+class ExpiryQueue:
+    """Deadlines per key on a lazy min-heap
+
+    touch() only pushes when a key is new or its deadline moves earlier, so
+    the heap keeps about one entry per live key. An entry whose key was
+    touched since goes back in at the key's real deadline when it surfaces,
+    and one whose key was discarded is dropped.
+    """
+
+    def __init__(self):
+        self._deadlines = {}  # key -> deadline
+        self._heap = []       # (deadline, key), possibly stale
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._deadlines)
+
+    def touch(self, key: Hashable, deadline: float):
+        with self._lock:
+            current = self._deadlines.get(key)
+            if current is None or deadline < current:
+                heapq.heappush(self._heap, (deadline, key))
+            self._deadlines[key] = deadline
+
+    def discard(self, key: Hashable):
+        with self._lock:
+            self._deadlines.pop(key, None)
+
+    def pop_due(self, now: float) -> List:
+        """Remove and return the keys whose deadlines are at or before now"""
+        due = []
+        with self._lock:
+            while self._heap and self._heap[0][0] <= now:
+                _, key = heapq.heappop(self._heap)
+                deadline = self._deadlines.get(key)
+                if deadline is None:
+                    continue
+                if deadline > now:
+                    heapq.heappush(self._heap, (deadline, key))
+                    continue
+                del self._deadlines[key]
+                due.append(key)
+        return due
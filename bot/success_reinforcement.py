@@ -1,14 +1,18 @@
+from config import DB_PATH
+
 class SuccessReinforcementSystem:
     """Recognizes and amplifies positive patterns"""
     
-    def __init__(self, db_path="life_agent.db"):
+    def __init__(self, db_path=DB_PATH, pattern_analyzer=None):
         self.db_path = db_path
+        self.pattern_analyzer = pattern_analyzer
     
-    def detect_success_patterns(self, user_id: int):
+    def detect_success_patterns(self, user_id: int, snapshot=None):
         """Detect positive momentum patterns"""
-        from bot.pattern_analyzer import PatternAnalyzer
-        analyzer = PatternAnalyzer(self.db_path)
-        patterns = analyzer.analyze_user_patterns(user_id, 7)
+        if self.pattern_analyzer is None:
+            from bot.pattern_analyzer import PatternAnalyzer
+            self.pattern_analyzer = PatternAnalyzer(self.db_path)
+        patterns = self.pattern_analyzer.analyze_user_patterns(user_id, 7, snapshot)
         
         success_patterns = []
         domain_patterns = patterns.get('completion_patterns', {}).get('by_domain', {})
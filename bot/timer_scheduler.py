@@ -0,0 +1,170 @@
+import asyncio
+import heapq
+import itertools
+import random
+from datetime import date, datetime, time, timedelta, timezone
+from typing import Optional
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+# How many jobs may run at once; the rest wait for a free slot
+MAX_CONCURRENT_JOBS = 4
+# For users who never set a timezone
+DEFAULT_TIMEZONE = 'UTC'
+
+def utc_now() -> datetime:
+    return datetime.now(timezone.utc)
+
+def get_timezone(name: str) -> ZoneInfo:
+    """ZoneInfo for an IANA name like 'Europe/London', raising ValueError if unknown"""
+    try:
+        return ZoneInfo(name)
+    except (ZoneInfoNotFoundError, ValueError) as e:
+        raise ValueError(f"Unknown timezone: {name}") from e
+
+def local_date(name: Optional[str], now: datetime = None) -> date:
+    """Today's date in a timezone, falling back to DEFAULT_TIMEZONE if it's unset or unknown"""
+    try:
+        tz = get_timezone(name or DEFAULT_TIMEZONE)
+    except ValueError:
+        tz = get_timezone(DEFAULT_TIMEZONE)
+    return (now or utc_now()).astimezone(tz).date()
+
+class DailyAt:
+    """Fires once a day at a wall-clock time in the given timezone"""
+
+    def __init__(self, hour: int, minute: int = 0, tz: str = 'UTC'):
+        self.at = time(hour, minute)
+        self.tz = get_timezone(tz)
+
+    def next_after(self, now: datetime) -> datetime:
+        local = now.astimezone(self.tz)
+        candidate = datetime.combine(local.date(), self.at, tzinfo=self.tz)
+        if candidate <= local:
+            candidate = datetime.combine(local.date() + timedelta(days=1), self.at, tzinfo=self.tz)
+        return candidate.astimezone(timezone.utc)
+
+class Every:
+    """Fires every N seconds, aligned to the clock (every 30 minutes means :00 and :30)"""
+
+    def __init__(self, seconds: float):
+        self.seconds = seconds
+
+    def next_after(self, now: datetime) -> datetime:
+        ticks = now.timestamp() // self.seconds + 1
+        return datetime.fromtimestamp(ticks * self.seconds, timezone.utc)
+
+class ScheduledJob:
+    __slots__ = ('name', 'schedule', 'callback', 'args', 'jitter', 'next_run', 'runs', 'running', 'cancelled')
+
+    def __init__(self, name, schedule, callback, args, jitter):
+        self.name = name
+        self.schedule = schedule
+        self.callback = callback
+        self.args = args
+        self.jitter = jitter
+        self.next_run = None
+        self.runs = 0
+        self.running = False
+        self.cancelled = False
+
+class TimerScheduler:
+    """Runs async and blocking jobs on the event loop from a heap of due times
+
+    The loop sleeps until the earliest job is due (or a job is added) instead
+    of polling. Each firing gets up to `jitter` seconds of random delay so
+    jobs sharing a time don't all start together, at most `max_concurrency`
+    jobs run at once, a job still running when it comes due again is skipped,
+    and plain (non-async) callbacks run on `executor` so they never block the loop.
+    """
+
+    def __init__(self, max_concurrency=MAX_CONCURRENT_JOBS, executor=None, clock=utc_now, rng=None):
+        self.jobs = {}
+        self.executor = executor
+        self.clock = clock
+        self.rng = rng or random.Random()
+        self._heap = []
+        self._seq = itertools.count()
+        self._slots = asyncio.Semaphore(max_concurrency)
+        self._wakeup = asyncio.Event()
+        self._task = None
+        self._running = set()
+
+    def add_job(self, name: str, schedule, callback, *args, jitter: float = 0.0) -> ScheduledJob:
+        """Schedule callback(*args), replacing any job with the same name"""
+        self.remove_job(name)
+        job = ScheduledJob(name, schedule, callback, args, jitter)
+        self.jobs[name] = job
+        self._push(job, self.clock())
+        return job
+
+    def remove_job(self, name: str):
+        job = self.jobs.pop(name, None)
+        if job is not None:
+            # Left in the heap and dropped when it surfaces
+            job.cancelled = True
+
+    def start(self):
+        """Start firing jobs on the running event loop"""
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._run(), name="timer-scheduler")
+
+    async def stop(self):
+        """Stop scheduling and wait for jobs already running to finish"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._running:
+            await asyncio.gather(*self._running, return_exceptions=True)
+
+    def _push(self, job: ScheduledJob, now: datetime):
+        delay = self.rng.uniform(0, job.jitter) if job.jitter else 0.0
+        job.next_run = job.schedule.next_after(now) + timedelta(seconds=delay)
+        heapq.heappush(self._heap, (job.next_run, next(self._seq), job))
+        self._wakeup.set()
+
+    async def _run(self):
+        while True:
+            now = self.clock()
+            while self._heap and self._heap[0][0] <= now:
+                _, _, job = heapq.heappop(self._heap)
+                if job.cancelled:
+                    continue
+                if job.running:
+                    print(f"Skipping {job.name}: previous run still in progress")
+                else:
+                    self._dispatch(job)
+                self._push(job, now)
+
+            self._wakeup.clear()
+            timeout = (self._heap[0][0] - now).total_seconds() if self._heap else None
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+
+    def _dispatch(self, job: ScheduledJob):
+        job.running = True
+        task = asyncio.get_running_loop().create_task(self._execute(job), name=f"job:{job.name}")
+        self._running.add(task)
+        task.add_done_callback(self._running.discard)
+
+    async def _execute(self, job: ScheduledJob):
+        try:
+            async with self._slots:
+                if job.cancelled:
+                    return
+                if asyncio.iscoroutinefunction(job.callback):
+                    await job.callback(*job.args)
+                elif self.executor is not None:
+                    await self.executor.run(job.callback, *job.args)
+                else:
+                    await asyncio.get_running_loop().run_in_executor(None, job.callback, *job.args)
+            job.runs += 1
+        except Exception as e:
+            print(f"Scheduled job {job.name} failed: {e}")
+        finally:
+            job.running = False
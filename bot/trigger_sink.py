@@ -0,0 +1,30 @@
+import json
+from config import DB_PATH
+from bot.write_behind import WriteBehindBuffer, utc_timestamp
+
+# Flush once this many triggers are waiting...
+TRIGGER_BATCH_SIZE = 100
+# ...or this many seconds after the first one arrived
+TRIGGER_FLUSH_INTERVAL = 1.0
+
+class TriggerSink(WriteBehindBuffer):
+    """Write-behind buffer for intervention triggers
+
+    Triggers are stamped when logged and written in bulk transactions by a
+    background thread, on close/shutdown, before the database's pooled
+    connections close, or whenever flush() is called. Readers of
+    intervention_triggers should flush() first to see their own writes.
+    """
+
+    name = 'trigger-sink'
+
+    def __init__(self, db_path=DB_PATH, batch_size=TRIGGER_BATCH_SIZE,
+                 flush_interval=TRIGGER_FLUSH_INTERVAL, storage=None):
+        super().__init__(db_path, batch_size, flush_interval, storage)
+
+    def add(self, user_id: int, trigger_type: str, domain: str, trigger_data: dict, severity: float):
+        """Buffer one trigger, flushing right away if the batch is full"""
+        self._append((user_id, trigger_type, domain, json.dumps(trigger_data), severity, utc_timestamp()))
+
+    def _write(self, batch):
+        self.storage.triggers.add_many(batch)
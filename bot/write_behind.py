@@ -0,0 +1,145 @@
+import atexit
+import functools
+import threading
+import weakref
+from abc import ABC, abstractmethod
+from datetime import datetime, timezone
+from typing import List, Tuple
+from config import DB_PATH
+from database.connection_pool import get_pool
+from database.storage import get_storage
+
+def utc_timestamp() -> str:
+    """Now in CURRENT_TIMESTAMP's format, so time-window queries are unaffected by buffering"""
+    return datetime.now(timezone.utc).strftime('%Y-%m-%d %H:%M:%S')
+
+# Buffers not closed yet, held weakly: exit handling, pool close hooks and idle
+# background threads keep none of them alive, only rows waiting to be written do
+_open_buffers = weakref.WeakSet()
+
+def _close_open_buffers():
+    for buffer in list(_open_buffers):
+        buffer.close()
+
+atexit.register(_close_open_buffers)
+
+def _flush_if_alive(ref):
+    buffer = ref()
+    if buffer is not None:
+        buffer.flush()
+
+def _stop(pending, closed):
+    closed.set()
+    pending.set()
+
+def _run(ref, pending, closed):
+    while not closed.is_set():
+        pending.wait()
+        buffer = ref()
+        if buffer is None:
+            return
+        # Give the batch time to fill unless we're shutting down
+        closed.wait(buffer.flush_interval)
+        buffer.flush()
+        del buffer
+
+class WriteBehindBuffer(ABC):
+    """Buffers rows and writes them in bulk transactions
+
+    Rows are written by a background thread once batch_size are waiting or
+    flush_interval seconds after the first arrived, on close/shutdown, before
+    the database's pooled connections close, or whenever flush() is called.
+    Subclasses stamp their rows, pass them to _append() and write a batch in
+    _write().
+    """
+
+    # Names the background thread and the flush error message
+    name = 'write-behind'
+
+    def __init__(self, db_path=DB_PATH, batch_size=100, flush_interval=1.0, storage=None):
+        self.db_path = db_path
+        self.storage = storage or get_storage(db_path)
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.flushed = 0
+        self._buffer = []
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._pending = threading.Event()
+        self._closed = threading.Event()
+        self._pool = None
+        self._thread = None
+        _open_buffers.add(self)
+        # Let the background thread end once the buffer is gone
+        weakref.finalize(self, _stop, self._pending, self._closed)
+
+    @abstractmethod
+    def _write(self, batch: List[Tuple]):
+        """Write one batch of rows in a single transaction"""
+        pass
+
+    def _append(self, row: Tuple):
+        """Buffer one row, flushing right away if the batch is full"""
+        with self._lock:
+            self._bind_pool()
+            self._buffer.append(row)
+            full = len(self._buffer) >= self.batch_size
+            self._pending.set()
+            if self._thread is None and not self._closed.is_set():
+                self._thread = threading.Thread(target=_run, args=(weakref.ref(self), self._pending, self._closed),
+                                                name=self.name, daemon=True)
+                self._thread.start()
+
+        if full or self._closed.is_set():
+            self.flush()
+
+    def flush(self, raise_errors: bool = False) -> int:
+        """Write every buffered row in one transaction and return how many
+
+        A failed batch is kept for the next attempt; the error is raised when
+        raise_errors is set, otherwise reported and 0 returned.
+        """
+        with self._flush_lock:
+            with self._lock:
+                batch, self._buffer = self._buffer, []
+                self._pending.clear()
+            if not batch:
+                return 0
+
+            try:
+                self._write(batch)
+            except Exception as e:
+                with self._lock:
+                    # Keep them for the next attempt, ahead of newer rows
+                    self._buffer[:0] = batch
+                    self._pending.set()
+                if raise_errors:
+                    raise
+                print(f"{self.name} flush error: {e}")
+                return 0
+
+            self.flushed += len(batch)
+            return len(batch)
+
+    def pending(self) -> int:
+        with self._lock:
+            return len(self._buffer)
+
+    def close(self):
+        """Stop the background thread and write whatever is left"""
+        _open_buffers.discard(self)
+        self._closed.set()
+        self._pending.set()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join()
+        self.flush()
+
+    def _bind_pool(self):
+        # Flush from the close hook of the pool rows were added on,
+        # so closing a database's connections never leaves rows behind
+        if not self.storage.uses_sql:
+            return
+        pool = get_pool(self.db_path)
+        if pool is not self._pool:
+            self._pool = pool
+            pool.add_close_hook(functools.partial(_flush_if_alive, weakref.ref(self)))
@@ -1 +1,14 @@
- 
+import os
+
+# Database file every component uses unless given another path
+DB_PATH = os.getenv('LIFE_AGENT_DB', 'life_agent.db')
+
+# Storage engine behind the repositories: 'sqlite' (the database file) or
+# 'memory' (in-process, nothing written to disk - for tests and benchmarks)
+STORAGE_BACKEND = os.getenv('LIFE_AGENT_STORAGE', 'sqlite')
+
+# Port serving Prometheus metrics at /metrics; 0 leaves the exporter off
+METRICS_PORT = int(os.getenv('LIFE_AGENT_METRICS_PORT', '0'))
+
+# Closed conversations older than this many days move to the compressed archive
+ARCHIVE_AFTER_DAYS = int(os.getenv('LIFE_AGENT_ARCHIVE_DAYS', '90'))
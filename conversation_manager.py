@@ -1,7 +1,7 @@
 from datetime import datetime, timedelta
 import json
-import sqlite3
 from typing import Dict, List, Optional
+from database.connection_pool import get_connection
 
 class ConversationManager:
     """Manages conversation state and context for all agents"""
@@ -13,7 +13,7 @@ class ConversationManager:
     
     def init_conversation_tables(self):
         """Initialize database tables for conversation tracking"""
-        conn = sqlite3.connect(self.db_path)
+        conn = get_connection(self.db_path)
         cursor = conn.cursor()
         
         cursor.execute('''
@@ -41,7 +41,6 @@ class ConversationManager:
         ''')
         
         conn.commit()
-        conn.close()
         print("✅ Conversation tables initialized")
     
     def start_conversation(self, user_id: int, agent_domain: str) -> str:
@@ -54,7 +53,7 @@ class ConversationManager:
         return session_id
     
     def _create_session(self, user_id: int, agent_domain: str) -> str:
-        conn = sqlite3.connect(self.db_path)
+        conn = get_connection(self.db_path)
         cursor = conn.cursor()
         cursor.execute('''
         INSERT INTO conversation_sessions (user_id, agent_domain)
@@ -62,7 +61,6 @@ class ConversationManager:
         ''', (user_id, agent_domain))
         session_id = cursor.lastrowid
         conn.commit()
-        conn.close()
         return session_id
 
 if __name__ == "__main__":
@@ -0,0 +1,116 @@
+import argparse
+import json
+import zlib
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from datetime import datetime, timedelta, timezone
+from typing import List, Tuple
+from config import DB_PATH, ARCHIVE_AFTER_DAYS
+from database.connection_pool import get_connection, transaction
+from database.migrations import migrate
+
+# Closed sessions moved to conversation_archive per transaction
+ARCHIVE_BATCH_SIZE = 500
+# Free pages handed back to the filesystem after each batch (4 KB pages: 4 MB)
+VACUUM_PAGES = 1000
+COMPRESSION_LEVEL = 6
+
+def compress_messages(messages: List[Tuple]) -> bytes:
+    return zlib.compress(json.dumps(messages, separators=(',', ':')).encode(), COMPRESSION_LEVEL)
+
+def decompress_messages(blob: bytes) -> List[Tuple]:
+    return [tuple(message) for message in json.loads(zlib.decompress(blob))]
+
+def archive_cutoff(days: float) -> str:
+    """CURRENT_TIMESTAMP-format time `days` ago; sessions ended before it are archived"""
+    return (datetime.now(timezone.utc) - timedelta(days=days)).strftime('%Y-%m-%d %H:%M:%S')
+
+def archive_sessions(db_path=DB_PATH, older_than_days=ARCHIVE_AFTER_DAYS, batch_size=ARCHIVE_BATCH_SIZE,
+                     vacuum_pages=VACUUM_PAGES) -> int:
+    """Move closed sessions that ended over older_than_days ago into the archive; returns how many
+
+    Each batch copies the sessions, with their messages compressed into one
+    blob per session, and deletes them from the hot tables in a single
+    transaction, then frees up to vacuum_pages pages so the file shrinks
+    a little at a time instead of in one long VACUUM.
+    """
+    migrate(db_path)
+    cutoff = archive_cutoff(older_than_days)
+    archived = 0
+    while True:
+        moved = _archive_batch(db_path, cutoff, batch_size)
+        if vacuum_pages:
+            get_connection(db_path).execute(f"PRAGMA incremental_vacuum({int(vacuum_pages)})").fetchall()
+        archived += moved
+        if moved < batch_size:
+            return archived
+
+def _archive_batch(db_path, cutoff, batch_size) -> int:
+    with transaction(db_path) as conn:
+        # Take the write lock before reading, so no message can be added to a
+        # session between copying its messages and deleting them
+        conn.commit()  # Start from a clean slate so BEGIN IMMEDIATE below is ours
+        conn.execute("BEGIN IMMEDIATE")
+        sessions = conn.execute('''
+        SELECT id, user_id, agent_domain, session_start, session_end, outcome, session_data
+        FROM conversation_sessions
+        WHERE session_end IS NOT NULL AND session_end < ?
+        ORDER BY session_end
+        LIMIT ?
+        ''', (cutoff, batch_size)).fetchall()
+        if not sessions:
+            return 0
+
+        session_ids = [session[0] for session in sessions]
+        placeholders = ', '.join('?' for _ in session_ids)
+        messages = {session_id: [] for session_id in session_ids}
+        message_ids = []
+        for message_id, session_id, *message in conn.execute(f'''
+        SELECT id, session_id, speaker, message_text, message_type, timestamp
+        FROM conversation_messages
+        WHERE session_id IN ({placeholders})
+        ORDER BY session_id, id
+        ''', session_ids):
+            messages[session_id].append(message)
+            message_ids.append((message_id,))
+
+        conn.executemany('''
+        INSERT OR REPLACE INTO conversation_archive
+        (session_id, user_id, agent_domain, session_start, session_end, outcome, session_data,
+         message_count, messages)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ''', [(*session, len(messages[session[0]]), compress_messages(messages[session[0]]))
+              for session in sessions])
+        # Exactly the messages archived above
+        conn.executemany("DELETE FROM conversation_messages WHERE id = ?", message_ids)
+        conn.execute(f"DELETE FROM conversation_sessions WHERE id IN ({placeholders})", session_ids)
+        return len(sessions)
+
+def archived_messages(conn, session_id: int) -> List[Tuple]:
+    """(speaker, message_text, message_type, timestamp) of an archived session, or [] if it isn't archived"""
+    row = conn.execute("SELECT messages FROM conversation_archive WHERE session_id = ?", (session_id,)).fetchone()
+    return decompress_messages(row[0]) if row else []
+
+def convert_to_incremental_vacuum(db_path=DB_PATH):
+    """Switch an existing file to incremental auto-vacuum (one full VACUUM; run while the bot is stopped)"""
+    conn = get_connection(db_path)
+    conn.commit()
+    conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+    conn.execute("VACUUM")
+    return conn.execute("PRAGMA auto_vacuum").fetchone()[0]
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Move old closed conversations into the compressed archive")
+    parser.add_argument("--db", default=DB_PATH, help="database path")
+    parser.add_argument("--days", type=float, default=ARCHIVE_AFTER_DAYS, help="archive sessions ended this long ago")
+    parser.add_argument("--convert", action="store_true",
+                        help="first switch the file to incremental auto-vacuum (runs a full VACUUM)")
+    args = parser.parse_args()
+
+    if args.convert:
+        print("🔧 Converting to incremental auto-vacuum...")
+        convert_to_incremental_vacuum(args.db)
+    archived = archive_sessions(args.db, args.days)
+    print(f"✅ Archived {archived} conversations ended more than {args.days:g} days ago")
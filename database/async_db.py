@@ -0,0 +1,23 @@
+import asyncio
+import contextvars
+import functools
+from concurrent.futures import ThreadPoolExecutor
+
+class AsyncDatabaseExecutor:
+    """Runs blocking database work on dedicated threads so async handlers can await it"""
+
+    def __init__(self, max_workers=4):
+        # Each worker thread gets its own pooled connection (see connection_pool),
+        # and WAL mode lets the readers run side by side
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="life-agent-db")
+
+    async def run(self, func, *args, **kwargs):
+        """Run func(*args, **kwargs) on a DB thread and await its result"""
+        loop = asyncio.get_running_loop()
+        # Carry the caller's context over so its statements count toward the awaiting handler
+        context = contextvars.copy_context()
+        return await loop.run_in_executor(self.executor, functools.partial(context.run, func, *args, **kwargs))
+
+    def shutdown(self, wait=True):
+        """Stop the worker threads"""
+        self.executor.shutdown(wait=wait)
@@ -0,0 +1,175 @@
+import itertools
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+from config import DB_PATH
+from database.metrics import METRICS
+
+# Performance PRAGMAs applied once when a pooled connection is opened
+PERFORMANCE_PRAGMAS = [
+    # Lets archiving hand freed pages back with incremental_vacuum. Only takes
+    # effect on new files; older ones need one `python -m database.archive --convert`
+    "PRAGMA auto_vacuum = INCREMENTAL;",
+    "PRAGMA journal_mode = WAL;",
+    "PRAGMA synchronous = NORMAL;",
+    "PRAGMA cache_size = 10000;",
+    "PRAGMA temp_store = memory;",
+    "PRAGMA mmap_size = 268435456;",  # 256MB
+]
+
+# Prepared statements kept per connection (sqlite3 reuses them by SQL text)
+STATEMENT_CACHE_SIZE = 256
+
+# Seconds to wait on a locked database before raising
+BUSY_TIMEOUT = 30
+
+_generations = itertools.count(1)
+
+
+class ConnectionPool:
+    """Hands out one reusable, pre-configured connection per thread for a database file"""
+
+    def __init__(self, db_path=DB_PATH):
+        self.db_path = db_path
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._connections = []
+        self.connections_opened = 0
+        # Names of lazily created schema pieces already checked for this file
+        self.prepared = set()
+        # Changes whenever the pool is (re)opened so caches can tell a recreated file apart
+        self.generation = next(_generations)
+        # Called before connections close, e.g. to flush buffered writes
+        self._close_hooks = []
+
+    def get_connection(self) -> sqlite3.Connection:
+        """Get this thread's connection, opening it on first use"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = self._open_connection()
+            self._local.conn = conn
+        return conn
+
+    @contextmanager
+    def transaction(self):
+        """Run a block of writes and commit, or roll back on error"""
+        conn = self.get_connection()
+        try:
+            yield conn
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+
+    def add_close_hook(self, hook):
+        """Run hook() before this pool's connections are closed"""
+        with self._lock:
+            if hook not in self._close_hooks:
+                self._close_hooks.append(hook)
+
+    def run_close_hooks(self):
+        with self._lock:
+            hooks = list(self._close_hooks)
+        for hook in hooks:
+            try:
+                hook()
+            except Exception as e:
+                print(f"Connection pool close hook error: {e}")
+
+    def close_all(self, run_hooks=True):
+        """Close every connection handed out by this pool"""
+        if run_hooks:
+            self.run_close_hooks()
+
+        with self._lock:
+            connections = self._connections
+            self._connections = []
+            # Threads holding a closed connection reopen on next use
+            self._local = threading.local()
+            self.prepared = set()
+            self.generation = next(_generations)
+
+        for conn in connections:
+            try:
+                conn.close()
+            except sqlite3.Error:
+                pass
+
+    def _open_connection(self) -> sqlite3.Connection:
+        # check_same_thread is off so close_all() can run from any thread;
+        # each connection is still only used by the thread that opened it
+        conn = sqlite3.connect(
+            self.db_path,
+            timeout=BUSY_TIMEOUT,
+            cached_statements=STATEMENT_CACHE_SIZE,
+            check_same_thread=False
+        )
+
+        for pragma in PERFORMANCE_PRAGMAS:
+            conn.execute(pragma)
+        # Counts statements per timed call and overall (see database.metrics)
+        conn.set_trace_callback(METRICS.count_statement)
+
+        with self._lock:
+            self._connections.append(conn)
+            self.connections_opened += 1
+
+        return conn
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def _pool_key(db_path: str) -> str:
+    if db_path == ':memory:' or db_path.startswith('file:'):
+        return db_path
+    return os.path.abspath(db_path)
+
+
+def get_pool(db_path=DB_PATH) -> ConnectionPool:
+    """Get the shared pool for a database file"""
+    key = _pool_key(db_path)
+    pool = _pools.get(key)
+    if pool is None:
+        with _pools_lock:
+            pool = _pools.get(key)
+            if pool is None:
+                pool = ConnectionPool(db_path)
+                _pools[key] = pool
+    return pool
+
+
+def get_connection(db_path=DB_PATH) -> sqlite3.Connection:
+    """Get the calling thread's pooled connection for a database file"""
+    return get_pool(db_path).get_connection()
+
+
+def transaction(db_path=DB_PATH):
+    """Context manager committing a block of writes on the pooled connection"""
+    return get_pool(db_path).transaction()
+
+
+def close_connections(db_path=None):
+    """Close pooled connections for one database, or all of them"""
+    with _pools_lock:
+        if db_path is None:
+            pools = list(_pools.values())
+        else:
+            pool = _pools.get(_pool_key(db_path))
+            pools = [pool] if pool else []
+
+    # Hooks run while the pool is still registered, so writes they flush
+    # through get_connection() land on it rather than on a fresh pool
+    for pool in pools:
+        pool.run_close_hooks()
+
+    with _pools_lock:
+        for pool in pools:
+            key = _pool_key(pool.db_path)
+            if _pools.get(key) is pool:
+                del _pools[key]
+
+    for pool in pools:
+        pool.close_all(run_hooks=False)
@@ -0,0 +1,78 @@
+import threading
+from config import DB_PATH
+from database.connection_pool import get_pool, get_connection
+
+# Tables whose writes change a user's analytics. Any insert, update or delete bumps
+# the user's row in user_data_versions, so caches can tell exactly when to reload.
+VERSIONED_TABLES = ['daily_checkins', 'intervention_triggers']
+
+VERSION_TABLE_SCHEMA = '''
+CREATE TABLE IF NOT EXISTS user_data_versions (
+    user_id INTEGER PRIMARY KEY,
+    version INTEGER NOT NULL DEFAULT 0
+)
+'''
+
+BUMP_VERSION = '''
+        INSERT INTO user_data_versions (user_id, version)
+        SELECT {row}.user_id, 1 WHERE {row}.user_id IS NOT NULL
+        ON CONFLICT (user_id) DO UPDATE SET version = version + 1;'''
+
+_prepare_lock = threading.Lock()
+
+def version_triggers(table):
+    """Trigger statements bumping the user version on every write to a table"""
+    return [
+        f'''
+        CREATE TRIGGER IF NOT EXISTS trg_{table}_version_insert
+        AFTER INSERT ON {table}
+        BEGIN{BUMP_VERSION.format(row='NEW')}
+        END
+        ''',
+        f'''
+        CREATE TRIGGER IF NOT EXISTS trg_{table}_version_delete
+        AFTER DELETE ON {table}
+        BEGIN{BUMP_VERSION.format(row='OLD')}
+        END
+        ''',
+        f'''
+        CREATE TRIGGER IF NOT EXISTS trg_{table}_version_update
+        AFTER UPDATE ON {table}
+        BEGIN{BUMP_VERSION.format(row='OLD')}{BUMP_VERSION.format(row='NEW')}
+        END
+        '''
+    ]
+
+def create_version_tracking(cursor, table):
+    """Create the version table and the triggers for one versioned table"""
+    cursor.execute(VERSION_TABLE_SCHEMA)
+    for statement in version_triggers(table):
+        cursor.execute(statement)
+
+def ensure_data_versions(db_path=DB_PATH):
+    """Install version triggers on whichever versioned tables exist yet"""
+    pool = get_pool(db_path)
+    if 'data_versions' in pool.prepared:
+        return
+
+    with _prepare_lock, pool.transaction() as conn:
+        cursor = conn.cursor()
+        placeholders = ', '.join('?' for _ in VERSIONED_TABLES)
+        cursor.execute(f'''
+        SELECT name FROM sqlite_master WHERE type='table' AND name IN ({placeholders})
+        ''', VERSIONED_TABLES)
+        existing = {row[0] for row in cursor.fetchall()}
+
+        for table in existing:
+            create_version_tracking(cursor, table)
+
+    # Keep checking until every table exists so late-created ones get triggers too
+    if existing == set(VERSIONED_TABLES):
+        pool.prepared.add('data_versions')
+
+def get_user_version(db_path, user_id) -> int:
+    """Current data version for a user (0 if they have never written anything)"""
+    ensure_data_versions(db_path)
+    conn = get_connection(db_path)
+    row = conn.execute("SELECT version FROM user_data_versions WHERE user_id = ?", (user_id,)).fetchone()
+    return row[0] if row else 0
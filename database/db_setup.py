@@ -1,47 +1,24 @@
-import sqlite3
 from datetime import datetime
+from config import DB_PATH
+from database.migrations import migrate
+from database.storage import get_storage
 
 class LifeDatabase:
-    def __init__(self, db_path="life_agent.db"):
+    def __init__(self, db_path=DB_PATH, storage=None):
         self.db_path = db_path
-        self.init_database()
-    
-    def init_database(self):
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-        CREATE TABLE IF NOT EXISTS users (
-            user_id INTEGER PRIMARY KEY,
-            username TEXT,
-            first_name TEXT,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        )
-        ''')
-        
-        cursor.execute('''
-        CREATE TABLE IF NOT EXISTS daily_checkins (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            user_id INTEGER,
-            date DATE,
-            domain TEXT,
-            commitment TEXT,
-            completed BOOLEAN DEFAULT FALSE,
-            notes TEXT,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            FOREIGN KEY (user_id) REFERENCES users (user_id)
-        )
-        ''')
-        
-        conn.commit()
-        conn.close()
+        self.storage = storage or get_storage(db_path)
+        if self.storage.uses_sql:
+            migrate(self.db_path)
     
     def add_user(self, user_id, username, first_name):
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        cursor.execute('''
-        INSERT OR IGNORE INTO users (user_id, username, first_name)
-        VALUES (?, ?, ?)
-        ''', (user_id, username, first_name))
-        conn.commit()
-        conn.close()
\ No newline at end of file
+        self.storage.users.add(user_id, username, first_name)
+    
+    def count_checkins(self, user_id):
+        return self.storage.checkins.count(user_id)
+    
+    def set_user_timezone(self, user_id, timezone):
+        self.storage.users.set_timezone(user_id, timezone)
+    
+    def get_user_timezones(self):
+        """Every known user with their timezone name (None if never set)"""
+        return self.storage.users.timezones()
@@ -0,0 +1,316 @@
+import bisect
+import itertools
+import threading
+from typing import Dict, Optional
+from database.repositories import (
+    Storage, UserRepository, CheckinRepository, TriggerRepository, InterventionRepository,
+    ConversationRepository, TemplateRepository, IncidentRepository, DeadLetterRepository, checkin_time, utc_timestamp
+)
+
+# Tells storages apart in data versions, like a connection pool's generation
+_instances = itertools.count(1)
+
+def bump(versions: Dict[int, int], user_id: Optional[int]):
+    if user_id is not None:
+        versions[user_id] = versions.get(user_id, 0) + 1
+
+class MemoryUserRepository(UserRepository):
+    def __init__(self, lock):
+        self._lock = lock
+        self._users = {}  # user_id -> [username, first_name, timezone]
+
+    def add(self, user_id, username, first_name):
+        with self._lock:
+            self._users.setdefault(user_id, [username, first_name, None])
+
+    def set_timezone(self, user_id, timezone):
+        with self._lock:
+            if user_id in self._users:
+                self._users[user_id][2] = timezone
+
+    def timezone(self, user_id):
+        with self._lock:
+            user = self._users.get(user_id)
+            return user[2] if user else None
+
+    def timezones(self):
+        with self._lock:
+            return {user_id: user[2] for user_id, user in self._users.items()}
+
+class CheckinRecord:
+    __slots__ = ('id', 'user_id', 'date', 'domain', 'commitment', 'completed', 'notes', 'created_at')
+
+    def __init__(self, checkin_id, user_id, date, domain, commitment, completed, notes, created_at):
+        self.id = checkin_id
+        self.user_id = user_id
+        self.date = date
+        self.domain = domain
+        self.commitment = commitment
+        self.completed = completed
+        self.notes = notes
+        self.created_at = created_at
+
+class MemoryCheckinRepository(CheckinRepository):
+    """Check-ins indexed by user/domain and user/date, with per-day totals kept as they change"""
+
+    def __init__(self, lock, versions):
+        self._lock = lock
+        self._versions = versions
+        self._ids = itertools.count(1)
+        self._records = {}
+        self._by_user = {}         # user_id -> [record]
+        self._by_domain = {}       # (user_id, domain) -> [record]
+        self._by_date = {}         # (user_id, date) -> [record]
+        self._days = {}            # user_id -> sorted [date] with totals
+        self._totals = {}          # user_id -> {date: {domain: [total, completed]}}
+
+    def add(self, user_id, date, domain, commitment, completed=False, notes=None, created_at=None):
+        with self._lock:
+            record = CheckinRecord(next(self._ids), user_id, date, domain, commitment, int(bool(completed)),
+                                   notes, created_at or utc_timestamp())
+            self._records[record.id] = record
+            self._by_user.setdefault(user_id, []).append(record)
+            self._by_domain.setdefault((user_id, domain), []).append(record)
+            self._by_date.setdefault((user_id, date), []).append(record)
+            self._count(record, 1)
+            bump(self._versions, user_id)
+            return record.id
+
+    def set_completed(self, checkin_id, completed=True):
+        with self._lock:
+            record = self._records.get(checkin_id)
+            if record is not None:
+                self._count(record, -1)
+                record.completed = int(bool(completed))
+                self._count(record, 1)
+                bump(self._versions, record.user_id)
+
+    def count(self, user_id):
+        with self._lock:
+            return len(self._by_user.get(user_id, ()))
+
+    def recent(self, user_id, domain, since):
+        with self._lock:
+            records = [r for r in self._by_domain.get((user_id, domain), ()) if r.date is not None and r.date > since]
+        records.sort(key=lambda r: r.date, reverse=True)
+        return [(r.date, r.commitment, r.completed, r.notes) for r in records]
+
+    def daily_totals(self, user_id, since):
+        with self._lock:
+            days = self._days.get(user_id, [])
+            totals = self._totals.get(user_id, {})
+            rows = []
+            for date in reversed(days[bisect.bisect_right(days, since):]):
+                for domain, (total, completed) in sorted(totals[date].items()):
+                    rows.append((date, domain, total, completed))
+            return rows
+
+    def open_on(self, user_id, date):
+        with self._lock:
+            return [(r.id, r.domain, r.commitment, r.created_at)
+                    for r in self._by_date.get((user_id, date), ()) if not r.completed]
+
+    def completion_history(self, user_id, since):
+        with self._lock:
+            records = [r for r in self._by_user.get(user_id, ()) if r.date is not None and r.date > since]
+        records.sort(key=lambda r: r.date, reverse=True)
+        return [(r.date, r.completed, checkin_time(r.created_at)[0]) for r in records]
+
+    def _count(self, record: CheckinRecord, sign: int):
+        # Same rule as the SQLite rollup triggers: rows missing a key aren't totalled
+        if record.user_id is None or record.date is None or record.domain is None:
+            return
+        days = self._days.setdefault(record.user_id, [])
+        totals = self._totals.setdefault(record.user_id, {})
+        if record.date not in totals:
+            bisect.insort(days, record.date)
+            totals[record.date] = {}
+        day = totals[record.date]
+        counts = day.setdefault(record.domain, [0, 0])
+        counts[0] += sign
+        counts[1] += sign * record.completed
+        if counts[0] <= 0:
+            del day[record.domain]
+            if not day:
+                del totals[record.date]
+                days.remove(record.date)
+
+class MemoryTriggerRepository(TriggerRepository):
+    """Triggers per (user, domain), kept sorted by timestamp for range reads"""
+
+    def __init__(self, lock, versions):
+        self._lock = lock
+        self._versions = versions
+        self._seq = itertools.count()
+        self._triggers = {}  # (user_id, domain) -> [(timestamp, seq, type, data, severity)]
+        self._domains = {}   # user_id -> domains with triggers
+
+    def add_many(self, rows):
+        with self._lock:
+            for user_id, trigger_type, domain, trigger_data, severity, timestamp in rows:
+                entries = self._triggers.setdefault((user_id, domain), [])
+                self._domains.setdefault(user_id, set()).add(domain)
+                bisect.insort(entries, (timestamp, next(self._seq), trigger_type, trigger_data, severity))
+                bump(self._versions, user_id)
+
+    def recent(self, user_id, domain, since):
+        with self._lock:
+            entries = self._triggers.get((user_id, domain), [])
+            start = bisect.bisect_right(entries, since, key=lambda entry: entry[0])
+            return [(trigger_type, data, severity, timestamp)
+                    for timestamp, _, trigger_type, data, severity in reversed(entries[start:])]
+
+    def summary(self, user_id, domain, since):
+        with self._lock:
+            entries = self._triggers.get((user_id, domain), [])
+            start = bisect.bisect_right(entries, since, key=lambda entry: entry[0])
+            return (len(entries) - start, max((entry[4] for entry in entries[start:]), default=0.0))
+
+    def count(self, user_id, since):
+        with self._lock:
+            total = 0
+            for domain in self._domains.get(user_id, ()):
+                entries = self._triggers[(user_id, domain)]
+                total += len(entries) - bisect.bisect_right(entries, since, key=lambda entry: entry[0])
+            return total
+
+class MemoryInterventionRepository(InterventionRepository):
+    def __init__(self, lock):
+        self._lock = lock
+        self._ids = itertools.count(1)
+        self._interventions = {}  # id -> (user_id, domain, level, trigger_condition, start_time)
+        self._latest = {}         # (user_id, domain) -> id of the newest active intervention
+
+    def add(self, user_id, domain, level, trigger_condition):
+        with self._lock:
+            intervention_id = next(self._ids)
+            self._interventions[intervention_id] = (user_id, domain, level, trigger_condition, utc_timestamp())
+            self._latest[(user_id, domain)] = intervention_id
+            return intervention_id
+
+    def active_level(self, user_id, domain):
+        with self._lock:
+            intervention_id = self._latest.get((user_id, domain))
+            return self._interventions[intervention_id][2] if intervention_id is not None else None
+
+class MemoryConversationRepository(ConversationRepository):
+    def __init__(self, lock):
+        self._lock = lock
+        self._ids = itertools.count(1)
+        self._sessions = {}  # id -> {user_id, agent_domain, session_start, session_end, session_data, outcome}
+        self._messages = {}  # session_id -> [(speaker, message_text, message_type, timestamp)]
+
+    def create_session(self, user_id, agent_domain):
+        with self._lock:
+            session_id = next(self._ids)
+            self._sessions[session_id] = {'user_id': user_id, 'agent_domain': agent_domain,
+                                          'session_start': utc_timestamp(), 'session_end': None,
+                                          'session_data': None, 'outcome': None}
+            return session_id
+
+    def add_message(self, session_id, speaker, message_text, message_type):
+        with self._lock:
+            self._messages.setdefault(session_id, []).append((speaker, message_text, message_type, utc_timestamp()))
+
+    def add_messages(self, rows):
+        with self._lock:
+            for session_id, speaker, message_text, message_type, timestamp in rows:
+                self._messages.setdefault(session_id, []).append((speaker, message_text, message_type, timestamp))
+
+    def end_session(self, session_id, outcome, session_data):
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is not None:
+                session.update(session_end=utc_timestamp(), outcome=outcome, session_data=session_data)
+
+    def end_sessions(self, rows):
+        with self._lock:
+            for session_id, outcome, session_data in rows:
+                self.end_session(session_id, outcome, session_data)
+
+    def messages(self, session_id):
+        with self._lock:
+            return list(self._messages.get(session_id, ()))
+
+class MemoryTemplateRepository(TemplateRepository):
+    def __init__(self, lock):
+        self._lock = lock
+        self._templates = {}  # name -> [category, subject_line, template_body, variables_used, usage_count, effectiveness]
+
+    def add(self, template_name, category, subject_line, template_body, variables_used):
+        with self._lock:
+            if template_name in self._templates:
+                return False
+            self._templates[template_name] = [category, subject_line, template_body, variables_used, 0, 5.0]
+            return True
+
+    def get(self, template_name):
+        with self._lock:
+            template = self._templates.get(template_name)
+            return tuple(template[1:4]) if template else None
+
+    def summaries(self):
+        with self._lock:
+            rows = [(name, t[0], t[1], t[4], t[5]) for name, t in self._templates.items()]
+        return sorted(rows, key=lambda row: (row[1], row[0]))
+
+class MemoryIncidentRepository(IncidentRepository):
+    def __init__(self, lock):
+        self._lock = lock
+        self._incidents = {}  # ticket_number -> incident dict
+
+    def upsert(self, incident):
+        with self._lock:
+            self._incidents[incident['ticket_number']] = dict(incident)
+
+    def count(self):
+        with self._lock:
+            return len(self._incidents)
+
+    def open_for(self, assignee):
+        with self._lock:
+            incidents = [dict(i) for i in self._incidents.values()
+                         if i['assignee'] == assignee and i['status'] in ('Open', 'In Progress', 'Scheduled')]
+        incidents.sort(key=lambda i: (i['priority'], i['urgency_score'], i['customer_impact']), reverse=True)
+        return incidents
+
+class MemoryDeadLetterRepository(DeadLetterRepository):
+    def __init__(self, lock):
+        self._lock = lock
+        self._dead_letters = []  # (chat_id, message, parse_mode, attempts, error, created_at), oldest first
+
+    def add(self, chat_id, message, parse_mode, attempts, error):
+        with self._lock:
+            self._dead_letters.append((chat_id, message, parse_mode, attempts, error, utc_timestamp()))
+            return len(self._dead_letters)
+
+    def recent(self, limit=100):
+        with self._lock:
+            return self._dead_letters[::-1][:limit]
+
+class MemoryStorage(Storage):
+    """Repositories held in process memory; nothing touches the disk
+
+    Answers the same queries as SQLiteStorage from indexed dicts and sorted
+    lists, so tests and benchmarks can run the bot's logic without file I/O.
+    """
+
+    backend = 'memory'
+    uses_sql = False
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._versions = {}
+        self.instance = next(_instances)
+        self.users = MemoryUserRepository(self._lock)
+        self.checkins = MemoryCheckinRepository(self._lock, self._versions)
+        self.triggers = MemoryTriggerRepository(self._lock, self._versions)
+        self.interventions = MemoryInterventionRepository(self._lock)
+        self.conversations = MemoryConversationRepository(self._lock)
+        self.templates = MemoryTemplateRepository(self._lock)
+        self.incidents = MemoryIncidentRepository(self._lock)
+        self.dead_letters = MemoryDeadLetterRepository(self._lock)
+
+    def data_version(self, user_id):
+        with self._lock:
+            return (self.instance, self._versions.get(user_id, 0))
@@ -0,0 +1,345 @@
+import bisect
+import contextvars
+import functools
+import inspect
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict
+
+# In-process metrics: latency and statements-per-call histograms for every
+# timed() call, error counters, and registered cache hit rates. Kept free of
+# bot imports so the connection pool can count statements into it.
+
+# Upper bounds in seconds, Prometheus style (each bucket counts values <= its bound)
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+STATEMENT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 250, 1000)
+
+LATENCY = 'life_agent_latency_seconds'
+STATEMENTS = 'life_agent_statements_per_call'
+ERRORS = 'life_agent_errors_total'
+STATEMENTS_TOTAL = 'life_agent_db_statements_total'
+SESSIONS_EXPIRED = 'life_agent_sessions_expired_total'
+SESSIONS_PERSISTED = 'life_agent_sessions_persisted_total'
+SESSIONS_LIVE = 'life_agent_sessions_live'
+
+HELP = {
+    LATENCY: ('histogram', "Time spent in instrumented calls"),
+    STATEMENTS: ('histogram', "SQL statements run during an instrumented call"),
+    ERRORS: ('counter', "Instrumented calls that raised"),
+    STATEMENTS_TOTAL: ('counter', "SQL statements run on pooled connections"),
+    SESSIONS_EXPIRED: ('counter', "Conversations closed as abandoned after going idle"),
+    SESSIONS_PERSISTED: ('counter', "Abandoned conversations written back to conversation_sessions"),
+}
+
+class Histogram:
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)  # last slot is +Inf
+        self.count = 0
+        self.sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.count += 1
+            self.sum += value
+
+    def merge(self, other: 'Histogram'):
+        with other._lock:
+            counts, count, total = list(other.counts), other.count, other.sum
+        with self._lock:
+            self.counts = [a + b for a, b in zip(self.counts, counts)]
+            self.count += count
+            self.sum += total
+
+    def clear(self):
+        with self._lock:
+            self.counts = [0] * (len(self.buckets) + 1)
+            self.count = 0
+            self.sum = 0.0
+
+    def quantile(self, q: float) -> float:
+        """Estimate of the q-quantile, interpolated within its bucket"""
+        with self._lock:
+            counts, count = list(self.counts), self.count
+        if not count:
+            return 0.0
+        rank = q * count
+        seen = 0
+        for index, bucket_count in enumerate(counts):
+            if bucket_count and seen + bucket_count >= rank:
+                if index == len(self.buckets):
+                    return self.buckets[-1]  # beyond the last bound; report the bound
+                lower = self.buckets[index - 1] if index else 0.0
+                return lower + (self.buckets[index] - lower) * (rank - seen) / bucket_count
+            seen += bucket_count
+        return self.buckets[-1]
+
+    def stats(self) -> Dict:
+        with self._lock:
+            count, total = self.count, self.sum
+        return {
+            'count': count,
+            'mean': total / count if count else 0.0,
+            'p50': self.quantile(0.5),
+            'p99': self.quantile(0.99),
+        }
+
+class Counter:
+    def __init__(self):
+        self.value = 0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: int = 1):
+        with self._lock:
+            self.value += amount
+
+    def clear(self):
+        with self._lock:
+            self.value = 0
+
+# Statements run so far by the outermost timed call in this context. Nested
+# calls share it, and AsyncDatabaseExecutor carries it onto its threads.
+_statements = contextvars.ContextVar('life_agent_statements', default=None)
+
+class Timer:
+    """Times a block or function into the registry, with its statement count
+
+    Use as `with registry.timed('engine', 'sweep'):` or as a decorator on
+    plain or async functions.
+    """
+
+    def __init__(self, registry: 'MetricsRegistry', component: str, operation: str):
+        self.registry = registry
+        self.component = component
+        self.operation = operation
+        self.latency = registry.histogram(LATENCY, component=component, operation=operation)
+        self.statements = registry.histogram(STATEMENTS, STATEMENT_BUCKETS, component=component, operation=operation)
+
+    def __enter__(self):
+        self._scope = self._start()
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        self._finish(self._scope, exc_type)
+        return False
+
+    def _start(self):
+        counter = _statements.get()
+        token = None
+        if counter is None:
+            counter = Counter()
+            token = _statements.set(counter)
+        return time.perf_counter(), counter, counter.value, token
+
+    def _finish(self, scope, exc_type):
+        started, counter, first_count, token = scope
+        self.latency.observe(time.perf_counter() - started)
+        self.statements.observe(counter.value - first_count)
+        if exc_type is not None:
+            self.registry.record_error(self.component, self.operation)
+        if token is not None:
+            _statements.reset(token)
+
+    def __call__(self, func):
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                scope = self._start()
+                try:
+                    result = await func(*args, **kwargs)
+                except BaseException as e:
+                    self._finish(scope, type(e))
+                    raise
+                self._finish(scope, None)
+                return result
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            scope = self._start()
+            try:
+                result = func(*args, **kwargs)
+            except BaseException as e:
+                self._finish(scope, type(e))
+                raise
+            self._finish(scope, None)
+            return result
+        return wrapper
+
+class MetricsRegistry:
+    """Histograms and counters keyed by name and labels, plus cache stats read on demand"""
+
+    def __init__(self):
+        self._metrics = {}  # (name, (('label', 'value'), ...)) -> Histogram or Counter
+        self._caches = {}   # name -> callable returning a stats dict with hits and misses
+        self._gauges = {}   # name -> (help text, callable returning the current value)
+        self._lock = threading.Lock()
+        self.started = time.time()
+        self._statements_total = self.counter(STATEMENTS_TOTAL)
+
+    def _get(self, name, labels, factory):
+        key = (name, tuple(sorted(labels.items())))
+        metric = self._metrics.get(key)
+        if metric is None:
+            with self._lock:
+                metric = self._metrics.setdefault(key, factory())
+        return metric
+
+    def histogram(self, name: str, buckets=LATENCY_BUCKETS, **labels) -> Histogram:
+        return self._get(name, labels, lambda: Histogram(buckets))
+
+    def counter(self, name: str, **labels) -> Counter:
+        return self._get(name, labels, Counter)
+
+    def timed(self, component: str, operation: str) -> Timer:
+        return Timer(self, component, operation)
+
+    def record_error(self, component: str, operation: str):
+        """Count a failure that was handled instead of raised out of a timed call"""
+        self.counter(ERRORS, component=component, operation=operation).inc()
+
+    def register_cache(self, name: str, stats: Callable[[], Dict]):
+        """Report a cache's hits and misses under name (a later registration replaces it)"""
+        with self._lock:
+            self._caches[name] = stats
+
+    def register_gauge(self, name: str, read: Callable[[], float], help_text: str):
+        """Export read()'s value as gauge name (a later registration replaces it)"""
+        with self._lock:
+            self._gauges[name] = (help_text, read)
+
+    def cache_stats(self) -> Dict[str, Dict]:
+        with self._lock:
+            caches = dict(self._caches)
+        return {name: stats() for name, stats in sorted(caches.items())}
+
+    def count_statement(self, statement: str):
+        """sqlite3 trace callback: count a statement for the current call and overall"""
+        counter = _statements.get()
+        if counter is not None:
+            counter.inc()
+        self._statements_total.inc()
+
+    def merged(self, name: str, **match) -> Histogram:
+        """One histogram combining every series of name whose labels include match"""
+        with self._lock:
+            series = [(dict(labels), metric) for (metric_name, labels), metric in self._metrics.items()
+                      if metric_name == name]
+        total = None
+        for labels, metric in series:
+            if all(labels.get(key) == value for key, value in match.items()):
+                if total is None:
+                    total = Histogram(metric.buckets)
+                total.merge(metric)
+        return total or Histogram()
+
+    def total(self, name: str, **match) -> int:
+        with self._lock:
+            series = [(dict(labels), metric) for (metric_name, labels), metric in self._metrics.items()
+                      if metric_name == name]
+        return sum(metric.value for labels, metric in series
+                   if all(labels.get(key) == value for key, value in match.items()))
+
+    def uptime(self) -> float:
+        return time.time() - self.started
+
+    def summary(self) -> Dict:
+        """Measured numbers for the status screen"""
+        return {
+            'requests': self.merged(LATENCY, component='handler').stats(),
+            'statements': self.merged(STATEMENTS, component='handler').stats(),
+            'db': self.merged(LATENCY, component='db').stats(),
+            'errors': self.total(ERRORS, component='handler'),
+            'caches': self.cache_stats(),
+            'uptime': self.uptime(),
+        }
+
+    def prometheus_text(self) -> str:
+        """Everything in the Prometheus text exposition format"""
+        with self._lock:
+            metrics = sorted(self._metrics.items(), key=lambda item: item[0])
+        lines = []
+        current = None
+        for (name, labels), metric in metrics:
+            if name != current:
+                kind, help_text = HELP.get(name, ('histogram' if isinstance(metric, Histogram) else 'counter', name))
+                lines += [f"# HELP {name} {help_text}", f"# TYPE {name} {kind}"]
+                current = name
+            if isinstance(metric, Histogram):
+                with metric._lock:
+                    counts, count, total = list(metric.counts), metric.count, metric.sum
+                cumulative = 0
+                for bound, bucket_count in zip(list(metric.buckets) + ['+Inf'], counts):
+                    cumulative += bucket_count
+                    lines.append(f"{name}_bucket{format_labels(labels, le=bound)} {cumulative}")
+                lines.append(f"{name}_sum{format_labels(labels)} {total}")
+                lines.append(f"{name}_count{format_labels(labels)} {count}")
+            else:
+                lines.append(f"{name}{format_labels(labels)} {metric.value}")
+
+        caches = self.cache_stats()
+        for name, kind, help_text, key in [
+            ('life_agent_cache_hits_total', 'counter', "Cache lookups answered from the cache", 'hits'),
+            ('life_agent_cache_misses_total', 'counter', "Cache lookups that missed", 'misses'),
+            ('life_agent_cache_hit_ratio', 'gauge', "Share of cache lookups that hit", 'hit_rate'),
+        ]:
+            if caches:
+                lines += [f"# HELP {name} {help_text}", f"# TYPE {name} {kind}"]
+                lines += [f"{name}{format_labels((('cache', cache),))} {stats[key]}" for cache, stats in caches.items()]
+
+        with self._lock:
+            gauges = sorted(self._gauges.items())
+        for name, (help_text, read) in gauges:
+            lines += [f"# HELP {name} {help_text}", f"# TYPE {name} gauge", f"{name} {read()}"]
+
+        lines += ["# HELP life_agent_uptime_seconds Seconds since the process started",
+                  "# TYPE life_agent_uptime_seconds gauge",
+                  f"life_agent_uptime_seconds {self.uptime():.0f}"]
+        return "\n".join(lines) + "\n"
+
+    def reset(self):
+        """Zero every series in place (timers hold on to theirs; registered caches stay)"""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        for metric in metrics:
+            metric.clear()
+        self.started = time.time()
+
+def format_labels(labels, **extra) -> str:
+    pairs = list(labels) + list(extra.items())
+    if not pairs:
+        return ''
+    escaped = (str(value).replace('\\', '\\\\').replace('"', '\\"') for _, value in pairs)
+    return '{' + ','.join(f'{key}="{value}"' for (key, _), value in zip(pairs, escaped)) + '}'
+
+# The process-wide registry every component reports to
+METRICS = MetricsRegistry()
+
+def timed(component: str, operation: str) -> Timer:
+    """Time a block or function into METRICS"""
+    return METRICS.timed(component, operation)
+
+def start_metrics_server(port: int, registry: MetricsRegistry = METRICS, host: str = '') -> ThreadingHTTPServer:
+    """Serve registry.prometheus_text() at /metrics from a daemon thread"""
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split('?')[0] != '/metrics':
+                self.send_error(404)
+                return
+            body = registry.prometheus_text().encode()
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), MetricsHandler)
+    threading.Thread(target=server.serve_forever, name="life-agent-metrics", daemon=True).start()
+    return server
@@ -0,0 +1,556 @@
+import argparse
+import threading
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import DB_PATH
+from database.connection_pool import get_pool
+from database.rollups import create_rollup_schema
+from database.data_versions import create_version_tracking
+
+# The whole schema, as an ordered list of migrations. PRAGMA user_version records
+# how many have been applied to a database file, so startup costs one query once
+# a file is current. Append new migrations; never edit one that has shipped.
+
+CORE_TABLES = [
+    '''
+    CREATE TABLE IF NOT EXISTS users (
+        user_id INTEGER PRIMARY KEY,
+        username TEXT,
+        first_name TEXT,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+    ''',
+    '''
+    CREATE TABLE IF NOT EXISTS daily_checkins (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        user_id INTEGER,
+        date DATE,
+        domain TEXT,
+        commitment TEXT,
+        completed BOOLEAN DEFAULT FALSE,
+        notes TEXT,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY (user_id) REFERENCES users (user_id)
+    )
+    ''',
+    '''
+    CREATE TABLE IF NOT EXISTS conversation_sessions (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        user_id INTEGER,
+        agent_domain TEXT,
+        session_start TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        session_end TIMESTAMP,
+        session_data TEXT, -- JSON data
+        outcome TEXT -- committed, abandoned, intervened
+    )
+    ''',
+    '''
+    CREATE TABLE IF NOT EXISTS conversation_messages (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        session_id INTEGER,
+        speaker TEXT, -- user, agent
+        message_text TEXT,
+        message_type TEXT, -- prompt, response, analysis, intervention
+        timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY (session_id) REFERENCES conversation_sessions (id)
+    )
+    ''',
+    '''
+    CREATE TABLE IF NOT EXISTS behavioral_patterns (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        user_id INTEGER,
+        pattern_type TEXT, -- avoidance, success, energy, mood
+        pattern_description TEXT,
+        confidence_score REAL, -- 0.0 to 1.0
+        occurrences INTEGER,
+        last_occurrence TIMESTAMP,
+        triggers TEXT, -- JSON array of trigger conditions
+        outcomes TEXT, -- JSON array of typical outcomes
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+    ''',
+    '''
+    CREATE TABLE IF NOT EXISTS active_interventions (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        user_id INTEGER,
+        domain TEXT,
+        intervention_level INTEGER, -- 1-5 escalation level
+        trigger_condition TEXT,
+        start_time TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        last_escalation TIMESTAMP,
+        response_received BOOLEAN DEFAULT FALSE,
+        resolution_status TEXT DEFAULT 'active', -- active, resolved, escalated
+        effectiveness_score REAL
+    )
+    ''',
+    '''
+    CREATE TABLE IF NOT EXISTS intervention_triggers (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        user_id INTEGER,
+        trigger_type TEXT, -- missed_commitment, pattern_decline, avoidance_language
+        domain TEXT,
+        trigger_data TEXT, -- JSON with specific details
+        severity_score REAL, -- 0.0 to 1.0
+        timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        intervention_deployed BOOLEAN DEFAULT FALSE
+    )
+    ''',
+    '''
+    CREATE TABLE IF NOT EXISTS dead_letters (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        chat_id INTEGER,
+        message TEXT,
+        parse_mode TEXT,
+        attempts INTEGER,
+        error TEXT,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+    ''',
+]
+
+# Pattern analysis tables (formerly AdvancedDatabaseManager)
+ADVANCED_TABLES = [
+    '''
+    CREATE TABLE IF NOT EXISTS daily_metrics (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        user_id INTEGER,
+        date DATE,
+        sleep_quality INTEGER,  -- 1-10 scale
+        energy_level INTEGER,   -- 1-10 scale
+        stress_level INTEGER,   -- 1-10 scale
+        mood_rating INTEGER,    -- 1-10 scale
+        external_factors TEXT,  -- JSON: weather, events, etc.
+        overall_performance REAL,  -- calculated score
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+    ''',
+    '''
+    CREATE TABLE IF NOT EXISTS performance_correlations (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        user_id INTEGER,
+        factor_1 TEXT,  -- domain or metric
+        factor_2 TEXT,  -- domain or metric
+        correlation_strength REAL,  -- -1.0 to 1.0
+        sample_size INTEGER,
+        last_calculated TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+    ''',
+    '''
+    CREATE TABLE IF NOT EXISTS success_predictions (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        user_id INTEGER,
+        domain TEXT,
+        prediction_date DATE,
+        predicted_success_rate REAL,  -- 0.0 to 1.0
+        actual_success_rate REAL,  -- filled in later for accuracy tracking
+        factors_considered TEXT,  -- JSON array
+        confidence_level REAL,  -- 0.0 to 1.0
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+    ''',
+]
+
+# Work automation tables (formerly fix_tables.py and the work_automation scripts)
+WORK_TABLES = [
+    '''
+    CREATE TABLE IF NOT EXISTS work_tasks (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        user_id INTEGER,
+        task_name TEXT,
+        task_category TEXT,
+        original_duration INTEGER,
+        automated_duration INTEGER,
+        automation_method TEXT,
+        frequency_per_week INTEGER,
+        automation_date DATE,
+        time_saved_weekly INTEGER,
+        automation_status TEXT
+    )
+    ''',
+    '''
+    CREATE TABLE IF NOT EXISTS automation_templates (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        template_name TEXT,
+        template_category TEXT,
+        template_content TEXT,
+        usage_count INTEGER DEFAULT 0,
+        effectiveness_score REAL DEFAULT 0.0,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        last_used TIMESTAMP
+    )
+    ''',
+    '''
+    CREATE TABLE IF NOT EXISTS work_efficiency_metrics (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        user_id INTEGER,
+        date DATE,
+        total_work_minutes INTEGER,
+        automated_minutes INTEGER,
+        manual_minutes INTEGER,
+        efficiency_score REAL,
+        tasks_automated INTEGER,
+        new_automations_implemented INTEGER
+    )
+    ''',
+    '''
+    CREATE TABLE IF NOT EXISTS email_templates (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        template_name TEXT UNIQUE NOT NULL,
+        category TEXT NOT NULL,
+        subject_line TEXT NOT NULL,
+        template_body TEXT NOT NULL,
+        variables_used TEXT,
+        usage_count INTEGER DEFAULT 0,
+        effectiveness_score REAL DEFAULT 5.0,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        last_used TIMESTAMP
+    )
+    ''',
+    '''
+    CREATE TABLE IF NOT EXISTS automation_portfolio (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        system_name TEXT UNIQUE NOT NULL,
+        category TEXT NOT NULL,
+        description TEXT NOT NULL,
+        time_before_hours REAL NOT NULL,
+        time_after_hours REAL NOT NULL,
+        weekly_usage INTEGER NOT NULL,
+        annual_savings_hours REAL NOT NULL,
+        annual_value_dollars REAL NOT NULL,
+        implementation_date TEXT NOT NULL,
+        complexity_level TEXT NOT NULL,
+        client_applicable BOOLEAN DEFAULT TRUE,
+        demo_available BOOLEAN DEFAULT TRUE,
+        roi_percentage REAL NOT NULL,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+    ''',
+    '''
+    CREATE TABLE IF NOT EXISTS real_jira_incidents (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        ticket_number TEXT UNIQUE NOT NULL,
+        summary TEXT NOT NULL,
+        priority TEXT NOT NULL,
+        status TEXT NOT NULL,
+        assignee TEXT NOT NULL,
+        customer TEXT NOT NULL,
+        created_date TEXT NOT NULL,
+        due_date TEXT,
+        estimated_hours REAL DEFAULT 1.0,
+        complexity_score REAL DEFAULT 0.5,
+        customer_impact INTEGER DEFAULT 5,
+        urgency_score REAL DEFAULT 0.5,
+        tags TEXT DEFAULT '',
+        last_updated TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+    ''',
+]
+
+# Lookup indexes (formerly created by optimize_db.py)
+QUERY_INDEXES = [
+    "CREATE INDEX IF NOT EXISTS idx_checkins_user_date ON daily_checkins(user_id, date)",
+    "CREATE INDEX IF NOT EXISTS idx_checkins_domain ON daily_checkins(domain)",
+    "CREATE INDEX IF NOT EXISTS idx_checkins_completed ON daily_checkins(completed)",
+    "CREATE INDEX IF NOT EXISTS idx_checkins_date_range ON daily_checkins(date)",
+    "CREATE INDEX IF NOT EXISTS idx_conversation_user ON conversation_sessions(user_id)",
+    "CREATE INDEX IF NOT EXISTS idx_conversation_agent ON conversation_sessions(agent_domain)",
+    "CREATE INDEX IF NOT EXISTS idx_messages_session ON conversation_messages(session_id)",
+    "CREATE INDEX IF NOT EXISTS idx_patterns_user ON behavioral_patterns(user_id)",
+    "CREATE INDEX IF NOT EXISTS idx_patterns_type ON behavioral_patterns(pattern_type)",
+    "CREATE INDEX IF NOT EXISTS idx_interventions_user ON active_interventions(user_id)",
+    "CREATE INDEX IF NOT EXISTS idx_interventions_domain ON active_interventions(domain)",
+    "CREATE INDEX IF NOT EXISTS idx_triggers_user_domain ON intervention_triggers(user_id, domain)",
+    "CREATE INDEX IF NOT EXISTS idx_work_tasks_user ON work_tasks(user_id)",
+    "CREATE INDEX IF NOT EXISTS idx_work_tasks_status ON work_tasks(automation_status)",
+]
+
+# Indexes shaped for the hot queries, so each is answered from the index alone:
+# check-ins by (user, date) for the dashboard and rollup backfills, triggers by
+# (user, domain, time) for intervention levels, and the latest active intervention.
+# They replace the single-column indexes that duplicated their prefixes or were
+# too unselective (domain, completed) to be worth their write cost.
+COVERING_INDEXES = [
+    "CREATE INDEX IF NOT EXISTS idx_checkins_user_date_cover "
+    "ON daily_checkins(user_id, date, domain, completed, created_at)",
+    "CREATE INDEX IF NOT EXISTS idx_triggers_user_domain_time "
+    "ON intervention_triggers(user_id, domain, timestamp, severity_score)",
+    "CREATE INDEX IF NOT EXISTS idx_interventions_active "
+    "ON active_interventions(user_id, domain, resolution_status, start_time, intervention_level)",
+    "DROP INDEX IF EXISTS idx_checkins_user_date",
+    "DROP INDEX IF EXISTS idx_checkins_domain",
+    "DROP INDEX IF EXISTS idx_checkins_completed",
+    "DROP INDEX IF EXISTS idx_triggers_user_domain",
+    "DROP INDEX IF EXISTS idx_interventions_user",
+    "DROP INDEX IF EXISTS idx_interventions_domain",
+]
+
+# When each check-in was made, as UTC weekday (0 = Sunday, as strftime('%w')) and
+# hour, stored at write time so time-of-day analytics group on plain columns.
+# Inserts write them with the row (see CHECKIN_TIME_ON_INSERT); a trigger keeps
+# them in step when created_at is edited.
+CHECKIN_TIME_COLUMNS = [
+    "ALTER TABLE daily_checkins ADD COLUMN created_weekday INTEGER",
+    "ALTER TABLE daily_checkins ADD COLUMN created_hour INTEGER",
+]
+
+SET_CHECKIN_TIME = '''
+        UPDATE daily_checkins
+        SET created_weekday = CAST(strftime('%w', NEW.created_at) AS INTEGER),
+            created_hour = CAST(strftime('%H', NEW.created_at) AS INTEGER)
+        WHERE id = NEW.id;'''
+
+CHECKIN_TIME_SCHEMA = [
+    f'''
+    CREATE TRIGGER IF NOT EXISTS trg_checkins_time_insert
+    AFTER INSERT ON daily_checkins
+    BEGIN{SET_CHECKIN_TIME}
+    END
+    ''',
+    f'''
+    CREATE TRIGGER IF NOT EXISTS trg_checkins_time_update
+    AFTER UPDATE OF created_at ON daily_checkins
+    BEGIN{SET_CHECKIN_TIME}
+    END
+    ''',
+    '''
+    UPDATE daily_checkins
+    SET created_weekday = CAST(strftime('%w', created_at) AS INTEGER),
+        created_hour = CAST(strftime('%H', created_at) AS INTEGER)
+    ''',
+    # Covers the weekday breakdown too, so it replaces the created_at variant
+    "CREATE INDEX IF NOT EXISTS idx_checkins_user_date_time "
+    "ON daily_checkins(user_id, date, domain, completed, created_weekday, created_hour)",
+    "DROP INDEX IF EXISTS idx_checkins_user_date_cover",
+]
+
+# Active conversations, one row per user, shared by every bot process on the
+# file. version increments on each write for optimistic updates; owner and
+# lease_expires (unix seconds) say which process may serve it from memory.
+CONVERSATION_STATE_SCHEMA = [
+    '''
+    CREATE TABLE IF NOT EXISTS conversation_state (
+        user_id INTEGER PRIMARY KEY,
+        session_id INTEGER,
+        version INTEGER NOT NULL,
+        state TEXT NOT NULL, -- JSON
+        owner TEXT,
+        lease_expires REAL,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+    ''',
+]
+
+# Closed conversations moved out of conversation_sessions/_messages by
+# database.archive once they are old enough, one row per session with its
+# messages as a zlib-compressed JSON array
+CONVERSATION_ARCHIVE_SCHEMA = [
+    '''
+    CREATE TABLE IF NOT EXISTS conversation_archive (
+        session_id INTEGER PRIMARY KEY,
+        user_id INTEGER,
+        agent_domain TEXT,
+        session_start TIMESTAMP,
+        session_end TIMESTAMP,
+        outcome TEXT,
+        session_data TEXT,
+        message_count INTEGER NOT NULL,
+        messages BLOB NOT NULL -- [[speaker, message_text, message_type, timestamp], ...]
+    )
+    ''',
+    "CREATE INDEX IF NOT EXISTS idx_archive_user ON conversation_archive(user_id, session_end)",
+    # Finds sessions due for archiving without scanning the hot table
+    "CREATE INDEX IF NOT EXISTS idx_conversation_end ON conversation_sessions(session_end)",
+]
+
+# Full-text indexes over what users said and committed to, kept current by
+# triggers. user_key holds one 'u<user_id>' token per row so a search is the
+# intersection of the user's postings with the query's. Message entries stay
+# when database.archive moves a session out, so archived history remains
+# searchable (messages are append-only; the index is only added to).
+SEARCH_SCHEMA = [
+    '''
+    CREATE VIRTUAL TABLE IF NOT EXISTS message_search USING fts5(
+        message_text, user_key, session_id UNINDEXED, speaker UNINDEXED, timestamp UNINDEXED,
+        tokenize = 'porter unicode61'
+    )
+    ''',
+    '''
+    CREATE VIRTUAL TABLE IF NOT EXISTS commitment_search USING fts5(
+        commitment, user_key, date UNINDEXED, domain UNINDEXED,
+        tokenize = 'porter unicode61'
+    )
+    ''',
+    '''
+    CREATE TRIGGER IF NOT EXISTS trg_messages_search_insert
+    AFTER INSERT ON conversation_messages
+    BEGIN
+        INSERT INTO message_search (rowid, message_text, user_key, session_id, speaker, timestamp)
+        SELECT NEW.id, NEW.message_text, 'u' || s.user_id, NEW.session_id, NEW.speaker, NEW.timestamp
+        FROM conversation_sessions s
+        WHERE s.id = NEW.session_id AND NEW.message_text IS NOT NULL;
+    END
+    ''',
+    '''
+    CREATE TRIGGER IF NOT EXISTS trg_checkins_search_insert
+    AFTER INSERT ON daily_checkins
+    BEGIN
+        INSERT INTO commitment_search (rowid, commitment, user_key, date, domain)
+        SELECT NEW.id, NEW.commitment, 'u' || NEW.user_id, NEW.date, NEW.domain
+        WHERE NEW.commitment IS NOT NULL;
+    END
+    ''',
+    '''
+    CREATE TRIGGER IF NOT EXISTS trg_checkins_search_delete
+    AFTER DELETE ON daily_checkins
+    BEGIN
+        DELETE FROM commitment_search WHERE rowid = OLD.id;
+    END
+    ''',
+    '''
+    CREATE TRIGGER IF NOT EXISTS trg_checkins_search_update
+    AFTER UPDATE OF user_id, date, domain, commitment ON daily_checkins
+    BEGIN
+        DELETE FROM commitment_search WHERE rowid = OLD.id;
+        INSERT INTO commitment_search (rowid, commitment, user_key, date, domain)
+        SELECT NEW.id, NEW.commitment, 'u' || NEW.user_id, NEW.date, NEW.domain
+        WHERE NEW.commitment IS NOT NULL;
+    END
+    ''',
+    # Backfill; messages already archived stay out, as their ids weren't kept
+    '''
+    INSERT INTO message_search (rowid, message_text, user_key, session_id, speaker, timestamp)
+    SELECT m.id, m.message_text, 'u' || s.user_id, m.session_id, m.speaker, m.timestamp
+    FROM conversation_messages m
+    JOIN conversation_sessions s ON s.id = m.session_id
+    WHERE m.message_text IS NOT NULL
+    ''',
+    '''
+    INSERT INTO commitment_search (rowid, commitment, user_key, date, domain)
+    SELECT id, commitment, 'u' || user_id, date, domain
+    FROM daily_checkins
+    WHERE commitment IS NOT NULL
+    ''',
+    "INSERT INTO message_search (message_search) VALUES ('optimize')",
+    "INSERT INTO commitment_search (commitment_search) VALUES ('optimize')",
+]
+
+# The insert trigger's UPDATE was a second row and index write per check-in, and
+# bumped the user's data version a second time: CheckinRepository.add and bulk
+# loaders now write weekday and hour with the row. Rows added without them since
+# are filled in once.
+CHECKIN_TIME_ON_INSERT = [
+    "DROP TRIGGER IF EXISTS trg_checkins_time_insert",
+    '''
+    UPDATE daily_checkins
+    SET created_weekday = CAST(strftime('%w', created_at) AS INTEGER),
+        created_hour = CAST(strftime('%H', created_at) AS INTEGER)
+    WHERE created_weekday IS NULL AND created_at IS NOT NULL
+    ''',
+]
+
+def create_tables(cursor):
+    # IF NOT EXISTS so files created before migrations are adopted as they are
+    for statement in CORE_TABLES + ADVANCED_TABLES + WORK_TABLES:
+        cursor.execute(statement)
+    create_rollup_schema(cursor)
+    create_version_tracking(cursor, 'daily_checkins')
+    create_version_tracking(cursor, 'intervention_triggers')
+
+def add_user_timezones(cursor):
+    # Files from before migrations may already have the column
+    columns = [row[1] for row in cursor.execute("PRAGMA table_info(users)")]
+    if 'timezone' not in columns:
+        cursor.execute("ALTER TABLE users ADD COLUMN timezone TEXT")
+
+def create_query_indexes(cursor):
+    for statement in QUERY_INDEXES:
+        cursor.execute(statement)
+
+def create_covering_indexes(cursor):
+    for statement in COVERING_INDEXES:
+        cursor.execute(statement)
+
+def add_checkin_time_columns(cursor):
+    for statement in CHECKIN_TIME_COLUMNS + CHECKIN_TIME_SCHEMA:
+        cursor.execute(statement)
+
+def create_conversation_state(cursor):
+    for statement in CONVERSATION_STATE_SCHEMA:
+        cursor.execute(statement)
+
+def create_conversation_archive(cursor):
+    for statement in CONVERSATION_ARCHIVE_SCHEMA:
+        cursor.execute(statement)
+
+def create_search_indexes(cursor):
+    for statement in SEARCH_SCHEMA:
+        cursor.execute(statement)
+
+def write_checkin_time_on_insert(cursor):
+    for statement in CHECKIN_TIME_ON_INSERT:
+        cursor.execute(statement)
+
+MIGRATIONS = [
+    ("Create tables", create_tables),
+    ("Add users.timezone", add_user_timezones),
+    ("Create query indexes", create_query_indexes),
+    ("Replace single-column indexes with covering ones", create_covering_indexes),
+    ("Add check-in weekday and hour columns", add_checkin_time_columns),
+    ("Create shared conversation state table", create_conversation_state),
+    ("Create compressed conversation archive", create_conversation_archive),
+    ("Create full-text search over messages and commitments", create_search_indexes),
+    ("Write check-in weekday and hour with the row", write_checkin_time_on_insert),
+]
+
+SCHEMA_VERSION = len(MIGRATIONS)
+
+_migrate_lock = threading.Lock()
+
+def get_schema_version(conn) -> int:
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+def migrate(db_path=DB_PATH) -> int:
+    """Apply pending migrations, checked once per database; returns how many ran"""
+    pool = get_pool(db_path)
+    if 'schema' in pool.prepared:
+        return 0
+
+    with _migrate_lock:
+        if 'schema' in pool.prepared:
+            return 0
+
+        conn = pool.get_connection()
+        version = get_schema_version(conn)
+        if version > SCHEMA_VERSION:
+            raise RuntimeError(f"{db_path} has schema version {version}, "
+                               f"newer than this code's {SCHEMA_VERSION}")
+
+        applied = 0
+        if version < SCHEMA_VERSION:
+            conn.commit()  # Start from a clean slate so BEGIN IMMEDIATE below is ours
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                # Re-read under the write lock in case another process just migrated
+                version = get_schema_version(conn)
+                cursor = conn.cursor()
+                for _, step in MIGRATIONS[version:]:
+                    step(cursor)
+                    applied += 1
+                cursor.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+
+        pool.prepared.add('schema')
+        return applied
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Bring a database up to the current schema version")
+    parser.add_argument("--db", default=DB_PATH, help="database path")
+    args = parser.parse_args()
+
+    applied = migrate(args.db)
+    print(f"✅ Schema at version {SCHEMA_VERSION} ({applied} migrations applied)")
@@ -1,53 +1,34 @@
-import sqlite3
 from datetime import datetime
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import DB_PATH
+from database.connection_pool import get_connection, PERFORMANCE_PRAGMAS
+from database.migrations import migrate, SCHEMA_VERSION
 
 class DatabaseOptimizer:
     """Optimize database for production-level performance"""
     
-    def __init__(self, db_path="life_agent.db"):
+    def __init__(self, db_path=DB_PATH):
         self.db_path = db_path
     
     def optimize_database(self):
         """Apply comprehensive database optimizations"""
         print("🔧 Starting database optimization...")
         
-        conn = sqlite3.connect(self.db_path)
+        conn = get_connection(self.db_path)
         cursor = conn.cursor()
         
         # Enable performance optimizations
         print("⚡ Enabling performance optimizations...")
-        cursor.execute("PRAGMA journal_mode = WAL;")
-        cursor.execute("PRAGMA synchronous = NORMAL;")
-        cursor.execute("PRAGMA cache_size = 10000;")
-        cursor.execute("PRAGMA temp_store = memory;")
-        cursor.execute("PRAGMA mmap_size = 268435456;")  # 256MB
+        for pragma in PERFORMANCE_PRAGMAS:
+            cursor.execute(pragma)
         
-        # Create performance indexes
+        # Create performance indexes (part of the migrated schema)
         print("📊 Creating performance indexes...")
-        
-        indexes = [
-            "CREATE INDEX IF NOT EXISTS idx_checkins_user_date ON daily_checkins(user_id, date);",
-            "CREATE INDEX IF NOT EXISTS idx_checkins_domain ON daily_checkins(domain);",
-            "CREATE INDEX IF NOT EXISTS idx_checkins_completed ON daily_checkins(completed);",
-            "CREATE INDEX IF NOT EXISTS idx_checkins_date_range ON daily_checkins(date);",
-            "CREATE INDEX IF NOT EXISTS idx_conversation_user ON conversation_sessions(user_id);",
-            "CREATE INDEX IF NOT EXISTS idx_conversation_agent ON conversation_sessions(agent_domain);",
-            "CREATE INDEX IF NOT EXISTS idx_messages_session ON conversation_messages(session_id);",
-            "CREATE INDEX IF NOT EXISTS idx_patterns_user ON behavioral_patterns(user_id);",
-            "CREATE INDEX IF NOT EXISTS idx_patterns_type ON behavioral_patterns(pattern_type);",
-            "CREATE INDEX IF NOT EXISTS idx_interventions_user ON active_interventions(user_id);",
-            "CREATE INDEX IF NOT EXISTS idx_interventions_domain ON active_interventions(domain);",
-            "CREATE INDEX IF NOT EXISTS idx_triggers_user_domain ON intervention_triggers(user_id, domain);",
-            "CREATE INDEX IF NOT EXISTS idx_work_tasks_user ON work_automation_tasks(user_id);",
-            "CREATE INDEX IF NOT EXISTS idx_work_tasks_status ON work_automation_tasks(automation_status);"
-        ]
-        
-        for index in indexes:
-            try:
-                cursor.execute(index)
-                print(f"  ✅ Created index: {index.split('idx_')[1].split(' ')[0]}")
-            except sqlite3.Error as e:
-                print(f"  ⚠️ Index creation warning: {e}")
+        applied = migrate(self.db_path)
+        print(f"  ✅ Schema at version {SCHEMA_VERSION} ({applied} migrations applied)")
         
         # Analyze database for query optimization
         print("🔍 Analyzing database for query optimization...")
@@ -73,7 +54,6 @@ class DatabaseOptimizer:
         db_size_mb = (page_count * page_size) / (1024 * 1024)
         
         conn.commit()
-        conn.close()
         
         print("\n📈 Database Optimization Complete!")
         print(f"  • Tables: {table_count}")
@@ -94,7 +74,7 @@ class DatabaseOptimizer:
         """Verify database performance optimizations"""
         print("\n🎯 Verifying database performance...")
         
-        conn = sqlite3.connect(self.db_path)
+        conn = get_connection(self.db_path)
         cursor = conn.cursor()
         
         # Test query performance
@@ -114,8 +94,6 @@ class DatabaseOptimizer:
         cursor.execute("PRAGMA cache_size;")
         cache_size = cursor.fetchone()[0]
         
-        conn.close()
-        
         print(f"  ✅ Query performance: {query_time:.3f} seconds")
         print(f"  ✅ Journal mode: {journal_mode}")
         print(f"  ✅ Cache size: {cache_size:,} pages")
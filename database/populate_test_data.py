@@ -1,9 +1,14 @@
-import sqlite3
 from datetime import datetime, timedelta
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import DB_PATH
+from database.connection_pool import get_connection
 
 def populate_test_data():
     """Add some test data for cross-domain analysis"""
-    conn = sqlite3.connect("life_agent.db")
+    conn = get_connection(DB_PATH)
     cursor = conn.cursor()
     
     print("📊 Adding test data for cross-domain analysis...")
@@ -29,7 +34,6 @@ def populate_test_data():
             ''', (12345, date, domain, f"Test {domain} commitment", completed))
     
     conn.commit()
-    conn.close()
     
     print("✅ Test data populated!")
 
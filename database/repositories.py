@@ -0,0 +1,173 @@
+from abc import ABC, abstractmethod
+from datetime import datetime, timezone
+from typing import Dict, Hashable, List, Optional, Tuple
+
+# Check-in, trigger and message timestamps use SQLite's CURRENT_TIMESTAMP
+# format (UTC, 'YYYY-MM-DD HH:MM:SS') and dates are ISO strings, in every backend.
+
+def utc_timestamp() -> str:
+    """Now in SQLite's CURRENT_TIMESTAMP format"""
+    return datetime.now(timezone.utc).strftime('%Y-%m-%d %H:%M:%S')
+
+def checkin_time(created_at: str) -> Tuple[Optional[int], Optional[int]]:
+    """(weekday, hour) of a CURRENT_TIMESTAMP-format time, weekday 0 = Sunday as strftime('%w'); Nones if unparseable"""
+    try:
+        created = datetime.strptime(created_at[:19], '%Y-%m-%d %H:%M:%S')
+    except (TypeError, ValueError):
+        return None, None
+    return created.isoweekday() % 7, created.hour
+
+class UserRepository(ABC):
+    @abstractmethod
+    def add(self, user_id: int, username: str, first_name: str):
+        """Register a user; existing users are left as they are"""
+
+    @abstractmethod
+    def set_timezone(self, user_id: int, timezone: str):
+        pass
+
+    @abstractmethod
+    def timezone(self, user_id: int) -> Optional[str]:
+        """The user's timezone name, or None if never set or the user is unknown"""
+
+    @abstractmethod
+    def timezones(self) -> Dict[int, Optional[str]]:
+        """Every known user with their timezone name (None if never set)"""
+
+class CheckinRepository(ABC):
+    @abstractmethod
+    def add(self, user_id: int, date: str, domain: str, commitment: str, completed: bool = False,
+            notes: Optional[str] = None, created_at: Optional[str] = None) -> int:
+        """Store a check-in and return its id"""
+
+    @abstractmethod
+    def set_completed(self, checkin_id: int, completed: bool = True):
+        pass
+
+    @abstractmethod
+    def count(self, user_id: int) -> int:
+        pass
+
+    @abstractmethod
+    def recent(self, user_id: int, domain: str, since: str) -> List[Tuple]:
+        """(date, commitment, completed, notes) after `since` for one domain, newest first"""
+
+    @abstractmethod
+    def daily_totals(self, user_id: int, since: str) -> List[Tuple]:
+        """(date, domain, total, completed) per day and domain after `since`, newest first"""
+
+    @abstractmethod
+    def open_on(self, user_id: int, date: str) -> List[Tuple]:
+        """(id, domain, commitment, created_at) for the day's uncompleted check-ins"""
+
+    @abstractmethod
+    def completion_history(self, user_id: int, since: str) -> List[Tuple]:
+        """(date, completed, created_weekday) after `since`, newest first, then in the order added; weekday 0 is Sunday"""
+
+class TriggerRepository(ABC):
+    @abstractmethod
+    def add_many(self, rows: List[Tuple]):
+        """Store (user_id, trigger_type, domain, trigger_data_json, severity, timestamp) rows"""
+
+    @abstractmethod
+    def recent(self, user_id: int, domain: str, since: str) -> List[Tuple]:
+        """(trigger_type, trigger_data_json, severity, timestamp) after `since`, newest first"""
+
+    @abstractmethod
+    def summary(self, user_id: int, domain: str, since: str) -> Tuple[int, float]:
+        """(count, max severity) of triggers after `since`; max is 0.0 when there are none"""
+
+    @abstractmethod
+    def count(self, user_id: int, since: str) -> int:
+        """Triggers after `since` across every domain"""
+
+class InterventionRepository(ABC):
+    @abstractmethod
+    def add(self, user_id: int, domain: str, level: int, trigger_condition: str) -> int:
+        """Record an active intervention and return its id"""
+
+    @abstractmethod
+    def active_level(self, user_id: int, domain: str) -> Optional[int]:
+        """Level of the most recent active intervention, or None"""
+
+class ConversationRepository(ABC):
+    @abstractmethod
+    def create_session(self, user_id: int, agent_domain: str) -> int:
+        pass
+
+    @abstractmethod
+    def add_message(self, session_id: int, speaker: str, message_text: str, message_type: str):
+        pass
+
+    @abstractmethod
+    def add_messages(self, rows: List[Tuple]):
+        """Store (session_id, speaker, message_text, message_type, timestamp) rows"""
+
+    @abstractmethod
+    def end_session(self, session_id: int, outcome: str, session_data: str):
+        pass
+
+    @abstractmethod
+    def end_sessions(self, rows: List[Tuple]):
+        """End (session_id, outcome, session_data) sessions together"""
+
+    @abstractmethod
+    def messages(self, session_id: int) -> List[Tuple]:
+        """(speaker, message_text, message_type, timestamp) in the order they were added, archived or not"""
+
+class TemplateRepository(ABC):
+    @abstractmethod
+    def add(self, template_name: str, category: str, subject_line: str, template_body: str,
+            variables_used: str) -> bool:
+        """Store a template unless one with the name exists; True if it was added"""
+
+    @abstractmethod
+    def get(self, template_name: str) -> Optional[Tuple]:
+        """(subject_line, template_body, variables_used) or None"""
+
+    @abstractmethod
+    def summaries(self) -> List[Tuple]:
+        """(template_name, category, subject_line, usage_count, effectiveness_score) by category, name"""
+
+class IncidentRepository(ABC):
+    @abstractmethod
+    def upsert(self, incident: Dict):
+        """Insert or replace an incident by ticket number"""
+
+    @abstractmethod
+    def count(self) -> int:
+        pass
+
+    @abstractmethod
+    def open_for(self, assignee: str) -> List[Dict]:
+        """Open, in-progress and scheduled incidents, by priority, urgency and impact (descending)"""
+
+class DeadLetterRepository(ABC):
+    @abstractmethod
+    def add(self, chat_id: int, message: str, parse_mode: Optional[str], attempts: int, error: str) -> int:
+        """Record an outbound message that could not be delivered and return its id"""
+
+    @abstractmethod
+    def recent(self, limit: int = 100) -> List[Tuple]:
+        """(chat_id, message, parse_mode, attempts, error, created_at), newest first"""
+
+class Storage(ABC):
+    """One set of repositories over a single backend"""
+
+    backend = None
+    # Whether the backend is the SQLite file that set-based analytics
+    # (rollups, sweeps, dashboards) query directly
+    uses_sql = False
+
+    users: UserRepository
+    checkins: CheckinRepository
+    triggers: TriggerRepository
+    interventions: InterventionRepository
+    conversations: ConversationRepository
+    templates: TemplateRepository
+    incidents: IncidentRepository
+    dead_letters: DeadLetterRepository
+
+    @abstractmethod
+    def data_version(self, user_id: int) -> Hashable:
+        """Changes whenever the user's check-ins or triggers change"""
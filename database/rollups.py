@@ -0,0 +1,141 @@
+import argparse
+import threading
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import DB_PATH
+from database.connection_pool import get_pool, transaction
+
+# One row per (user, date, domain) with the check-in count and how many were completed.
+# Triggers on daily_checkins keep it current, so every write path (agents, test data
+# scripts, manual fixes) is covered without extra code.
+ROLLUP_SCHEMA = [
+    '''
+    CREATE TABLE IF NOT EXISTS daily_domain_rollups (
+        user_id INTEGER NOT NULL,
+        date DATE NOT NULL,
+        domain TEXT NOT NULL,
+        total INTEGER NOT NULL DEFAULT 0,
+        completed INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (user_id, date, domain)
+    ) WITHOUT ROWID
+    ''',
+    '''
+    CREATE TRIGGER IF NOT EXISTS trg_checkins_rollup_insert
+    AFTER INSERT ON daily_checkins
+    BEGIN
+        INSERT INTO daily_domain_rollups (user_id, date, domain, total, completed)
+        SELECT NEW.user_id, NEW.date, NEW.domain, 1, CASE WHEN NEW.completed THEN 1 ELSE 0 END
+        WHERE NEW.user_id IS NOT NULL AND NEW.date IS NOT NULL AND NEW.domain IS NOT NULL
+        ON CONFLICT (user_id, date, domain) DO UPDATE SET
+            total = total + 1,
+            completed = completed + excluded.completed;
+    END
+    ''',
+    '''
+    CREATE TRIGGER IF NOT EXISTS trg_checkins_rollup_delete
+    AFTER DELETE ON daily_checkins
+    BEGIN
+        UPDATE daily_domain_rollups
+        SET total = total - 1,
+            completed = completed - CASE WHEN OLD.completed THEN 1 ELSE 0 END
+        WHERE user_id = OLD.user_id AND date = OLD.date AND domain = OLD.domain;
+
+        DELETE FROM daily_domain_rollups
+        WHERE user_id = OLD.user_id AND date = OLD.date AND domain = OLD.domain AND total <= 0;
+    END
+    ''',
+    '''
+    CREATE TRIGGER IF NOT EXISTS trg_checkins_rollup_update
+    AFTER UPDATE OF user_id, date, domain, completed ON daily_checkins
+    BEGIN
+        UPDATE daily_domain_rollups
+        SET total = total - 1,
+            completed = completed - CASE WHEN OLD.completed THEN 1 ELSE 0 END
+        WHERE user_id = OLD.user_id AND date = OLD.date AND domain = OLD.domain;
+
+        DELETE FROM daily_domain_rollups
+        WHERE user_id = OLD.user_id AND date = OLD.date AND domain = OLD.domain AND total <= 0;
+
+        INSERT INTO daily_domain_rollups (user_id, date, domain, total, completed)
+        SELECT NEW.user_id, NEW.date, NEW.domain, 1, CASE WHEN NEW.completed THEN 1 ELSE 0 END
+        WHERE NEW.user_id IS NOT NULL AND NEW.date IS NOT NULL AND NEW.domain IS NOT NULL
+        ON CONFLICT (user_id, date, domain) DO UPDATE SET
+            total = total + 1,
+            completed = completed + excluded.completed;
+    END
+    '''
+]
+
+_prepare_lock = threading.Lock()
+
+def create_rollup_schema(cursor):
+    """Create the rollup table and triggers, backfilling if the table is new"""
+    cursor.execute("SELECT 1 FROM sqlite_master WHERE type='table' AND name='daily_domain_rollups'")
+    is_new = cursor.fetchone() is None
+
+    for statement in ROLLUP_SCHEMA:
+        cursor.execute(statement)
+
+    if is_new:
+        _backfill(cursor)
+
+def ensure_rollups(db_path=DB_PATH):
+    """Make sure rollups exist before reading them, checked once per database"""
+    pool = get_pool(db_path)
+    if 'rollups' in pool.prepared:
+        return
+
+    with _prepare_lock, pool.transaction() as conn:
+        cursor = conn.cursor()
+        cursor.execute('''
+        SELECT name FROM sqlite_master
+        WHERE type='table' AND name IN ('daily_checkins', 'daily_domain_rollups')
+        ''')
+        tables = {row[0] for row in cursor.fetchall()}
+        if 'daily_checkins' not in tables:
+            return  # Nothing to roll up yet
+
+        if 'daily_domain_rollups' not in tables:
+            create_rollup_schema(cursor)
+    pool.prepared.add('rollups')
+
+def rebuild_rollups(db_path=DB_PATH, user_id=None):
+    """Recompute rollups from raw check-ins, for one user or everyone"""
+    with transaction(db_path) as conn:
+        cursor = conn.cursor()
+        for statement in ROLLUP_SCHEMA:
+            cursor.execute(statement)
+
+        if user_id is None:
+            cursor.execute("DELETE FROM daily_domain_rollups")
+        else:
+            cursor.execute("DELETE FROM daily_domain_rollups WHERE user_id = ?", (user_id,))
+        _backfill(cursor, user_id)
+
+        cursor.execute("SELECT COUNT(*) FROM daily_domain_rollups")
+        return cursor.fetchone()[0]
+
+def _backfill(cursor, user_id=None):
+    query = '''
+    INSERT INTO daily_domain_rollups (user_id, date, domain, total, completed)
+    SELECT user_id, date, domain, COUNT(*), SUM(CASE WHEN completed THEN 1 ELSE 0 END)
+    FROM daily_checkins
+    WHERE user_id IS NOT NULL AND date IS NOT NULL AND domain IS NOT NULL
+    '''
+    params = ()
+    if user_id is not None:
+        query += " AND user_id = ?"
+        params = (user_id,)
+    cursor.execute(query + " GROUP BY user_id, date, domain", params)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Rebuild daily_domain_rollups from daily_checkins")
+    parser.add_argument("--db", default=DB_PATH, help="database path")
+    parser.add_argument("--user-id", type=int, help="only rebuild this user's rollups")
+    args = parser.parse_args()
+
+    print("🔄 Rebuilding daily domain rollups...")
+    row_count = rebuild_rollups(args.db, args.user_id)
+    print(f"✅ Rollups rebuilt: {row_count} rows")
@@ -0,0 +1,104 @@
+import argparse
+import re
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from itertools import chain, zip_longest
+from typing import List, Optional
+from config import DB_PATH
+from database.connection_pool import get_connection
+from database.metrics import timed
+from database.migrations import migrate
+
+SEARCH_LIMIT = 10
+# Tokens of context around the matches in each snippet
+SNIPPET_TOKENS = 12
+# Longest query accepted, in words
+MAX_QUERY_TERMS = 8
+
+class SearchHit:
+    """One ranked match: a conversation message or a check-in commitment"""
+
+    __slots__ = ('kind', 'ref', 'when', 'label', 'snippet', 'rank')
+
+    def __init__(self, kind: str, ref: int, when: str, label: str, snippet: str, rank: float):
+        self.kind = kind        # 'message' or 'commitment'
+        self.ref = ref          # session id for messages, check-in id for commitments
+        self.when = when        # message timestamp or check-in date
+        self.label = label      # speaker or domain
+        self.snippet = snippet
+        self.rank = rank        # bm25 within its own index, lower is better
+
+def match_expression(user_id: int, text: str, column: str) -> Optional[str]:
+    """FTS5 query for every word of text in column, limited to the user; None if text has no words
+
+    Words are quoted so punctuation and FTS operators in user input are taken literally.
+    """
+    terms = re.findall(r"\w+", text)[:MAX_QUERY_TERMS]
+    if not terms:
+        return None
+    phrase = ' AND '.join(f'"{term}"' for term in terms)
+    return f'user_key : u{int(user_id)} AND {column} : ({phrase})'
+
+@timed('search', 'history')
+def search_history(db_path, user_id: int, text: str, limit: int = SEARCH_LIMIT,
+                   mark=('[', ']')) -> List[SearchHit]:
+    """The user's best-matching messages and commitments for text, best first
+
+    Snippets wrap matched words in mark. Each index ranks with bm25 on its
+    text column alone, so the user_key token doesn't weigh in. bm25 depends
+    on each index's own term statistics, so scores from the two aren't
+    comparable: the results interleave the two lists by their rank within
+    each, a message before the commitment of the same rank.
+    """
+    migrate(db_path)
+    conn = get_connection(db_path)
+    start, end = mark
+    messages, commitments = [], []
+
+    query = match_expression(user_id, text, 'message_text')
+    if query is None:
+        return []
+    for session_id, timestamp, speaker, snippet, rank in conn.execute('''
+    SELECT session_id, timestamp, speaker, snippet(message_search, 0, ?, ?, '…', ?),
+           bm25(message_search, 1.0, 0.0) AS score
+    FROM message_search
+    WHERE message_search MATCH ?
+    ORDER BY score
+    LIMIT ?
+    ''', (start, end, SNIPPET_TOKENS, query, limit)):
+        messages.append(SearchHit('message', session_id, timestamp, speaker, snippet, rank))
+
+    query = match_expression(user_id, text, 'commitment')
+    for checkin_id, date, domain, snippet, rank in conn.execute('''
+    SELECT rowid, date, domain, snippet(commitment_search, 0, ?, ?, '…', ?),
+           bm25(commitment_search, 1.0, 0.0) AS score
+    FROM commitment_search
+    WHERE commitment_search MATCH ?
+    ORDER BY score
+    LIMIT ?
+    ''', (start, end, SNIPPET_TOKENS, query, limit)):
+        commitments.append(SearchHit('commitment', checkin_id, date, domain, snippet, rank))
+
+    hits = [hit for hit in chain.from_iterable(zip_longest(messages, commitments)) if hit is not None]
+    return hits[:limit]
+
+def rebuild_search(db_path=DB_PATH):
+    """Merge each index's segments into one, for the fastest queries after bulk loads"""
+    migrate(db_path)
+    conn = get_connection(db_path)
+    conn.execute("INSERT INTO message_search (message_search) VALUES ('optimize')")
+    conn.execute("INSERT INTO commitment_search (commitment_search) VALUES ('optimize')")
+    conn.commit()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Search a user's conversations and commitments")
+    parser.add_argument("user_id", type=int)
+    parser.add_argument("query", nargs='+')
+    parser.add_argument("--db", default=DB_PATH, help="database path")
+    parser.add_argument("--limit", type=int, default=SEARCH_LIMIT)
+    args = parser.parse_args()
+
+    for hit in search_history(args.db, args.user_id, ' '.join(args.query), args.limit):
+        print(f"{hit.rank:8.3f}  {hit.kind:<10} {hit.when}  {hit.label:<10} {hit.snippet}")
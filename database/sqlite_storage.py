@@ -0,0 +1,286 @@
+from config import DB_PATH
+from database.connection_pool import get_connection, get_pool, transaction
+from database.archive import archived_messages
+from database.data_versions import get_user_version
+from database.metrics import timed
+from database.rollups import ensure_rollups
+from database.repositories import (
+    Storage, UserRepository, CheckinRepository, TriggerRepository, InterventionRepository,
+    ConversationRepository, TemplateRepository, IncidentRepository, DeadLetterRepository, checkin_time, utc_timestamp
+)
+
+INCIDENT_FIELDS = ['ticket_number', 'summary', 'priority', 'status', 'assignee', 'customer', 'created_date',
+                   'due_date', 'estimated_hours', 'complexity_score', 'customer_impact', 'urgency_score', 'tags']
+
+class SQLiteRepository:
+    """Runs its queries on the calling thread's pooled connection"""
+
+    def __init__(self, db_path=DB_PATH):
+        self.db_path = db_path
+
+    def __init_subclass__(cls, **kwargs):
+        # Time every repository call, e.g. db/checkins.recent
+        super().__init_subclass__(**kwargs)
+        name = cls.__name__[len('SQLite'):-len('Repository')].lower()
+        for attribute, value in list(vars(cls).items()):
+            if callable(value) and not attribute.startswith('_'):
+                setattr(cls, attribute, timed('db', f"{name}.{attribute}")(value))
+
+    def connection(self):
+        return get_connection(self.db_path)
+
+class SQLiteUserRepository(SQLiteRepository, UserRepository):
+    def add(self, user_id, username, first_name):
+        with transaction(self.db_path) as conn:
+            conn.execute('''
+            INSERT OR IGNORE INTO users (user_id, username, first_name)
+            VALUES (?, ?, ?)
+            ''', (user_id, username, first_name))
+
+    def set_timezone(self, user_id, timezone):
+        with transaction(self.db_path) as conn:
+            conn.execute("UPDATE users SET timezone = ? WHERE user_id = ?", (timezone, user_id))
+
+    def timezone(self, user_id):
+        row = self.connection().execute("SELECT timezone FROM users WHERE user_id = ?", (user_id,)).fetchone()
+        return row[0] if row else None
+
+    def timezones(self):
+        return dict(self.connection().execute("SELECT user_id, timezone FROM users").fetchall())
+
+class SQLiteCheckinRepository(SQLiteRepository, CheckinRepository):
+    def add(self, user_id, date, domain, commitment, completed=False, notes=None, created_at=None):
+        created_at = created_at or utc_timestamp()
+        with transaction(self.db_path) as conn:
+            cursor = conn.execute('''
+            INSERT INTO daily_checkins
+            (user_id, date, domain, commitment, completed, notes, created_at, created_weekday, created_hour)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ''', (user_id, date, domain, commitment, completed, notes, created_at, *checkin_time(created_at)))
+        return cursor.lastrowid
+
+    def set_completed(self, checkin_id, completed=True):
+        with transaction(self.db_path) as conn:
+            conn.execute("UPDATE daily_checkins SET completed = ? WHERE id = ?", (completed, checkin_id))
+
+    def count(self, user_id):
+        return self.connection().execute(
+            "SELECT COUNT(*) FROM daily_checkins WHERE user_id = ?", (user_id,)).fetchone()[0]
+
+    def recent(self, user_id, domain, since):
+        return self.connection().execute('''
+        SELECT date, commitment, completed, notes
+        FROM daily_checkins
+        WHERE user_id = ? AND domain = ? AND date > ?
+        ORDER BY date DESC
+        ''', (user_id, domain, since)).fetchall()
+
+    def daily_totals(self, user_id, since):
+        ensure_rollups(self.db_path)
+        return self.connection().execute('''
+        SELECT date, domain, total, completed
+        FROM daily_domain_rollups
+        WHERE user_id = ? AND date > ?
+        ORDER BY date DESC, domain
+        ''', (user_id, since)).fetchall()
+
+    def open_on(self, user_id, date):
+        return self.connection().execute('''
+        SELECT id, domain, commitment, created_at
+        FROM daily_checkins
+        WHERE user_id = ? AND date = ? AND completed = 0
+        ''', (user_id, date)).fetchall()
+
+    def completion_history(self, user_id, since):
+        return self.connection().execute('''
+        SELECT date, completed, created_weekday
+        FROM daily_checkins
+        WHERE user_id = ? AND date > ?
+        ORDER BY date DESC, id
+        ''', (user_id, since)).fetchall()
+
+class SQLiteTriggerRepository(SQLiteRepository, TriggerRepository):
+    def add_many(self, rows):
+        with transaction(self.db_path) as conn:
+            conn.executemany('''
+            INSERT INTO intervention_triggers
+            (user_id, trigger_type, domain, trigger_data, severity_score, timestamp)
+            VALUES (?, ?, ?, ?, ?, ?)
+            ''', rows)
+
+    def recent(self, user_id, domain, since):
+        return self.connection().execute('''
+        SELECT trigger_type, trigger_data, severity_score, timestamp
+        FROM intervention_triggers
+        WHERE user_id = ? AND domain = ? AND timestamp > ?
+        ORDER BY timestamp DESC
+        ''', (user_id, domain, since)).fetchall()
+
+    def summary(self, user_id, domain, since):
+        return self.connection().execute('''
+        SELECT COUNT(*), COALESCE(MAX(severity_score), 0.0)
+        FROM intervention_triggers
+        WHERE user_id = ? AND domain = ? AND timestamp > ?
+        ''', (user_id, domain, since)).fetchone()
+
+    def count(self, user_id, since):
+        return self.connection().execute('''
+        SELECT COUNT(*)
+        FROM intervention_triggers
+        WHERE user_id = ? AND timestamp > ?
+        ''', (user_id, since)).fetchone()[0]
+
+class SQLiteInterventionRepository(SQLiteRepository, InterventionRepository):
+    def add(self, user_id, domain, level, trigger_condition):
+        with transaction(self.db_path) as conn:
+            cursor = conn.execute('''
+            INSERT INTO active_interventions
+            (user_id, domain, intervention_level, trigger_condition)
+            VALUES (?, ?, ?, ?)
+            ''', (user_id, domain, level, trigger_condition))
+        return cursor.lastrowid
+
+    def active_level(self, user_id, domain):
+        row = self.connection().execute('''
+        SELECT intervention_level
+        FROM active_interventions
+        WHERE user_id = ? AND domain = ? AND resolution_status = 'active'
+        ORDER BY start_time DESC LIMIT 1
+        ''', (user_id, domain)).fetchone()
+        return row[0] if row else None
+
+class SQLiteConversationRepository(SQLiteRepository, ConversationRepository):
+    def create_session(self, user_id, agent_domain):
+        with transaction(self.db_path) as conn:
+            cursor = conn.execute('''
+            INSERT INTO conversation_sessions (user_id, agent_domain)
+            VALUES (?, ?)
+            ''', (user_id, agent_domain))
+        return cursor.lastrowid
+
+    def add_message(self, session_id, speaker, message_text, message_type):
+        with transaction(self.db_path) as conn:
+            conn.execute('''
+            INSERT INTO conversation_messages (session_id, speaker, message_text, message_type)
+            VALUES (?, ?, ?, ?)
+            ''', (session_id, speaker, message_text, message_type))
+
+    def add_messages(self, rows):
+        with transaction(self.db_path) as conn:
+            conn.executemany('''
+            INSERT INTO conversation_messages (session_id, speaker, message_text, message_type, timestamp)
+            VALUES (?, ?, ?, ?, ?)
+            ''', rows)
+
+    def end_session(self, session_id, outcome, session_data):
+        with transaction(self.db_path) as conn:
+            conn.execute('''
+            UPDATE conversation_sessions
+            SET session_end = CURRENT_TIMESTAMP,
+                outcome = ?,
+                session_data = ?
+            WHERE id = ?
+            ''', (outcome, session_data, session_id))
+
+    def end_sessions(self, rows):
+        with transaction(self.db_path) as conn:
+            conn.executemany('''
+            UPDATE conversation_sessions
+            SET session_end = CURRENT_TIMESTAMP,
+                outcome = ?,
+                session_data = ?
+            WHERE id = ?
+            ''', [(outcome, session_data, session_id) for session_id, outcome, session_data in rows])
+
+    def messages(self, session_id):
+        conn = self.connection()
+        rows = conn.execute('''
+        SELECT speaker, message_text, message_type, timestamp
+        FROM conversation_messages
+        WHERE session_id = ?
+        ORDER BY id
+        ''', (session_id,)).fetchall()
+        # Old sessions live in the compressed archive
+        return rows or archived_messages(conn, session_id)
+
+class SQLiteTemplateRepository(SQLiteRepository, TemplateRepository):
+    def add(self, template_name, category, subject_line, template_body, variables_used):
+        with transaction(self.db_path) as conn:
+            cursor = conn.execute('''
+            INSERT OR IGNORE INTO email_templates
+            (template_name, category, subject_line, template_body, variables_used)
+            VALUES (?, ?, ?, ?, ?)
+            ''', (template_name, category, subject_line, template_body, variables_used))
+        return cursor.rowcount == 1
+
+    def get(self, template_name):
+        return self.connection().execute('''
+        SELECT subject_line, template_body, variables_used
+        FROM email_templates
+        WHERE template_name = ?
+        ''', (template_name,)).fetchone()
+
+    def summaries(self):
+        return self.connection().execute('''
+        SELECT template_name, category, subject_line, usage_count, effectiveness_score
+        FROM email_templates
+        ORDER BY category, template_name
+        ''').fetchall()
+
+class SQLiteIncidentRepository(SQLiteRepository, IncidentRepository):
+    def upsert(self, incident):
+        with transaction(self.db_path) as conn:
+            conn.execute(f'''
+            INSERT OR REPLACE INTO real_jira_incidents ({', '.join(INCIDENT_FIELDS)})
+            VALUES ({', '.join('?' for _ in INCIDENT_FIELDS)})
+            ''', [incident[field] for field in INCIDENT_FIELDS])
+
+    def count(self):
+        return self.connection().execute('SELECT COUNT(*) FROM real_jira_incidents').fetchone()[0]
+
+    def open_for(self, assignee):
+        cursor = self.connection().execute(f'''
+        SELECT {', '.join(INCIDENT_FIELDS)}
+        FROM real_jira_incidents
+        WHERE assignee = ? AND status IN ('Open', 'In Progress', 'Scheduled')
+        ORDER BY priority DESC, urgency_score DESC, customer_impact DESC
+        ''', (assignee,))
+        return [dict(zip(INCIDENT_FIELDS, row)) for row in cursor.fetchall()]
+
+class SQLiteDeadLetterRepository(SQLiteRepository, DeadLetterRepository):
+    def add(self, chat_id, message, parse_mode, attempts, error):
+        with transaction(self.db_path) as conn:
+            cursor = conn.execute('''
+            INSERT INTO dead_letters (chat_id, message, parse_mode, attempts, error)
+            VALUES (?, ?, ?, ?, ?)
+            ''', (chat_id, message, parse_mode, attempts, error))
+        return cursor.lastrowid
+
+    def recent(self, limit=100):
+        return self.connection().execute('''
+        SELECT chat_id, message, parse_mode, attempts, error, created_at
+        FROM dead_letters
+        ORDER BY id DESC
+        LIMIT ?
+        ''', (limit,)).fetchall()
+
+class SQLiteStorage(Storage):
+    """Repositories over a SQLite database file, through the connection pool"""
+
+    backend = 'sqlite'
+    uses_sql = True
+
+    def __init__(self, db_path=DB_PATH):
+        self.db_path = db_path
+        self.users = SQLiteUserRepository(db_path)
+        self.checkins = SQLiteCheckinRepository(db_path)
+        self.triggers = SQLiteTriggerRepository(db_path)
+        self.interventions = SQLiteInterventionRepository(db_path)
+        self.conversations = SQLiteConversationRepository(db_path)
+        self.templates = SQLiteTemplateRepository(db_path)
+        self.incidents = SQLiteIncidentRepository(db_path)
+        self.dead_letters = SQLiteDeadLetterRepository(db_path)
+
+    def data_version(self, user_id):
+        # The pool generation tells a recreated database file apart
+        return (get_pool(self.db_path).generation, get_user_version(self.db_path, user_id))
@@ -0,0 +1,34 @@
+import threading
+from config import DB_PATH, STORAGE_BACKEND
+from database.repositories import Storage
+from database.sqlite_storage import SQLiteStorage
+from database.memory_storage import MemoryStorage
+
+STORAGE_BACKENDS = {
+    'sqlite': SQLiteStorage,
+    'memory': lambda db_path: MemoryStorage(),
+}
+
+_storages = {}
+_storages_lock = threading.Lock()
+
+
+def get_storage(db_path=DB_PATH, backend=None) -> Storage:
+    """Shared repositories for a database, on the configured backend unless one is named
+
+    With the memory backend db_path only names the store, so components
+    pointed at the same path still see each other's writes.
+    """
+    backend = backend or STORAGE_BACKEND
+    if backend not in STORAGE_BACKENDS:
+        raise ValueError(f"Unknown storage backend: {backend}")
+
+    key = (backend, db_path)
+    storage = _storages.get(key)
+    if storage is None:
+        with _storages_lock:
+            storage = _storages.get(key)
+            if storage is None:
+                storage = STORAGE_BACKENDS[backend](db_path)
+                _storages[key] = storage
+    return storage
@@ -1,7 +1,6 @@
 from abc import ABC, abstractmethod
-from datetime import datetime
-import sqlite3
 from typing import Dict, List, Optional
+from bot.analytics_snapshot import user_today
 
 class BaseAgent(ABC):
     """Enhanced base class with conversation capabilities"""
@@ -42,26 +41,19 @@ class BaseAgent(ABC):
         """Process user response with conversation intelligence"""
         context = self.conversation_manager.get_conversation_context(self.user_id)
         
-        # Add user message
-        self.conversation_manager.add_message(
-            self.user_id, 'user', user_response, 'response'
-        )
-        
         # Analyze response
         analysis = self.analyze_response(user_response, context)
         
-        # Add analysis
-        self.conversation_manager.add_message(
-            self.user_id, 'agent', analysis, 'analysis'
-        )
-        
         # Generate follow-up if needed
         follow_up = self.generate_follow_up(user_response, analysis)
         
+        # Record the exchange in one go: user message, analysis, follow-up
+        messages = [('user', user_response, 'response'), ('agent', analysis, 'analysis')]
+        if follow_up:
+            messages.append(('agent', follow_up, 'follow_up'))
+        self.conversation_manager.add_messages(self.user_id, messages)
+        
         if follow_up:
-            self.conversation_manager.add_message(
-                self.user_id, 'agent', follow_up, 'follow_up'
-            )
             return f"{analysis}\n\n{follow_up}"
         else:
             # Conversation complete
@@ -70,17 +62,13 @@ class BaseAgent(ABC):
             return f"{analysis}\n\n✅ **Commitment locked and tracked.**"
     
     def lock_commitment(self, commitment_text):
-        """Lock commitment to database"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-        INSERT INTO daily_checkins (user_id, date, domain, commitment, completed)
-        VALUES (?, ?, ?, ?, ?)
-        ''', (self.user_id, datetime.now().date(), self.domain, commitment_text, False))
-        
-        conn.commit()
-        conn.close()
+        """Lock commitment to database, with the time fields analytics group on"""
+        self.conversation_manager.storage.checkins.add(self.user_id, self.today().isoformat(), self.domain,
+                                                       commitment_text)
+    
+    def today(self):
+        """The user's local date, which check-ins are dated by and pattern windows end on"""
+        return user_today(self.conversation_manager.storage, self.user_id)
     
     def get_domain_patterns(self, days=7):
         """Get recent patterns for this domain"""
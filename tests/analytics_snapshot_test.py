@@ -0,0 +1,97 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import random
+from datetime import datetime, timedelta, timezone
+from database.db_setup import LifeDatabase
+from database.connection_pool import get_connection, close_connections
+from bot.pattern_analyzer import PatternAnalyzer
+from bot.analytics_snapshot import SNAPSHOT_WINDOWS, DOMAINS
+
+def test_snapshot_matches_per_window_queries():
+    """One snapshot scan gives the same figures as querying each window separately"""
+    db_path = "test_analytics_snapshot.db"
+    if os.path.exists(db_path):
+        os.remove(db_path)
+
+    test_user_id = 4242
+    LifeDatabase(db_path)
+    create_random_checkins(db_path, test_user_id)
+
+    try:
+        analyzer = PatternAnalyzer(db_path)
+        snapshot = analyzer.load_snapshot(test_user_id)
+
+        for days in SNAPSHOT_WINDOWS:
+            expected = expected_patterns(db_path, test_user_id, days)
+            patterns = analyzer.analyze_user_patterns(test_user_id, days, snapshot)
+
+            by_domain = patterns['completion_patterns']['by_domain']
+            assert by_domain.keys() == expected['by_domain'].keys()
+            for domain, stats in expected['by_domain'].items():
+                assert by_domain[domain]['total_commitments'] == stats['total_commitments']
+                assert abs(by_domain[domain]['completion_rate'] - stats['completion_rate']) < 1e-9
+                assert by_domain[domain]['trend'] == stats['trend'], (days, domain)
+
+            avoidance = patterns['avoidance_patterns']['total_avoidance_rate']
+            assert abs(avoidance - expected['avoidance_rate']) < 1e-9
+
+            # Loading without a snapshot must agree too
+            assert analyzer.analyze_user_patterns(test_user_id, days) == patterns
+    finally:
+        close_connections(db_path)
+        os.remove(db_path)
+
+def create_random_checkins(db_path, user_id):
+    """One check-in per domain per day so ordering inside a day is unambiguous"""
+    rng = random.Random(7)
+    today = datetime.now(timezone.utc).date()
+    conn = get_connection(db_path)
+    for day_offset in range(45):
+        date = (today - timedelta(days=day_offset)).isoformat()
+        for domain in DOMAINS:
+            if rng.random() < 0.8:
+                conn.execute('''
+                INSERT INTO daily_checkins (user_id, date, domain, commitment, completed)
+                VALUES (?, ?, ?, ?, ?)
+                ''', (user_id, date, domain, f"Test {domain} commitment", rng.random() < 0.55))
+    conn.commit()
+
+def expected_patterns(db_path, user_id, days):
+    """Reference implementation: the original per-window row scans"""
+    conn = get_connection(db_path)
+    rows = conn.execute('''
+    SELECT domain, date, completed FROM daily_checkins
+    WHERE user_id = ? AND date > date('now', ?)
+    ORDER BY date DESC
+    ''', (user_id, f'-{days} days')).fetchall()
+
+    by_domain = {}
+    for domain in DOMAINS:
+        domain_rows = [r for r in rows if r[0] == domain]
+        if not domain_rows:
+            continue
+        completed = sum(1 for r in domain_rows if r[2])
+        trend = 'stable'
+        if len(domain_rows) >= 4:
+            recent = domain_rows[:len(domain_rows) // 2]
+            earlier = domain_rows[len(domain_rows) // 2:]
+            recent_rate = sum(1 for r in recent if r[2]) / len(recent)
+            earlier_rate = sum(1 for r in earlier if r[2]) / len(earlier)
+            if recent_rate > earlier_rate + 0.1:
+                trend = 'improving'
+            elif recent_rate < earlier_rate - 0.1:
+                trend = 'declining'
+        by_domain[domain] = {
+            'completion_rate': completed / len(domain_rows),
+            'total_commitments': len(domain_rows),
+            'trend': trend
+        }
+
+    failed = sum(1 for r in rows if not r[2])
+    return {'by_domain': by_domain, 'avoidance_rate': failed / max(1, len(rows)) if failed else 0.0}
+
+if __name__ == "__main__":
+    test_snapshot_matches_per_window_queries()
+    print("✅ Analytics snapshot tests passed!")
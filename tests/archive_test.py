@@ -0,0 +1,114 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import sqlite3
+import threading
+import database.archive
+from database.archive import archive_sessions, compress_messages, decompress_messages
+from database.connection_pool import get_connection, close_connections
+from database.migrations import migrate
+from database.sqlite_storage import SQLiteStorage
+
+def test_old_sessions_move_to_the_archive():
+    """Old closed sessions leave the hot tables and read back unchanged"""
+    db_path = "test_archive.db"
+    if os.path.exists(db_path):
+        os.remove(db_path)
+
+    migrate(db_path)
+    storage = SQLiteStorage(db_path)
+    conn = get_connection(db_path)
+    try:
+        assert conn.execute("PRAGMA auto_vacuum").fetchone()[0] == 2  # incremental
+
+        sessions = []
+        for index in range(5):
+            session_id = storage.conversations.create_session(1, 'health')
+            storage.conversations.add_messages([
+                (session_id, 'agent', 'What will you do today? ' * 20, 'initial_prompt', '2024-01-01 08:00:00'),
+                (session_id, 'user', f"Run {index}k", 'response', '2024-01-01 08:01:00'),
+            ])
+            sessions.append(session_id)
+        open_session = storage.conversations.create_session(1, 'work')
+        for session_id in sessions[:4]:
+            storage.conversations.end_session(session_id, 'committed', '{}')
+        conn.execute("UPDATE conversation_sessions SET session_end = '2024-01-01 09:00:00' WHERE id <= ?",
+                     (sessions[2],))
+        conn.commit()
+        before = {session_id: storage.conversations.messages(session_id) for session_id in sessions}
+
+        assert archive_sessions(db_path, older_than_days=30, batch_size=2) == 3
+        assert archive_sessions(db_path, older_than_days=30) == 0
+
+        hot = conn.execute("SELECT id FROM conversation_sessions ORDER BY id").fetchall()
+        assert [row[0] for row in hot] == sessions[3:] + [open_session]
+        assert conn.execute("SELECT COUNT(*) FROM conversation_messages").fetchone()[0] == 4
+        outcome, count = conn.execute(
+            "SELECT outcome, message_count FROM conversation_archive WHERE session_id = ?", (sessions[0],)).fetchone()
+        assert (outcome, count) == ('committed', 2)
+        for session_id in sessions:
+            assert storage.conversations.messages(session_id) == before[session_id]
+    finally:
+        close_connections(db_path)
+        os.remove(db_path)
+
+def test_batch_holds_the_write_lock_while_reading():
+    """A message can't be added to a session between archiving its messages and deleting them"""
+    db_path = "test_archive_lock.db"
+    if os.path.exists(db_path):
+        os.remove(db_path)
+
+    migrate(db_path)
+    storage = SQLiteStorage(db_path)
+    conn = get_connection(db_path)
+    writes = []
+
+    def late_message(session_id):
+        other = sqlite3.connect(db_path, timeout=0.1)
+        try:
+            other.execute("INSERT INTO conversation_messages (session_id, speaker, message_text, message_type) "
+                          "VALUES (?, 'user', 'Late reply', 'response')", (session_id,))
+            other.commit()
+            writes.append('written')
+        except sqlite3.OperationalError as e:
+            writes.append(str(e))
+        finally:
+            other.close()
+
+    original = database.archive.compress_messages
+
+    def compress_while_writing(messages):
+        # Runs between the message read and the delete
+        writer = threading.Thread(target=late_message, args=(session_id,))
+        writer.start()
+        writer.join()
+        return original(messages)
+
+    try:
+        session_id = storage.conversations.create_session(1, 'health')
+        storage.conversations.add_messages([(session_id, 'user', 'Run 5k', 'response', '2024-01-01 08:01:00')])
+        storage.conversations.end_session(session_id, 'committed', '{}')
+        conn.execute("UPDATE conversation_sessions SET session_end = '2024-01-01 09:00:00'")
+        conn.commit()
+
+        database.archive.compress_messages = compress_while_writing
+        assert archive_sessions(db_path, older_than_days=30) == 1
+        assert writes == ['database is locked']
+        assert [message[1] for message in storage.conversations.messages(session_id)] == ['Run 5k']
+    finally:
+        database.archive.compress_messages = original
+        close_connections(db_path)
+        os.remove(db_path)
+
+def test_compression_round_trip():
+    messages = [('user', 'I will call three clients ' * 10, 'response', '2024-01-01 08:00:00')] * 20
+    blob = compress_messages(messages)
+    assert decompress_messages(blob) == messages
+    assert len(blob) < len(str(messages)) / 10
+
+if __name__ == "__main__":
+    test_old_sessions_move_to_the_archive()
+    test_batch_holds_the_write_lock_while_reading()
+    test_compression_round_trip()
+    print("✅ Archive tests passed!")
@@ -0,0 +1,99 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import asyncio
+import time
+from datetime import datetime, timedelta
+from database.db_setup import LifeDatabase
+from database.async_db import AsyncDatabaseExecutor
+from database.connection_pool import get_connection, close_connections
+from bot.pattern_analyzer import PatternAnalyzer
+
+SIMULTANEOUS_USERS = 25
+SLOW_QUERY_SECONDS = 1.0
+
+def test_simultaneous_users_without_head_of_line_blocking():
+    """One slow dashboard must not hold up other users or the event loop"""
+    db_path = "test_async_db.db"
+    if os.path.exists(db_path):
+        os.remove(db_path)
+
+    LifeDatabase(db_path)
+    create_test_checkins(db_path, SIMULTANEOUS_USERS)
+
+    analyzer = PatternAnalyzer(db_path)
+    executor = AsyncDatabaseExecutor(max_workers=4)
+
+    def slow_dashboard(user_id, days):
+        time.sleep(SLOW_QUERY_SECONDS)  # Stands in for a heavy dashboard build
+        return analyzer.analyze_user_patterns(user_id, days)
+
+    async def scenario():
+        latencies = {}
+        heartbeat_gaps = []
+        stop = asyncio.Event()
+
+        async def heartbeat():
+            last = time.perf_counter()
+            while not stop.is_set():
+                await asyncio.sleep(0.01)
+                now = time.perf_counter()
+                heartbeat_gaps.append(now - last)
+                last = now
+
+        async def serve(user_id, handler):
+            start = time.perf_counter()
+            patterns = await executor.run(handler, user_id, 30)
+            latencies[user_id] = time.perf_counter() - start
+            return patterns
+
+        beat = asyncio.create_task(heartbeat())
+        slow = asyncio.create_task(serve(0, slow_dashboard))
+        await asyncio.sleep(0)  # Let the slow request grab a worker first
+
+        results = await asyncio.gather(*[
+            serve(user_id, analyzer.analyze_user_patterns)
+            for user_id in range(1, SIMULTANEOUS_USERS + 1)
+        ])
+        fast_finished_while_slow_running = not slow.done()
+
+        await slow
+        stop.set()
+        await beat
+        return latencies, heartbeat_gaps, results, fast_finished_while_slow_running
+
+    try:
+        latencies, gaps, results, overlapped = asyncio.run(scenario())
+    finally:
+        executor.shutdown()
+        close_connections(db_path)
+        os.remove(db_path)
+
+    fast_latencies = [latencies[user_id] for user_id in range(1, SIMULTANEOUS_USERS + 1)]
+    print(f"Slowest fast user: {max(fast_latencies):.3f}s, slow user: {latencies[0]:.3f}s, "
+          f"max loop stall: {max(gaps):.3f}s")
+
+    assert overlapped, "Fast users waited behind the slow dashboard"
+    assert max(fast_latencies) < SLOW_QUERY_SECONDS / 2
+    assert max(gaps) < 0.25, "Event loop was blocked by database work"
+    assert all(r['completion_patterns']['by_domain'] for r in results)
+
+def create_test_checkins(db_path, user_count):
+    """Insert two weeks of check-ins for each test user"""
+    conn = get_connection(db_path)
+    rows = []
+    for user_id in range(0, user_count + 1):
+        for day_offset in range(14):
+            date = (datetime.now() - timedelta(days=day_offset)).date().isoformat()
+            for domain in ['business', 'health', 'finance']:
+                rows.append((user_id, date, domain, f"Test {domain} commitment", (user_id + day_offset) % 2))
+    conn.executemany('''
+    INSERT INTO daily_checkins (user_id, date, domain, commitment, completed)
+    VALUES (?, ?, ?, ?, ?)
+    ''', rows)
+    conn.commit()
+
+if __name__ == "__main__":
+    test_simultaneous_users_without_head_of_line_blocking()
+    print("✅ Async database access tests passed!")
@@ -0,0 +1,52 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from datetime import date
+from database.connection_pool import get_connection, close_connections
+from benchmarks.load_generator import generate, user_history
+from benchmarks.end_to_end_benchmark import run, compare, percentile
+
+def test_histories_are_reproducible():
+    """The same seed gives the same user, another seed a different one"""
+    today = date(2025, 1, 1)
+    assert user_history(7, 120, 0, today) == user_history(7, 120, 0, today)
+    assert user_history(7, 120, 0, today) != user_history(7, 120, 1, today)
+
+def test_generate_and_run():
+    """Generated rows land in the database and every scenario gets timed"""
+    db_path = "test_benchmark.db"
+    if os.path.exists(db_path):
+        os.remove(db_path)
+
+    try:
+        counts = generate(db_path, users=5, years=0.25, incidents=20, batch_users=2, verbose=False)
+        conn = get_connection(db_path)
+        for table, key in [('users', 'users'), ('daily_checkins', 'checkins'), ('intervention_triggers', 'triggers'),
+                           ('conversation_sessions', 'sessions'), ('conversation_messages', 'messages')]:
+            assert conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0] == counts[key] > 0
+
+        report = run(db_path, samples=5)
+        assert report['users'] == 5
+        for name in ('generate_comprehensive_dashboard', 'analyze_user_patterns',
+                     'comprehensive_intervention_check', 'get_optimized_workday'):
+            result = report['results'][name]
+            assert result['samples'] == 5
+            assert 0 < result['p50_ms'] <= result['p99_ms']
+    finally:
+        close_connections(db_path)
+        os.remove(db_path)
+
+def test_compare_flags_regressions():
+    baseline = {'results': {'dashboard': {'p50_ms': 10.0, 'p99_ms': 20.0}}}
+    assert compare({'results': {'dashboard': {'p50_ms': 11.0, 'p99_ms': 24.0}}}, baseline) == []
+    regressions = compare({'results': {'dashboard': {'p50_ms': 11.0, 'p99_ms': 30.0}}}, baseline)
+    assert len(regressions) == 1 and 'p99' in regressions[0]
+    assert percentile([1, 2, 3, 4], 50) == 2
+    assert percentile([1, 2, 3, 4], 99) == 4
+
+if __name__ == "__main__":
+    test_histories_are_reproducible()
+    test_generate_and_run()
+    test_compare_flags_regressions()
+    print("✅ Benchmark tests passed!")
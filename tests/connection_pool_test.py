@@ -0,0 +1,48 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import threading
+from database.connection_pool import get_connection, get_pool, transaction, close_connections
+
+def test_connection_reuse_and_pragmas():
+    """Pooled connections are reused per thread and configured once"""
+    db_path = "test_connection_pool.db"
+    if os.path.exists(db_path):
+        os.remove(db_path)
+
+    try:
+        conn = get_connection(db_path)
+        assert get_connection(db_path) is conn
+        assert conn.execute("PRAGMA journal_mode").fetchone()[0] == 'wal'
+        assert conn.execute("PRAGMA synchronous").fetchone()[0] == 1  # NORMAL
+
+        # Other threads get their own connection
+        other = []
+        worker = threading.Thread(target=lambda: other.append(get_connection(db_path)))
+        worker.start()
+        worker.join()
+        assert other[0] is not conn
+        assert get_pool(db_path).connections_opened == 2
+
+        # Failed transactions roll back
+        with transaction(db_path) as conn:
+            conn.execute("CREATE TABLE items (name TEXT)")
+        try:
+            with transaction(db_path) as conn:
+                conn.execute("INSERT INTO items VALUES ('lost')")
+                raise RuntimeError("abort")
+        except RuntimeError:
+            pass
+        assert conn.execute("SELECT COUNT(*) FROM items").fetchone()[0] == 0
+
+        # Closing the pool forces a fresh connection
+        close_connections(db_path)
+        assert get_connection(db_path) is not conn
+    finally:
+        close_connections(db_path)
+        os.remove(db_path)
+
+if __name__ == "__main__":
+    test_connection_reuse_and_pragmas()
+    print("✅ Connection pool tests passed!")
@@ -0,0 +1,146 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from datetime import datetime, timedelta, timezone
+from database.connection_pool import close_connections
+from database.storage import get_storage
+from bot.services import ServiceRegistry
+from bot.dashboard_generator import LifeDashboardGenerator, DashboardMetrics, SECTIONS
+from bot.lru_cache import LRUCache
+
+DOMAINS = ['business', 'health', 'finance', 'parenting', 'work', 'personal']
+
+def populate(storage, engine, days=40):
+    today = datetime.now(timezone.utc).date()
+    storage.users.add(1, 'user1', 'Test')
+    for day in range(days):
+        date = (today - timedelta(days=day)).isoformat()
+        for index, domain in enumerate(DOMAINS[:4 + day % 3]):
+            storage.checkins.add(1, date, domain, "Commitment", completed=(day * index) % 4 != 1,
+                                 created_at=f"{date} {8 + index:02d}:00:00")
+    engine.log_trigger(1, 'pattern_decline', 'health', {}, 0.6)
+    engine.flush_triggers()
+
+def test_metrics_fold_every_window():
+    """One pass over daily rollups gives each window's per-domain totals and active days"""
+    today = datetime(2025, 3, 31).date()
+    day = lambda n: (today - timedelta(days=n)).isoformat()
+    rows = [
+        (day(0), 'health', 2, 1),
+        (day(0), 'work', 1, 1),
+        (day(6), 'health', 1, 0),
+        (day(10), 'work', 4, 2),
+        (day(20), 'finance', 3, 3),
+    ]
+    metrics = DashboardMetrics(rows, today)
+    assert metrics.by_domain(7) == [('health', 3, 1, 1 / 3), ('work', 1, 1, 1.0)]
+    assert metrics.by_domain(14, min_total=3) == [('health', 3, 1, 1 / 3), ('work', 5, 3, 0.6)]
+    assert metrics.overall(30) == (11, 7)
+    assert metrics.active_days == {7: 2, 14: 3, 30: 4}
+
+def test_shared_metrics_match_per_section_reads():
+    """Sections built from one shared read render exactly what each would from its own"""
+    db_path = "test_dashboard.db"
+    if os.path.exists(db_path):
+        os.remove(db_path)
+
+    storage = get_storage(db_path)
+    services = ServiceRegistry(db_path, storage=storage)
+    services.init_schema()
+    engine = services.intervention_engine
+    try:
+        populate(storage, engine)
+        generator = LifeDashboardGenerator(db_path)
+        for user_id in (1, 2):
+            assert generator.build_sections(user_id) == [
+                getattr(generator, section)(user_id, generator.load_metrics(user_id)) for section in SECTIONS]
+        assert 'Needs Attention' in generator.generate_comprehensive_dashboard(1)
+    finally:
+        engine.close()
+        close_connections(db_path)
+        os.remove(db_path)
+
+def test_dashboard_cache():
+    """Taps are served from the cache until the user's check-ins or triggers change"""
+    db_path = "test_dashboard_cache.db"
+    if os.path.exists(db_path):
+        os.remove(db_path)
+
+    storage = get_storage(db_path)
+    services = ServiceRegistry(db_path, storage=storage)
+    services.init_schema()
+    engine = services.intervention_engine
+    generator = LifeDashboardGenerator(db_path, cache=LRUCache())
+    try:
+        populate(storage, engine)
+        first = generator.materialize(1)
+        assert generator.materialize(1) is first
+        assert generator.generate_comprehensive_dashboard(1) == first.text
+        assert generator.cache.stats()['hits'] == 2
+
+        storage.checkins.add(1, datetime.now(timezone.utc).date().isoformat(), 'work', 'New commitment')
+        rebuilt = generator.materialize(1)
+        assert rebuilt is not first
+        assert rebuilt.sections != first.sections
+
+        engine.log_trigger(1, 'missed_commitment', 'work', {}, 0.9)
+        engine.flush_triggers()
+        assert generator.warm([1, 2]) == 2
+        assert generator.warm([1, 2]) == 0
+
+        generator.invalidate_user(1)
+        assert generator.warm([1, 2]) == 1
+    finally:
+        engine.close()
+        close_connections(db_path)
+        os.remove(db_path)
+
+def test_warmed_dashboard_survives_utc_midnight():
+    """Dashboards are keyed on the user's local date: warmed at 8:45 in Tokyo (23:45 UTC), still fresh at 9:00"""
+    storage = get_storage("test_dashboard_local_day", 'memory')
+    storage.users.add(1, 'tokyo', 'Test')
+    storage.users.set_timezone(1, 'Asia/Tokyo')
+    storage.users.add(2, 'default', 'Test')  # No timezone set, so UTC
+    now = [datetime(2025, 3, 30, 23, 45, tzinfo=timezone.utc)]
+    generator = LifeDashboardGenerator("test_dashboard_local_day", cache=LRUCache(), storage=storage,
+                                       clock=lambda: now[0])
+
+    assert generator.warm([1, 2]) == 2
+    assert generator.materialize(1).metrics.today.isoformat() == '2025-03-31'
+    now[0] = datetime(2025, 3, 31, 0, 0, tzinfo=timezone.utc)
+    assert generator.warm([1]) == 0, "Tokyo's day hasn't changed"
+    assert generator.warm([2]) == 1, "UTC's has"
+    now[0] = datetime(2025, 3, 31, 15, 0, tzinfo=timezone.utc)
+    assert generator.warm([1]) == 1
+
+def test_memory_storage_dashboard_matches_sqlite():
+    """The dashboard reads through storage, so the memory backend renders the same sections"""
+    db_path = "test_dashboard_backends.db"
+    if os.path.exists(db_path):
+        os.remove(db_path)
+
+    sqlite_services = ServiceRegistry(db_path, storage=get_storage(db_path, 'sqlite'))
+    sqlite_services.init_schema()
+    memory_services = ServiceRegistry(db_path, storage=get_storage(db_path, 'memory'))
+    engines = [sqlite_services.intervention_engine, memory_services.intervention_engine]
+    try:
+        populate(sqlite_services.storage, engines[0])
+        populate(memory_services.storage, engines[1])
+        sections = [LifeDashboardGenerator(db_path, cache=LRUCache(), storage=services.storage).materialize(1).sections
+                    for services in (sqlite_services, memory_services)]
+        assert sections[0] == sections[1]
+        assert 'Recent Interventions (7d):** 1' in sections[1][4]
+    finally:
+        for engine in engines:
+            engine.close()
+        close_connections(db_path)
+        os.remove(db_path)
+
+if __name__ == "__main__":
+    test_metrics_fold_every_window()
+    test_shared_metrics_match_per_section_reads()
+    test_dashboard_cache()
+    test_warmed_dashboard_survives_utc_midnight()
+    test_memory_storage_dashboard_matches_sqlite()
+    print("✅ Dashboard tests passed!")
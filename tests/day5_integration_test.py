@@ -7,6 +7,7 @@ from bot.intervention_messages import InterventionMessageGenerator
 from bot.agents.business_agent import BusinessAgent
 from bot.conversation_manager import ConversationManager
 from bot.pattern_analyzer import PatternAnalyzer
+from database.connection_pool import close_connections
 import sqlite3
 from datetime import datetime, timedelta
 
@@ -76,6 +77,7 @@ def test_complete_intervention_system():
         return False
     
     # Clean up test database
+    close_connections(db_path)
     os.remove(db_path)
     
     print("\n🎉 ALL INTERVENTION SYSTEM TESTS PASSED!")
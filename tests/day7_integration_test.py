@@ -1,20 +1,26 @@
-import asyncio
-import sqlite3
 import sys
 import os
-from datetime import datetime, timedelta
-import json
+from datetime import datetime, timedelta, timezone
 
 # Add project root to path
-sys.path.append('.')
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import DB_PATH
+from database.storage import get_storage
+from bot.services import ServiceRegistry
 
 class Day7IntegrationTest:
-    """Comprehensive integration testing for complete AI agent system"""
+    """Comprehensive integration testing for complete AI agent system
+
+    Runs on the in-memory storage backend, so nothing is read from or written to disk.
+    """
     
     def __init__(self):
         self.test_user_id = 12345
         self.test_results = {}
-        self.db_path = "life_agent.db"
+        self.db_path = DB_PATH
+        self.storage = get_storage(self.db_path, backend='memory')
+        self.services = ServiceRegistry(self.db_path, storage=self.storage)
         
     def run_all_tests(self):
         """Run complete integration test suite"""
@@ -22,7 +28,7 @@ class Day7IntegrationTest:
         print("=" * 60)
         
         tests = [
-            ("Database Connection", self.test_database_connection),
+            ("Storage Backend", self.test_storage_backend),
             ("Agent Architecture", self.test_agent_architecture),
             ("Conversation System", self.test_conversation_system),
             ("Pattern Analysis", self.test_pattern_analysis),
@@ -46,40 +52,30 @@ class Day7IntegrationTest:
         self.print_test_summary()
         return self.test_results
     
-    def test_database_connection(self):
-        """Test database connectivity and basic operations"""
+    def test_storage_backend(self):
+        """Test the storage repositories and basic operations"""
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            # Test table existence
-            cursor.execute("SELECT name FROM sqlite_master WHERE type='table'")
-            tables = [row[0] for row in cursor.fetchall()]
-            
-            required_tables = [
-                'users', 'daily_checkins', 'conversation_sessions', 
-                'conversation_messages', 'behavioral_patterns', 
-                'work_tasks', 'intervention_triggers'
+            required_repositories = [
+                'users', 'checkins', 'triggers', 'interventions',
+                'conversations', 'templates', 'incidents'
             ]
             
-            missing_tables = [t for t in required_tables if t not in tables]
-            if missing_tables:
-                print(f"   Missing tables: {missing_tables}")
+            missing_repositories = [r for r in required_repositories if not hasattr(self.storage, r)]
+            if missing_repositories:
+                print(f"   Missing repositories: {missing_repositories}")
                 return False
             
             # Test data insertion
-            cursor.execute("""
-                INSERT OR REPLACE INTO users (user_id, username, first_name)
-                VALUES (?, ?, ?)
-            """, (self.test_user_id, "test_user", "TestUser"))
-            
-            conn.commit()
-            conn.close()
-            print(f"   Database has {len(tables)} tables, all required tables present")
+            self.storage.users.add(self.test_user_id, "test_user", "TestUser")
+            if self.test_user_id not in self.storage.users.timezones():
+                print("   Test user was not stored")
+                return False
+            
+            print(f"   {self.storage.backend} storage has {len(required_repositories)} repositories, all present")
             return True
             
         except Exception as e:
-            print(f"   Database test failed: {e}")
+            print(f"   Storage test failed: {e}")
             return False
     
     def test_agent_architecture(self):
@@ -104,7 +100,7 @@ class Day7IntegrationTest:
             
             # Test each agent can be instantiated and has required methods
             for domain, agent_class in agents.items():
-                agent = agent_class(self.test_user_id)
+                agent = agent_class(self.test_user_id, self.services.conversation_manager, self.services)
                 
                 # Check required methods exist
                 required_methods = [
@@ -137,9 +133,7 @@ class Day7IntegrationTest:
     def test_conversation_system(self):
         """Test conversation management and state retention"""
         try:
-            from bot.conversation_manager import ConversationManager
-            
-            conv_manager = ConversationManager(self.db_path)
+            conv_manager = self.services.conversation_manager
             
             # Test conversation creation
             session_id = conv_manager.start_conversation(self.test_user_id, "business")
@@ -174,31 +168,20 @@ class Day7IntegrationTest:
     def test_pattern_analysis(self):
         """Test behavioral pattern recognition system"""
         try:
-            from bot.pattern_analyzer import PatternAnalyzer
-            
-            analyzer = PatternAnalyzer(self.db_path)
-            
-            # Add some test data first
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
+            analyzer = self.services.pattern_analyzer
             
-            # Insert test checkins for pattern analysis
+            # Add some test data first, inside the analysis windows
+            today = datetime.now(timezone.utc).date()
             test_data = [
-                (self.test_user_id, '2024-01-01', 'business', 'Call 3 clients', True),
-                (self.test_user_id, '2024-01-02', 'business', 'Write proposal', False),
-                (self.test_user_id, '2024-01-03', 'health', 'Morning workout', True),
-                (self.test_user_id, '2024-01-04', 'health', 'Gym session', True),
+                (4, 'business', 'Call 3 clients', True),
+                (3, 'business', 'Write proposal', False),
+                (2, 'health', 'Morning workout', True),
+                (1, 'health', 'Gym session', True),
             ]
             
-            for data in test_data:
-                cursor.execute("""
-                    INSERT OR REPLACE INTO daily_checkins 
-                    (user_id, date, domain, commitment, completed)
-                    VALUES (?, ?, ?, ?, ?)
-                """, data)
-            
-            conn.commit()
-            conn.close()
+            for days_ago, domain, commitment, completed in test_data:
+                date = (today - timedelta(days=days_ago)).isoformat()
+                self.storage.checkins.add(self.test_user_id, date, domain, commitment, completed)
             
             # Test pattern analysis
             patterns = analyzer.analyze_user_patterns(self.test_user_id, 30)
@@ -223,9 +206,7 @@ class Day7IntegrationTest:
     def test_intervention_engine(self):
         """Test automated intervention system"""
         try:
-            from bot.intervention_engine import InterventionEngine
-            
-            engine = InterventionEngine(self.db_path)
+            engine = self.services.intervention_engine
             
             # Test intervention level calculation  
             level = engine.get_intervention_level(self.test_user_id, "business")
@@ -271,20 +252,23 @@ class Day7IntegrationTest:
                     print(f"   Work automation module missing: {module_name}")
                     return False
             
-            # Test work automation database tables
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name LIKE '%work%'")
-            work_tables = [row[0] for row in cursor.fetchall()]
-            
-            if not work_tables:
-                print("   No work automation tables found")
+            # Test the template and incident repositories the automation tools use
+            self.storage.templates.add("day7_followup", "followup", "Following up", "Hi {name}", "name")
+            if self.storage.templates.get("day7_followup") is None:
+                print("   Work automation templates not stored")
                 return False
             
-            conn.close()
+            self.storage.incidents.upsert({
+                'ticket_number': 'DAY7-1', 'summary': 'Integration check', 'priority': 3,
+                'status': 'Open', 'assignee': 'TestUser', 'customer': 'Internal',
+                'created_date': '2024-01-01', 'due_date': '2024-01-02', 'estimated_hours': 1.0,
+                'complexity_score': 1, 'customer_impact': 1, 'urgency_score': 1, 'tags': ''
+            })
+            if not self.storage.incidents.open_for('TestUser'):
+                print("   Work automation incidents not stored")
+                return False
             
-            print(f"   Work automation working: {len(work_modules)} modules, {len(work_tables)} tables")
+            print(f"   Work automation working: {len(work_modules)} modules, templates and incidents")
             return True
             
         except Exception as e:
@@ -294,9 +278,7 @@ class Day7IntegrationTest:
     def test_cross_domain_intelligence(self):
         """Test cross-domain insights and coordination"""
         try:
-            from bot.conversation_manager import ConversationManager
-            
-            conv_manager = ConversationManager(self.db_path)
+            conv_manager = self.services.conversation_manager
             
             # Test cross-domain pattern analysis
             patterns = conv_manager.analyze_cross_domain_patterns(self.test_user_id)
@@ -324,9 +306,7 @@ class Day7IntegrationTest:
         """Test system performance and response times"""
         try:
             import time
-            from bot.pattern_analyzer import PatternAnalyzer
-            
-            analyzer = PatternAnalyzer(self.db_path)
+            analyzer = self.services.pattern_analyzer
             
             # Test pattern analysis performance
             start_time = time.time()
@@ -337,19 +317,13 @@ class Day7IntegrationTest:
                 print(f"   Pattern analysis too slow: {analysis_time:.2f}s")
                 return False
             
-            # Test database query performance
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
+            # Test storage query performance
             start_time = time.time()
-            cursor.execute("SELECT COUNT(*) FROM daily_checkins WHERE user_id = ?", (self.test_user_id,))
-            result = cursor.fetchone()
+            self.storage.checkins.count(self.test_user_id)
             query_time = time.time() - start_time
             
-            conn.close()
-            
             if query_time > 1.0:  # Should complete in under 1 second
-                print(f"   Database query too slow: {query_time:.2f}s")
+                print(f"   Storage query too slow: {query_time:.2f}s")
                 return False
             
             print(f"   Performance good: analysis {analysis_time:.2f}s, query {query_time:.3f}s")
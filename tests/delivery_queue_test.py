@@ -0,0 +1,137 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import asyncio
+import time
+from collections import defaultdict
+from database.connection_pool import close_connections
+from database.storage import get_storage
+from bot.delivery_queue import DeliveryQueue
+
+class TimedOut(Exception):
+    pass
+
+class RetryAfter(Exception):
+    def __init__(self, retry_after):
+        super().__init__(f"Flood control exceeded. Retry in {retry_after} seconds")
+        self.retry_after = retry_after
+
+class Forbidden(Exception):
+    pass
+
+class FakeBot:
+    """Records sends and fails the first few for chats told to"""
+
+    def __init__(self, latency=0.005):
+        self.latency = latency
+        self.sent = defaultdict(list)  # chat_id -> send times
+        self.failures = {}  # chat_id -> list of exceptions to raise, in order
+
+    async def send_message(self, chat_id, text, parse_mode=None):
+        # Rate limits pace when sends start, so that's the time recorded
+        started = time.monotonic()
+        await asyncio.sleep(self.latency)
+        failures = self.failures.get(chat_id)
+        if failures:
+            raise failures.pop(0)
+        self.sent[chat_id].append(started)
+
+def fresh_db(db_path):
+    if os.path.exists(db_path):
+        os.remove(db_path)
+
+def remove_db(db_path):
+    close_connections(db_path)
+    os.remove(db_path)
+
+def test_rate_limits():
+    """Per-chat and global buckets pace sends without blocking other chats"""
+    db_path = "test_delivery_limits.db"
+    fresh_db(db_path)
+
+    async def scenario():
+        bot = FakeBot()
+        queue = DeliveryQueue(bot, db_path, workers=4, global_rate=200, global_burst=10,
+                              chat_rate=20, chat_burst=1)
+        queue.start()
+        start = time.monotonic()
+        results = [queue.enqueue(1, f"chatty {i}") for i in range(5)]
+        results += [queue.enqueue(chat_id, "hello") for chat_id in range(100, 140)]
+        assert queue.stats()['queue_depth'] == 45
+        assert all(await asyncio.gather(*results))
+        await queue.stop()
+
+        gaps = [b - a for a, b in zip(bot.sent[1], bot.sent[1][1:])]
+        assert len(bot.sent[1]) == 5 and min(gaps) >= 0.04, gaps
+        # 45 messages at 200/s after a burst of 10 take at least ~0.17s overall...
+        all_sends = sorted(t for times in bot.sent.values() for t in times)
+        assert all_sends[-1] - start >= 0.15
+        # ...but the quiet chats weren't stuck behind chat 1
+        assert max(times[0] for chat_id, times in bot.sent.items() if chat_id >= 100) < bot.sent[1][-1]
+
+        stats = queue.stats()
+        assert stats['sent'] == 45 and stats['queue_depth'] == 0 and stats['in_flight'] == 0
+        assert 0 < stats['send_latency_p50'] <= stats['send_latency_p99']
+        assert stats['delivery_latency_p99'] >= stats['send_latency_p99']
+
+    try:
+        asyncio.run(scenario())
+    finally:
+        remove_db(db_path)
+
+def test_retries_and_dead_letters():
+    """Transient errors are retried; permanent or repeated failures are dead-lettered"""
+    db_path = "test_delivery_retries.db"
+    fresh_db(db_path)
+
+    async def scenario():
+        bot = FakeBot()
+        bot.failures = {
+            1: [TimedOut("timed out"), RetryAfter(0.05)],
+            2: [Forbidden("bot was blocked by the user")],
+            3: [TimedOut("timed out")] * 3,
+        }
+        queue = DeliveryQueue(bot, db_path, workers=2, max_attempts=3, base_backoff=0.01)
+        queue.start()
+        recovered, blocked, flaky = queue.enqueue(1, "hi"), queue.enqueue(2, "hi"), queue.enqueue(3, "hi")
+        await queue.drain()
+        assert await recovered is True
+        assert await blocked is False
+        assert await flaky is False
+        await queue.stop()
+
+        stats = queue.stats()
+        assert stats['sent'] == 1 and stats['dead_lettered'] == 2 and stats['retried'] == 4
+
+    try:
+        asyncio.run(scenario())
+        rows = sorted((row[0], row[3], row[4]) for row in get_storage(db_path, 'sqlite').dead_letters.recent())
+        assert rows == [(2, 1, 'Forbidden: bot was blocked by the user'), (3, 3, 'TimedOut: timed out')]
+    finally:
+        remove_db(db_path)
+
+def test_dead_letters_follow_the_storage_backend():
+    """On memory storage a failed delivery is dead-lettered without creating a database file"""
+    db_path = "test_delivery_memory.db"
+    fresh_db(db_path)
+    storage = get_storage(db_path, 'memory')
+
+    async def scenario():
+        bot = FakeBot()
+        bot.failures = {2: [Forbidden("bot was blocked by the user")]}
+        queue = DeliveryQueue(bot, db_path, workers=1, storage=storage)
+        queue.start()
+        assert await queue.enqueue(2, "hi") is False
+        await queue.stop()
+
+    asyncio.run(scenario())
+    assert [row[:5] for row in storage.dead_letters.recent()] == [
+        (2, 'hi', 'Markdown', 1, 'Forbidden: bot was blocked by the user')]
+    assert not os.path.exists(db_path)
+
+if __name__ == "__main__":
+    test_rate_limits()
+    test_retries_and_dead_letters()
+    test_dead_letters_follow_the_storage_backend()
+    print("✅ Delivery queue tests passed!")
@@ -0,0 +1,171 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import random
+import time
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+from database.db_setup import LifeDatabase
+from database.connection_pool import get_connection, close_connections
+from bot.intervention_engine import InterventionEngine, DOMAINS
+from bot.services import ServiceRegistry
+from bot.timer_scheduler import local_date
+
+USER_COUNT = 60
+
+def create_sweep_data(db_path, user_count, seed=11):
+    """Two weeks of mixed check-ins, open commitments and earlier interventions"""
+    LifeDatabase(db_path)
+    engine = InterventionEngine(db_path)
+    rng = random.Random(seed)
+    today = datetime.now(timezone.utc).date()
+    overdue_at = (datetime.now() - timedelta(hours=3)).strftime('%Y-%m-%d %H:%M:%S')
+
+    conn = get_connection(db_path)
+    checkins, triggers, interventions = [], [], []
+    for user_id in range(1, user_count + 1):
+        skill = rng.random()
+        for day_offset in range(1, 15):
+            date = (today - timedelta(days=day_offset)).isoformat()
+            for domain in rng.sample(DOMAINS, 3):
+                # Older days go better than recent ones for some users (declining trend)
+                rate = skill if day_offset < 7 else min(1.0, skill + rng.choice([0, 0.4]))
+                checkins.append((user_id, date, domain, "Test commitment", rng.random() < rate, overdue_at))
+        if rng.random() < 0.5:
+            checkins.append((user_id, today.isoformat(), rng.choice(DOMAINS), "Open commitment", False, overdue_at))
+        for _ in range(rng.randint(0, 3)):
+            triggers.append((user_id, 'avoidance_language', rng.choice(DOMAINS + ['general']), '{}', rng.random()))
+        if rng.random() < 0.3:
+            interventions.append((user_id, rng.choice(DOMAINS), rng.randint(1, 4), '{}'))
+
+    conn.executemany('''
+    INSERT INTO daily_checkins (user_id, date, domain, commitment, completed, created_at)
+    VALUES (?, ?, ?, ?, ?, ?)
+    ''', checkins)
+    conn.executemany('''
+    INSERT INTO intervention_triggers (user_id, trigger_type, domain, trigger_data, severity_score)
+    VALUES (?, ?, ?, ?, ?)
+    ''', triggers)
+    conn.executemany('''
+    INSERT INTO active_interventions (user_id, domain, intervention_level, trigger_condition)
+    VALUES (?, ?, ?, ?)
+    ''', interventions)
+    conn.commit()
+    return engine
+
+def written_rows(db_path):
+    conn = get_connection(db_path)
+    triggers = Counter(conn.execute(
+        "SELECT user_id, domain, trigger_type, ROUND(severity_score, 3) FROM intervention_triggers").fetchall())
+    interventions = Counter(conn.execute(
+        "SELECT user_id, domain, intervention_level FROM active_interventions").fetchall())
+    return triggers, interventions
+
+def test_sweep_matches_per_user_checks():
+    """The batched sweep decides and writes exactly what per-user checks do"""
+    per_user_db, sweep_db = "test_sweep_per_user.db", "test_sweep_batched.db"
+    for db_path in (per_user_db, sweep_db):
+        if os.path.exists(db_path):
+            os.remove(db_path)
+
+    try:
+        per_user_engine = create_sweep_data(per_user_db, USER_COUNT)
+        sweep_engine = create_sweep_data(sweep_db, USER_COUNT)
+        user_ids = list(range(1, USER_COUNT + 1))
+
+        expected = {}
+        for user_id in user_ids:
+            interventions = per_user_engine.comprehensive_intervention_check(user_id)
+            if interventions:
+                expected[user_id] = interventions
+        swept = sweep_engine.run_intervention_sweep(user_ids)
+
+        assert expected, "Test data should need some interventions"
+        assert swept.keys() == expected.keys()
+        for user_id, interventions in expected.items():
+            assert {d: i['level'] for d, i in swept[user_id].items()} == \
+                   {d: i['level'] for d, i in interventions.items()}, user_id
+            for domain, intervention in interventions.items():
+                assert Counter(t['type'] for t in swept[user_id][domain]['triggers']) == \
+                       Counter(t['type'] for t in intervention['triggers'])
+
+        per_user_triggers, per_user_interventions = written_rows(per_user_db)
+        sweep_triggers, sweep_interventions = written_rows(sweep_db)
+        assert sweep_triggers == per_user_triggers
+        assert sweep_interventions == per_user_interventions
+
+        # Returned ids point at the rows that were written
+        conn = get_connection(sweep_db)
+        for user_id, interventions in swept.items():
+            for domain, intervention in interventions.items():
+                row = conn.execute("SELECT user_id, domain, intervention_level FROM active_interventions WHERE id = ?",
+                                   (intervention['intervention_id'],)).fetchone()
+                assert row == (user_id, domain, intervention['level'])
+    finally:
+        for db_path in (per_user_db, sweep_db):
+            close_connections(db_path)
+            os.remove(db_path)
+
+def test_sweep_scales():
+    """Thousands of users are handled in one pass"""
+    db_path = "test_sweep_scale.db"
+    if os.path.exists(db_path):
+        os.remove(db_path)
+
+    try:
+        engine = create_sweep_data(db_path, 3000)
+        start = time.perf_counter()
+        swept = engine.run_intervention_sweep(list(range(1, 3001)))
+        elapsed = time.perf_counter() - start
+        print(f"Swept 3000 users in {elapsed:.2f}s ({len(swept)} needing intervention)")
+        assert swept
+        assert not engine.run_intervention_sweep([])
+    finally:
+        close_connections(db_path)
+        os.remove(db_path)
+
+def test_screens_share_the_users_local_date():
+    """Check-ins are dated, and every screen's windows end, on the user's own date"""
+    db_path = "test_sweep_local_date.db"
+    if os.path.exists(db_path):
+        os.remove(db_path)
+
+    # Whatever the UTC hour, one of these is on another date than UTC
+    tz = 'Pacific/Kiritimati' if datetime.now(timezone.utc).hour >= 10 else 'Etc/GMT+12'
+    services = ServiceRegistry(db_path)
+    services.init_schema()
+    storage = services.storage
+    try:
+        storage.users.add(1, 'away', 'Test')
+        storage.users.set_timezone(1, tz)
+        today = local_date(tz)
+        assert today != datetime.now(timezone.utc).date()
+        overdue_at = (datetime.now() - timedelta(hours=3)).strftime('%Y-%m-%d %H:%M:%S')
+        storage.checkins.add(1, today.isoformat(), 'health', 'Open commitment', created_at=overdue_at)
+        for day in range(1, 20):
+            storage.checkins.add(1, (today - timedelta(days=day)).isoformat(), 'health', 'Run', completed=day % 2 == 0)
+
+        dashboard = services.dashboard_generator.load_metrics(1)
+        assert dashboard.today == today
+        assert dashboard.overall(7)[0] == 7
+        assert services.pattern_analyzer.get_total_commitments(1, 7) == 7
+        assert services.pattern_analyzer.analyze_user_patterns(1, 7)['completion_patterns']['by_domain']['health'][
+            'total_commitments'] == 7
+        assert len(services.conversation_manager.get_recent_patterns(1, 'health', 7)) == 7
+
+        # Today's open commitment is today's wherever the deadline check runs
+        swept = services.intervention_engine.run_intervention_sweep([1])
+        assert [t['type'] for t in swept[1]['health']['triggers']] == ['missed_deadline']
+        assert len(services.intervention_engine.monitor_commitment_deadlines(1)) == 1
+    finally:
+        services.intervention_engine.close()
+        services.conversation_manager.close()
+        close_connections(db_path)
+        os.remove(db_path)
+
+if __name__ == "__main__":
+    test_sweep_matches_per_user_checks()
+    test_sweep_scales()
+    test_screens_share_the_users_local_date()
+    print("✅ Intervention sweep tests passed!")
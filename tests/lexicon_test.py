@@ -0,0 +1,70 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bot.lexicon import LANGUAGE, Lexicon
+from database.connection_pool import close_connections
+from bot.intervention_engine import InterventionEngine
+
+def test_word_boundaries_and_overlaps():
+    """Phrases match whole words only, in any case, and overlapping phrases all count"""
+    assert 'likelihood.scheduled' not in LANGUAGE.match("I know that feeling")
+    assert 'likelihood.scheduled' in LANGUAGE.match("Gym at 6am")
+    assert 'health.activity' not in LANGUAGE.match("Sunday brunch")
+    assert 'parenting.conditional' in LANGUAGE.match("Basketball if I can get off early")
+
+    match = LANGUAGE.match("Maybe I'll TRY TO call")
+    assert match.phrases('business.vague') == ['maybe', 'try to']
+    assert 'likelihood.uncertain' in match, "'try' inside 'try to' still counts"
+    assert LANGUAGE.match("I can’t today").phrases('avoidance.blocked') == ["can't"]
+
+def test_inflected_words():
+    """Regular -s/-ed/-ing forms match their phrase; the phrase itself is reported"""
+    match = LANGUAGE.match("I automated the weekly reports with templates")
+    assert match.phrases('work.automation') == ['automate', 'template']
+    assert match.phrases('work.efficiency') == ['report', 'template']
+
+    match = LANGUAGE.match("Learning Python and planning my week")
+    assert 'business.learning' in match and 'business.preparation' in match
+    assert LANGUAGE.match("Did two workouts and ran").phrases('health.activity') == ['workout', 'ran']
+    match = LANGUAGE.match("Skipped it, studied instead")
+    assert 'health.excuse' in match and 'business.learning' in match
+    assert 'avoidance.intent' in LANGUAGE.match("Trying to finish")
+    assert LANGUAGE.match("Three new clients").phrases('business.revenue') == ['client']
+    assert 'health.activity' not in LANGUAGE.match("Sunday brunch, then a runway show")
+
+def test_weights_and_order():
+    """Matches carry category weights and come back in lexicon order"""
+    lexicon = Lexicon({
+        'low': (0.2, ['later', 'some day']),
+        'high': (0.9, ['never']),
+    })
+    match = lexicon.match("Never, maybe some day, later")
+    assert match.categories() == ['low', 'high']
+    assert match.phrases('low') == ['later', 'some day']
+    assert match.max_weight() == 0.9
+    assert lexicon.match(None).categories() == []
+
+def test_avoidance_language():
+    """Avoidance scoring keeps its categories and weights"""
+    db_path = "test_lexicon.db"
+    if os.path.exists(db_path):
+        os.remove(db_path)
+
+    engine = InterventionEngine(db_path)
+    try:
+        result = engine.analyze_avoidance_language(1, "Maybe later, I'm too tired")
+        assert result['avoidance_detected'] and result['score'] == 0.6
+        assert result['patterns'] == ['maybe', 'later', 'too tired']
+        assert not engine.analyze_avoidance_language(1, "I will call clients at 2pm")['avoidance_detected']
+    finally:
+        engine.close()
+        close_connections(db_path)
+        os.remove(db_path)
+
+if __name__ == "__main__":
+    test_word_boundaries_and_overlaps()
+    test_inflected_words()
+    test_weights_and_order()
+    test_avoidance_language()
+    print("✅ Lexicon tests passed!")
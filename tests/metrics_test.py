@@ -0,0 +1,125 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import asyncio
+import urllib.request
+from database.async_db import AsyncDatabaseExecutor
+from database.connection_pool import get_connection, close_connections
+from database.metrics import (
+    METRICS, LATENCY, STATEMENTS, ERRORS, Histogram, MetricsRegistry, timed, start_metrics_server
+)
+from database.sqlite_storage import SQLiteStorage
+from database.migrations import migrate
+
+DB_PATH = "test_metrics.db"
+
+def fresh_db():
+    if os.path.exists(DB_PATH):
+        os.remove(DB_PATH)
+    migrate(DB_PATH)
+
+def test_histogram_quantiles():
+    histogram = Histogram((1, 2, 4, 8))
+    for value in [0.5] * 50 + [3] * 49 + [100]:
+        histogram.observe(value)
+    assert histogram.count == 100
+    assert 0 < histogram.quantile(0.5) <= 1
+    assert 2 < histogram.quantile(0.99) <= 4
+    assert histogram.quantile(1.0) == 8  # past the last bound
+    assert Histogram().quantile(0.5) == 0.0
+
+def test_timed_counts_statements_per_call():
+    """Nested timed calls each see the statements run inside them"""
+    fresh_db()
+    try:
+        @timed('test', 'inner')
+        def inner():
+            conn = get_connection(DB_PATH)
+            conn.execute("SELECT 1")
+            conn.execute("SELECT 2")
+
+        @timed('test', 'outer')
+        def outer():
+            get_connection(DB_PATH).execute("SELECT 3")
+            inner()
+
+        get_connection(DB_PATH)  # connection setup PRAGMAs don't belong to a call
+        outer()
+        outer_statements = METRICS.histogram(STATEMENTS, component='test', operation='outer')
+        inner_statements = METRICS.histogram(STATEMENTS, component='test', operation='inner')
+        assert (outer_statements.count, outer_statements.sum) == (1, 3)
+        assert (inner_statements.count, inner_statements.sum) == (1, 2)
+        assert METRICS.histogram(LATENCY, component='test', operation='outer').count == 1
+
+        storage = SQLiteStorage(DB_PATH)
+        before = METRICS.histogram(LATENCY, component='db', operation='checkin.count').count
+        storage.checkins.count(1)
+        assert METRICS.histogram(LATENCY, component='db', operation='checkin.count').count == before + 1
+    finally:
+        close_connections(DB_PATH)
+        os.remove(DB_PATH)
+
+def test_async_handler_counts_executor_statements():
+    """Statements run on the DB executor count toward the handler awaiting them"""
+    fresh_db()
+    executor = AsyncDatabaseExecutor(max_workers=2)
+
+    def query():
+        conn = get_connection(DB_PATH)
+        conn.execute("SELECT COUNT(*) FROM users").fetchone()
+        conn.execute("SELECT COUNT(*) FROM daily_checkins").fetchone()
+
+    @timed('test', 'async_handler')
+    async def handler():
+        await executor.run(query)
+
+    @timed('test', 'failing_handler')
+    async def failing():
+        raise ValueError("boom")
+
+    try:
+        asyncio.run(handler())
+        statements = METRICS.histogram(STATEMENTS, component='test', operation='async_handler')
+        assert (statements.count, statements.sum) == (1, 2)
+        try:
+            asyncio.run(failing())
+        except ValueError:
+            pass
+        assert METRICS.counter(ERRORS, component='test', operation='failing_handler').value == 1
+    finally:
+        executor.shutdown()
+        close_connections(DB_PATH)
+        os.remove(DB_PATH)
+
+def test_prometheus_export():
+    registry = MetricsRegistry()
+    with registry.timed('handler', 'start'):
+        pass
+    registry.register_cache('patterns', lambda: {'hits': 3, 'misses': 1, 'hit_rate': 0.75})
+    text = registry.prometheus_text()
+    assert '# TYPE life_agent_latency_seconds histogram' in text
+    assert 'life_agent_latency_seconds_count{component="handler",operation="start"} 1' in text
+    assert 'life_agent_latency_seconds_bucket{component="handler",operation="start",le="+Inf"} 1' in text
+    assert 'life_agent_cache_hit_ratio{cache="patterns"} 0.75' in text
+
+    summary = registry.summary()
+    assert summary['requests']['count'] == 1 and summary['errors'] == 0
+    registry.record_error('handler', 'dashboard')
+    assert registry.summary()['errors'] == 1
+
+    server = start_metrics_server(0, registry, host='127.0.0.1')
+    try:
+        url = f"http://127.0.0.1:{server.server_address[1]}/metrics"
+        with urllib.request.urlopen(url) as response:
+            assert 'life_agent_uptime_seconds' in response.read().decode()
+    finally:
+        server.shutdown()
+        server.server_close()
+
+if __name__ == "__main__":
+    test_histogram_quantiles()
+    test_timed_counts_statements_per_call()
+    test_async_handler_counts_executor_statements()
+    test_prometheus_export()
+    print("✅ Metrics tests passed!")
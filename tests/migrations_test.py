@@ -0,0 +1,123 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import sqlite3
+from database.connection_pool import get_connection, close_connections
+from database.migrations import migrate, get_schema_version, SCHEMA_VERSION
+from database.db_setup import LifeDatabase
+from database.data_versions import get_user_version
+from database.sqlite_storage import SQLiteStorage
+from bot.conversation_manager import ConversationManager
+from bot.intervention_engine import InterventionEngine
+
+def test_fresh_database_is_migrated_once():
+    """A new file gets every table and index, and later checks cost nothing"""
+    db_path = "test_migrations.db"
+    if os.path.exists(db_path):
+        os.remove(db_path)
+
+    try:
+        assert migrate(db_path) == SCHEMA_VERSION
+        conn = get_connection(db_path)
+        assert get_schema_version(conn) == SCHEMA_VERSION
+
+        names = {row[0] for row in conn.execute("SELECT name FROM sqlite_master")}
+        assert {'users', 'daily_checkins', 'daily_domain_rollups', 'conversation_sessions',
+                'intervention_triggers', 'dead_letters', 'email_templates', 'real_jira_incidents',
+                'daily_metrics', 'work_tasks', 'user_data_versions'} <= names
+        assert {'idx_checkins_user_date_time', 'idx_triggers_user_domain_time', 'idx_interventions_active'} <= names
+        assert not {'idx_checkins_user_date', 'idx_checkins_user_date_cover'} & names, "Superseded indexes"
+
+        # Components only check the version, and only once per pool
+        statements = []
+        conn.set_trace_callback(statements.append)
+        LifeDatabase(db_path)
+        ConversationManager(db_path)
+        engine = InterventionEngine(db_path)
+        engine.close()
+        conn.set_trace_callback(None)
+        assert not [s for s in statements if 'CREATE' in s.upper()]
+        assert migrate(db_path) == 0
+
+        # Reopening the file checks the version again but applies nothing
+        close_connections(db_path)
+        assert migrate(db_path) == 0
+    finally:
+        close_connections(db_path)
+        os.remove(db_path)
+
+def test_checkin_time_columns():
+    """Weekday and hour are stored with a check-in, in one write, and follow created_at"""
+    db_path = "test_migrations_time.db"
+    if os.path.exists(db_path):
+        os.remove(db_path)
+
+    try:
+        migrate(db_path)
+        conn = get_connection(db_path)
+        # 2024-01-07 was a Sunday
+        SQLiteStorage(db_path).checkins.add(1, '2024-01-07', 'health', 'Run', created_at='2024-01-07 13:05:00')
+        row = "SELECT created_weekday, created_hour FROM daily_checkins"
+        assert conn.execute(row).fetchall() == [(0, 13)]
+        assert get_user_version(db_path, 1) == 1
+
+        conn.execute("UPDATE daily_checkins SET created_at = '2024-01-10 08:00:00'")
+        assert conn.execute(row).fetchall() == [(3, 8)]
+        conn.commit()
+    finally:
+        close_connections(db_path)
+        os.remove(db_path)
+
+def test_legacy_database_is_adopted():
+    """Files created before migrations keep their data and gain the new pieces"""
+    db_path = "test_migrations_legacy.db"
+    if os.path.exists(db_path):
+        os.remove(db_path)
+
+    legacy = sqlite3.connect(db_path)
+    legacy.execute("CREATE TABLE users (user_id INTEGER PRIMARY KEY, username TEXT, first_name TEXT, "
+                   "created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP)")
+    legacy.execute("CREATE TABLE daily_checkins (id INTEGER PRIMARY KEY AUTOINCREMENT, user_id INTEGER, "
+                   "date DATE, domain TEXT, commitment TEXT, completed BOOLEAN DEFAULT FALSE, notes TEXT, "
+                   "created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP)")
+    legacy.execute("INSERT INTO users (user_id, username, first_name) VALUES (1, 'old', 'Old')")
+    legacy.execute("INSERT INTO daily_checkins (user_id, date, domain, commitment, completed) "
+                   "VALUES (1, '2024-01-01', 'health', 'Run', 1)")
+    legacy.commit()
+    legacy.close()
+
+    try:
+        assert migrate(db_path) == SCHEMA_VERSION
+        conn = get_connection(db_path)
+        assert conn.execute("SELECT user_id, timezone FROM users").fetchall() == [(1, None)]
+        assert conn.execute("SELECT total, completed FROM daily_domain_rollups").fetchall() == [(1, 1)]
+    finally:
+        close_connections(db_path)
+        os.remove(db_path)
+
+def test_newer_schema_is_refused():
+    """Code older than the database must not write to it"""
+    db_path = "test_migrations_newer.db"
+    if os.path.exists(db_path):
+        os.remove(db_path)
+
+    newer = sqlite3.connect(db_path)
+    newer.execute(f"PRAGMA user_version = {SCHEMA_VERSION + 1}")
+    newer.close()
+
+    try:
+        migrate(db_path)
+        assert False, "Expected RuntimeError"
+    except RuntimeError:
+        pass
+    finally:
+        close_connections(db_path)
+        os.remove(db_path)
+
+if __name__ == "__main__":
+    test_fresh_database_is_migrated_once()
+    test_checkin_time_columns()
+    test_legacy_database_is_adopted()
+    test_newer_schema_is_refused()
+    print("✅ Migration tests passed!")
@@ -0,0 +1,88 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from datetime import datetime, timezone
+from database.db_setup import LifeDatabase
+from database.connection_pool import get_connection, close_connections
+from bot.intervention_engine import InterventionEngine
+from bot.pattern_analyzer import PatternAnalyzer
+from bot.lru_cache import LRUCache
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+def add_checkin(db_path, user_id, domain, completed):
+    conn = get_connection(db_path)
+    conn.execute('''
+    INSERT INTO daily_checkins (user_id, date, domain, commitment, completed)
+    VALUES (?, ?, ?, ?, ?)
+    ''', (user_id, datetime.now(timezone.utc).date().isoformat(), domain, "Test commitment", completed))
+    conn.commit()
+
+def test_cache_hits_and_write_invalidation():
+    """Repeated analysis is served from cache until that user's data changes"""
+    db_path = "test_pattern_cache.db"
+    if os.path.exists(db_path):
+        os.remove(db_path)
+
+    LifeDatabase(db_path)
+    engine = InterventionEngine(db_path)
+    clock = FakeClock()
+    analyzer = PatternAnalyzer(db_path, cache=LRUCache(maxsize=8, ttl=60, clock=clock))
+
+    try:
+        add_checkin(db_path, 1, 'health', True)
+        add_checkin(db_path, 2, 'health', True)
+
+        first = analyzer.analyze_user_patterns(1, 14)
+        assert analyzer.analyze_user_patterns(1, 14) is first
+        analyzer.analyze_user_patterns(2, 14)
+        assert analyzer.cache_stats()['hits'] == 1
+        assert analyzer.cache_stats()['misses'] == 2
+
+        # Another user's check-in leaves user 1 cached
+        add_checkin(db_path, 2, 'health', False)
+        assert analyzer.analyze_user_patterns(1, 14) is first
+
+        # User 1's own check-in is picked up immediately
+        add_checkin(db_path, 1, 'health', False)
+        updated = analyzer.analyze_user_patterns(1, 14)
+        assert updated['completion_patterns']['by_domain']['health']['total_commitments'] == 2
+
+        # So is an intervention trigger, once the write-behind buffer is flushed
+        engine.log_trigger(1, 'pattern_decline', 'health', {}, 0.5)
+        engine.flush_triggers()
+        assert analyzer.analyze_user_patterns(1, 14) is not updated
+
+        # TTL expiry forces a reload even without writes
+        cached = analyzer.analyze_user_patterns(1, 14)
+        clock.now += 61
+        assert analyzer.analyze_user_patterns(1, 14) is not cached
+        assert analyzer.cache_stats()['misses'] == 5
+    finally:
+        engine.close()
+        close_connections(db_path)
+        os.remove(db_path)
+
+def test_lru_eviction():
+    """Least recently used entries go first once the cache is full"""
+    cache = LRUCache(maxsize=2)
+    cache.set('a', 1)
+    cache.set('b', 2)
+    assert cache.get('a') == 1
+    cache.set('c', 3)
+
+    assert cache.get('b') is None
+    assert cache.get('a') == 1 and cache.get('c') == 3
+    assert cache.get('a', version=1) is None, "Version mismatch is a miss"
+    assert cache.stats()['evictions'] == 1
+
+if __name__ == "__main__":
+    test_cache_hits_and_write_invalidation()
+    test_lru_eviction()
+    print("✅ Pattern cache tests passed!")
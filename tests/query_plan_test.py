@@ -0,0 +1,101 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import re
+from datetime import datetime, timedelta, timezone
+from database.connection_pool import get_connection, close_connections
+from database.storage import get_storage
+from bot.services import ServiceRegistry
+from bot.agents.health_agent import HealthAgent
+
+DOMAINS = ['business', 'health', 'finance', 'parenting', 'work', 'personal']
+
+def populate(storage, engine, users=20, days=30):
+    today = datetime.now(timezone.utc).date()
+    for user_id in range(1, users + 1):
+        storage.users.add(user_id, f"user{user_id}", "Test")
+        for day in range(days):
+            date = (today - timedelta(days=day)).isoformat()
+            for index, domain in enumerate(DOMAINS):
+                storage.checkins.add(user_id, date, domain, "Commitment", completed=(day + index) % 3 != 0)
+        engine.log_trigger(user_id, 'pattern_decline', 'health', {}, 0.5)
+    engine.flush_triggers()
+
+# Reads meant to take the whole table: the sweep works out every user's local date
+WHOLE_TABLE_READS = {"SELECT user_id, timezone FROM users"}
+
+def query_plan(conn, statement):
+    return [detail for _, _, _, detail in conn.execute("EXPLAIN QUERY PLAN " + statement)]
+
+def full_scans(conn, statement):
+    """Tables a statement reads in full, or indexes it builds on the fly, going by EXPLAIN QUERY PLAN
+
+    Plans name tables by their alias, so aliases are resolved first. Temp tables
+    such as sweep_users aren't in sqlite_master and may be scanned.
+    """
+    tables = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type='table'")}
+    aliases = {name: name for name in tables}
+    for table, alias in re.findall(r"(?:FROM|JOIN)\s+(\w+)(?:\s+(?:AS\s+)?(\w+))?", statement, re.IGNORECASE):
+        if table in tables and alias:
+            aliases[alias] = table
+    scans = []
+    for detail in query_plan(conn, statement):
+        match = re.match(r"SCAN (\w+)", detail)
+        if (match and match.group(1) in aliases) or 'AUTOMATIC' in detail:
+            scans.append(detail)
+    return scans
+
+def test_hot_queries_use_indexes():
+    """Every read behind the dashboard, pattern analysis, intervention checks and sweeps is an index search"""
+    db_path = "test_query_plans.db"
+    if os.path.exists(db_path):
+        os.remove(db_path)
+
+    storage = get_storage(db_path)
+    services = ServiceRegistry(db_path, storage=storage)
+    services.init_schema()
+    engine = services.intervention_engine
+    try:
+        populate(storage, engine)
+
+        statements = []
+        conn = get_connection(db_path)
+        conn.set_trace_callback(statements.append)
+        try:
+            services.pattern_analyzer.analyze_user_patterns(1, 30)
+            services.dashboard_generator.generate_comprehensive_dashboard(1)
+            engine.comprehensive_intervention_check(1)
+            engine.get_domain_triggers(1, 'health')
+            trigger = HealthAgent(1, services.conversation_manager, services).get_recent_triggers()
+            storage.checkins.recent(1, 'health', '2000-01-01')
+            storage.checkins.count(1)
+            storage.interventions.add(1, 'health', 2, 'pattern_decline')
+            engine.run_intervention_sweep(list(range(1, 21)))
+        finally:
+            conn.set_trace_callback(None)
+
+        reads = {s.strip() for s in statements
+                 if s.lstrip().upper().startswith('SELECT') and 'sqlite_master' not in s} - WHOLE_TABLE_READS
+        assert trigger['trigger_type'] == 'pattern_decline'
+        assert any('daily_domain_rollups' in s for s in reads)
+        assert any('intervention_triggers' in s for s in reads)
+        assert any('active_interventions' in s for s in reads)
+
+        sweep_reads = [s for s in reads if 'sweep_users' in s]
+        assert len(sweep_reads) == 5
+        # The latest active intervention per user and domain comes straight from the index
+        latest = next(s for s in sweep_reads if 'ROW_NUMBER' in s)
+        assert any(detail.startswith('SEARCH a USING COVERING INDEX') for detail in query_plan(conn, latest)), \
+            query_plan(conn, latest)
+
+        problems = {s: scans for s in reads if (scans := full_scans(conn, s))}
+        assert not problems, f"Full table scans: {problems}"
+    finally:
+        engine.close()
+        close_connections(db_path)
+        os.remove(db_path)
+
+if __name__ == "__main__":
+    test_hot_queries_use_indexes()
+    print("✅ Query plan tests passed!")
@@ -0,0 +1,97 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database.db_setup import LifeDatabase
+from database.connection_pool import get_connection, close_connections
+from database.rollups import rebuild_rollups
+
+RAW_ROLLUPS = '''
+SELECT user_id, date, domain, COUNT(*), SUM(CASE WHEN completed THEN 1 ELSE 0 END)
+FROM daily_checkins
+GROUP BY user_id, date, domain
+ORDER BY user_id, date, domain
+'''
+
+def stored_rollups(conn):
+    return conn.execute('''
+    SELECT user_id, date, domain, total, completed FROM daily_domain_rollups
+    ORDER BY user_id, date, domain
+    ''').fetchall()
+
+def test_triggers_follow_every_write():
+    """Inserts, updates and deletes on daily_checkins keep the rollups exact"""
+    db_path = "test_rollups.db"
+    if os.path.exists(db_path):
+        os.remove(db_path)
+
+    LifeDatabase(db_path)
+    conn = get_connection(db_path)
+
+    try:
+        conn.executemany('''
+        INSERT INTO daily_checkins (user_id, date, domain, commitment, completed)
+        VALUES (?, ?, ?, ?, ?)
+        ''', [
+            (1, '2024-01-01', 'health', 'Run', True),
+            (1, '2024-01-01', 'health', 'Stretch', False),
+            (1, '2024-01-01', 'business', 'Call client', False),
+            (1, '2024-01-02', 'health', 'Run', False),
+            (2, '2024-01-01', 'health', 'Walk', True),
+        ])
+        conn.commit()
+        assert stored_rollups(conn) == conn.execute(RAW_ROLLUPS).fetchall()
+        assert (1, '2024-01-01', 'health', 2, 1) in stored_rollups(conn)
+
+        # Marking complete, moving a check-in to another domain and deleting
+        conn.execute("UPDATE daily_checkins SET completed = 1 WHERE commitment = 'Call client'")
+        conn.execute("UPDATE daily_checkins SET domain = 'personal' WHERE commitment = 'Stretch'")
+        conn.execute("DELETE FROM daily_checkins WHERE user_id = 1 AND date = '2024-01-02'")
+        conn.commit()
+
+        rollups = stored_rollups(conn)
+        assert rollups == conn.execute(RAW_ROLLUPS).fetchall()
+        assert not any(row[1] == '2024-01-02' for row in rollups), "Empty rollup rows are removed"
+    finally:
+        close_connections(db_path)
+        os.remove(db_path)
+
+def test_backfill_and_rebuild():
+    """Existing history is backfilled on upgrade and rebuild repairs drift"""
+    db_path = "test_rollups_backfill.db"
+    if os.path.exists(db_path):
+        os.remove(db_path)
+
+    conn = get_connection(db_path)
+    try:
+        # A database created before rollups existed
+        conn.execute('''
+        CREATE TABLE daily_checkins (
+            id INTEGER PRIMARY KEY AUTOINCREMENT, user_id INTEGER, date DATE, domain TEXT,
+            commitment TEXT, completed BOOLEAN DEFAULT FALSE, notes TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        ''')
+        for day in range(1, 8):
+            conn.execute('''
+            INSERT INTO daily_checkins (user_id, date, domain, commitment, completed)
+            VALUES (?, ?, ?, ?, ?)
+            ''', (5, f'2024-02-0{day}', 'finance', 'Budget', day % 2))
+        conn.commit()
+
+        LifeDatabase(db_path)
+        assert stored_rollups(conn) == conn.execute(RAW_ROLLUPS).fetchall()
+        assert len(stored_rollups(conn)) == 7
+
+        conn.execute("UPDATE daily_domain_rollups SET total = 99")
+        conn.commit()
+        assert rebuild_rollups(db_path, user_id=5) == 7
+        assert stored_rollups(conn) == conn.execute(RAW_ROLLUPS).fetchall()
+    finally:
+        close_connections(db_path)
+        os.remove(db_path)
+
+if __name__ == "__main__":
+    test_triggers_follow_every_write()
+    test_backfill_and_rebuild()
+    print("✅ Rollup tests passed!")
@@ -0,0 +1,119 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database.archive import archive_sessions
+from database.connection_pool import get_connection, close_connections
+from database.migrations import migrate
+from database.search import match_expression, search_history
+from database.sqlite_storage import SQLiteStorage
+
+def test_search_finds_messages_and_commitments():
+    """Both indexes are searched, ranked together and limited to the asking user"""
+    db_path = "test_search.db"
+    if os.path.exists(db_path):
+        os.remove(db_path)
+
+    migrate(db_path)
+    storage = SQLiteStorage(db_path)
+    try:
+        session_id = storage.conversations.create_session(1, 'work')
+        storage.conversations.add_messages([
+            (session_id, 'agent', 'What is blocking the client proposal?', 'initial_prompt', '2024-01-01 08:00:00'),
+            (session_id, 'user', 'I keep postponing the proposal for the client', 'response', '2024-01-01 08:01:00'),
+            (session_id, 'user', 'Going for a run first', 'response', '2024-01-01 08:02:00'),
+        ])
+        other_session = storage.conversations.create_session(2, 'work')
+        storage.conversations.add_messages([
+            (other_session, 'user', 'My client proposal is done', 'response', '2024-01-01 09:00:00'),
+        ])
+        checkin_id = storage.checkins.add(1, '2024-01-02', 'work', 'Send the client proposal')
+        storage.checkins.add(2, '2024-01-02', 'work', 'Review client proposal')
+
+        hits = search_history(db_path, 1, 'client proposals!')
+        assert {(hit.kind, hit.ref) for hit in hits} == {
+            ('message', session_id), ('commitment', checkin_id)}
+        assert len(hits) == 3
+        assert [hit.kind for hit in hits] == ['message', 'commitment', 'message']
+        messages = [hit.rank for hit in hits if hit.kind == 'message']
+        assert messages == sorted(messages)
+        assert all('[client]' in hit.snippet and '[proposal]' in hit.snippet for hit in hits)
+        commitment = next(hit for hit in hits if hit.kind == 'commitment')
+        assert (commitment.when, commitment.label) == ('2024-01-02', 'work')
+
+        assert [hit.label for hit in search_history(db_path, 1, 'running')] == ['user']
+        assert len(search_history(db_path, 1, 'client', limit=1)) == 1
+        assert search_history(db_path, 1, '?! ...') == []
+        assert search_history(db_path, 3, 'client proposal') == []
+    finally:
+        close_connections(db_path)
+        os.remove(db_path)
+
+def test_results_interleave_each_index_by_rank():
+    """bm25 from different indexes isn't compared: the best of each comes first"""
+    db_path = "test_search_rank.db"
+    if os.path.exists(db_path):
+        os.remove(db_path)
+
+    migrate(db_path)
+    storage = SQLiteStorage(db_path)
+    try:
+        # "gym" is in every message but few commitments, so raw bm25 would rank
+        # both commitments ahead of every message
+        session_id = storage.conversations.create_session(1, 'health')
+        storage.conversations.add_messages([
+            (session_id, 'user', f'Gym day {n}', 'response', '2024-01-01 08:00:00') for n in range(10)])
+        checkin_ids = [storage.checkins.add(1, '2024-01-02', 'health', 'Gym before work') for _ in range(2)]
+        for n in range(20):
+            storage.checkins.add(1, '2024-01-02', 'work', f'Report {n}')
+
+        hits = search_history(db_path, 1, 'gym', limit=4)
+        assert [hit.kind for hit in hits] == ['message', 'commitment', 'message', 'commitment']
+        assert {hits[1].ref, hits[3].ref} == set(checkin_ids)
+        assert max(hits[1].rank, hits[3].rank) < min(hits[0].rank, hits[2].rank)
+    finally:
+        close_connections(db_path)
+        os.remove(db_path)
+
+def test_index_follows_checkin_edits_and_archiving():
+    db_path = "test_search_sync.db"
+    if os.path.exists(db_path):
+        os.remove(db_path)
+
+    migrate(db_path)
+    storage = SQLiteStorage(db_path)
+    conn = get_connection(db_path)
+    try:
+        checkin_id = storage.checkins.add(1, '2024-01-02', 'health', 'Swim twenty laps')
+        conn.execute("UPDATE daily_checkins SET commitment = 'Cycle to work' WHERE id = ?", (checkin_id,))
+        conn.commit()
+        assert search_history(db_path, 1, 'swim') == []
+        assert [hit.ref for hit in search_history(db_path, 1, 'cycle')] == [checkin_id]
+        conn.execute("DELETE FROM daily_checkins WHERE id = ?", (checkin_id,))
+        conn.commit()
+        assert search_history(db_path, 1, 'cycle') == []
+
+        session_id = storage.conversations.create_session(1, 'health')
+        storage.conversations.add_messages([
+            (session_id, 'user', 'Booked a physio appointment', 'response', '2024-01-01 08:00:00'),
+        ])
+        storage.conversations.end_session(session_id, 'committed', '{}')
+        conn.execute("UPDATE conversation_sessions SET session_end = '2024-01-01 09:00:00'")
+        conn.commit()
+        assert archive_sessions(db_path, older_than_days=30) == 1
+        assert [hit.ref for hit in search_history(db_path, 1, 'physio')] == [session_id]
+    finally:
+        close_connections(db_path)
+        os.remove(db_path)
+
+def test_match_expression_quotes_user_input():
+    assert match_expression(5, 'NEAR(a b) OR "x', 'commitment') == \
+        'user_key : u5 AND commitment : ("NEAR" AND "a" AND "b" AND "OR" AND "x")'
+    assert match_expression(5, '***', 'commitment') is None
+
+if __name__ == "__main__":
+    test_search_finds_messages_and_commitments()
+    test_results_interleave_each_index_by_rank()
+    test_index_follows_checkin_edits_and_archiving()
+    test_match_expression_quotes_user_input()
+    print("✅ Search tests passed!")
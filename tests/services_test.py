@@ -0,0 +1,58 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database.connection_pool import get_connection, close_connections
+from bot.services import get_services
+from bot.intervention_engine import InterventionEngine
+from bot.agents.business_agent import BusinessAgent
+from bot.agents.health_agent import HealthAgent
+
+def test_agents_share_services():
+    """Agents for every user reuse one analyzer, engine and generator"""
+    db_path = "test_services.db"
+    if os.path.exists(db_path):
+        os.remove(db_path)
+
+    engines_built = []
+    original_init = InterventionEngine.__init__
+
+    def counting_init(engine, *args, **kwargs):
+        engines_built.append(engine)
+        original_init(engine, *args, **kwargs)
+
+    InterventionEngine.__init__ = counting_init
+    try:
+        services = get_services(db_path)
+        services.init_schema()
+        services.init_schema()
+        assert get_services(db_path) is services
+
+        agents = []
+        for user_id in range(50):
+            agents.append(BusinessAgent(user_id, services.conversation_manager, services))
+            agents.append(HealthAgent(user_id, services.conversation_manager, services))
+
+        assert len(engines_built) == 1, "Intervention engine should be built once"
+        assert all(agent.pattern_analyzer is services.pattern_analyzer for agent in agents)
+        assert all(agent.intervention_engine is services.intervention_engine for agent in agents)
+        assert all(agent.intervention_generator is services.intervention_generator for agent in agents)
+        assert services.intervention_engine.pattern_analyzer is services.pattern_analyzer
+
+        tables = {row[0] for row in get_connection(db_path).execute(
+            "SELECT name FROM sqlite_master WHERE type='table'")}
+        assert {'daily_checkins', 'conversation_sessions', 'intervention_triggers'} <= tables
+
+        # A recreated database gets fresh services (and fresh schema)
+        close_connections(db_path)
+        os.remove(db_path)
+        assert get_services(db_path) is not services
+    finally:
+        InterventionEngine.__init__ = original_init
+        close_connections(db_path)
+        if os.path.exists(db_path):
+            os.remove(db_path)
+
+if __name__ == "__main__":
+    test_agents_share_services()
+    print("✅ Service registry tests passed!")
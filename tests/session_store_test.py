@@ -0,0 +1,319 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import time
+from datetime import datetime
+from database.connection_pool import get_connection, close_connections
+from database.metrics import METRICS, STATEMENTS_TOTAL
+from database.memory_storage import MemoryStorage
+from database.storage import get_storage
+from bot.conversation_manager import ConversationManager
+from bot.conversation_journal import MESSAGE_TAIL
+from bot.write_behind import WriteBehindBuffer
+from bot.session_store import (
+    MemorySessionStore, SQLiteSessionStore, SessionConflict, ExpiryQueue, encode_state, decode_state
+)
+
+def test_memory_store_versions():
+    store = MemorySessionStore()
+    store.start(1, {'session_id': 7, 'messages': []})
+    state, version = store.load(1)
+    assert store.save(1, state, version) == version + 1
+    try:
+        store.save(1, state, version)
+        assert False, "a stale version should be refused"
+    except SessionConflict:
+        pass
+    assert store.update(1, lambda state: state['messages'].append('hi'))['messages'] == ['hi']
+    assert store.remove(1)['session_id'] == 7
+    assert store.get(1) is None and store.update(2, lambda state: None) is None
+
+def test_sqlite_store_leases_and_versions():
+    """Two stores on one file act like two bot processes"""
+    db_path = "test_session_store.db"
+    if os.path.exists(db_path):
+        os.remove(db_path)
+
+    now = [1000.0]
+    clock = lambda: now[0]
+    first = SQLiteSessionStore(db_path, lease_seconds=5, owner='first', clock=clock)
+    second = SQLiteSessionStore(db_path, lease_seconds=5, owner='second', clock=clock)
+    try:
+        first.start(1, {'session_id': 3, 'stage': 'initial_prompt'})
+
+        # The lease holder answers loads from memory
+        before = METRICS.total(STATEMENTS_TOTAL)
+        assert first.get(1)['stage'] == 'initial_prompt'
+        assert METRICS.total(STATEMENTS_TOTAL) == before
+
+        # Others can read it but not write until the lease lapses
+        state, version = second.load(1)
+        state['stage'] = 'second'
+        try:
+            second.save(1, state, version)
+            assert False, "a leased session should not be writable elsewhere"
+        except SessionConflict:
+            pass
+
+        now[0] += 6
+        assert second.save(1, state, version) == version + 1
+
+        # first's lease lapsed, so it reads the row again and sees the change
+        state, version = first.load(1)
+        assert state['stage'] == 'second'
+        try:
+            first.save(1, state, version - 1)
+            assert False, "a stale version should be refused"
+        except SessionConflict:
+            pass
+
+        now[0] += 6
+        assert first.remove(1)['stage'] == 'second'
+        assert second.get(1) is None
+    finally:
+        close_connections(db_path)
+        os.remove(db_path)
+
+def test_conversation_survives_restart():
+    db_path = "test_session_restart.db"
+    if os.path.exists(db_path):
+        os.remove(db_path)
+
+    storage = get_storage(db_path)
+    try:
+        manager = ConversationManager(db_path, storage=storage)
+        session_id = manager.start_conversation(1, 'health')
+        assert manager.add_message(1, 'agent', 'What will you do today?', 'initial_prompt')
+
+        # The old process shuts down and a new one, with its own store, picks the conversation up
+        manager.close()
+        restarted = ConversationManager(db_path, storage=storage)
+        context = restarted.get_conversation_context(1)
+        assert context['session_id'] == session_id and context['agent_domain'] == 'health'
+        assert isinstance(context['last_activity'], datetime)
+        assert context['messages'][0].message == 'What will you do today?'
+        assert context['messages'][0].timestamp.date() == context['last_activity'].date()
+        # The shared row keeps the conversation without its messages
+        state = get_connection(db_path).execute(
+            "SELECT state FROM conversation_state WHERE user_id = 1").fetchone()[0]
+        assert 'What will you do today?' not in state and 'messages' not in decode_state(state)
+
+        assert restarted.add_message(1, 'user', 'Run 5k', 'response')
+        restarted.end_conversation(1, 'committed')
+        assert restarted.get_conversation_context(1) == {}
+        assert [message[0] for message in storage.conversations.messages(session_id)] == ['agent', 'user']
+    finally:
+        close_connections(db_path)
+        os.remove(db_path)
+
+def test_expiry_queue():
+    queue = ExpiryQueue()
+    queue.touch('a', 10)
+    queue.touch('b', 20)
+    queue.touch('a', 30)  # activity pushes a's deadline back
+    queue.touch('c', 5)
+    queue.discard('c')
+    assert queue.pop_due(25) == ['b']
+    assert len(queue) == 1 and len(queue._heap) == 1
+    assert queue.pop_due(30) == ['a']
+    assert len(queue) == 0 and queue.pop_due(100) == []
+
+def live_gauge() -> int:
+    line = next(line for line in METRICS.prometheus_text().splitlines() if line.startswith('life_agent_sessions_live '))
+    return int(line.split()[1])
+
+def test_idle_conversations_expire_as_abandoned():
+    storage = MemoryStorage()
+    now = [1000.0]
+    live = live_gauge()
+    manager = ConversationManager(storage=storage, idle_timeout=60, clock=lambda: now[0])
+    expired, persisted = manager.expired.value, manager.persisted.value
+
+    first = manager.start_conversation(1, 'health')
+    manager.start_conversation(2, 'work')
+    manager.start_conversation(3, 'finance')
+    manager.end_conversation(3, 'committed')
+    assert manager.session_stats()['live'] == 2
+    # Every open manager counts, whichever was built last
+    other = ConversationManager(storage=MemoryStorage())
+    other.start_conversation(1, 'work')
+    assert live_gauge() == live + 3
+    other.close()
+    assert live_gauge() == live + 2
+
+    now[0] += 45
+    manager.add_message(2, 'user', 'Still here', 'response')
+    now[0] += 30
+    assert manager.expire_idle_conversations() == 1
+    assert manager.get_conversation_context(1) == {} and manager.get_conversation_context(2)
+    assert storage.conversations._sessions[first]['outcome'] == 'abandoned'
+
+    now[0] += 60
+    assert manager.expire_idle_conversations() == 1
+    assert manager.session_stats()['live'] == 0
+    assert (manager.expired.value - expired, manager.persisted.value - persisted) == (2, 2)
+    assert live_gauge() == live
+
+def test_orphaned_sessions_expire():
+    """Sessions left in the table by a process that stopped are closed by the next one"""
+    db_path = "test_session_orphans.db"
+    if os.path.exists(db_path):
+        os.remove(db_path)
+
+    storage = get_storage(db_path)
+    try:
+        old = ConversationManager(db_path, storage=storage)
+        session_id = old.start_conversation(1, 'health')
+        old.sessions.release()
+
+        later = time.time() + 3600
+        restarted = ConversationManager(db_path, storage=storage, clock=lambda: later)
+        assert restarted.expire_idle_conversations() == 1
+        assert restarted.get_conversation_context(1) == {}
+        row = get_connection(db_path).execute(
+            "SELECT outcome, session_end IS NOT NULL FROM conversation_sessions WHERE id = ?", (session_id,)).fetchone()
+        assert tuple(row) == ('abandoned', 1)
+    finally:
+        close_connections(db_path)
+        os.remove(db_path)
+
+def test_journal_batches_messages_and_bounds_the_tail():
+    db_path = "test_session_journal.db"
+    if os.path.exists(db_path):
+        os.remove(db_path)
+
+    storage = get_storage(db_path)
+    manager = ConversationManager(db_path, storage=storage)
+    try:
+        session_id = manager.start_conversation(1, 'business')
+        for index in range(MESSAGE_TAIL + 5):
+            assert manager.add_messages(1, [('user', f"Message {index}", 'response'),
+                                            ('agent', f"Reply {index}", 'analysis')])
+        assert not manager.add_messages(2, [('user', 'No conversation', 'response')])
+
+        # Nothing written per message; the live conversation keeps only the latest ones
+        assert storage.conversations.messages(session_id) == []
+        context = manager.get_conversation_context(1)
+        assert len(context['messages']) == MESSAGE_TAIL
+        assert context['messages'][-1].message == f"Reply {MESSAGE_TAIL + 4}"
+        assert decode_state(encode_state(context))['messages'] == context['messages']
+
+        manager.end_conversation(1, 'committed')
+        messages = storage.conversations.messages(session_id)
+        assert len(messages) == 2 * (MESSAGE_TAIL + 5)
+        assert messages[0][:3] == ('user', 'Message 0', 'response')
+    finally:
+        manager.close()
+        close_connections(db_path)
+        os.remove(db_path)
+
+def test_failed_journal_flush_keeps_the_conversation_open():
+    """Messages that can't be written stay buffered and the session isn't ended without them"""
+    storage = MemoryStorage()
+    manager = ConversationManager(storage=storage)
+    add_messages = storage.conversations.add_messages
+
+    def unavailable(rows):
+        raise RuntimeError("storage unavailable")
+
+    try:
+        session_id = manager.start_conversation(1, 'work')
+        manager.add_message(1, 'user', 'Sending the proposal today', 'response')
+        storage.conversations.add_messages = unavailable
+        try:
+            manager.end_conversation(1, 'committed')
+            assert False, "end_conversation should raise when its messages can't be written"
+        except RuntimeError:
+            pass
+        assert manager.journal.pending() == 1
+        assert manager.get_conversation_context(1)
+        assert storage.conversations._sessions[session_id]['outcome'] is None
+
+        storage.conversations.add_messages = add_messages
+        manager.end_conversation(1, 'committed')
+        assert manager.journal.pending() == 0
+        assert [message[1] for message in storage.conversations.messages(session_id)] == ['Sending the proposal today']
+        assert storage.conversations._sessions[session_id]['outcome'] == 'committed'
+    finally:
+        storage.conversations.add_messages = add_messages
+        manager.close()
+
+def test_write_behind_buffer_requeues_failed_batches():
+    class FlakyBuffer(WriteBehindBuffer):
+        failures = 1
+
+        def _write(self, batch):
+            if self.failures:
+                self.failures -= 1
+                raise ValueError("not written")
+            self.written.extend(batch)
+
+    try:
+        WriteBehindBuffer(storage=MemoryStorage())
+        assert False, "WriteBehindBuffer is abstract"
+    except TypeError:
+        pass
+
+    buffer = FlakyBuffer(storage=MemoryStorage(), batch_size=10, flush_interval=60)
+    buffer.written = []
+    try:
+        buffer._append(('first',))
+        assert buffer.flush() == 0 and buffer.pending() == 1
+        buffer._append(('second',))
+        assert buffer.flush() == 2
+        assert buffer.written == [('first',), ('second',)]
+
+        buffer.failures = 1
+        buffer._append(('third',))
+        try:
+            buffer.flush(raise_errors=True)
+            assert False, "flush(raise_errors=True) should raise"
+        except ValueError:
+            pass
+        assert buffer.pending() == 1
+    finally:
+        buffer.close()
+    assert buffer.written[-1] == ('third',)
+
+def test_returned_context_is_a_copy():
+    """Changing a context a caller got back never reaches the session, before or after the lease lapses"""
+    db_path = "test_session_copy.db"
+    if os.path.exists(db_path):
+        os.remove(db_path)
+
+    now = [1000.0]
+    storage = get_storage(db_path)
+    sessions = SQLiteSessionStore(db_path, lease_seconds=5, clock=lambda: now[0])
+    manager = ConversationManager(db_path, storage=storage, sessions=sessions)
+    try:
+        manager.start_conversation(1, 'work')
+        context = manager.get_conversation_context(1)
+        context['conversation_stage'] = 'changed'
+        context['context']['note'] = 'changed'
+        assert manager.get_conversation_context(1)['conversation_stage'] == 'initial_prompt'
+
+        # Changes go through the store and are what the row holds once the lease lapses
+        sessions.update(1, lambda state: state.update(conversation_stage='follow_up'))
+        context = manager.get_conversation_context(1)
+        context['conversation_stage'] = 'changed again'
+        now[0] += 6
+        stored = manager.get_conversation_context(1)
+        assert stored['conversation_stage'] == 'follow_up' and stored['context'] == {}
+    finally:
+        manager.close()
+        close_connections(db_path)
+        os.remove(db_path)
+
+if __name__ == "__main__":
+    test_memory_store_versions()
+    test_sqlite_store_leases_and_versions()
+    test_conversation_survives_restart()
+    test_returned_context_is_a_copy()
+    test_expiry_queue()
+    test_idle_conversations_expire_as_abandoned()
+    test_orphaned_sessions_expire()
+    test_journal_batches_messages_and_bounds_the_tail()
+    test_failed_journal_flush_keeps_the_conversation_open()
+    test_write_behind_buffer_requeues_failed_batches()
+    print("✅ Session store tests passed!")
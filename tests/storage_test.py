@@ -0,0 +1,162 @@
+import sys
+import os
+import sqlite3
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from datetime import datetime, timedelta, timezone
+from database.connection_pool import close_connections, get_connection
+from database.memory_storage import MemoryStorage
+from database.sqlite_storage import INCIDENT_FIELDS, SQLiteStorage
+from bot.services import ServiceRegistry
+from work_automation.real_jira_organizer import RealJiraOrganizer
+
+def exercise(storage):
+    """Run the same calls against a backend and collect every answer"""
+    results = []
+    today = datetime.now(timezone.utc).date()
+    day = lambda n: (today - timedelta(days=n)).isoformat()
+
+    storage.users.add(1, 'first', 'First')
+    storage.users.add(1, 'ignored', 'Ignored')
+    storage.users.add(2, 'second', 'Second')
+    storage.users.set_timezone(1, 'Europe/London')
+    results.append(storage.users.timezones())
+    results.append([storage.users.timezone(user_id) for user_id in (1, 2, 3)])
+
+    ids = [
+        storage.checkins.add(1, day(0), 'health', 'Run', created_at='2024-01-01 08:00:00'),
+        storage.checkins.add(1, day(0), 'work', 'Ship', completed=True),
+        storage.checkins.add(1, day(3), 'health', 'Walk', notes='Rain'),
+        storage.checkins.add(1, day(20), 'health', 'Swim'),
+        storage.checkins.add(2, day(0), 'health', 'Other user'),
+    ]
+    storage.checkins.set_completed(ids[2])
+    results.append(storage.checkins.count(1))
+    results.append(storage.checkins.recent(1, 'health', day(14)))
+    results.append(storage.checkins.daily_totals(1, day(14)))
+    results.append(storage.checkins.open_on(1, day(0)))
+    results.append(storage.checkins.completion_history(1, day(14))[0])
+    results.append(sorted(storage.checkins.completion_history(1, day(30))))
+
+    storage.triggers.add_many([
+        (1, 'missed_deadline', 'health', '{}', 0.4, '2024-01-01 10:00:00'),
+        (1, 'pattern_decline', 'health', '{"a": 1}', 0.7, '2024-01-02 10:00:00'),
+        (1, 'cascade_failure', 'work', '{}', 0.9, '2024-01-03 10:00:00'),
+    ])
+    results.append(storage.triggers.recent(1, 'health', '2024-01-01 10:00:00'))
+    results.append(storage.triggers.recent(1, 'health', '2023-12-31 00:00:00'))
+    results.append(storage.triggers.count(1, '2024-01-01 10:00:00'))
+    results.append(storage.triggers.count(2, '2023-12-31 00:00:00'))
+
+    storage.interventions.add(1, 'health', 2, '{}')
+    results.append(storage.interventions.active_level(1, 'health'))
+    results.append(storage.interventions.active_level(1, 'work'))
+
+    session_id = storage.conversations.create_session(1, 'health')
+    storage.conversations.add_message(session_id, 'user', 'Hello', 'response')
+    storage.conversations.add_message(session_id, 'agent', 'Hi', 'question')
+    storage.conversations.add_messages([(session_id, 'user', 'Bye', 'response', '2024-01-04 09:00:00')])
+    storage.conversations.end_session(session_id, 'completed', '{}')
+    storage.conversations.end_sessions([(session_id, 'abandoned', '{}')])
+    results.append([message[:3] for message in storage.conversations.messages(session_id)])
+    results.append(storage.conversations.messages(session_id)[-1])
+
+    storage.dead_letters.add(1, 'Check in', 'Markdown', 5, 'TimedOut: timed out')
+    storage.dead_letters.add(2, 'Blocked', None, 1, 'Forbidden: bot was blocked by the user')
+    results.append([row[:5] for row in storage.dead_letters.recent()])
+    results.append([row[0] for row in storage.dead_letters.recent(limit=1)])
+    return results
+
+def test_backends_agree():
+    """MemoryStorage answers every repository call exactly like SQLiteStorage"""
+    db_path = "test_storage.db"
+    if os.path.exists(db_path):
+        os.remove(db_path)
+
+    sqlite_storage = SQLiteStorage(db_path)
+    ServiceRegistry(db_path, storage=sqlite_storage).init_schema()
+    try:
+        assert exercise(MemoryStorage()) == exercise(sqlite_storage)
+    finally:
+        close_connections(db_path)
+        os.remove(db_path)
+
+def test_failed_write_rolls_back():
+    """A write that fails leaves no transaction open on the thread's connection"""
+    db_path = "test_storage_rollback.db"
+    if os.path.exists(db_path):
+        os.remove(db_path)
+
+    storage = SQLiteStorage(db_path)
+    ServiceRegistry(db_path, storage=storage).init_schema()
+    try:
+        incident = dict.fromkeys(INCIDENT_FIELDS)
+        incident['ticket_number'] = 'OPS-1'
+        try:
+            storage.incidents.upsert(incident)
+        except sqlite3.IntegrityError:
+            pass
+        else:
+            raise AssertionError("upsert without a summary should fail")
+        assert not get_connection(db_path).in_transaction
+
+        storage.users.add(1, "alice", "Alice")
+        # The next write commits on its own rather than joining a dangling transaction
+        close_connections(db_path)
+        assert get_connection(db_path).execute("SELECT COUNT(*) FROM users").fetchone()[0] == 1
+    finally:
+        close_connections(db_path)
+        os.remove(db_path)
+
+def test_services_on_memory_storage():
+    """The bot's services run on MemoryStorage without creating a database file"""
+    db_path = "test_memory_only.db"
+    if os.path.exists(db_path):
+        os.remove(db_path)
+
+    storage = MemoryStorage()
+    services = ServiceRegistry(db_path, storage=storage)
+    services.init_schema()
+    today = datetime.now(timezone.utc).date().isoformat()
+
+    services.database.add_user(1, 'first', 'First')
+    for completed in (False, False, False, True):
+        storage.checkins.add(1, today, 'health', 'Run', completed=completed,
+                             created_at='2024-01-01 08:00:00')
+    assert services.database.count_checkins(1) == 4
+
+    manager = services.conversation_manager
+    manager.start_conversation(1, 'health')
+    manager.add_message(1, 'user', 'I will run tomorrow', 'commitment')
+    manager.end_conversation(1)
+    assert [message[0] for message in storage.conversations.messages(1)] == ['user']
+
+    patterns = services.pattern_analyzer.analyze_user_patterns(1, 14)
+    assert patterns['completion_patterns']['by_domain']['health']['total_commitments'] == 4
+    assert '**📊 Total Commitments:** 4' in services.dashboard_generator.generate_comprehensive_dashboard(1)
+
+    engine = services.intervention_engine
+    try:
+        needed = engine.run_intervention_sweep([1, 2])
+        assert list(needed) == [1]
+        assert needed[1]['health']['level'] >= 1
+        assert storage.interventions.active_level(1, 'health') == needed[1]['health']['level']
+    finally:
+        engine.close()
+
+    assert not os.path.exists(db_path)
+
+def test_work_automation_on_memory_storage():
+    """Incidents load and plan from MemoryStorage"""
+    organizer = RealJiraOrganizer(storage=MemoryStorage())
+    assert organizer.storage.incidents.count() > 0
+    plan = organizer.get_optimized_workday()
+    assert plan['planned_incidents']
+    assert plan['total_planned_hours'] <= 8
+
+if __name__ == "__main__":
+    test_backends_agree()
+    test_failed_write_rolls_back()
+    test_services_on_memory_storage()
+    test_work_automation_on_memory_storage()
+    print("✅ Storage tests passed!")
@@ -0,0 +1,131 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import asyncio
+import threading
+import time
+from datetime import datetime, timezone
+from database.connection_pool import close_connections
+from bot.timer_scheduler import TimerScheduler, DailyAt, Every
+from bot.intervention_scheduler import InterventionScheduler
+from bot.delivery_queue import DeliveryQueue
+
+def utc(*args):
+    return datetime(*args, tzinfo=timezone.utc)
+
+def test_schedules_follow_local_time():
+    """Daily jobs fire at local wall-clock time, across DST changes"""
+    new_york = DailyAt(9, 0, 'America/New_York')
+    assert new_york.next_after(utc(2026, 1, 15, 12, 0)) == utc(2026, 1, 15, 14, 0)   # EST
+    assert new_york.next_after(utc(2026, 1, 15, 14, 0)) == utc(2026, 1, 16, 14, 0)
+    assert new_york.next_after(utc(2026, 7, 15, 12, 0)) == utc(2026, 7, 15, 13, 0)   # EDT
+    assert DailyAt(9, 0, 'Asia/Tokyo').next_after(utc(2026, 1, 15, 12, 0)) == utc(2026, 1, 16, 0, 0)
+
+    half_hourly = Every(30 * 60)
+    assert half_hourly.next_after(utc(2026, 1, 15, 12, 7)) == utc(2026, 1, 15, 12, 30)
+    assert half_hourly.next_after(utc(2026, 1, 15, 12, 30)) == utc(2026, 1, 15, 13, 0)
+
+    try:
+        DailyAt(9, 0, 'Mars/Olympus_Mons')
+        assert False, "Unknown timezones are rejected"
+    except ValueError:
+        pass
+
+def test_jobs_fire_without_blocking_the_loop():
+    """Jobs fire on time, within the concurrency limit, with blocking work off the loop"""
+    async def scenario():
+        scheduler = TimerScheduler(max_concurrency=2)
+        in_flight, peak, fired = [0], [0], []
+        threads = set()
+
+        async def slow_job(name):
+            in_flight[0] += 1
+            peak[0] = max(peak[0], in_flight[0])
+            fired.append(name)
+            await asyncio.sleep(0.15)
+            in_flight[0] -= 1
+
+        def blocking_job():
+            threads.add(threading.current_thread().name)
+            time.sleep(0.05)
+
+        for name in ('a', 'b', 'c'):
+            scheduler.add_job(name, Every(0.1), slow_job, name, jitter=0.02)
+        scheduler.add_job('blocking', Every(0.1), blocking_job)
+        scheduler.start()
+
+        # The loop keeps ticking while jobs run
+        start = time.perf_counter()
+        longest_gap = 0.0
+        last = start
+        while time.perf_counter() - start < 0.6:
+            await asyncio.sleep(0.01)
+            now = time.perf_counter()
+            longest_gap = max(longest_gap, now - last)
+            last = now
+
+        scheduler.remove_job('c')
+        fired_before_removal = fired.count('c')
+        await asyncio.sleep(0.25)
+        await scheduler.stop()
+
+        assert fired.count('c') == fired_before_removal, "Removed jobs stop firing"
+        assert {'a', 'b', 'c'} <= set(fired)
+        assert peak[0] <= 2, "Never more than max_concurrency jobs at once"
+        assert in_flight[0] == 0, "stop() waits for running jobs"
+        assert threading.main_thread().name not in threads
+        assert longest_gap < 0.05, f"Event loop stalled for {longest_gap:.3f}s"
+
+    asyncio.run(scenario())
+
+class FakeBot:
+    def __init__(self):
+        self.sent = []
+        self.in_flight = 0
+        self.peak = 0
+
+    async def send_message(self, chat_id, text, parse_mode=None):
+        self.in_flight += 1
+        self.peak = max(self.peak, self.in_flight)
+        await asyncio.sleep(0.01)
+        self.in_flight -= 1
+        self.sent.append(chat_id)
+
+def test_checks_grouped_by_timezone():
+    """Each timezone gets its own daily checks, sent through the delivery workers"""
+    db_path = "test_timer_scheduler.db"
+    if os.path.exists(db_path):
+        os.remove(db_path)
+
+    async def scenario():
+        bot = FakeBot()
+        scheduler = InterventionScheduler(bot, db_path)
+        scheduler.delivery = DeliveryQueue(bot, db_path, workers=3, executor=scheduler.executor)
+        scheduler.delivery.start()
+        for user_id in range(1, 21):
+            scheduler.add_monitored_user(user_id, 'Europe/London' if user_id % 2 else 'America/Chicago')
+        scheduler.add_monitored_user(99, 'Not/A_Zone')
+
+        assert scheduler.active_users[99] == 'UTC'
+        assert {'morning:Europe/London', 'evening:America/Chicago', 'midday:UTC',
+                'dashboards:Europe/London'} <= set(scheduler.scheduler.jobs)
+        assert scheduler.scheduler.jobs['morning:Europe/London'].schedule.next_after(utc(2026, 7, 1, 0, 0)) == \
+            utc(2026, 7, 1, 8, 0)
+
+        await scheduler.evening_review_reminder('Europe/London')
+        assert sorted(bot.sent) == list(range(1, 21, 2))
+        assert bot.peak <= 3
+        await scheduler.stop()
+
+    try:
+        asyncio.run(scenario())
+    finally:
+        close_connections(db_path)
+        os.remove(db_path)
+
+if __name__ == "__main__":
+    test_schedules_follow_local_time()
+    test_jobs_fire_without_blocking_the_loop()
+    test_checks_grouped_by_timezone()
+    print("✅ Timer scheduler tests passed!")
@@ -0,0 +1,94 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import gc
+import time
+import weakref
+from database.connection_pool import get_connection, close_connections
+from bot.intervention_engine import InterventionEngine
+from bot.trigger_sink import TriggerSink
+from bot.write_behind import _open_buffers
+
+def stored_triggers(db_path):
+    return get_connection(db_path).execute("SELECT COUNT(*) FROM intervention_triggers").fetchone()[0]
+
+def test_trigger_sink_flushes():
+    """Triggers are buffered and written on size, time, read, close and pool shutdown"""
+    db_path = "test_trigger_sink.db"
+    if os.path.exists(db_path):
+        os.remove(db_path)
+
+    engine = InterventionEngine(db_path)
+    sink = TriggerSink(db_path, batch_size=5, flush_interval=0.2)
+
+    try:
+        # Size threshold
+        for i in range(4):
+            sink.add(1, 'avoidance_language', 'health', {'n': i}, 0.5)
+        assert stored_triggers(db_path) == 0 and sink.pending() == 4
+        sink.add(1, 'avoidance_language', 'health', {'n': 4}, 0.5)
+        assert stored_triggers(db_path) == 5
+
+        # Time threshold
+        sink.add(1, 'avoidance_language', 'health', {}, 0.5)
+        deadline = time.time() + 5
+        while stored_triggers(db_path) < 6 and time.time() < deadline:
+            time.sleep(0.05)
+        assert stored_triggers(db_path) == 6
+
+        # Readers see buffered triggers
+        engine.analyze_avoidance_language(2, "I can't, no time")
+        assert engine.trigger_sink.pending() == 1
+        assert engine.get_intervention_level(2, 'general') == 3
+        assert engine.trigger_sink.pending() == 0
+
+        # Synchronous flush and close
+        sink.add(3, 'missed_deadline', 'work', {}, 0.2)
+        assert sink.flush() == 1
+        sink.add(3, 'missed_deadline', 'work', {}, 0.2)
+        sink.close()
+        assert stored_triggers(db_path) == 9
+
+        # Closing the database's connections writes anything still buffered
+        engine.log_trigger(4, 'pattern_decline', 'finance', {}, 0.7)
+        close_connections(db_path)
+        assert stored_triggers(db_path) == 10
+    finally:
+        engine.close()
+        close_connections(db_path)
+        os.remove(db_path)
+
+def test_unclosed_sinks_are_not_kept_alive():
+    """Exit handling, pool hooks and the idle background thread don't hold on to a sink"""
+    db_path = "test_trigger_sink_release.db"
+    if os.path.exists(db_path):
+        os.remove(db_path)
+
+    InterventionEngine(db_path).close()
+    try:
+        closed = TriggerSink(db_path)
+        closed.close()
+        assert closed not in _open_buffers
+
+        sink = TriggerSink(db_path, flush_interval=0.05)
+        sink.add(1, 'avoidance_language', 'health', {}, 0.5)
+        thread, ref = sink._thread, weakref.ref(sink)
+        assert sink in _open_buffers
+        del sink
+        deadline = time.time() + 5
+        while ref() is not None and time.time() < deadline:
+            time.sleep(0.05)
+            gc.collect()
+        assert ref() is None
+        thread.join(5)
+        assert not thread.is_alive()
+        assert stored_triggers(db_path) == 1
+    finally:
+        close_connections(db_path)
+        os.remove(db_path)
+
+if __name__ == "__main__":
+    test_trigger_sink_flushes()
+    test_unclosed_sinks_are_not_kept_alive()
+    print("✅ Trigger sink tests passed!")
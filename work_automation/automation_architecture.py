@@ -1,7 +1,9 @@
+from config import DB_PATH
+
 class WorkAutomationManager:
     """Basic work automation manager for testing"""
     
-    def __init__(self, db_path="life_agent.db"):
+    def __init__(self, db_path=DB_PATH):
         self.db_path = db_path
     
     def get_automation_impact(self, user_id):
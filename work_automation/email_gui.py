@@ -1,41 +1,26 @@
 import tkinter as tk
 from tkinter import ttk, scrolledtext, messagebox
-import sqlite3
 from datetime import datetime
 import json
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import DB_PATH
+from database.migrations import migrate
+from database.storage import get_storage
 
 class EmailAutomationGUI:
     """Professional email template automation with GUI interface"""
     
-    def __init__(self):
-        self.db_path = "life_agent.db"
-        self.init_email_tables()
+    def __init__(self, storage=None):
+        self.db_path = DB_PATH
+        self.storage = storage or get_storage(self.db_path)
+        if self.storage.uses_sql:
+            migrate(self.db_path)
         self.create_gui()
         self.load_template_data()
     
-    def init_email_tables(self):
-        """Initialize email automation tables"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-        CREATE TABLE IF NOT EXISTS email_templates (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            template_name TEXT UNIQUE NOT NULL,
-            category TEXT NOT NULL,
-            subject_line TEXT NOT NULL,
-            template_body TEXT NOT NULL,
-            variables_used TEXT,
-            usage_count INTEGER DEFAULT 0,
-            effectiveness_score REAL DEFAULT 5.0,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            last_used TIMESTAMP
-        )
-        ''')
-        
-        conn.commit()
-        conn.close()
-    
     def load_template_data(self):
         """Load sample email templates"""
         sample_templates = [
@@ -128,25 +113,12 @@ Best regards,
             }
         ]
         
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
         for template in sample_templates:
-            cursor.execute('SELECT COUNT(*) FROM email_templates WHERE template_name = ?', 
-                         (template['template_name'],))
-            if cursor.fetchone()[0] == 0:
-                cursor.execute('''
-                INSERT INTO email_templates 
-                (template_name, category, subject_line, template_body, variables_used)
-                VALUES (?, ?, ?, ?, ?)
-                ''', (
-                    template['template_name'], template['category'], 
-                    template['subject_line'], template['template_body'],
-                    template['variables_used']
-                ))
-        
-        conn.commit()
-        conn.close()
+            self.storage.templates.add(
+                template['template_name'], template['category'],
+                template['subject_line'], template['template_body'],
+                template['variables_used']
+            )
     
     def create_gui(self):
         """Create the main GUI interface"""
@@ -223,12 +195,7 @@ Best regards,
     
     def load_template_list(self):
         """Load template names into combobox"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute('SELECT template_name, category FROM email_templates ORDER BY category, template_name')
-        templates = cursor.fetchall()
-        conn.close()
+        templates = self.storage.templates.summaries()
         
         template_list = [f"{template[1]} - {template[0]}" for template in templates]
         self.template_combo['values'] = template_list
@@ -246,17 +213,7 @@ Best regards,
         # Extract template name from "Category - Template Name" format
         template_name = selected.split(' - ', 1)[1]
         
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-        SELECT subject_line, template_body, variables_used 
-        FROM email_templates 
-        WHERE template_name = ?
-        ''', (template_name,))
-        
-        result = cursor.fetchone()
-        conn.close()
+        result = self.storage.templates.get(template_name)
         
         if result:
             subject, body, variables = result
@@ -289,27 +246,19 @@ Best regards,
     
     def show_statistics(self):
         """Show email automation statistics"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-        SELECT 
-            COUNT(*) as total_templates,
-            AVG(effectiveness_score) as avg_effectiveness,
-            SUM(usage_count) as total_usage
-        FROM email_templates
-        ''')
+        templates = self.storage.templates.summaries()
         
-        stats = cursor.fetchone()
-        
-        cursor.execute('''
-        SELECT category, COUNT(*) 
-        FROM email_templates 
-        GROUP BY category
-        ''')
+        # (total_templates, avg_effectiveness, total_usage)
+        stats = (
+            len(templates),
+            sum(t[4] for t in templates) / len(templates) if templates else 0.0,
+            sum(t[3] for t in templates)
+        )
         
-        categories = cursor.fetchall()
-        conn.close()
+        categories = {}
+        for template in templates:
+            categories[template[1]] = categories.get(template[1], 0) + 1
+        categories = categories.items()
         
         # Calculate time savings
         avg_email_time_before = 8  # minutes
@@ -345,17 +294,7 @@ Best regards,
     
     def export_templates(self):
         """Export templates summary"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-        SELECT template_name, category, subject_line, usage_count, effectiveness_score
-        FROM email_templates
-        ORDER BY category, template_name
-        ''')
-        
-        templates = cursor.fetchall()
-        conn.close()
+        templates = self.storage.templates.summaries()
         
         export_text = "EMAIL TEMPLATE PORTFOLIO EXPORT\n"
         export_text += "=" * 50 + "\n\n"
@@ -1,48 +1,25 @@
-import sqlite3
 import json
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import DB_PATH
+from database.connection_pool import get_connection
+from database.migrations import migrate
 
 class AutomationPortfolioDashboard:
     """Professional portfolio dashboard for client presentations"""
     
     def __init__(self):
-        self.db_path = "life_agent.db"
-        self.init_portfolio_tables()
+        self.db_path = DB_PATH
+        migrate(self.db_path)
         self.ensure_portfolio_data()
     
-    def init_portfolio_tables(self):
-        """Initialize portfolio tracking tables"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-        CREATE TABLE IF NOT EXISTS automation_portfolio (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            system_name TEXT UNIQUE NOT NULL,
-            category TEXT NOT NULL,
-            description TEXT NOT NULL,
-            time_before_hours REAL NOT NULL,
-            time_after_hours REAL NOT NULL,
-            weekly_usage INTEGER NOT NULL,
-            annual_savings_hours REAL NOT NULL,
-            annual_value_dollars REAL NOT NULL,
-            implementation_date TEXT NOT NULL,
-            complexity_level TEXT NOT NULL,
-            client_applicable BOOLEAN DEFAULT TRUE,
-            demo_available BOOLEAN DEFAULT TRUE,
-            roi_percentage REAL NOT NULL,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        )
-        ''')
-        
-        conn.commit()
-        conn.close()
-        print("✅ Portfolio database initialized")
-    
     def ensure_portfolio_data(self):
         """Ensure portfolio data exists"""
-        conn = sqlite3.connect(self.db_path)
+        conn = get_connection(self.db_path)
         cursor = conn.cursor()
         
         cursor.execute('SELECT COUNT(*) FROM automation_portfolio')
@@ -53,8 +30,6 @@ class AutomationPortfolioDashboard:
             self.load_portfolio_systems()
         else:
             print(f"✅ Found {count} automation systems in portfolio")
-        
-        conn.close()
     
     def load_portfolio_systems(self):
         """Load real automation systems from your work"""
@@ -109,7 +84,7 @@ class AutomationPortfolioDashboard:
             }
         ]
         
-        conn = sqlite3.connect(self.db_path)
+        conn = get_connection(self.db_path)
         cursor = conn.cursor()
         
         for system in portfolio_systems:
@@ -135,12 +110,11 @@ class AutomationPortfolioDashboard:
             ))
         
         conn.commit()
-        conn.close()
         print(f"✅ Loaded {len(portfolio_systems)} automation systems")
     
     def generate_portfolio_summary(self):
         """Generate comprehensive portfolio summary"""
-        conn = sqlite3.connect(self.db_path)
+        conn = get_connection(self.db_path)
         cursor = conn.cursor()
         
         # Get all portfolio systems
@@ -154,7 +128,6 @@ class AutomationPortfolioDashboard:
         ''')
         
         systems = cursor.fetchall()
-        conn.close()
         
         # Calculate totals
         total_annual_hours = sum(system[6] for system in systems)
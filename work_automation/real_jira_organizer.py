@@ -1,64 +1,35 @@
-import sqlite3
 import json
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import DB_PATH
+from database.metrics import timed
+from database.migrations import migrate
+from database.storage import get_storage
 
 class RealJiraOrganizer:
     """Real Jira integration system for Continuum incidents"""
     
-    def __init__(self):
-        self.db_path = "life_agent.db"
-        self.init_database()
+    def __init__(self, db_path=DB_PATH, storage=None):
+        self.db_path = db_path
+        self.storage = storage or get_storage(self.db_path)
+        if self.storage.uses_sql:
+            migrate(self.db_path)
         self.ensure_sample_data()
     
-    def init_database(self):
-        """Initialize database tables for real incidents"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        # Drop and recreate table to ensure correct schema
-        cursor.execute('DROP TABLE IF EXISTS real_jira_incidents')
-        
-        cursor.execute('''
-        CREATE TABLE real_jira_incidents (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            ticket_number TEXT UNIQUE NOT NULL,
-            summary TEXT NOT NULL,
-            priority TEXT NOT NULL,
-            status TEXT NOT NULL,
-            assignee TEXT NOT NULL,
-            customer TEXT NOT NULL,
-            created_date TEXT NOT NULL,
-            due_date TEXT,
-            estimated_hours REAL DEFAULT 1.0,
-            complexity_score REAL DEFAULT 0.5,
-            customer_impact INTEGER DEFAULT 5,
-            urgency_score REAL DEFAULT 0.5,
-            tags TEXT DEFAULT '',
-            last_updated TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        )
-        ''')
-        
-        conn.commit()
-        conn.close()
-        print("✅ Database schema created/updated")
-    
     def ensure_sample_data(self):
         """Ensure we have sample incidents for testing"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
         # Check if we already have data
-        cursor.execute('SELECT COUNT(*) FROM real_jira_incidents')
-        count = cursor.fetchone()[0]
+        count = self.storage.incidents.count()
         
         if count == 0:
             print("📝 Loading sample Continuum incidents...")
             self.load_continuum_sample_data()
         else:
             print(f"✅ Found {count} incidents in database")
-        
-        conn.close()
     
     def load_continuum_sample_data(self):
         """Load realistic Continuum-style incidents"""
@@ -174,29 +145,12 @@ class RealJiraOrganizer:
                 'tags': template[3] + ',continuum'
             })
         
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
         for incident in continuum_incidents:
             try:
-                cursor.execute('''
-                INSERT OR REPLACE INTO real_jira_incidents 
-                (ticket_number, summary, priority, status, assignee, customer, 
-                 created_date, due_date, estimated_hours, complexity_score, 
-                 customer_impact, urgency_score, tags)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                ''', (
-                    incident['ticket_number'], incident['summary'], incident['priority'],
-                    incident['status'], incident['assignee'], incident['customer'],
-                    incident['created_date'], incident['due_date'], incident['estimated_hours'],
-                    incident['complexity_score'], incident['customer_impact'], 
-                    incident['urgency_score'], incident['tags']
-                ))
+                self.storage.incidents.upsert(incident)
             except Exception as e:
                 print(f"Error inserting incident {incident['ticket_number']}: {e}")
         
-        conn.commit()
-        conn.close()
         print(f"✅ Loaded {len(continuum_incidents)} Continuum-style incidents")
     
     def calculate_priority_score(self, incident):
@@ -222,44 +176,18 @@ class RealJiraOrganizer:
         
         return round(priority_score, 3)
     
+    @timed('work', 'get_optimized_workday')
     def get_optimized_workday(self, target_hours=8):
         """Get optimized 8-hour workday based on Continuum priorities"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
         try:
-            cursor.execute('''
-            SELECT ticket_number, summary, priority, status, customer, 
-                   estimated_hours, complexity_score, customer_impact, urgency_score, tags,
-                   due_date
-            FROM real_jira_incidents 
-            WHERE assignee = 'You' AND status IN ('Open', 'In Progress', 'Scheduled')
-            ORDER BY priority DESC, urgency_score DESC, customer_impact DESC
-            ''')
-            
-            incidents = cursor.fetchall()
+            incidents = self.storage.incidents.open_for('You')
         except Exception as e:
             print(f"Database query error: {e}")
             return {'error': str(e)}
-        finally:
-            conn.close()
         
         # Process incidents with priority scoring
         scored_incidents = []
-        for incident in incidents:
-            incident_dict = {
-                'ticket_number': incident[0],
-                'summary': incident[1],
-                'priority': incident[2],
-                'status': incident[3],
-                'customer': incident[4],
-                'estimated_hours': incident[5],
-                'complexity_score': incident[6],
-                'customer_impact': incident[7],
-                'urgency_score': incident[8],
-                'tags': incident[9],
-                'due_date': incident[10]
-            }
+        for incident_dict in incidents:
             incident_dict['priority_score'] = self.calculate_priority_score(incident_dict)
             scored_incidents.append(incident_dict)
         
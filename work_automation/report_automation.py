@@ -1,7 +1,9 @@
+from config import DB_PATH
+
 class ReportAutomationSystem:
     """Basic report automation for testing"""
     
-    def __init__(self, db_path="life_agent.db"):
+    def __init__(self, db_path=DB_PATH):
         self.db_path = db_path
     
     def generate_daily_report(self, date=None):